@@ -46,15 +46,30 @@ C_STR_SAMPLE_FILE_DEST = "str_sample_file"
 # Make sure to include all flags and move argparse to the correct group.
 C_LSTR_LOCKED_ARGS = ["--out_dir",
                       C_STR_SAMPLE_FILE_ARG,
-                      "--concurrent_jobs"]
+                      "--concurrent_jobs",
+                      "--merge_samples",
+                      "--job_oversubscription",
+                      "--stream_samples",
+                      "--sample_start_row",
+                      "--resume"]
+
+# Arguments used only when running the samples of a sample file,
+# these are not passed on to the script ran for each sample.
+C_LSTR_SAMPLE_RUNNER_ARGS = ["--stream_samples",
+                             "--sample_start_row",
+                             "--resume"]
 
 # These arguments do not show up in the help due to being
 # sciedpiper specific
-HIDDEN_ARGS = ["--clean", "--copy", "--dot_file",
-               "--log", "--json_out", "--max_bsub_memory", "--move",
+HIDDEN_ARGS = ["--clean", "--command_priority", "--copy", "--dot_file",
+               "--log", "--json_out", "--local_cores", "--local_memory",
+               "--max_bsub_memory", "--max_parallel_commands", "--move",
+               "--product_detection", "--run_manifest", "--fingerprint", "--output_cache", "--output_cache_size",
+               "--resource_history", "--trace_out", "--metrics_out",
                "--test", "--graph_ordered_commands", "--timestamp",
                "--update_command", "--compress", "--wait",
-               C_STR_SAMPLE_FILE_ARG, "--concurrent_jobs",
+               C_STR_SAMPLE_FILE_ARG, "--concurrent_jobs", "--merge_samples", "--job_oversubscription",
+               "--stream_samples", "--sample_start_row", "--resume",
                "--job_system", "--job_memory", "--job_queue",
                "--job_misc", C_STR_NO_PIPELINE_CONFIG_ARG,
                C_STR_PIPELINE_CONFIG_FILE_ARG, "--resources"]
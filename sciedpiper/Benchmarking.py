@@ -5,6 +5,7 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 import os
+import time
 
 """
 Utility functions used for benchmarking resources.
@@ -124,3 +125,391 @@ def func_parse_measure(str_key, str_mem_info):
 
     i_location = str_mem_info.find(str_key)
     return(float(str_mem_info[i_location:].split(None,3)[1]))
+
+
+# Measures of a process tree
+c_STR_PROC = b'/proc'
+c_STR_SAMPLE_TIME = "time"
+c_STR_SAMPLE_PROCESSES = "processes"
+c_STR_SAMPLE_VSIZE = "vsize"
+c_STR_SAMPLE_RSS = "rss"
+c_STR_SAMPLE_CPU = "cpu_seconds"
+c_STR_SAMPLE_READ = "read_bytes"
+c_STR_SAMPLE_WRITE = "write_bytes"
+c_LSTR_SAMPLE_MEASURES = [c_STR_SAMPLE_TIME, c_STR_SAMPLE_PROCESSES,
+                          c_STR_SAMPLE_VSIZE, c_STR_SAMPLE_RSS,
+                          c_STR_SAMPLE_CPU, c_STR_SAMPLE_READ,
+                          c_STR_SAMPLE_WRITE]
+
+# Keys of the stats of one process
+c_STR_STAT_PPID = "ppid"
+
+# Positions in /proc/<pid>/stat after the command name (field 3 is at 0)
+c_I_STAT_PPID = 1
+c_I_STAT_UTIME = 11
+c_I_STAT_STIME = 12
+c_I_STAT_CUTIME = 13
+c_I_STAT_CSTIME = 14
+c_I_STAT_VSIZE = 20
+c_I_STAT_RSS = 21
+
+try:
+    c_I_CLOCK_TICKS = os.sysconf(b'SC_CLK_TCK')
+    c_I_PAGE_BYTES = os.sysconf(b'SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    c_I_CLOCK_TICKS = 100
+    c_I_PAGE_BYTES = 4096
+
+
+# Tested
+def func_parse_process_stat(str_stat):
+    """
+    Parse the contents of /proc/<pid>/stat.
+    * str_stat: Contents of the process stat file
+              : String
+    * return: { ppid, vsize (bytes), rss (bytes), cpu_seconds } or None if not parsed.
+              CPU includes the ended children the process waited on.
+            : Dict or None
+    """
+
+    # The command name is in parentheses and may have spaces
+    lstr_fields = str_stat[str_stat.rfind(b')') + 1:].split()
+    try:
+        i_ticks = sum([int(lstr_fields[i_field]) for i_field in [c_I_STAT_UTIME, c_I_STAT_STIME,
+                                                                 c_I_STAT_CUTIME, c_I_STAT_CSTIME]])
+        return({c_STR_STAT_PPID: int(lstr_fields[c_I_STAT_PPID]),
+                c_STR_SAMPLE_VSIZE: int(lstr_fields[c_I_STAT_VSIZE]),
+                c_STR_SAMPLE_RSS: int(lstr_fields[c_I_STAT_RSS]) * c_I_PAGE_BYTES,
+                c_STR_SAMPLE_CPU: i_ticks / c_I_CLOCK_TICKS})
+    except (IndexError, ValueError):
+        return(None)
+
+
+# Tested
+def func_read_process_stats():
+    """
+    Read the stats of every process.
+    ** Only linux compatible. **
+
+    * return: { pid: stats from func_parse_process_stat }, empty if /proc can not be read.
+            : Dict
+    """
+
+    dict_stats = {}
+    for i_pid in func_list_processes():
+        dict_stat = func_read_process_stat(i_pid)
+        if dict_stat:
+            dict_stats[i_pid] = dict_stat
+    return(dict_stats)
+
+
+def func_list_processes():
+    """
+    Ids of the running processes.
+    ** Only linux compatible. **
+
+    * return: Process ids, empty if /proc can not be read.
+            : List of ints
+    """
+
+    try:
+        return([int(str_name) for str_name in os.listdir(c_STR_PROC) if str_name.isdigit()])
+    except OSError:
+        return([])
+
+
+def func_read_process_stat(i_pid):
+    """
+    Read the stats of one process from /proc/<pid>/stat.
+    ** Only linux compatible. **
+
+    * return: Stats from func_parse_process_stat, None if the process ended.
+            : Dict or None
+    """
+
+    try:
+        with open(os.path.join(c_STR_PROC, str(i_pid), b'stat'), 'r') as hndl_stat:
+            return(func_parse_process_stat(hndl_stat.read()))
+    except (IOError, OSError):
+        return(None)
+
+
+# Tested
+def func_read_process_io(i_pid):
+    """
+    Bytes read and written by a process (and the ended children it waited on)
+    from /proc/<pid>/io, including reads served from the page cache.
+    ** Only linux compatible. **
+
+    * return: ( bytes read, bytes written ), 0s if not readable.
+            : Tuple of ints
+    """
+
+    dict_io = {}
+    try:
+        with open(os.path.join(c_STR_PROC, str(i_pid), b'io'), 'r') as hndl_io:
+            for str_line in hndl_io:
+                lstr_line = str_line.split(b':')
+                if len(lstr_line) == 2:
+                    dict_io[lstr_line[0].strip()] = lstr_line[1].strip()
+        return((int(dict_io.get(b'rchar', 0)), int(dict_io.get(b'wchar', 0))))
+    except (IOError, OSError, ValueError):
+        return((0, 0))
+
+
+# Tested
+def func_get_process_tree(i_pid, dict_stats):
+    """
+    The process and all of its descendants.
+
+    * i_pid: Process at the root of the tree.
+           : Int
+    * dict_stats: Stats of every process from func_read_process_stats.
+                : Dict
+    * return: Process ids in the tree, the root first. Empty if the root is not running.
+            : List of ints
+    """
+
+    if i_pid not in dict_stats:
+        return([])
+    dict_children = {}
+    for i_child, dict_stat in dict_stats.items():
+        dict_children.setdefault(dict_stat[c_STR_STAT_PPID], []).append(i_child)
+    li_tree = [i_pid]
+    i_next = 0
+    while i_next < len(li_tree):
+        li_tree.extend(dict_children.get(li_tree[i_next], []))
+        i_next += 1
+    return(li_tree)
+
+
+# Tested
+def func_sample_process_tree(i_pid, dict_stats=None):
+    """
+    Total use of the process and all of its descendants at this time.
+    Commands ran with a shell are measured with the tools the shell started.
+    ** Only linux compatible. **
+
+    * i_pid: Process at the root of the tree.
+           : Int
+    * dict_stats: Stats of every process, if None read now.
+                  Give when sampling many trees at once to read /proc once.
+                : Dict or None
+    * return: { measure in c_LSTR_SAMPLE_MEASURES: value } or None if the process is not running.
+            : Dict or None
+    """
+
+    dict_stats = func_read_process_stats() if dict_stats is None else dict_stats
+    return(func_sum_process_tree(func_get_process_tree(i_pid, dict_stats), dict_stats))
+
+
+def func_sum_process_tree(li_tree, dict_stats):
+    """
+    Total use of the processes of a tree.
+
+    * li_tree: Process ids in the tree.
+             : List of ints
+    * dict_stats: Stats of at least the processes in the tree.
+                : Dict
+    * return: { measure in c_LSTR_SAMPLE_MEASURES: value } or None if the tree is empty.
+            : Dict or None
+    """
+
+    if not li_tree:
+        return(None)
+    dict_sample = dict([(str_measure, 0) for str_measure in c_LSTR_SAMPLE_MEASURES])
+    dict_sample[c_STR_SAMPLE_TIME] = time.time()
+    dict_sample[c_STR_SAMPLE_PROCESSES] = len(li_tree)
+    for i_tree_pid in li_tree:
+        dict_stat = dict_stats[i_tree_pid]
+        for str_measure in [c_STR_SAMPLE_VSIZE, c_STR_SAMPLE_RSS, c_STR_SAMPLE_CPU]:
+            dict_sample[str_measure] += dict_stat[str_measure]
+        i_read, i_write = func_read_process_io(i_tree_pid)
+        dict_sample[c_STR_SAMPLE_READ] += i_read
+        dict_sample[c_STR_SAMPLE_WRITE] += i_write
+    return(dict_sample)
+
+
+class ProcessTreeProfile:
+    """
+    Samples of the resources used by a command's process tree over time
+    and the peak of each measure.
+    """
+
+    # Tested
+    def __init__(self, i_max_samples=1000):
+        """
+        Initializer
+
+        * i_max_samples : Most samples kept in the time series, when reached
+                          every other sample is dropped and half as many kept from then on.
+                        : Int
+        """
+
+        self.i_pid = None
+        """ Process at the root of the tree. """
+
+        self.dict_peak = {}
+        """ Peak of each measure { measure: value } over all samples. """
+
+        self.ltpl_samples = []
+        """ Time series, a tuple of the measures in c_LSTR_SAMPLE_MEASURES per sample kept. """
+
+        self.i_samples = 0
+        """ Number of samples measured. """
+
+        self.i_max_samples = max(i_max_samples, 2)
+        self.__i_keep_every = 1
+
+    # Tested
+    def func_add_sample(self, dict_sample):
+        """
+        Add a sample, updating the peaks and time series.
+
+        * dict_sample: Sample from func_sample_process_tree, None is ignored.
+                     : Dict or None
+        """
+
+        if not dict_sample:
+            return
+        for str_measure in c_LSTR_SAMPLE_MEASURES:
+            self.dict_peak[str_measure] = max(self.dict_peak.get(str_measure, 0), dict_sample[str_measure])
+        if self.i_samples % self.__i_keep_every == 0:
+            self.ltpl_samples.append(tuple([dict_sample[str_measure] for str_measure in c_LSTR_SAMPLE_MEASURES]))
+            if len(self.ltpl_samples) >= self.i_max_samples:
+                self.ltpl_samples = self.ltpl_samples[::2]
+                self.__i_keep_every *= 2
+        self.i_samples += 1
+
+    # Tested
+    def func_sample(self, i_pid=None, dict_stats=None):
+        """
+        Sample the process tree now.
+
+        * i_pid: Process at the root of the tree, if None the last one sampled.
+               : Int or None
+        * dict_stats: Stats of every process, if None read now.
+                    : Dict or None
+        * return: The sample or None if the process is not running.
+                : Dict or None
+        """
+
+        self.i_pid = i_pid if i_pid is not None else self.i_pid
+        dict_sample = func_sample_process_tree(self.i_pid, dict_stats)
+        self.func_add_sample(dict_sample)
+        return(dict_sample)
+
+    # Tested
+    def func_get_peak(self, str_measure):
+        """
+        Peak of a measure, None if no samples.
+        """
+
+        return(self.dict_peak.get(str_measure))
+
+    # Tested
+    def __str__(self):
+        """
+        Human readable peaks.
+        """
+
+        if not self.i_samples:
+            return(b'Memory benchmarking is only compatible with Linux operating systems.')
+        return(b''.join([b'Memory: ', func_human_readable(self.dict_peak[c_STR_SAMPLE_VSIZE]),
+                         b' Resident Memory: ', func_human_readable(self.dict_peak[c_STR_SAMPLE_RSS]),
+                         b' CPU Time: ', str(round(self.dict_peak[c_STR_SAMPLE_CPU], 2)), b' s',
+                         b' Read: ', func_human_readable(self.dict_peak[c_STR_SAMPLE_READ]),
+                         b' Written: ', func_human_readable(self.dict_peak[c_STR_SAMPLE_WRITE]),
+                         b' Processes: ', str(self.dict_peak[c_STR_SAMPLE_PROCESSES])]))
+
+
+class ProcessSampler:
+    """
+    Samples the process trees of many commands at once.
+    The parent of each process is remembered, so after listing /proc only
+    processes which are new or in a tree are read: the stat and io of each
+    process in a tree, once per sample. The time spent sampling is kept
+    so the overhead of benchmarking can be reported.
+    """
+
+    # Tested
+    def __init__(self):
+        """
+        Initializer
+        """
+
+        self.dict_parents = {}
+        """ Parent of each process seen { pid: parent pid }. """
+
+        self.i_samples = 0
+        """ Number of times the trees were sampled. """
+
+        self.i_process_reads = 0
+        """ Number of process stat files read. """
+
+        self.d_seconds = 0.0
+        """ Seconds spent sampling. """
+
+    # Tested
+    def func_sample(self, dict_profiles):
+        """
+        Sample the process trees and add a sample to each profile.
+
+        * dict_profiles: { pid at the root of a tree: ProcessTreeProfile }
+                       : Dict
+        * return: { pid at the root of a tree: sample or None if the process is not running }
+                : Dict
+        """
+
+        d_start = time.time()
+        dict_stats = {}
+        li_running = func_list_processes()
+        # Forget processes which ended and learn the parent of new ones
+        dict_parents = {}
+        for i_pid in li_running:
+            if i_pid in self.dict_parents:
+                dict_parents[i_pid] = self.dict_parents[i_pid]
+                continue
+            dict_stat = func_read_process_stat(i_pid)
+            self.i_process_reads += 1
+            if dict_stat:
+                dict_parents[i_pid] = dict_stat[c_STR_STAT_PPID]
+                dict_stats[i_pid] = dict_stat
+        self.dict_parents = dict_parents
+
+        dict_children = {}
+        for i_pid, i_parent in self.dict_parents.items():
+            dict_children.setdefault(i_parent, []).append(i_pid)
+        dict_samples = {}
+        for i_root, prof_tree in dict_profiles.items():
+            li_tree = []
+            if i_root in self.dict_parents:
+                li_tree = [i_root]
+                i_next = 0
+                while i_next < len(li_tree):
+                    li_tree.extend(dict_children.get(li_tree[i_next], []))
+                    i_next += 1
+            for i_pid in li_tree:
+                if i_pid not in dict_stats:
+                    dict_stats[i_pid] = func_read_process_stat(i_pid)
+                    self.i_process_reads += 1
+            # Processes which ended since the listing are not counted
+            li_tree = [i_pid for i_pid in li_tree if dict_stats.get(i_pid)]
+            dict_samples[i_root] = func_sum_process_tree(li_tree, dict_stats)
+            prof_tree.i_pid = i_root
+            prof_tree.func_add_sample(dict_samples[i_root])
+        self.i_samples += 1
+        self.d_seconds += time.time() - d_start
+        return(dict_samples)
+
+    # Tested
+    def __str__(self):
+        """
+        Overhead of sampling.
+        """
+
+        return(" ".join(["ProcessSampler{ Samples:", str(self.i_samples),
+                         "Process reads:", str(self.i_process_reads),
+                         "Seconds:", str(round(self.d_seconds, 3)),
+                         "Milliseconds per sample:",
+                         str(round(1000 * self.d_seconds / max(self.i_samples, 1), 3)), "}"]))
@@ -6,6 +6,8 @@ from __future__ import unicode_literals
 import Benchmarking
 import os
 import ParentPipelineTester
+import subprocess
+import time
 import unittest
 
 
@@ -179,6 +181,102 @@ class BenchmarkingTester(ParentPipelineTester.ParentPipelineTester):
         str_result = Benchmarking.func_parse_measure(str_key, str_mem_info)
         self.func_test_equals(str_answer,str_result)
 
+    ########################
+    # func_parse_process_stat
+    ########################
+    def test_func_parse_process_stat(self):
+        """ The parent, memory and cpu time of a process ( with spaces in its name ) are read. """
+        str_stat = b' '.join([b'1111 (my tool) S 1000 1111 1000 0 -1 4194304 78 0 0 0',
+                              b'150 50 100 100 20 0 1 0 523644 2703360 272 18446744073709551615'])
+        dict_stat = Benchmarking.func_parse_process_stat(str_stat)
+        self.func_test_equals([1000, 2703360, 272 * Benchmarking.c_I_PAGE_BYTES, 400 / Benchmarking.c_I_CLOCK_TICKS],
+                              [dict_stat[Benchmarking.c_STR_STAT_PPID], dict_stat[Benchmarking.c_STR_SAMPLE_VSIZE],
+                               dict_stat[Benchmarking.c_STR_SAMPLE_RSS], dict_stat[Benchmarking.c_STR_SAMPLE_CPU]])
+
+    def test_func_parse_process_stat_for_partial(self):
+        """ A stat which can not be parsed gives None. """
+        self.func_test_equals(None, Benchmarking.func_parse_process_stat(b'1111 (tool) S 1000'))
+
+    ########################
+    # func_get_process_tree
+    ########################
+    def test_func_get_process_tree(self):
+        """ The process and all its descendants are in the tree, other processes are not. """
+        dict_stats = dict([(i_pid, {Benchmarking.c_STR_STAT_PPID: i_parent})
+                           for i_pid, i_parent in [(1, 0), (10, 1), (11, 10), (12, 10), (13, 11), (20, 1), (21, 20)]])
+        self.func_test_equals([[10, 11, 12, 13], []],
+                              [sorted(Benchmarking.func_get_process_tree(10, dict_stats)),
+                               Benchmarking.func_get_process_tree(99, dict_stats)])
+
+    ########################
+    # func_sample_process_tree
+    ########################
+    def test_func_sample_process_tree(self):
+        """ The children of a shell are measured with the shell. """
+        subp_shell = subprocess.Popen("sleep 1; true", shell=True)
+        time.sleep(0.3)
+        dict_sample = Benchmarking.func_sample_process_tree(subp_shell.pid)
+        subp_shell.wait()
+        self.func_test_true(dict_sample[Benchmarking.c_STR_SAMPLE_PROCESSES] == 2 and
+                            dict_sample[Benchmarking.c_STR_SAMPLE_RSS] > 0 and
+                            Benchmarking.func_sample_process_tree(subp_shell.pid) is None)
+
+    ########################
+    # ProcessTreeProfile
+    ########################
+    def func_make_sample(self, i_sample):
+        """ Makes a sample where every measure is the sample number. """
+        return(dict([(str_measure, i_sample) for str_measure in Benchmarking.c_LSTR_SAMPLE_MEASURES]))
+
+    def test_func_add_sample_for_peak(self):
+        """ The peak of each measure is kept. """
+        prof_cur = Benchmarking.ProcessTreeProfile()
+        for i_sample in [2, 5, 3]:
+            prof_cur.func_add_sample(self.func_make_sample(i_sample))
+        prof_cur.func_add_sample(None)
+        self.func_test_equals([5, 3, 3], [prof_cur.func_get_peak(Benchmarking.c_STR_SAMPLE_RSS),
+                                          prof_cur.i_samples, len(prof_cur.ltpl_samples)])
+
+    def test_func_add_sample_for_max_samples(self):
+        """ Samples are thinned when the time series is full, keeping it evenly spaced. """
+        prof_cur = Benchmarking.ProcessTreeProfile(i_max_samples=4)
+        for i_sample in range(10):
+            prof_cur.func_add_sample(self.func_make_sample(i_sample))
+        self.func_test_equals([0, 4, 8], [tpl_sample[0] for tpl_sample in prof_cur.ltpl_samples])
+
+    def test_str_for_no_samples(self):
+        """ A profile with no samples ( not linux ) says so. """
+        self.func_test_equals(b'Memory benchmarking is only compatible with Linux operating systems.',
+                              str(Benchmarking.ProcessTreeProfile()))
+
+    ########################
+    # ProcessSampler
+    ########################
+    def test_func_sample_for_many_trees(self):
+        """ Trees are sampled together, after the first sample only the processes in the trees are read. """
+        lsubp_shells = [subprocess.Popen("sleep 1; true", shell=True) for i_shell in range(2)]
+        time.sleep(0.3)
+        smplr_cur = Benchmarking.ProcessSampler()
+        dict_profiles = dict([(subp_shell.pid, Benchmarking.ProcessTreeProfile()) for subp_shell in lsubp_shells])
+        smplr_cur.func_sample(dict_profiles)
+        i_first_reads = smplr_cur.i_process_reads
+        dict_samples = smplr_cur.func_sample(dict_profiles)
+        i_second_reads = smplr_cur.i_process_reads - i_first_reads
+        for subp_shell in lsubp_shells:
+            subp_shell.wait()
+        self.func_test_true(smplr_cur.i_samples == 2 and i_second_reads < i_first_reads and
+                            [dict_sample[Benchmarking.c_STR_SAMPLE_PROCESSES] for dict_sample in dict_samples.values()] == [2, 2] and
+                            [prof_cur.i_samples for prof_cur in dict_profiles.values()] == [2, 2])
+
+    def test_str_for_sampler(self):
+        """ The overhead of sampling is reported. """
+        smplr_cur = Benchmarking.ProcessSampler()
+        smplr_cur.i_samples = 4
+        smplr_cur.i_process_reads = 10
+        smplr_cur.d_seconds = 0.01
+        self.func_test_equals("ProcessSampler{ Samples: 4 Process reads: 10 Seconds: 0.01 Milliseconds per sample: 2.5 }",
+                              str(smplr_cur))
+
 #Creates a suite of tests
 def suite():
     """ Suite aggregates tests and is used to run tests. """
@@ -5,6 +5,7 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 import Graph
+import itertools
 import os
 import Resource
 
@@ -43,6 +44,10 @@ STR_PATH_JSON = "PATH"
 USTR_PATH_JSON = u'PATH'
 STR_PRODUCTS_JSON = "MAKES"
 USTR_PRODUCTS_JSON = u'MAKES'
+STR_CORES_JSON = "CORES"
+USTR_CORES_JSON = u'CORES'
+STR_MEMORY_JSON = "MEMORY"
+USTR_MEMORY_JSON = u'MEMORY'
 LSTR_JSON_KEYS = [STR_COMMAND_JSON, STR_DEPENDENCIES_JSON, STR_PRODUCTS_JSON]
 
 STR_TYPE = "COMMAND"
@@ -52,6 +57,10 @@ STR_RUNNING = "RUN"
 STR_COMPLETE = "DONE"
 STR_ERROR = "ERROR"
 
+# Default resources a command needs to run
+I_DEFAULT_CORES = 1
+D_DEFAULT_MEMORY = 0.0
+
 # Clean levels, here for backwards compatability
 CLEAN_NEVER = Resource.CLEAN_NEVER
 CLEAN_AS_TEMP = Resource.CLEAN_AS_TEMP
@@ -67,7 +76,8 @@ class Command(Graph.Vertex):
 
     # Tested
     def __init__(self, str_cur_command, lstr_cur_dependencies,
-                 lstr_cur_products, str_name="unnamed"):
+                 lstr_cur_products, str_name="unnamed",
+                 i_cores=I_DEFAULT_CORES, d_memory=D_DEFAULT_MEMORY):
         """
         Initializer.
         All paths should be absolute paths.
@@ -82,6 +92,12 @@ class Command(Graph.Vertex):
 
         * lstr_cur_products : List of strings
                               List of absolute paths for products to be made
+
+        * i_cores : Int
+                    Number of cores the command uses when running
+
+        * d_memory : Float
+                     Memory (GB) the command uses when running
         """
 
         # Set there id for the parent vertex
@@ -103,11 +119,18 @@ class Command(Graph.Vertex):
         # an update command.
         self.f_stop_update_at_flags = False
 
+        # Resources needed to run the command, used when scheduling
+        # commands to run at the same time.
+        self.i_cores = I_DEFAULT_CORES
+        self.d_memory = D_DEFAULT_MEMORY
+        self.func_set_resources(i_cores=i_cores, d_memory=d_memory)
+
     # Used in testing
     @property
     def lstr_dependencies(self):
         """
-        Gets the list of dependencies
+        Gets the list of dependencies, sorted.
+        The list is shared with the vertex, do not change it.
 
         * return : List of paths
                  : List of paths for dependencies
@@ -119,7 +142,8 @@ class Command(Graph.Vertex):
     @property
     def lstr_products(self):
         """
-        Gets the list of products
+        Gets the list of products, sorted.
+        The list is shared with the vertex, do not change it.
 
         * return : List of paths
                  : List of paths for products
@@ -127,6 +151,37 @@ class Command(Graph.Vertex):
 
         return self.func_get_children()
 
+    # Tested
+    def func_set_resources(self, i_cores=None, d_memory=None):
+        """
+        Declare the cores and memory the command needs when running.
+        Values not given (None) are not changed. Invalid values, such as negative
+        numbers or text that is not a number, are ignored.
+
+        * i_cores : Int
+                  : Number of cores, must be 1 or more.
+
+        * d_memory : Float
+                   : Memory in GB, must be 0 or more.
+
+        * return : Self
+                 : This command.
+        """
+
+        if i_cores is not None:
+            try:
+                if int(i_cores) >= 1:
+                    self.i_cores = int(i_cores)
+            except (ValueError, TypeError):
+                pass
+        if d_memory is not None:
+            try:
+                if float(d_memory) >= 0:
+                    self.d_memory = float(d_memory)
+            except (ValueError, TypeError):
+                pass
+        return self
+
     # Tested
     def func_is_valid(self):
         """
@@ -137,7 +192,7 @@ class Command(Graph.Vertex):
                    dependencies, and products
         """
 
-        return self.str_id and self.lstr_dependencies and self.lstr_products
+        return bool(self.str_id) and self.func_has_parent() and self.func_has_child()
 
     # Tested
     def func_to_dict(self):
@@ -170,6 +225,12 @@ class Command(Graph.Vertex):
                 dict_cur[STR_PRODUCTS_JSON].append({STR_PATH_JSON: vtx_prod.str_id,
                                                     STR_CLEAN_JSON: DICT_CLEAN_TO_KEY[vtx_prod.i_clean]})
 
+        # Add resources if not the defaults
+        if not self.i_cores == I_DEFAULT_CORES:
+            dict_cur[STR_CORES_JSON] = self.i_cores
+        if not self.d_memory == D_DEFAULT_MEMORY:
+            dict_cur[STR_MEMORY_JSON] = self.d_memory
+
         return dict_cur
 
     # Lightly tested
@@ -208,7 +269,9 @@ class Command(Graph.Vertex):
         # Make command object
         vtx_cmd_cur = Command(str_cur_command=str_cur_command,
                               lstr_cur_dependencies=lstr_dep_paths,
-                              lstr_cur_products=lstr_prod_paths)
+                              lstr_cur_products=lstr_prod_paths,
+                              i_cores=dict_convert.get(USTR_CORES_JSON, I_DEFAULT_CORES),
+                              d_memory=dict_convert.get(USTR_MEMORY_JSON, D_DEFAULT_MEMORY))
         # Add dependencies clean level
         for dict_file in lstr_dependencies + lstr_products:
             lstr_file = [dict_file[USTR_PATH_JSON]]
@@ -244,7 +307,7 @@ class Command(Graph.Vertex):
 
         if ((not lstr_file) or
                 (i_level not in Resource.LSTR_CLEAN_LEVELS) or
-                (not self.lstr_dependencies)):
+                (not self.func_has_parent())):
             return self
 
         # Handle in case a string is accidently given
@@ -254,7 +317,7 @@ class Command(Graph.Vertex):
         # Make sure are absolute paths
         lstr_file = Resource.Resource.func_make_paths_absolute(lstr_file)
         # Allow all files to be added as long as they are known dependencies
-        for vtx_file in self.lstr_dependencies + self.lstr_products:
+        for vtx_file in itertools.chain(self.func_iter_parents(), self.func_iter_children()):
             if vtx_file.str_id in lstr_file:
                 vtx_file.i_clean = i_level
 
@@ -291,7 +354,7 @@ class Command(Graph.Vertex):
 
         # Get all dependencies that are that level or greater
         # This does not include the defaults level
-        for vtx_dependency in self.lstr_dependencies:
+        for vtx_dependency in self.func_iter_parents():
             if vtx_dependency.i_clean >= i_level:
                 lstr_dependencies_to_clean.append(vtx_dependency)
 
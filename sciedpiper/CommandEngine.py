@@ -0,0 +1,366 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+import Benchmarking
+import errno
+import logging
+import os
+import select
+import subprocess
+import threading
+import time
+
+"""
+Runs many commands on the command line at the same time, supervised by one
+thread. The output of each command is copied in chunks to its own log files
+as it is written ( never kept whole in memory ) and the return code of each
+command is given through a future when the command ends.
+"""
+
+__author__ = "Timothy Tickle"
+__copyright__ = "Copyright 2016"
+__credits__ = ["Timothy Tickle", "Brian Haas"]
+__license__ = "MIT"
+__maintainer__ = "Timothy Tickle"
+__email__ = "ttickle@broadinstitute.org"
+__status__ = "Development"
+
+
+# Bytes read from an output of a command at a time
+I_READ_BYTES = 64 * 1024
+
+# Engine shared by command lines which are not given one
+c_eng_shared = None
+c_lock_shared = threading.Lock()
+
+
+def func_get_shared_engine():
+    """
+    The engine shared by all command lines which are not given their own.
+
+    * return : Shared engine, made the first time.
+             : CommandEngine
+    """
+
+    global c_eng_shared
+    with c_lock_shared:
+        if c_eng_shared is None:
+            c_eng_shared = CommandEngine()
+        return(c_eng_shared)
+
+
+class CommandFuture:
+    """
+    Result of a command which is running or has ended.
+    """
+
+    def __init__(self, str_command):
+        """
+        Initializer
+
+        * str_command : Command ran.
+                      : String
+        """
+
+        self.str_command = str_command
+        """ Command ran. """
+
+        self.i_pid = None
+        """ Process id of the command. """
+
+        self.i_return_code = None
+        """ Return code, None until the command ends. """
+
+        self.d_start = time.time()
+        """ Time the command started. """
+
+        self.d_end = None
+        """ Time the command ended. """
+
+        self.str_stdout = None
+        """ Standard out, only when it was requested to be kept. """
+
+        self.prof_memory = None
+        """ Resources used by the command's process tree over time, only when memory is benchmarked. """
+
+        self.__evnt_done = threading.Event()
+        self.__lock_callbacks = threading.Lock()
+        # True once the callbacks are being called
+        self.__f_ended = False
+        self.__lfunc_callbacks = []
+
+    # Tested
+    def done(self):
+        """
+        True indicates the command ended.
+        """
+
+        return(self.__evnt_done.is_set())
+
+    # Tested
+    def result(self, d_timeout=None):
+        """
+        Waits for the command to end.
+
+        * d_timeout : Most seconds to wait, None waits until the command ends.
+                    : Float or None
+        * return : Return code of the command, None if it did not end in time.
+                 : Int or None
+        """
+
+        self.__evnt_done.wait(d_timeout)
+        return(self.i_return_code)
+
+    # Tested
+    def add_done_callback(self, func_callback):
+        """
+        Calls a function with this future when the command ends,
+        at once if it has already ended.
+        """
+
+        with self.__lock_callbacks:
+            if not self.__f_ended:
+                self.__lfunc_callbacks.append(func_callback)
+                return
+        func_callback(self)
+
+    def func_set_result(self, i_return_code):
+        """
+        Records the command ended and calls the callbacks, then
+        wakes those waiting for the result. Called by the engine.
+        """
+
+        self.d_end = time.time()
+        self.i_return_code = i_return_code
+        with self.__lock_callbacks:
+            self.__f_ended = True
+            lfunc_callbacks = self.__lfunc_callbacks
+            self.__lfunc_callbacks = []
+        try:
+            for func_callback in lfunc_callbacks:
+                func_callback(self)
+        finally:
+            self.__evnt_done.set()
+
+    def __str__(self):
+        return("CommandFuture{" + ", ".join(["pid=" + str(self.i_pid),
+                                             "return_code=" + str(self.i_return_code),
+                                             "command=" + self.str_command]) + "}")
+
+
+class CommandEngine:
+    """
+    Starts commands and supervises them from one thread which is running
+    only while commands are. A small thread per command waits for its
+    process to exit, so the end of a command is noticed at once.
+    """
+
+    # Tested
+    def __init__(self, logr_cur=None):
+        """
+        Initializer
+
+        * logr_cur : Logger
+                   : Logger
+        """
+
+        self.logr_logger = logr_cur if logr_cur else logging.getLogger(__name__)
+        """ Logger, uses the default logger. """
+
+        self.__lock = threading.Lock()
+        # Commands started and not yet supervised
+        self.__ldict_started = []
+        # Commands supervised { pid: running command }
+        self.__dict_running = {}
+        self.__thrd_supervisor = None
+        # Pipe to wake the supervisor when a command starts or exits
+        self.__i_wake_read, self.__i_wake_write = os.pipe()
+
+        self.smplr_processes = Benchmarking.ProcessSampler()
+        """ Samples the process trees of all commands being benchmarked together. """
+
+    # Tested
+    def func_submit(self, str_command, str_stdout_file=None, str_stderr_file=None,
+                    f_keep_stdout=False, i_secs=None, prof_memory=None):
+        """
+        Starts a command in the shell and returns at once.
+
+        * str_command : Command to run.
+                      : String
+        * str_stdout_file : File standard out is written to, if None standard out is not changed.
+                          : String or None
+        * str_stderr_file : File standard error is written to, if None standard error is not changed.
+                          : String or None
+        * f_keep_stdout : True keeps standard out in the future ( str_stdout ),
+                          used when standard out is the result of the command.
+                        : Boolean
+        * i_secs : Seconds between measuring the memory of the command, None does not measure.
+                 : Float or None
+        * prof_memory : Profile the measures are added to, if None and measuring a new profile.
+                      : Benchmarking.ProcessTreeProfile or None
+        * return : Future giving the return code.
+                 : CommandFuture
+        """
+
+        ftr_cmd = CommandFuture(str_command)
+        f_pipe_stdout = f_keep_stdout or bool(str_stdout_file)
+        # Close the pipes of other commands in the child, otherwise the
+        # outputs of a command do not close until those commands end.
+        subp_cur = subprocess.Popen(str_command, shell=True, cwd=os.getcwd(), close_fds=True,
+                                    stdout=subprocess.PIPE if f_pipe_stdout else None,
+                                    stderr=subprocess.PIPE if str_stderr_file else None)
+        ftr_cmd.i_pid = subp_cur.pid
+        dict_outputs = {}
+        if f_pipe_stdout:
+            dict_outputs[subp_cur.stdout.fileno()] = {"pipe": subp_cur.stdout,
+                                                      "file": open(str_stdout_file, "wb") if str_stdout_file else None,
+                                                      "kept": [] if f_keep_stdout else None}
+        if str_stderr_file:
+            dict_outputs[subp_cur.stderr.fileno()] = {"pipe": subp_cur.stderr,
+                                                      "file": open(str_stderr_file, "wb"),
+                                                      "kept": None}
+        dict_running = {"future": ftr_cmd, "process": subp_cur, "outputs": dict_outputs,
+                        "secs": i_secs, "next_measure": 0.0}
+        if i_secs:
+            ftr_cmd.prof_memory = prof_memory if prof_memory else Benchmarking.ProcessTreeProfile()
+        thrd_wait = threading.Thread(target=self.__func_wait_for_exit, args=(subp_cur,))
+        thrd_wait.daemon = True
+        thrd_wait.start()
+        with self.__lock:
+            self.__ldict_started.append(dict_running)
+            if self.__thrd_supervisor is None:
+                self.__thrd_supervisor = threading.Thread(target=self.__func_supervise)
+                self.__thrd_supervisor.daemon = True
+                self.__thrd_supervisor.start()
+        os.write(self.__i_wake_write, b"x")
+        return(ftr_cmd)
+
+    # Tested
+    def func_run(self, lstr_commands, i_secs=None):
+        """
+        Runs commands at the same time and waits for all to end.
+
+        * lstr_commands : Commands to run.
+                        : List of strings
+        * return : Return code of each command in the order given.
+                 : List of ints
+        """
+
+        lftr_commands = [self.func_submit(str_command, i_secs=i_secs) for str_command in lstr_commands]
+        return([ftr_cmd.result() for ftr_cmd in lftr_commands])
+
+    def func_running(self):
+        """
+        Number of commands which have not ended.
+        """
+
+        with self.__lock:
+            return(len(self.__ldict_started) + len(self.__dict_running))
+
+    def __func_wait_for_exit(self, subp_cur):
+        """
+        Waits for the process of a command to exit and wakes the supervisor.
+        """
+
+        subp_cur.wait()
+        os.write(self.__i_wake_write, b"x")
+
+    def __func_wait(self, li_fds, d_wait):
+        """
+        Waits for any of the file descriptors to be readable.
+
+        * d_wait : Most seconds to wait, None waits until one is readable.
+                 : Float or None
+        * return : Readable file descriptors.
+                 : List of ints
+        """
+
+        try:
+            if hasattr(select, "poll"):
+                poll_fds = select.poll()
+                for i_fd in li_fds:
+                    poll_fds.register(i_fd, select.POLLIN | select.POLLHUP | select.POLLERR)
+                return([i_fd for i_fd, i_event in poll_fds.poll(None if d_wait is None else d_wait * 1000)])
+            return(select.select(li_fds, [], [], d_wait)[0])
+        except (select.error, OSError, IOError) as e:
+            if e.args[0] == errno.EINTR:
+                return([])
+            raise
+
+    def __func_supervise(self):
+        """
+        Copies the output of the commands to their files and ends the futures
+        of commands which ended. Returns when no commands are running.
+        """
+
+        # { file descriptor: pid }
+        dict_fd_to_pid = {}
+        while True:
+            with self.__lock:
+                for dict_running in self.__ldict_started:
+                    i_pid = dict_running["future"].i_pid
+                    self.__dict_running[i_pid] = dict_running
+                    for i_fd in dict_running["outputs"]:
+                        dict_fd_to_pid[i_fd] = i_pid
+                self.__ldict_started = []
+                if not self.__dict_running:
+                    self.__thrd_supervisor = None
+                    return
+
+            # Wait for output or a command to start or exit, but not past the next measurement
+            d_now = time.time()
+            ld_measures = [dict_running["next_measure"] for dict_running in self.__dict_running.values()
+                           if dict_running["secs"]]
+            d_timeout = max(min(ld_measures) - d_now, 0.0) if ld_measures else None
+
+            for i_fd in self.__func_wait([self.__i_wake_read] + list(dict_fd_to_pid), d_timeout):
+                if i_fd == self.__i_wake_read:
+                    os.read(self.__i_wake_read, I_READ_BYTES)
+                    continue
+                dict_running = self.__dict_running[dict_fd_to_pid[i_fd]]
+                dict_output = dict_running["outputs"][i_fd]
+                str_chunk = os.read(i_fd, I_READ_BYTES)
+                if str_chunk:
+                    if dict_output["file"]:
+                        dict_output["file"].write(str_chunk)
+                    if dict_output["kept"] is not None:
+                        dict_output["kept"].append(str_chunk)
+                else:
+                    # The output closed
+                    del dict_fd_to_pid[i_fd]
+                    del dict_running["outputs"][i_fd]
+                    dict_output["pipe"].close()
+                    if dict_output["file"]:
+                        dict_output["file"].close()
+                    if dict_output["kept"] is not None:
+                        dict_running["future"].str_stdout = b"".join(dict_output["kept"])
+
+            # Sample the process trees of all commands measured now at once
+            d_now = time.time()
+            ldict_measure = [dict_running for dict_running in self.__dict_running.values()
+                             if dict_running["secs"] and d_now >= dict_running["next_measure"]
+                             and dict_running["process"].returncode is None]
+            if ldict_measure:
+                self.smplr_processes.func_sample(dict([(dict_running["future"].i_pid, dict_running["future"].prof_memory)
+                                                       for dict_running in ldict_measure]))
+                for dict_running in ldict_measure:
+                    dict_running["next_measure"] = d_now + dict_running["secs"]
+
+            for i_pid, dict_running in list(self.__dict_running.items()):
+                # A command ends when it exited and all its outputs closed
+                if dict_running["outputs"]:
+                    continue
+                # Set by the thread waiting for the process
+                i_return_code = dict_running["process"].returncode
+                if i_return_code is None:
+                    continue
+                with self.__lock:
+                    del self.__dict_running[i_pid]
+                try:
+                    dict_running["future"].func_set_result(i_return_code)
+                except Exception as e:
+                    self.logr_logger.error(" ".join(["CommandEngine:: Error in a callback of the command",
+                                                     dict_running["future"].str_command, "Error =", str(e)]))
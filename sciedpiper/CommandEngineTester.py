@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+import Benchmarking
+import CommandEngine
+import os
+import ParentPipelineTester
+import time
+import unittest
+
+
+"""
+Tests the CommandEngine module.
+"""
+
+
+__author__ = "Timothy Tickle"
+__copyright__ = "Copyright 2016"
+__credits__ = ["Timothy Tickle", "Brian Haas"]
+__license__ = "MIT"
+__maintainer__ = "Timothy Tickle"
+__email__ = "ttickle@broadinstitute.org"
+__status__ = "Development"
+
+
+class CommandEngineTester(ParentPipelineTester.ParentPipelineTester):
+    """
+    Tests running many commands at the same time.
+    """
+
+    ########################
+    # func_run
+    ########################
+    def test_func_run_for_return_codes(self):
+        """ The return code of each command is given in the order of the commands. """
+        eng_cur = CommandEngine.CommandEngine()
+        self.func_test_equals([0, 3, 1, 0], eng_cur.func_run(["true", "exit 3", "false", "sleep 0.1"]))
+
+    def test_func_run_for_concurrent_commands(self):
+        """ The commands run at the same time, not one after the other. """
+        eng_cur = CommandEngine.CommandEngine()
+        d_start = time.time()
+        li_return_codes = eng_cur.func_run(["sleep 0.5"] * 20)
+        d_seconds = time.time() - d_start
+        self.func_test_true(li_return_codes == [0] * 20 and d_seconds < 3 and eng_cur.func_running() == 0)
+
+    ########################
+    # func_submit
+    ########################
+    def test_func_submit_for_output_files(self):
+        """ The standard out and error of each command is streamed to its own files. """
+        str_env = self.func_make_env("test_func_submit_for_output_files")
+        eng_cur = CommandEngine.CommandEngine()
+        lftr_commands = []
+        for i_command in range(5):
+            str_out = os.path.join(str_env, str(i_command) + ".out")
+            str_err = os.path.join(str_env, str(i_command) + ".err")
+            lftr_commands.append(eng_cur.func_submit("seq 1 20000; echo error_" + str(i_command) + " >&2",
+                                                     str_stdout_file=str_out, str_stderr_file=str_err))
+        li_return_codes = [ftr_cmd.result() for ftr_cmd in lftr_commands]
+        lstr_outputs = []
+        for i_command in range(5):
+            for str_extension in [".out", ".err"]:
+                str_file = os.path.join(str_env, str(i_command) + str_extension)
+                with open(str_file) as hndl_output:
+                    lstr_outputs.append(hndl_output.read())
+                os.remove(str_file)
+        self.func_remove_dirs([str_env])
+        str_answer = "\n".join([str(i_number) for i_number in range(1, 20001)]) + "\n"
+        self.func_test_true(li_return_codes == [0] * 5 and
+                            lstr_outputs[0::2] == [str_answer] * 5 and
+                            lstr_outputs[1::2] == ["error_" + str(i_command) + "\n" for i_command in range(5)])
+
+    def test_func_submit_for_kept_stdout(self):
+        """ Standard out can be kept in the future instead of written to a file. """
+        ftr_cmd = CommandEngine.CommandEngine().func_submit("echo hello", f_keep_stdout=True)
+        ftr_cmd.result()
+        self.func_test_equals("hello\n", ftr_cmd.str_stdout)
+
+    def test_func_submit_for_memory(self):
+        """ The resources used are measured over time when requested. """
+        ftr_cmd = CommandEngine.CommandEngine().func_submit("sleep 0.5; true", i_secs=0.1)
+        ftr_cmd.result()
+        self.func_test_true(ftr_cmd.prof_memory.i_samples >= 3 and
+                            ftr_cmd.prof_memory.func_get_peak(Benchmarking.c_STR_SAMPLE_PROCESSES) == 2)
+
+    def test_func_submit_for_end_between_measures(self):
+        """ A command is ended when its process exits, not at the next measurement. """
+        eng_cur = CommandEngine.CommandEngine()
+        d_start = time.time()
+        ftr_cmd = eng_cur.func_submit("sleep 0.2; true", i_secs=5)
+        ftr_cmd.result()
+        self.func_test_true(time.time() - d_start < 1 and eng_cur.smplr_processes.i_samples >= 1)
+
+    ########################
+    # CommandFuture
+    ########################
+    def test_result_for_timeout(self):
+        """ A command which has not ended has no return code. """
+        ftr_cmd = CommandEngine.CommandEngine().func_submit("sleep 1")
+        i_early = ftr_cmd.result(d_timeout=0.05)
+        f_early = ftr_cmd.done()
+        i_return_code = ftr_cmd.result()
+        self.func_test_true(i_early is None and not f_early and i_return_code == 0 and ftr_cmd.done())
+
+    def test_add_done_callback(self):
+        """ Callbacks are called when the command ends or at once if it has ended. """
+        lstr_called = []
+        ftr_cmd = CommandEngine.CommandEngine().func_submit("sleep 0.2; exit 2")
+        ftr_cmd.add_done_callback(lambda ftr_done: lstr_called.append("before " + str(ftr_done.i_return_code)))
+        ftr_cmd.result()
+        ftr_cmd.add_done_callback(lambda ftr_done: lstr_called.append("after " + str(ftr_done.i_return_code)))
+        self.func_test_equals(["before 2", "after 2"], lstr_called)
+
+
+#Creates a suite of tests
+def suite():
+    """ Suite aggregates tests and is used to run tests. """
+    return unittest.TestLoader().loadTestsFromTestCase(CommandEngineTester)
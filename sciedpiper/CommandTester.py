@@ -209,6 +209,33 @@ class CommandTester( ParentPipelineTester.ParentPipelineTester ):
         str_answer = str_command
         self.func_test_equals(str_answer, str_result)
 
+    def test_init_for_default_resources( self ):
+        """ Testing init gives one core and no memory by default. """
+
+        cmd_test = Command.Command( "This is a command", [ "dependency" ], [ "product" ] )
+        self.func_test_equals( str( ( 1, 0.0 ) ), str( ( cmd_test.i_cores, cmd_test.d_memory ) ) )
+
+    def test_func_set_resources( self ):
+        """ Testing setting the cores and memory of a command. """
+
+        cmd_test = Command.Command( "This is a command", [ "dependency" ], [ "product" ] ).func_set_resources( 4, 32 )
+        self.func_test_equals( str( ( 4, 32.0 ) ), str( ( cmd_test.i_cores, cmd_test.d_memory ) ) )
+
+    def test_func_set_resources_for_bad_values( self ):
+        """ Testing invalid cores and memory are ignored. """
+
+        cmd_test = Command.Command( "This is a command", [ "dependency" ], [ "product" ], i_cores = 2, d_memory = 8 )
+        cmd_test.func_set_resources( i_cores = 0, d_memory = -1 )
+        self.func_test_equals( str( ( 2, 8.0 ) ), str( ( cmd_test.i_cores, cmd_test.d_memory ) ) )
+
+    def test_func_set_resources_for_not_numbers( self ):
+        """ Testing cores and memory that are not numbers are ignored. """
+
+        cmd_test = Command.Command( "This is a command", [ "dependency" ], [ "product" ], i_cores = "four", d_memory = [ 8 ] )
+        cmd_test.func_set_resources( i_cores = "2", d_memory = "8" )
+        cmd_test.func_set_resources( i_cores = "two", d_memory = "eight" )
+        self.func_test_equals( str( ( 2, 8.0 ) ), str( ( cmd_test.i_cores, cmd_test.d_memory ) ) )
+
     def test_func_set_resource_clean_level_for_bad_level(self):
         """ Testing for adding a clean level when there is no dependency. """
         
@@ -614,6 +641,23 @@ class CommandTester( ParentPipelineTester.ParentPipelineTester ):
         str_result = self.func_command_dict_to_string( cmd_test.func_to_dict() )
         self.func_test_equals( str_answer, str_result )
 
+    def test_func_to_dict_for_resources( self ):
+        """ Tests cores and memory are kept going to and from a dict. """
+
+        cmd_test = Command.Command( "Test Command", [ "dependency" ], [ "product" ], i_cores = 4, d_memory = 32 )
+        cmd_result = Command.Command.func_dict_to_command( cmd_test.func_to_dict() )
+        self.func_test_equals( str( ( 4, 32.0 ) ), str( ( cmd_result.i_cores, cmd_result.d_memory ) ) )
+
+    def test_func_dict_to_command_for_bad_resources( self ):
+        """ Tests cores and memory that are not numbers in a dict give the default resources. """
+
+        dict_test = { Command.USTR_COMMAND_JSON: "Test Command",
+                      Command.USTR_CORES_JSON: "four",
+                      Command.USTR_MEMORY_JSON: "lots" }
+        cmd_result = Command.Command.func_dict_to_command( dict_test )
+        self.func_test_equals( str( ( Command.I_DEFAULT_CORES, Command.D_DEFAULT_MEMORY ) ),
+                               str( ( cmd_result.i_cores, cmd_result.d_memory ) ) )
+
     def test_func_dict_to_command( self ):
       """ Tests the class method dict to command which makes a standard dict a command. """
 
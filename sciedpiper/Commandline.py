@@ -7,11 +7,9 @@ from __future__ import unicode_literals
 """
 Functions involving sending commands to the commandline.
 """
-import Benchmarking
+import CommandEngine
 import logging
 import os
-import subprocess as sp
-import time
 
 __author__ = "Timothy Tickle"
 __copyright__ = "Copyright 2014"
@@ -27,7 +25,7 @@ class Commandline:
     This class wraps calls to the command line in a simple interface.
     """
 
-    def __init__(self, str_name=None, logr_cur=None):
+    def __init__(self, str_name=None, logr_cur=None, eng_cur=None):
         """
         Initializer that allows one to set the logger.
 
@@ -35,10 +33,17 @@ class Commandline:
                      Optional parameter for logging.
                      If supplied this logger will be used,
                      otherwise the root logger will be used.
+        * eng_cur : CommandEngine
+                    Optional engine running the commands.
+                    If not supplied the engine shared by
+                    all command lines will be used.
         """
 
         self.logr_cur = logr_cur if logr_cur else logging.getLogger(str_name)
 
+        self.eng_cur = eng_cur
+        """ Engine running the commands, if None the shared engine. """
+
 
     # Tested
     def func_CMD(self,
@@ -46,7 +51,9 @@ class Commandline:
                  f_use_bash=False,
                  f_test=False,
                  f_stdout=False,
-                 i_secs=None):
+                 i_secs=None,
+                 prof_memory=None,
+                 func_ended=None):
         """
   	    Runs the given command.
         * str_command : Command to run on the commandline
@@ -63,6 +70,10 @@ class Commandline:
                      On a fail False (boolean) will still be given.
         * i_secs : Number of seconds to measure memory within.
                  : integer
+        * prof_memory : Profile the resources used are added to when measuring memory.
+                      : Benchmarking.ProcessTreeProfile or None
+        * func_ended : Called with the return code when the command ends.
+                     : Function or None
 	      * Return : Boolean
 	                 True indicates success
 	      """
@@ -79,39 +90,20 @@ class Commandline:
             return True
 
         try:
-            # Perform command and wait for completion
-            if f_stdout:
-                subp_cur = sp.Popen(str_command,
-                                    shell=True,
-                                    cwd=os.getcwd(),
-                                    stdout=sp.PIPE)
-            else:
-                subp_cur = sp.Popen(str_command, shell=True, cwd=os.getcwd())
-            str_pid = str(subp_cur.pid)
-
-            # If seconds are given, record memory usage within those
-            # seconds.
-            str_out = " "
-            if i_secs:
-                ld_max_mem = [-1,-1,-1]
-                while(i_return_code is None):
-                    ld_mem_info = Benchmarking.func_memory(str_pid)
-                    ld_max_mem = [max(info) for info
-                                  in zip(ld_mem_info,ld_max_mem)]
-                    time.sleep(i_secs)
-                    i_return_code = subp_cur.poll()
-                if(-1 in ld_max_mem):
-                    str_mem = b''.join([b'Memory benchmarking is only ',
-                                        b'compatible with Linux ',
-                                        b'operating systems.'])
-                else:
-                    str_mem = b''.join([b'Memory: '+Benchmarking.func_human_readable(ld_max_mem[0]),
-                                        b' Resident Memory: '+Benchmarking.func_human_readable(ld_max_mem[1]),
-                                        b' Stack Size: '+Benchmarking.func_human_readable(ld_max_mem[2])])
-                self.logr_cur.info(b'Memory benchmark::'+str_mem)
-            else:
-                str_out, str_err = subp_cur.communicate()
-                i_return_code = subp_cur.returncode
+            # Start the command and wait for it to end
+            ftr_cmd = self.func_CMD_async(str_command, f_keep_stdout=f_stdout, i_secs=i_secs,
+                                          prof_memory=prof_memory)
+            i_return_code = ftr_cmd.result()
+            str_out = ftr_cmd.str_stdout
+            str_err = None
+            if func_ended:
+                func_ended(i_return_code)
+
+            # If seconds are given, the resources of the command and all the
+            # processes it started were recorded every those seconds.
+            # They are logged here unless the caller keeps the profile.
+            if i_secs and prof_memory is None:
+                self.logr_cur.info(b'Memory benchmark::'+str(ftr_cmd.prof_memory))
 
             # 0 indicates success
             # On Stdout == true return a true string (stdout or 1 blank space)
@@ -145,6 +137,54 @@ class Commandline:
             return False
         return False
 
+    # Tested
+    def func_CMD_async(self,
+                       str_command,
+                       f_use_bash=False,
+                       str_stdout_file=None,
+                       str_stderr_file=None,
+                       f_keep_stdout=False,
+                       i_secs=None,
+                       prof_memory=None):
+        """
+        Starts the given command and returns without waiting for it to end.
+        Many commands can run at the same time this way.
+        * str_command : Command to run on the commandline
+                      : String
+        * f_use_bash : Boolean
+                     : If true, sends the command through using BASH.
+        * str_stdout_file : File the standard out is streamed to.
+                          : String or None (standard out is not changed)
+        * str_stderr_file : File the standard error is streamed to.
+                          : String or None (standard error is not changed)
+        * f_keep_stdout : Boolean
+                        : If true, the standard out is kept in the future.
+        * i_secs : Number of seconds to measure memory within.
+                 : integer
+        * prof_memory : Profile the resources used are added to when measuring memory.
+                      : Benchmarking.ProcessTreeProfile or None
+        * Return : CommandFuture
+                   result() gives the return code.
+        """
+
+        if f_use_bash:
+            str_command = "".join([os.sep, "bin", os.sep,
+                                   "bash -c \'", str_command, "\'"])
+        return self.func_get_engine().func_submit(str_command,
+                                   str_stdout_file=str_stdout_file,
+                                   str_stderr_file=str_stderr_file,
+                                   f_keep_stdout=f_keep_stdout,
+                                   i_secs=i_secs,
+                                   prof_memory=prof_memory)
+
+    def func_get_engine(self):
+        """
+        The engine running the commands.
+        * Return : CommandEngine
+        """
+
+        return self.eng_cur if self.eng_cur else CommandEngine.func_get_shared_engine()
+
     # Tested
     def func_CMDs(self, lstr_command,
                   f_use_bash=False, f_test=False,
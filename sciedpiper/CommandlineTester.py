@@ -157,6 +157,31 @@ class CommandlineTester(ParentPipelineTester.ParentPipelineTester):
         # Destroy environment
         self.func_remove_files([str_test_file_1, str_test_file_2])
 
+    def test_func_cmd_async_for_log_files(self):
+        """
+        Test the case of starting commands without waiting, each
+        streaming its output to its own log files.
+        """
+        # Set up environment
+        lstr_files = ["test_func_cmd_async_for_log_files_" + str(i_command) + str_extension
+                      for i_command in range(3) for str_extension in [".log", ".err"]]
+        self.func_remove_files(lstr_files)
+        # Start the commands and wait for their return codes
+        cmdl_cur = Commandline.Commandline()
+        lftr_commands = [cmdl_cur.func_CMD_async(str_command="echo out_" + str(i_command) + "; echo err_" + str(i_command) + " >&2; exit " + str(i_command),
+                                                 str_stdout_file=lstr_files[i_command * 2],
+                                                 str_stderr_file=lstr_files[i_command * 2 + 1])
+                         for i_command in range(3)]
+        li_return_codes = [ftr_command.result() for ftr_command in lftr_commands]
+        lstr_results = []
+        for str_file in lstr_files:
+            with open(str_file) as hndl_test:
+                lstr_results.append(hndl_test.read()[:-1])
+        # Destroy environment
+        self.func_remove_files(lstr_files)
+        self.func_test_true(li_return_codes == [0, 1, 2] and
+                            lstr_results == ["out_0", "err_0", "out_1", "err_1", "out_2", "err_2"])
+
 #Creates a suite of tests
 def suite():
     return unittest.TestLoader().loadTestsFromTestCase(CommandlineTester)
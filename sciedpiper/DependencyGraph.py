@@ -58,7 +58,7 @@ class DependencyGraph( Graph.Graph ):
       if not ( vtx_cur.str_type == Resource.STR_TYPE ):
         continue
       if vtx_cur.func_has_child():
-        dict_cmd_return.setdefault( vtx_cur.str_id, []).extend( vtx_cur.func_get_children() )
+        dict_cmd_return.setdefault( vtx_cur.str_id, []).extend( vtx_cur.func_iter_children() )
     for str_key in dict_cmd_return.keys():
       dict_cmd_return[ str_key ] = list( set( dict_cmd_return[ str_key ] ) )
     return dict_cmd_return
@@ -69,6 +69,6 @@ class DependencyGraph( Graph.Graph ):
     for vtx_cur in self:
       if not ( vtx_cur.str_type ==  Resource.STR_TYPE ):
         continue
-      if vtx_cur.func_has_parent() and ( not self.root in vtx_cur.func_get_parents()):
+      if vtx_cur.func_has_parent() and ( not self.root.str_id in vtx_cur.dict_vtx_parents ):
         lcmd_return.append(  vtx_cur )
     return lcmd_return
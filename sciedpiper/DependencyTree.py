@@ -6,10 +6,14 @@ from __future__ import print_function
 from __future__ import unicode_literals
 import Command
 import DependencyGraph
+import FileWatcher
 import logging
+import Metrics
 import os
 import Resource
+import StatCache
 import time
+import Trace
 
 __author__ = "Timothy Tickle"
 __copyright__ = "Copyright 2014"
@@ -28,6 +32,8 @@ class DependencyTree:
     { string_dependency: [ str_command, str_command,...] }
     lstr_products is a list of products added (helps determine currently terminal files).
     lstr_terminal_products is a list of terminal products given current graph state.
+    sstr_product_ids, sstr_input_ids, and sstr_terminal_product_ids are sets of the
+    ids (paths) in these lists for constant time membership checks.
     """
     C_INT_DEPENDENCIES_INDEX = 0
     C_INT_PRODUCTS_INDEX = 1
@@ -47,12 +53,21 @@ class DependencyTree:
         self.graph_commands = DependencyGraph.DependencyGraph()
         """ Graph holds the relationship between commands. """
 
-        # Load any initial commands
+        # Load any initial commands, the state is updated once after all are added.
         if lcmd_inital_commands:
             for cmd_cur in lcmd_inital_commands:
-                self.__func_add_command( cmd_cur )
+                self.__func_add_command( cmd_cur, f_update_state = False )
 
         self.li_waits_for_products = [ 5, 15, 40 ]
+        """ Seconds to wait for products after a command, the total is the most that is waited. """
+        self.str_product_detection = FileWatcher.STR_DETECTION_WATCH
+        """ How to wait for products, a value from FileWatcher.LSTR_DETECTION_CHOICES. """
+        self.stc_paths = None
+        """ StatCache shared with the pipeline, if None paths are checked with a new cache each time. """
+        self.trc_run = None
+        """ TraceRecorder of the pipeline run the waits for products are recorded in, if None waits are not traced. """
+        self.mtrc_run = None
+        """ MetricsExporter of the pipeline run the time waited for products is counted in, if None it is not counted. """
 
         self.__func_update_state_to_start()
 
@@ -100,6 +115,7 @@ class DependencyTree:
         """ A list of input files. """
         self.__lstr_terminal_products = self.graph_commands.func_get_terminal_vertices()
         """ A list of terminal products for the pipeline ( should never be deleted ). """
+        self.__func_reset_indices()
 
     # Used in tests
     @property
@@ -113,7 +129,47 @@ class DependencyTree:
         return self.__lstr_inputs
 
     # Tested
-    def __func_add_command( self, cmd_cur ):
+    @property
+    def sstr_product_ids( self ):
+        """
+        Ids of the products, made from lstr_products if needed.
+        """
+        if self.__sstr_product_ids is None:
+            self.__sstr_product_ids = set( [ rsc_product.str_id for rsc_product in self.lstr_products ] )
+        return self.__sstr_product_ids
+
+    # Tested
+    @property
+    def sstr_input_ids( self ):
+        """
+        Ids of the input files, made from lstr_inputs if needed.
+        """
+        if self.__sstr_input_ids is None:
+            self.__sstr_input_ids = set( [ rsc_input.str_id for rsc_input in self.lstr_inputs ] )
+        return self.__sstr_input_ids
+
+    # Tested
+    @property
+    def sstr_terminal_product_ids( self ):
+        """
+        Ids of the terminal products, made from lstr_terminal_products if needed.
+        Only resources are included, other terminal vertices are not products.
+        """
+        if self.__sstr_terminal_product_ids is None:
+            self.__sstr_terminal_product_ids = set( [ vtx_terminal.str_id for vtx_terminal in self.lstr_terminal_products
+                                                      if isinstance( vtx_terminal, Resource.Resource ) ] )
+        return self.__sstr_terminal_product_ids
+
+    def __func_reset_indices( self ):
+        """
+        Indicate the id indices need to be remade from the current lists.
+        """
+        self.__sstr_product_ids = None
+        self.__sstr_input_ids = None
+        self.__sstr_terminal_product_ids = None
+
+    # Tested
+    def __func_add_command( self, cmd_cur, f_update_state = True ):
         """
         Adds a command and outputs to the dependency tree.
         Resets the state of the Dependency tree based on the new underlying graph
@@ -123,6 +179,10 @@ class DependencyTree:
         automatically in this manner before the Tree is traversed.
         * cmd_cur : Command
                     Command to add to the dependency tree.
+        * f_update_state : Boolean
+                           True updates the state of the tree after adding.
+                           Updating walks the whole graph, when adding many commands
+                           use False and call __func_update_state_to_start once after the last.
         * Return : Boolean
                    True indicates the command was successfully added.
         """
@@ -170,8 +230,10 @@ class DependencyTree:
             self.__dict_dependencies = None
             self.__lstr_products = None
             self.__lstr_inputs = None
+            self.__func_reset_indices()
 
-            self.__func_update_state_to_start()
+            if f_update_state:
+                self.__func_update_state_to_start()
             return True
         return False
 
@@ -195,25 +257,28 @@ class DependencyTree:
         # Remove the dependency relationships for the command
         self.logr_logger.debug( "DependencyTree.func_complete_command: Checking products" )
         if self.func_products_are_made( cmd_cur, f_wait = f_wait ) or f_test:
-            self.logr_logger.info( "DependencyTree.func_complete_command: Products are made" )
-            for str_product in cmd_cur.lstr_products:
-                str_product_size = ""
-                if os.path.exists(str_product.str_id):
-                    str_product_size = str_product.func_get_size()
-                self.logr_logger.info( "DependencyTree.func_complete_command: " + str_product.str_id + " " + str_product_size )
+            self.logr_logger.info( " ".join( [ "DependencyTree.func_complete_command: Products are made.",
+                                               str( len( cmd_cur.lstr_products ) ), "product(s)." ] ) )
+            # The size of each product is logged at debug.
+            if self.logr_logger.isEnabledFor( logging.DEBUG ):
+                for str_product in cmd_cur.lstr_products:
+                    str_product_size = ""
+                    if os.path.exists(str_product.str_id):
+                        str_product_size = str_product.func_get_size()
+                    self.logr_logger.debug( "DependencyTree.func_complete_command: " + str_product.str_id + " " + str_product_size )
 
             # Update the dependency relationships
             if not self.func_remove_dependency_relationships( cmd_cur ):
                 self.logr_logger.error( "DependencyTree.func_complete_command: Could not update dependency relationships." )
                 # Update the products
-                for rsc_prod in cmd_cur.func_get_children():
+                for rsc_prod in cmd_cur.func_iter_children():
                     rsc_prod.str_status = Resource.STR_MADE
                 cmd_cur.str_status = Command.STR_ERROR
                 return False
 
             # Completed cleaning return true
             # Update the products
-            for rsc_prod in cmd_cur.func_get_children():
+            for rsc_prod in cmd_cur.func_iter_children():
                 rsc_prod.str_status = Resource.STR_MADE
             cmd_cur.str_status = Command.STR_COMPLETE
             return True
@@ -221,7 +286,7 @@ class DependencyTree:
         # Return false indicating the command state was invalid for completing.
         self.logr_logger.info( "DependencyTree.func_complete_command: Products were not created." )
         # If error update the files were made on an error run and indicate the command was an error.
-        for rsc_prod in cmd_cur.func_get_children():
+        for rsc_prod in cmd_cur.func_iter_children():
             rsc_prod.str_status = Resource.STR_ERROR
         cmd_cur.str_status = Command.STR_ERROR
         return False
@@ -301,12 +366,17 @@ class DependencyTree:
             return len( self.dict_dependencies.get( str_dependency, [] ) ) > 0
         return False
 
+    # Tested
     def func_is_input(self,rsc_check):
+        """
+        Returns if a resource is an input file ( not made by any command ).
+        * rsc_check : Resource
+                    : Resource to check
+        * Return : Boolean
+                 : True indicates the resource is an input file.
+        """
         if rsc_check:
-            str_cur_id = rsc_check.str_id
-            for rsc_input in self.lstr_inputs:
-                if rsc_input.str_id == str_cur_id:
-                    return True
+            return rsc_check.str_id in self.sstr_input_ids
         return False
 
     # Tested
@@ -319,7 +389,7 @@ class DependencyTree:
         * Return : Boolean
                  : True indicates is an intermediate file that is used.
         """
-        f_is_product = rsc_check in self.lstr_products
+        f_is_product = rsc_check.str_id in self.sstr_product_ids
         f_is_terminal = self.func_product_is_terminal( rsc_check )
         f_is_needed = self.func_dependency_is_needed( rsc_check )
         if( f_is_product and ( not f_is_terminal ) and ( not f_is_needed ) ):
@@ -327,29 +397,43 @@ class DependencyTree:
         return False
 
     # Used in testing
-    def func_paths_made( self, lstr_files ):
+    def func_paths_made( self, lstr_files, f_log = True, f_fresh = False ):
         """
         Check to see if paths are made, could be a folder or a file.
         * lstr_Files : List of strings
                        Paths to files/folders to check and see if they exist.
+        * f_log : Boolean
+                  False checks without logging ( used when checking repeatedly ).
+        * f_fresh : Boolean
+                    True ignores what is known about the paths ( used for paths which may have just been made ).
         * Return : Boolean
                    True indicates they all exist.
         """
+        stc_paths = self.stc_paths if not self.stc_paths is None else StatCache.StatCache()
+        if f_fresh:
+            stc_paths.func_forget( [ rsc_file.str_id for rsc_file in lstr_files ] )
         if lstr_files:
-            self.logr_logger.info(" ".join( [ "DependencyTree.func_paths_made: Currently at ", os.getcwd() ] ) )
+            # Each path checked is logged at debug, the result once at info.
+            f_debug = f_log and self.logr_logger.isEnabledFor( logging.DEBUG )
+            if f_debug:
+                self.logr_logger.debug(" ".join( [ "DependencyTree.func_paths_made: Currently at ", os.getcwd() ] ) )
             for rsc_file in lstr_files:
                 str_file = rsc_file.str_id
-                self.logr_logger.info( "".join( [ "DependencyTree.func_paths_made: Checking that ", str_file, " was made." ] ) )
-                if not os.path.exists( str_file ):
-                    self.logr_logger.info( "DependencyTree.func_paths_made: Does not exist." )
+                if f_debug:
+                    self.logr_logger.debug( "".join( [ "DependencyTree.func_paths_made: Checking that ", str_file, " was made." ] ) )
+                if not stc_paths.func_exists( str_file ):
+                    if f_log:
+                        self.logr_logger.info( "DependencyTree.func_paths_made: Does not exist. " + str_file )
                     # Return false of not existent path
                     return False
-                if os.path.isdir( str_file ) and not os.listdir( str_file ):
-                    self.logr_logger.info( "DependencyTree.func_paths_made: This folder is empty." )
+                if stc_paths.func_is_empty_dir( str_file ):
+                    if f_log:
+                        self.logr_logger.info( "DependencyTree.func_paths_made: This folder is empty. " + str_file )
                     # Return false for an empty directory
                     return False
             # Return true for a file or directory that contains things
-            self.logr_logger.info( "DependencyTree.func_paths_made: Files were made." )
+            if f_log:
+                self.logr_logger.info( " ".join( [ "DependencyTree.func_paths_made: Files were made.", str( len( lstr_files ) ), "path(s) checked." ] ) )
             return True
         # Return false for bad file names
         return False
@@ -359,21 +443,48 @@ class DependencyTree:
         """
         Check to see if products are made.
         This assumes a product may just have been made and could be subject to lag.
-        A wait is incorporated into the check, by default 3 attempts occur at progressively
-        more wait.
+        A wait is incorporated into the check, waiting at most the total of li_waits_for_products.
+        In watch mode the check returns as soon as the products appear ( inotify events or polling ),
+        in retry mode the check is repeated after each wait in li_waits_for_products.
+        The time waited is logged.
         * cmd_cur : Command
                     Command to check that it's products exist.
         * Return : Boolean
                    True indicates all products exist.
         """
-        # Try a tiered approach to checking for products
-        # Sometimes products are made but there is a lag on the server / cluster
-        # Check and then on failure try in 5 seconds, 15 seconds and 40 seconds then fail.
-        for i_wait_in_seconds in self.li_waits_for_products if f_wait else [0]:
-            if self.func_paths_made( cmd_cur.lstr_products ):
-                return True
-            time.sleep( i_wait_in_seconds )
-        return False
+        if not f_wait:
+            return self.func_paths_made( cmd_cur.lstr_products )
+
+        d_start = time.time()
+        if self.str_product_detection == FileWatcher.STR_DETECTION_RETRY:
+            # Try a tiered approach to checking for products
+            # Sometimes products are made but there is a lag on the server / cluster
+            # Check and then on failure try in 5 seconds, 15 seconds and 40 seconds then fail.
+            f_made = False
+            for i_wait_in_seconds in self.li_waits_for_products:
+                if self.func_paths_made( cmd_cur.lstr_products, f_fresh = True ):
+                    f_made = True
+                    break
+                time.sleep( i_wait_in_seconds )
+        else:
+            # Sometimes products are made but there is a lag on the server / cluster
+            # Return as soon as they are seen, up to the total wait.
+            f_made = FileWatcher.func_wait_for_paths( lstr_paths = [ rsc_product.str_id for rsc_product in cmd_cur.lstr_products ],
+                                                      func_paths_made = lambda: self.func_paths_made( cmd_cur.lstr_products, f_log = False, f_fresh = True ),
+                                                      d_max_wait = sum( self.li_waits_for_products ) )
+            # Log the final state of the products
+            f_made = self.func_paths_made( cmd_cur.lstr_products, f_fresh = True )
+        self.logr_logger.info( " ".join( [ "DependencyTree.func_products_are_made: Waited",
+                                           "{:.2f}".format( time.time() - d_start ), "seconds for products",
+                                           "( " + self.str_product_detection + " ).",
+                                           "Products were made." if f_made else "Products were not made.",
+                                           "Command:", cmd_cur.str_id ] ) )
+        if self.mtrc_run:
+            self.mtrc_run.func_add( Metrics.C_STR_PRODUCT_WAIT_SECONDS, time.time() - d_start )
+        if self.trc_run:
+            self.trc_run.func_add_span( Trace.C_STR_SPAN_PRODUCT_WAIT, Trace.C_STR_CATEGORY_WAIT, d_start,
+                                        dict_args = { "command": cmd_cur.str_id, "made": f_made } )
+        return f_made
 
     # Tested
     def func_product_is_terminal( self, str_product ):
@@ -386,7 +497,10 @@ class DependencyTree:
                    True indicates that the product is terminal.
         """
         # Handle the case where the dependencies are empty
-        return str_product in self.lstr_terminal_products
+        # Resources are looked up by id, anything else is compared with the terminal vertices as before.
+        if not isinstance( str_product, Resource.Resource ):
+            return str_product in self.lstr_terminal_products
+        return str_product.str_id in self.sstr_terminal_product_ids
 
     # Tested
     def func_remove_wait( self ):
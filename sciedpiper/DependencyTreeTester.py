@@ -6,9 +6,13 @@ from __future__ import print_function
 from __future__ import unicode_literals
 import Command
 import DependencyTree
+import FileWatcher
+import Graph
 import ParentPipelineTester
 import os
 import Resource
+import threading
+import time
 import unittest
 
 __author__ = "Timothy Tickle"
@@ -173,6 +177,22 @@ class DependencyTreeTester(ParentPipelineTester.ParentPipelineTester):
         dt_tree = DependencyTree.DependencyTree(lcmd_commands)
         self.func_test_equals(str_answer, dt_tree.func_detail())
 
+    def test_init_for_shared_reference(self):
+        """ Chains of commands starting at a shared reference are built once, with the reference as the only input. """
+        str_env = os.path.join(self.str_test_directory, "test_init_for_shared_reference")
+        lcmd_commands = []
+        for i_index in range(12):
+            str_chain = "sample_" + str(i_index // 4)
+            str_in = (os.path.join(str_env, "reference.fa") if not i_index % 4
+                      else os.path.join(str_env, str_chain + "_step_" + str((i_index % 4) - 1)))
+            lcmd_commands.append(Command.Command("step " + str(i_index), [str_in],
+                                                 [os.path.join(str_env, str_chain + "_step_" + str(i_index % 4))]))
+        dt_tree = DependencyTree.DependencyTree(lcmd_commands)
+        self.func_test_true(len(dt_tree.func_get_commands()) == 12 and
+                            [rsc_input.str_id for rsc_input in dt_tree.lstr_inputs] == [os.path.join(str_env, "reference.fa")] and
+                            sorted([rsc_product.str_id for rsc_product in dt_tree.lstr_terminal_products]) ==
+                            [os.path.join(str_env, "sample_" + str(i_sample) + "_step_3") for i_sample in range(3)])
+
 # func_add_command
     def test_func_add_command_for_invalid_command(self):
         """ Test adding commands when an invalid command is given. """
@@ -192,6 +212,18 @@ class DependencyTreeTester(ParentPipelineTester.ParentPipelineTester):
         self.func_test_true(f_result)
 
 
+    def test_func_add_command_for_batched_state(self):
+        """ Adding without updating the state leaves the state for one update after the last command. """
+        str_env = os.path.join(self.str_test_directory, "test_func_add_command_for_batched_state")
+        cmd_test = Command.Command("Command_1", [os.path.join(str_env, "Dependencies_1") ],
+                                    [os.path.join(str_env, "Products_1") ])
+        dt_tree = DependencyTree.DependencyTree()
+        f_result = dt_tree._DependencyTree__func_add_command(cmd_test, f_update_state = False)
+        f_before = len(dt_tree.lstr_products) == 0
+        dt_tree._DependencyTree__func_update_state_to_start()
+        self.func_test_true(f_result and f_before and len(dt_tree.lstr_products) == 1)
+
+
     def test_func_add_command_for_known_command(self):
         """ Test adding commands when a command already in the DependencyTree are given. """
         str_env = os.path.join(self.str_test_directory, "test_func_add_command_for_known_command")
@@ -1108,6 +1140,105 @@ class DependencyTreeTester(ParentPipelineTester.ParentPipelineTester):
         self.func_test_true(f_success)
 
 
+    def func_make_file_later(self, str_file, d_seconds):
+        """ Makes a file after a delay in the background, like a product showing up late on a network file system. """
+        def func_make():
+            time.sleep(d_seconds)
+            self.func_make_dummy_file(str_file)
+        thrd_make = threading.Thread(target=func_make)
+        thrd_make.start()
+        return thrd_make
+
+    def test_products_are_made_for_late_file_watch(self):
+        """ In watch mode a product made late is found as soon as it appears, not after the full wait. """
+        str_env = os.path.join(self.str_test_directory, "test_products_are_made_for_late_file_watch")
+        str_file = os.path.join(str_env, "product_1.txt")
+        self.func_make_dummy_dir(str_env)
+        cmd_test = Command.Command("Command_1", [os.path.join(str_env, "Dependency_1") ], [str_file ])
+        dt_tree = DependencyTree.DependencyTree()
+        dt_tree.li_waits_for_products = [ 5, 15, 40 ]
+        thrd_make = self.func_make_file_later(str_file, 0.5)
+        d_start = time.time()
+        f_success = dt_tree.func_products_are_made(cmd_test)
+        d_waited = time.time() - d_start
+        thrd_make.join()
+        self.func_remove_files([str_file])
+        self.func_remove_dirs([str_env])
+        self.func_test_true(f_success and d_waited < 5)
+
+    def test_products_are_made_for_missing_file_watch(self):
+        """ In watch mode a product which is not made is waited for at most the total of the waits. """
+        str_env = os.path.join(self.str_test_directory, "test_products_are_made_for_missing_file_watch")
+        cmd_test = Command.Command("Command_1", [os.path.join(str_env, "Dependency_1") ],
+                                    [os.path.join(str_env, "product_1.txt") ])
+        dt_tree = DependencyTree.DependencyTree()
+        dt_tree.li_waits_for_products = [ 0.5, 0.5 ]
+        d_start = time.time()
+        f_success = dt_tree.func_products_are_made(cmd_test)
+        d_waited = time.time() - d_start
+        self.func_test_true(not f_success and 1 <= d_waited < 3)
+
+    def test_products_are_made_for_late_file_retry(self):
+        """ In retry mode a product made late is found at the next retry. """
+        str_env = os.path.join(self.str_test_directory, "test_products_are_made_for_late_file_retry")
+        str_file = os.path.join(str_env, "product_1.txt")
+        self.func_make_dummy_dir(str_env)
+        cmd_test = Command.Command("Command_1", [os.path.join(str_env, "Dependency_1") ], [str_file ])
+        dt_tree = DependencyTree.DependencyTree()
+        dt_tree.str_product_detection = FileWatcher.STR_DETECTION_RETRY
+        dt_tree.li_waits_for_products = [ 1, 1 ]
+        thrd_make = self.func_make_file_later(str_file, 0.2)
+        d_start = time.time()
+        f_success = dt_tree.func_products_are_made(cmd_test)
+        d_waited = time.time() - d_start
+        thrd_make.join()
+        self.func_remove_files([str_file])
+        self.func_remove_dirs([str_env])
+        self.func_test_true(f_success and 1 <= d_waited < 2)
+
+# func_is_input
+    def test_func_is_input_for_input_and_product(self):
+        """ Inputs are found by path, products and unknown paths are not inputs. """
+        str_env = os.path.join(self.str_test_directory, "test_func_is_input_for_input_and_product")
+        cmd_test = Command.Command("Command_1", [os.path.join(str_env, "Dependency_1") ],
+                                    [os.path.join(str_env, "Product_1") ])
+        dt_tree = DependencyTree.DependencyTree([cmd_test])
+        self.func_test_true(dt_tree.func_is_input(Resource.Resource(os.path.join(str_env, "Dependency_1"), False))
+                            and not dt_tree.func_is_input(Resource.Resource(os.path.join(str_env, "Product_1"), True))
+                            and not dt_tree.func_is_input(Resource.Resource(os.path.join(str_env, "Other"), False))
+                            and not dt_tree.func_is_input(None))
+
+# sstr_product_ids, sstr_input_ids, sstr_terminal_product_ids
+    def test_id_indices_for_chain(self):
+        """ The id indices match the products, inputs, and terminal products. """
+        str_env = os.path.join(self.str_test_directory, "test_id_indices_for_chain")
+        cmd_test_1 = Command.Command("Command_1", [os.path.join(str_env, "Dependency_1") ],
+                                      [os.path.join(str_env, "Product_1") ])
+        cmd_test_2 = Command.Command("Command_2", [os.path.join(str_env, "Product_1") ],
+                                      [os.path.join(str_env, "Product_2") ])
+        dt_tree = DependencyTree.DependencyTree([cmd_test_1, cmd_test_2])
+        str_answer = str([[os.path.join(str_env, "Product_1"), os.path.join(str_env, "Product_2")],
+                          [os.path.join(str_env, "Dependency_1")],
+                          [os.path.join(str_env, "Product_2")]])
+        str_result = str([sorted(dt_tree.sstr_product_ids),
+                          sorted(dt_tree.sstr_input_ids),
+                          sorted(dt_tree.sstr_terminal_product_ids)])
+        self.func_test_equals(str_answer, str_result)
+
+    def test_id_indices_for_added_command(self):
+        """ The id indices are remade after a command is added. """
+        str_env = os.path.join(self.str_test_directory, "test_id_indices_for_added_command")
+        cmd_test_1 = Command.Command("Command_1", [os.path.join(str_env, "Dependency_1") ],
+                                      [os.path.join(str_env, "Product_1") ])
+        cmd_test_2 = Command.Command("Command_2", [os.path.join(str_env, "Product_1") ],
+                                      [os.path.join(str_env, "Product_2") ])
+        dt_tree = DependencyTree.DependencyTree([cmd_test_1])
+        f_before = os.path.join(str_env, "Product_1") in dt_tree.sstr_terminal_product_ids
+        dt_tree._DependencyTree__func_add_command(cmd_test_2)
+        f_after = os.path.join(str_env, "Product_1") in dt_tree.sstr_terminal_product_ids
+        self.func_test_true(f_before and not f_after and
+                            os.path.join(str_env, "Product_2") in dt_tree.sstr_product_ids)
+
 # func_product_is_terminal
     def test_func_product_is_terminal_for_empty_dependency_tree(self):
         """ Test if a dependency is terminal when the dependency tree is empty. """
@@ -1169,6 +1300,20 @@ class DependencyTreeTester(ParentPipelineTester.ParentPipelineTester):
         self.func_test_true(dt_tree.func_product_is_terminal(cmd_test_3.lstr_products[0 ]))
  
 
+    def test_func_product_is_terminal_for_other_vertices(self):
+        """ Test a terminal vertex which is not a resource is terminal and a path string is not. """
+
+        str_env = os.path.join(self.str_current_dir, "test_func_product_is_terminal_for_other_vertices")
+        cmd_test = Command.Command("Command_1", [os.path.join(str_env, "Dependency_1") ],
+                                    [os.path.join(str_env, "Product_1") ])
+        dt_tree = DependencyTree.DependencyTree([cmd_test ])
+        vtx_other = Graph.Vertex("Other")
+        dt_tree.graph_commands.func_add_vertex(vtx_other)
+        dt_tree._DependencyTree__func_update_state_to_start()
+        self.func_test_true(dt_tree.func_product_is_terminal(vtx_other) and
+                            not dt_tree.func_product_is_terminal(os.path.join(str_env, "Product_1")))
+
+
 # func_remove_dependency_relationships
     def test_func_remove_dependency_relationships_for_empty_tree(self):
         """ Tests removing relationships on an empty dependency tree """
@@ -44,12 +44,13 @@ class Runner:
         self.str_log_file = None
         self.str_current_python = sys.executable
 
-    # TODO Test
+    # Tested
     def func_build_arguments(self, args_name_space, dict_args_info):
         """
         Builds a list of all the command arguments and values.
         Adds an indicator not to read the config file so that it
-        does not happen again (already happened).
+        does not happen again (already happened). Arguments only used
+        when running the samples of a sample file are left out.
         Returns a list of strings that are the arguments an values in order.
         """
 
@@ -66,6 +67,8 @@ class Runner:
                 # If it is then use the correct flag presence depending
                 # on the value and the action.
                 cur_str_flag = dict_dest_to_flag[str_arg_dest]
+                if cur_str_flag in Arguments.C_LSTR_SAMPLE_RUNNER_ARGS:
+                    continue
                 if (isinstance(str_arg_value, bool)):
                     # Handle special cases help
                     if cur_str_flag in ["-h", "--help"]:
@@ -74,6 +77,10 @@ class Runner:
                     elif(not str_arg_value ==
                          dict_args_info[cur_str_flag][Arguments.C_STR_DEFAULT]):
                         lstr_script.append(cur_str_flag)
+                elif(str_arg_value is None and
+                     dict_args_info[cur_str_flag][Arguments.C_STR_DEFAULT] is None):
+                    # Left at its default, "None" would not parse for typed arguments.
+                    continue
                 else:
                     lstr_script.extend([cur_str_flag, str(str_arg_value)])
 
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import time
+
+"""
+Waits for paths to appear.
+On linux, inotify is used to wake up as soon as something changes in the
+directories the paths are expected in. Polling with an increasing interval
+is always done as well, this covers file systems which do not send events
+(eg. network file systems written to by other machines) and machines without inotify.
+"""
+
+__author__ = "Timothy Tickle"
+__copyright__ = "Copyright 2016"
+__credits__ = ["Timothy Tickle", "Brian Haas"]
+__license__ = "MIT"
+__maintainer__ = "Timothy Tickle"
+__email__ = "ttickle@broadinstitute.org"
+__status__ = "Development"
+
+
+# Ways to wait for products
+## Check, then sleep through the list of waits (the original behavior)
+STR_DETECTION_RETRY = "retry"
+## Return as soon as the products appear, waking on inotify events or polling
+STR_DETECTION_WATCH = "watch"
+LSTR_DETECTION_CHOICES = [STR_DETECTION_WATCH, STR_DETECTION_RETRY]
+
+# Polling starts at this interval (seconds) and doubles up to the max interval
+D_FIRST_POLL = 0.05
+D_MAX_POLL = 5.0
+
+# inotify flags (linux/inotify.h)
+# Only events which can make a path appear are watched, writes to other files do not wake the wait.
+I_IN_CLOSE_WRITE = 0x00000008
+I_IN_MOVED_TO = 0x00000080
+I_IN_CREATE = 0x00000100
+I_IN_WATCH_MASK = I_IN_CLOSE_WRITE | I_IN_MOVED_TO | I_IN_CREATE
+I_IN_NONBLOCK = 0o4000
+I_IN_CLOEXEC = 0o2000000
+I_EVENT_BUFFER = 64 * 1024
+
+
+class InotifyWatcher:
+    """
+    Watches directories for changes using inotify through the c library.
+    If inotify is not available the watcher is not active and waiting just times out.
+    """
+
+    # Tested
+    def __init__(self):
+        self.i_fd = None
+        """ inotify file descriptor, None indicates inotify is not available. """
+        self.sstr_watched = set()
+        """ Directories already watched. """
+
+        try:
+            str_libc = ctypes.util.find_library(b"c") or b"libc.so.6"
+            self.libc = ctypes.CDLL(str_libc, use_errno=True)
+            i_fd = self.libc.inotify_init1(I_IN_NONBLOCK | I_IN_CLOEXEC)
+            if i_fd >= 0:
+                self.i_fd = i_fd
+        except (OSError, AttributeError):
+            self.i_fd = None
+
+    # Tested
+    def func_is_active(self):
+        """
+        True indicates inotify is available and watching is used.
+        """
+        return self.i_fd is not None
+
+    # Tested
+    def func_watch_directory(self, str_directory):
+        """
+        Watch a directory for files being made, moved in, or finishing being written.
+
+        * str_directory : Directory to watch
+                        : String
+        * return : True indicates the directory is watched.
+                 : Boolean
+        """
+        if not self.func_is_active():
+            return False
+        if str_directory in self.sstr_watched:
+            return True
+        # inotify takes the path as bytes, byte strings are already encoded.
+        str_path = str_directory.encode("utf-8") if isinstance(str_directory, unicode) else str_directory
+        i_watch = self.libc.inotify_add_watch(self.i_fd, str_path, I_IN_WATCH_MASK)
+        if i_watch < 0:
+            return False
+        self.sstr_watched.add(str_directory)
+        return True
+
+    # Tested
+    def func_wait(self, d_timeout):
+        """
+        Wait until a watched directory changes or the time out.
+
+        * d_timeout : Maximum seconds to wait
+                    : Float
+        * return : True indicates a change was seen.
+                 : Boolean
+        """
+        d_timeout = max(d_timeout, 0.0)
+        if not self.func_is_active() or not self.sstr_watched:
+            time.sleep(d_timeout)
+            return False
+        try:
+            lhndl_ready = select.select([self.i_fd], [], [], d_timeout)[0]
+        except (select.error, OSError) as e:
+            if e.args and e.args[0] == errno.EINTR:
+                return False
+            raise
+        if not lhndl_ready:
+            return False
+        # Drain the events, the paths are checked directly so the events are not needed.
+        try:
+            while os.read(self.i_fd, I_EVENT_BUFFER):
+                pass
+        except OSError:
+            pass
+        return True
+
+    # Tested
+    def func_close(self):
+        """
+        Stop watching.
+        """
+        if self.i_fd is not None:
+            os.close(self.i_fd)
+        self.i_fd = None
+        self.sstr_watched = set()
+
+
+# Tested
+def func_get_existing_directory(str_path):
+    """
+    The closest directory containing a path which exists,
+    changes here are the first sign of the path being made.
+
+    * str_path : Path
+               : String
+    * return : Directory which exists
+             : String
+    """
+    str_directory = os.path.dirname(os.path.abspath(str_path))
+    while not os.path.isdir(str_directory):
+        str_parent = os.path.dirname(str_directory)
+        if str_parent == str_directory:
+            break
+        str_directory = str_parent
+    return str_directory
+
+
+# Tested
+def func_wait_for_paths(lstr_paths, func_paths_made, d_max_wait, d_first_poll=D_FIRST_POLL, d_max_poll=D_MAX_POLL):
+    """
+    Wait for paths to be made, returning as soon as they are.
+
+    * lstr_paths : Paths to wait for
+                 : List of strings
+    * func_paths_made : Function which returns True when the paths are made
+                      : Function with no arguments
+    * d_max_wait : Maximum seconds to wait
+                 : Float
+    * d_first_poll : Seconds to wait before checking again without an event,
+                     doubles after each check to d_max_poll
+                   : Float
+    * return : True indicates the paths were made
+             : Boolean
+    """
+    if func_paths_made():
+        return True
+    d_deadline = time.time() + max(d_max_wait, 0)
+    d_poll = d_first_poll
+    wtch_cur = InotifyWatcher()
+    try:
+        while True:
+            d_remaining = d_deadline - time.time()
+            if d_remaining <= 0:
+                return False
+            # Directories may have been made since the last check, watch the closest to each path.
+            for str_path in lstr_paths:
+                wtch_cur.func_watch_directory(func_get_existing_directory(str_path))
+            wtch_cur.func_wait(min(d_poll, d_remaining))
+            if func_paths_made():
+                return True
+            d_poll = min(d_poll * 2, d_max_poll)
+    finally:
+        wtch_cur.func_close()
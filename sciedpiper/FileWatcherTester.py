@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+import FileWatcher
+import os
+import ParentPipelineTester
+import threading
+import time
+import unittest
+
+
+"""
+Tests the FileWatcher module.
+"""
+
+
+__author__ = "Timothy Tickle"
+__copyright__ = "Copyright 2016"
+__credits__ = ["Timothy Tickle", "Brian Haas"]
+__license__ = "MIT"
+__maintainer__ = "Timothy Tickle"
+__email__ = "ttickle@broadinstitute.org"
+__status__ = "Development"
+
+
+class FileWatcherTester(ParentPipelineTester.ParentPipelineTester):
+    """
+    Tests waiting for paths.
+    """
+
+    def func_make_file_later(self, str_file, d_seconds):
+        """ Makes a file ( and its directory ) after a delay in the background. """
+        def func_make():
+            time.sleep(d_seconds)
+            self.func_make_dummy_dir(os.path.dirname(str_file))
+            self.func_make_dummy_file(str_file)
+        thrd_make = threading.Thread(target=func_make)
+        thrd_make.start()
+        return thrd_make
+
+    ########################
+    # func_get_existing_directory
+    ########################
+    def test_func_get_existing_directory_for_existing_parent(self):
+        """ The directory of a path is used when it exists. """
+        str_env = os.path.join(self.str_test_directory, "test_func_get_existing_directory_for_existing_parent")
+        self.func_make_dummy_dir(str_env)
+        str_result = FileWatcher.func_get_existing_directory(os.path.join(str_env, "file.txt"))
+        self.func_remove_dirs([str_env])
+        self.func_test_equals(str_env, str_result)
+
+    def test_func_get_existing_directory_for_missing_parents(self):
+        """ The closest existing directory is used when the directories of the path are not made yet. """
+        str_env = os.path.join(self.str_test_directory, "test_func_get_existing_directory_for_missing_parents")
+        self.func_make_dummy_dir(str_env)
+        str_result = FileWatcher.func_get_existing_directory(os.path.join(str_env, "one", "two", "file.txt"))
+        self.func_remove_dirs([str_env])
+        self.func_test_equals(str_env, str_result)
+
+    ########################
+    # InotifyWatcher
+    ########################
+    def test_inotify_watcher_for_event(self):
+        """ A file made in a watched directory wakes the wait (or the wait times out without inotify). """
+        str_env = os.path.join(self.str_test_directory, "test_inotify_watcher_for_event")
+        str_file = os.path.join(str_env, "file.txt")
+        self.func_make_dummy_dir(str_env)
+        wtch_cur = FileWatcher.InotifyWatcher()
+        f_watched = wtch_cur.func_watch_directory(str_env)
+        thrd_make = self.func_make_file_later(str_file, 0.2)
+        d_start = time.time()
+        f_event = wtch_cur.func_wait(10)
+        d_waited = time.time() - d_start
+        thrd_make.join()
+        wtch_cur.func_close()
+        self.func_remove_files([str_file])
+        self.func_remove_dirs([str_env])
+        if f_watched:
+            self.func_test_true(f_event and d_waited < 5)
+        else:
+            self.func_test_true(not f_event and not wtch_cur.func_is_active())
+
+    def test_inotify_watcher_for_timeout(self):
+        """ Without a change the wait times out. """
+        str_env = os.path.join(self.str_test_directory, "test_inotify_watcher_for_timeout")
+        self.func_make_dummy_dir(str_env)
+        wtch_cur = FileWatcher.InotifyWatcher()
+        wtch_cur.func_watch_directory(str_env)
+        f_event = wtch_cur.func_wait(0.2)
+        wtch_cur.func_close()
+        self.func_remove_dirs([str_env])
+        self.func_test_true(not f_event and not wtch_cur.func_is_active())
+
+    def test_inotify_watcher_for_byte_string_path(self):
+        """ A directory given as a byte string which is not ascii is watched as given. """
+        str_env = os.path.join(self.str_test_directory, "test_inotify_watcher_for_byte_string_path")
+        str_env_bytes = os.path.join(str_env, "caf\u00e9").encode("utf-8")
+        self.func_make_dummy_dir(str_env)
+        os.mkdir(str_env_bytes)
+        wtch_cur = FileWatcher.InotifyWatcher()
+        f_active = wtch_cur.func_is_active()
+        f_watched = wtch_cur.func_watch_directory(str_env_bytes)
+        wtch_cur.func_close()
+        os.rmdir(str_env_bytes)
+        self.func_remove_dirs([str_env])
+        self.func_test_true(f_watched == f_active)
+
+    ########################
+    # func_wait_for_paths
+    ########################
+    def test_func_wait_for_paths_for_existing_paths(self):
+        """ Paths already made return without waiting. """
+        d_start = time.time()
+        f_made = FileWatcher.func_wait_for_paths(["made"], lambda: True, 10)
+        self.func_test_true(f_made and time.time() - d_start < 1)
+
+    def test_func_wait_for_paths_for_late_path(self):
+        """ A path made late returns soon after it is made. """
+        str_env = os.path.join(self.str_test_directory, "test_func_wait_for_paths_for_late_path")
+        str_file = os.path.join(str_env, "sub", "file.txt")
+        self.func_make_dummy_dir(str_env)
+        thrd_make = self.func_make_file_later(str_file, 0.3)
+        d_start = time.time()
+        f_made = FileWatcher.func_wait_for_paths([str_file], lambda: os.path.exists(str_file), 30)
+        d_waited = time.time() - d_start
+        thrd_make.join()
+        self.func_remove_files([str_file])
+        self.func_remove_dirs([os.path.join(str_env, "sub"), str_env])
+        self.func_test_true(f_made and d_waited < 5)
+
+    def test_func_wait_for_paths_for_missing_path(self):
+        """ A path never made waits the most time given. """
+        str_file = os.path.join(self.str_test_directory, "test_func_wait_for_paths_for_missing_path", "file.txt")
+        d_start = time.time()
+        f_made = FileWatcher.func_wait_for_paths([str_file], lambda: os.path.exists(str_file), 0.5)
+        d_waited = time.time() - d_start
+        self.func_test_true(not f_made and 0.5 <= d_waited < 2)
+
+
+#Creates a suite of tests
+def suite():
+    """ Suite aggregates tests and is used to run tests. """
+    return unittest.TestLoader().loadTestsFromTestCase(FileWatcherTester)
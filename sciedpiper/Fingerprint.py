@@ -0,0 +1,329 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+import hashlib
+import json
+import logging
+from multiprocessing.pool import ThreadPool
+import os
+import stat
+
+"""
+Fingerprints the content of the dependencies and products of commands so a
+command is only skipped when the files it used and made are unchanged,
+independent of time stamps (which change with copies and differ between
+machines with clock skew).
+"""
+
+__author__ = "Timothy Tickle"
+__copyright__ = "Copyright 2016"
+__credits__ = ["Timothy Tickle", "Brian Haas"]
+__license__ = "MIT"
+__maintainer__ = "Timothy Tickle"
+__email__ = "ttickle@broadinstitute.org"
+__status__ = "Development"
+
+
+# Ways to fingerprint files
+## Do not fingerprint, use time stamps
+STR_FINGERPRINT_NONE = "none"
+## Hash all of the content
+STR_FINGERPRINT_FULL = "full"
+## Hash the size and evenly spaced chunks of files larger than I_SAMPLE_ABOVE_BYTES
+STR_FINGERPRINT_SAMPLED = "sampled"
+LSTR_FINGERPRINT_CHOICES = [STR_FINGERPRINT_FULL, STR_FINGERPRINT_SAMPLED]
+
+# Name of the fingerprint file in the output directory
+C_STR_FINGERPRINT_FILE = ".sciedpiper_fingerprints.jsonl"
+
+# Files are read in chunks of this many bytes
+I_CHUNK_BYTES = 1024 * 1024
+# When sampling, files larger than this are sampled
+I_SAMPLE_ABOVE_BYTES = 256 * 1024 * 1024
+# When sampling, the number of chunks read (including the first and last)
+I_SAMPLE_CHUNKS = 16
+# Threads reading files
+I_HASH_THREADS = 8
+
+# Keys in each record
+C_STR_TYPE = "type"
+C_STR_TYPE_FILE = "file"
+C_STR_TYPE_COMMAND = "command"
+C_STR_PATH = "path"
+C_STR_INODE = "inode"
+C_STR_SIZE = "size"
+C_STR_MTIME = "mtime"
+C_STR_HASH = "hash"
+C_STR_COMMAND = "command"
+C_STR_DEPENDENCIES = "dependencies"
+C_STR_PRODUCTS = "products"
+
+
+# Tested
+def func_hash_file(str_path, f_sample=False):
+    """
+    Hash of the content of a file, read in chunks.
+
+    * str_path : Path to the file
+               : String
+    * f_sample : True hashes the size and evenly spaced chunks of large files instead of all content
+               : Boolean
+    * return : Hex digest, None if the file can not be read.
+             : String or None
+    """
+
+    hash_cur = hashlib.md5()
+    try:
+        i_size = os.path.getsize(str_path)
+        with open(str_path, "rb") as hndl_file:
+            if f_sample and i_size > I_SAMPLE_ABOVE_BYTES:
+                hash_cur.update(str(i_size).encode("utf-8"))
+                i_step = (i_size - I_CHUNK_BYTES) // (I_SAMPLE_CHUNKS - 1)
+                for i_chunk in range(I_SAMPLE_CHUNKS):
+                    hndl_file.seek(i_chunk * i_step)
+                    hash_cur.update(hndl_file.read(I_CHUNK_BYTES))
+            else:
+                for str_chunk in iter(lambda: hndl_file.read(I_CHUNK_BYTES), b""):
+                    hash_cur.update(str_chunk)
+    except (IOError, OSError):
+        return(None)
+    return(hash_cur.hexdigest())
+
+
+# Tested
+def func_hash_path(str_path, f_sample=False):
+    """
+    Hash of a file, or of a directory's files and their relative paths.
+
+    * return : Hex digest, None if the path does not exist.
+             : String or None
+    """
+
+    if not os.path.isdir(str_path):
+        return(func_hash_file(str_path, f_sample=f_sample))
+    hash_cur = hashlib.md5()
+    for str_root, lstr_dirs, lstr_files in os.walk(str_path):
+        lstr_dirs.sort()
+        for str_file in sorted(lstr_files):
+            str_file_path = os.path.join(str_root, str_file)
+            hash_cur.update(os.path.relpath(str_file_path, str_path).encode("utf-8"))
+            hash_cur.update((func_hash_file(str_file_path, f_sample=f_sample) or "").encode("utf-8"))
+    return(hash_cur.hexdigest())
+
+
+class FingerprintStore:
+    """
+    Fingerprints of files and of the commands which completed.
+    Kept in an append-only json lines file in the output directory. File hashes
+    are reused while the file's inode, size and time stamp are unchanged so
+    unchanged files are not read again.
+    """
+
+    # Tested
+    def __init__(self, str_output_dir, str_mode=STR_FINGERPRINT_FULL, logr_cur=None, i_threads=I_HASH_THREADS):
+        """
+        Initializer, reads the fingerprints if they exist.
+
+        * str_output_dir : Output directory the fingerprints are kept in.
+                         : String
+        * str_mode : How files are fingerprinted
+                   : A value from LSTR_FINGERPRINT_CHOICES
+        * logr_cur : Logger
+                   : Logger
+        * i_threads : Number of threads reading files
+                    : Int
+        """
+
+        self.logr_logger = logr_cur if logr_cur else logging.getLogger(__name__)
+        """ Logger, uses the default logger. """
+
+        self.str_fingerprints = os.path.join(str_output_dir, C_STR_FINGERPRINT_FILE)
+        """ Path to the fingerprint file. """
+
+        self.f_sample = str_mode == STR_FINGERPRINT_SAMPLED
+        """ True indicates large files are sampled. """
+
+        self.i_threads = i_threads
+        """ Number of threads reading files. """
+
+        self.dict_files = {}
+        """ Latest record for each file { path: record } """
+
+        self.dict_commands = {}
+        """ Latest record for each command { command: record } """
+
+        self.dict_unwritten = {}
+        """ Records of files hashed but not yet written { path: record } """
+
+        self.i_hashed = 0
+        """ Number of paths read to hash, used to report how much was reused. """
+
+        self.func_load()
+
+    # Tested
+    def func_load(self):
+        """
+        Read the fingerprints, the latest record for each file and command is kept.
+        """
+
+        self.dict_files = {}
+        self.dict_commands = {}
+        if not os.path.exists(self.str_fingerprints):
+            return
+        with open(self.str_fingerprints, "r") as hndl_fingerprints:
+            for str_line in hndl_fingerprints:
+                try:
+                    dict_record = json.loads(str_line)
+                    if dict_record[C_STR_TYPE] == C_STR_TYPE_FILE:
+                        self.dict_files[dict_record[C_STR_PATH]] = dict_record
+                    else:
+                        self.dict_commands[dict_record[C_STR_COMMAND]] = dict_record
+                except (ValueError, KeyError, TypeError):
+                    self.logr_logger.warning("FingerprintStore.func_load: Skipping an incomplete record in " + self.str_fingerprints)
+        self.logr_logger.info(" ".join(["FingerprintStore.func_load: Read fingerprints for", str(len(self.dict_files)),
+                                        "files and", str(len(self.dict_commands)), "commands from", self.str_fingerprints]))
+
+    def func_append(self, ldict_records):
+        """
+        Append records to the fingerprint file.
+        """
+
+        if not ldict_records:
+            return
+        str_directory = os.path.dirname(self.str_fingerprints)
+        if not os.path.exists(str_directory):
+            os.makedirs(str_directory)
+        with open(self.str_fingerprints, "a") as hndl_fingerprints:
+            hndl_fingerprints.write("".join([json.dumps(dict_record) + "\n" for dict_record in ldict_records]))
+
+    def func_get_key(self, str_path):
+        """
+        ( inode, size, time stamp ) of a path, None if it does not exist.
+        Directories have no key, their content is read each time.
+        """
+
+        try:
+            stat_path = os.stat(str_path)
+        except OSError:
+            return(None)
+        if stat.S_ISDIR(stat_path.st_mode):
+            return(None)
+        return([stat_path.st_ino, stat_path.st_size, stat_path.st_mtime])
+
+    # Tested
+    def func_get_hashes(self, lstr_paths, f_write=True):
+        """
+        Hashes of paths. Hashes are reused for files whose inode, size and time stamp
+        are unchanged, the other paths are read in parallel.
+
+        * lstr_paths : Paths
+                     : List of strings
+        * f_write : True writes the hashes of the paths read to the fingerprint file, False keeps
+                    them until they are written by a later call ( eg. when checking commands ).
+                  : Boolean
+        * return : { path: hash }, the hash is None for paths which do not exist.
+                 : Dict
+        """
+
+        dict_hashes = {}
+        lstr_read = []
+        for str_path in set(lstr_paths):
+            lx_key = self.func_get_key(str_path)
+            dict_record = self.dict_files.get(str_path)
+            if lx_key and dict_record and lx_key == [dict_record[C_STR_INODE], dict_record[C_STR_SIZE], dict_record[C_STR_MTIME]]:
+                dict_hashes[str_path] = dict_record[C_STR_HASH]
+            elif lx_key or os.path.exists(str_path):
+                lstr_read.append(str_path)
+            else:
+                dict_hashes[str_path] = None
+        if lstr_read:
+            self.i_hashed += len(lstr_read)
+            pool_cur = ThreadPool(min(self.i_threads, len(lstr_read))) if self.i_threads > 1 and len(lstr_read) > 1 else None
+            try:
+                func_hash = lambda str_path: func_hash_path(str_path, f_sample=self.f_sample)
+                lstr_hashes = pool_cur.map(func_hash, lstr_read) if pool_cur else [func_hash(str_path) for str_path in lstr_read]
+            finally:
+                if pool_cur:
+                    pool_cur.close()
+                    pool_cur.join()
+
+            # Remember the hashes of files so they are not read again.
+            for str_path, str_hash in zip(lstr_read, lstr_hashes):
+                dict_hashes[str_path] = str_hash
+                lx_key = self.func_get_key(str_path)
+                if lx_key and str_hash:
+                    dict_record = {C_STR_TYPE: C_STR_TYPE_FILE, C_STR_PATH: str_path, C_STR_INODE: lx_key[0],
+                                   C_STR_SIZE: lx_key[1], C_STR_MTIME: lx_key[2], C_STR_HASH: str_hash}
+                    self.dict_files[str_path] = dict_record
+                    self.dict_unwritten[str_path] = dict_record
+        if f_write:
+            self.func_append([self.dict_unwritten.pop(str_path) for str_path in set(lstr_paths) if str_path in self.dict_unwritten])
+        return(dict_hashes)
+
+    # Tested
+    def func_record_command(self, cmd_cur):
+        """
+        Record the fingerprints of a command which completed: the command and
+        the hashes of its dependencies and products.
+
+        * cmd_cur : Command
+        """
+
+        lstr_dependencies = [rsc_dependency.str_id for rsc_dependency in cmd_cur.func_iter_parents()]
+        lstr_products = [rsc_product.str_id for rsc_product in cmd_cur.func_iter_children()]
+        dict_hashes = self.func_get_hashes(lstr_dependencies + lstr_products)
+        dict_record = {C_STR_TYPE: C_STR_TYPE_COMMAND, C_STR_COMMAND: cmd_cur.str_id,
+                       C_STR_DEPENDENCIES: dict([(str_path, dict_hashes[str_path]) for str_path in lstr_dependencies]),
+                       C_STR_PRODUCTS: dict([(str_path, dict_hashes[str_path]) for str_path in lstr_products])}
+        self.dict_commands[cmd_cur.str_id] = dict_record
+        self.func_append([dict_record])
+
+    # Tested
+    def func_is_recorded(self, cmd_cur):
+        """
+        True indicates fingerprints were recorded for the command.
+        """
+
+        return(cmd_cur.str_id in self.dict_commands)
+
+    # Tested
+    def func_command_matches(self, cmd_cur, func_is_valid_missing=None):
+        """
+        Checks the command completed before with the same dependencies and products and
+        none of their content changed since.
+
+        * cmd_cur : Command
+        * func_is_valid_missing : Function given a path which no longer exists, returning True
+                                  if it is ok that the path is missing ( eg. it was cleaned ).
+                                  If None, a missing path does not match.
+                                : Function or None
+        * return : True indicates the fingerprints match.
+                 : Boolean
+        """
+
+        dict_record = self.dict_commands.get(cmd_cur.str_id)
+        if not dict_record:
+            return(False)
+        lstr_dependencies = [rsc_dependency.str_id for rsc_dependency in cmd_cur.func_iter_parents()]
+        lstr_products = [rsc_product.str_id for rsc_product in cmd_cur.func_iter_children()]
+        if((set(lstr_dependencies) != set(dict_record[C_STR_DEPENDENCIES])) or
+           (set(lstr_products) != set(dict_record[C_STR_PRODUCTS]))):
+            return(False)
+        dict_hashes = self.func_get_hashes(lstr_dependencies + lstr_products, f_write=False)
+        dict_recorded = dict(dict_record[C_STR_DEPENDENCIES])
+        dict_recorded.update(dict_record[C_STR_PRODUCTS])
+        for str_path in lstr_dependencies + lstr_products:
+            if dict_hashes[str_path] is None:
+                if not (func_is_valid_missing and func_is_valid_missing(str_path)):
+                    return(False)
+            elif dict_hashes[str_path] != dict_recorded[str_path]:
+                return(False)
+        return(True)
+
+    def __str__(self):
+        return(" ".join(["FingerprintStore{ Files:", str(len(self.dict_files)),
+                         "Commands:", str(len(self.dict_commands)),
+                         "Files read:", str(self.i_hashed), "}"]))
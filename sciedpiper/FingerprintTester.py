@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+import Command
+import Fingerprint
+import hashlib
+import os
+import ParentPipelineTester
+import unittest
+
+
+"""
+Tests the Fingerprint module.
+"""
+
+
+__author__ = "Timothy Tickle"
+__copyright__ = "Copyright 2016"
+__credits__ = ["Timothy Tickle", "Brian Haas"]
+__license__ = "MIT"
+__maintainer__ = "Timothy Tickle"
+__email__ = "ttickle@broadinstitute.org"
+__status__ = "Development"
+
+
+class FingerprintTester(ParentPipelineTester.ParentPipelineTester):
+    """
+    Tests fingerprinting files and commands.
+    """
+
+    def func_write(self, str_path, str_content):
+        """ Writes content to a file. """
+        with open(str_path, "w") as hndl_file:
+            hndl_file.write(str_content)
+
+    ########################
+    # func_hash_file, func_hash_path
+    ########################
+    def test_func_hash_file(self):
+        """ The hash is of the whole content. """
+        str_env = self.func_make_env("test_func_hash_file")
+        str_file = os.path.join(str_env, "file.txt")
+        str_content = "content\n" * 1000
+        self.func_write(str_file, str_content)
+        str_result = Fingerprint.func_hash_file(str_file)
+        self.func_remove_dirs_recursively(str_env)
+        self.func_test_equals(hashlib.md5(str_content.encode("utf-8")).hexdigest(), str_result)
+
+    def test_func_hash_file_for_missing_file(self):
+        """ Missing files have no hash. """
+        str_file = os.path.join(self.str_test_directory, "test_func_hash_file_for_missing_file.txt")
+        self.func_test_equals(None, Fingerprint.func_hash_file(str_file))
+
+    def test_func_hash_file_for_sampled(self):
+        """ Sampling large files reads chunks, a change between chunks is not seen, a change in a chunk or in size is. """
+        str_env = self.func_make_env("test_func_hash_file_for_sampled")
+        str_file = os.path.join(str_env, "file.txt")
+        i_chunk_bytes, i_sample_above_bytes, i_sample_chunks = (Fingerprint.I_CHUNK_BYTES,
+                                                                Fingerprint.I_SAMPLE_ABOVE_BYTES,
+                                                                Fingerprint.I_SAMPLE_CHUNKS)
+        try:
+            # Chunks of 2 bytes at 0, 9 and 18 of a 20 byte file
+            Fingerprint.I_CHUNK_BYTES, Fingerprint.I_SAMPLE_ABOVE_BYTES, Fingerprint.I_SAMPLE_CHUNKS = (2, 10, 3)
+            self.func_write(str_file, "a" * 20)
+            str_original = Fingerprint.func_hash_file(str_file, f_sample=True)
+            self.func_write(str_file, "a" * 5 + "b" + "a" * 14)
+            str_between = Fingerprint.func_hash_file(str_file, f_sample=True)
+            self.func_write(str_file, "a" * 9 + "b" + "a" * 10)
+            str_in_chunk = Fingerprint.func_hash_file(str_file, f_sample=True)
+            str_full = Fingerprint.func_hash_file(str_file)
+        finally:
+            Fingerprint.I_CHUNK_BYTES, Fingerprint.I_SAMPLE_ABOVE_BYTES, Fingerprint.I_SAMPLE_CHUNKS = (i_chunk_bytes,
+                                                                                                         i_sample_above_bytes,
+                                                                                                         i_sample_chunks)
+        self.func_remove_dirs_recursively(str_env)
+        self.func_test_true(str_original == str_between and str_original != str_in_chunk and str_full != str_in_chunk)
+
+    def test_func_hash_path_for_directory(self):
+        """ A directory's hash changes when a file in it changes. """
+        str_env = self.func_make_env("test_func_hash_path_for_directory")
+        str_sub = os.path.join(str_env, "sub")
+        self.func_make_dummy_dir(str_sub)
+        self.func_write(os.path.join(str_sub, "file.txt"), "one")
+        str_before = Fingerprint.func_hash_path(str_env)
+        str_same = Fingerprint.func_hash_path(str_env)
+        self.func_write(os.path.join(str_sub, "file.txt"), "two")
+        str_after = Fingerprint.func_hash_path(str_env)
+        self.func_remove_dirs_recursively(str_env)
+        self.func_test_true(str_before == str_same and str_before != str_after)
+
+    ########################
+    # FingerprintStore
+    ########################
+    def test_func_get_hashes_for_reuse(self):
+        """ Unchanged files are not read again, also after reading the fingerprints again. Changed files are. """
+        str_env = self.func_make_env("test_func_get_hashes_for_reuse")
+        lstr_files = [os.path.join(str_env, "file_" + str(i_index) + ".txt") for i_index in range(4)]
+        for str_file in lstr_files:
+            self.func_write(str_file, str_file)
+        fngr_cur = Fingerprint.FingerprintStore(str_env)
+        dict_first = fngr_cur.func_get_hashes(lstr_files)
+        i_first = fngr_cur.i_hashed
+        fngr_cur = Fingerprint.FingerprintStore(str_env)
+        dict_second = fngr_cur.func_get_hashes(lstr_files)
+        i_second = fngr_cur.i_hashed
+        self.func_write(lstr_files[0], "changed content")
+        dict_third = fngr_cur.func_get_hashes(lstr_files)
+        i_third = fngr_cur.i_hashed
+        self.func_remove_dirs_recursively(str_env)
+        self.func_test_true(dict_first == dict_second and dict_first[lstr_files[0]] != dict_third[lstr_files[0]] and
+                            i_first == 4 and i_second == 0 and i_third == 1)
+
+    def test_func_get_hashes_for_not_writing(self):
+        """ Hashes not written are kept, then written by a later call without reading the files again. """
+        str_env = self.func_make_env("test_func_get_hashes_for_not_writing")
+        str_file = os.path.join(str_env, "file.txt")
+        self.func_write(str_file, "content")
+        fngr_cur = Fingerprint.FingerprintStore(str_env)
+        fngr_cur.func_get_hashes([str_file], f_write=False)
+        f_written_before = os.path.exists(fngr_cur.str_fingerprints)
+        fngr_cur.func_get_hashes([str_file])
+        i_hashed = fngr_cur.i_hashed
+        fngr_new = Fingerprint.FingerprintStore(str_env)
+        fngr_new.func_get_hashes([str_file])
+        self.func_remove_dirs_recursively(str_env)
+        self.func_test_true(not f_written_before and i_hashed == 1 and fngr_new.i_hashed == 0)
+
+    def test_func_command_matches(self):
+        """ A recorded command matches until a dependency's content changes. """
+        str_env = self.func_make_env("test_func_command_matches")
+        str_dependency = os.path.join(str_env, "dependency.txt")
+        str_product = os.path.join(str_env, "product.txt")
+        self.func_write(str_dependency, "dependency")
+        self.func_write(str_product, "product")
+        cmd_cur = Command.Command("make product", [str_dependency], [str_product])
+        fngr_cur = Fingerprint.FingerprintStore(str_env)
+        f_before = fngr_cur.func_command_matches(cmd_cur)
+        fngr_cur.func_record_command(cmd_cur)
+        fngr_cur = Fingerprint.FingerprintStore(str_env)
+        f_recorded = fngr_cur.func_is_recorded(cmd_cur) and fngr_cur.func_command_matches(cmd_cur)
+        # Same content written again ( new time stamp )
+        self.func_write(str_dependency, "dependency")
+        f_rewritten = fngr_cur.func_command_matches(cmd_cur)
+        self.func_write(str_dependency, "new dependency")
+        f_changed = fngr_cur.func_command_matches(cmd_cur)
+        self.func_remove_dirs_recursively(str_env)
+        self.func_test_true(not f_before and f_recorded and f_rewritten and not f_changed)
+
+    def test_func_command_matches_for_missing_product(self):
+        """ A missing product only matches if it is allowed to be missing ( eg. cleaned ). """
+        str_env = self.func_make_env("test_func_command_matches_for_missing_product")
+        str_dependency = os.path.join(str_env, "dependency.txt")
+        str_product = os.path.join(str_env, "product.txt")
+        self.func_write(str_dependency, "dependency")
+        self.func_write(str_product, "product")
+        cmd_cur = Command.Command("make product", [str_dependency], [str_product])
+        fngr_cur = Fingerprint.FingerprintStore(str_env)
+        fngr_cur.func_record_command(cmd_cur)
+        os.remove(str_product)
+        f_missing = fngr_cur.func_command_matches(cmd_cur)
+        f_allowed = fngr_cur.func_command_matches(cmd_cur, func_is_valid_missing=lambda str_path: str_path == str_product)
+        self.func_remove_dirs_recursively(str_env)
+        self.func_test_true(not f_missing and f_allowed)
+
+
+#Creates a suite of tests
+def suite():
+    """ Suite aggregates tests and is used to run tests. """
+    return unittest.TestLoader().loadTestsFromTestCase(FingerprintTester)
@@ -15,10 +15,12 @@ __email__ = "ttickle@broadinstitute.org"
 __status__ = "Development"
 
 import Commandline
+import JobLedger
 import os
 import ParentPipelineTester
 import PipelineRunner
 import Pipeline
+import shutil
 import time
 import unittest
 
@@ -121,13 +123,15 @@ class FunctionalTester(ParentPipelineTester.ParentPipelineTester):
         # Generic files
         str_job_log = os.path.join(str_output_dir,
                                    PipelineRunner.C_STR_JOB_LOGGER_NAME)
+        str_job_ledger = os.path.join(str_output_dir,
+                                      JobLedger.C_STR_LEDGER_FILE)
 
         return({"sample_files": [str_file_1, str_file_2, str_file_3,
                           str_file_4, str_file_5, str_file_6, str_file_7,
                           str_file_2_ok, str_file_3_ok, str_file_6_ok,
                           str_file_7_ok, str_log, str_sample_job_log,
                           str_sample_bash, str_sample_log, str_sample_err],
-                "generic_files": [str_job_log],
+                "generic_files": [str_job_log, str_job_ledger],
                 "sample_directories": [str_dir_4, str_dir_5, str_dir_6,
                                 str_dir_1, str_dir_2, str_dir_3, str_dir_sample],
                 "generic_directories": [str_dir_log]})
@@ -576,6 +580,133 @@ class FunctionalTester(ParentPipelineTester.ParentPipelineTester):
         self.func_remove_dirs(sorted(dict_env["generic_directories"]+[str_env],reverse=True))
         self.func_test_true(f_success)
 
+    ####
+    ## Test running 3 sample jobs, streaming and resuming
+    ####
+    def test_app_for_three_sample_jobs_stream_resume(self):
+        """
+        Test the scenario where three samples are ran as concurrent jobs
+        with the sample file streamed, each sample should be made and
+        recorded as completed in the job ledger. A product of the second
+        sample is then removed, resuming the run should not remake it
+        but starting at the second row should. The sample runner arguments
+        should not be passed on to the script of each sample.
+        """
+        # Create test environment
+        str_env = os.path.join(self.str_test_directory,
+                               "test_app_for_three_sample_jobs_stream_resume")
+        self.func_make_dummy_dir(str_env)
+        lstr_samples = ["sample_one", "sample_two", "sample_three"]
+        str_removed = os.path.join(str_env, "sample_two", "dir3", "file7.txt")
+        str_removed_ok = os.path.join(str_env, "sample_two", "dir3", ".file7.txt.ok")
+        str_command = " ".join([self.str_python,
+                                self.str_script_three_sample,
+                                "--concurrent_jobs",
+                                "2",
+                                "--sample_file",
+                                self.str_sample_three_file,
+                                "--log",
+                                os.path.join(str_env, self.str_log_file_name),
+                                "--out_dir",
+                                str_env])
+        x_result = Commandline.Commandline().func_CMD(" ".join([str_command, "--stream_samples"]))
+        # Check test environment for results
+        f_success = x_result
+        for str_sample in lstr_samples:
+            with open(os.path.join(str_env, str_sample, "dir3", "file7.txt"), "r") as hndl_read:
+                f_success = f_success and hndl_read.read() == str_sample
+        ldgr_jobs = JobLedger.JobLedger(str_env)
+        f_success = f_success and all([ldgr_jobs.func_is_completed(i_row, str_sample)
+                                       for i_row, str_sample in enumerate(lstr_samples)])
+        # Resume
+        self.func_remove_files([str_removed, str_removed_ok])
+        x_result = Commandline.Commandline().func_CMD(" ".join([str_command, "--resume"]))
+        f_success = f_success and x_result and not os.path.exists(str_removed)
+        # Start at the second sample
+        x_result = Commandline.Commandline().func_CMD(" ".join([str_command, "--sample_start_row", "1"]))
+        f_success = f_success and x_result and os.path.exists(str_removed)
+        with open(os.path.join(str_env, "sample_two", "ExampleThreeSample.sh"), "r") as hndl_read:
+            str_script = hndl_read.read()
+        f_success = f_success and not [str_arg for str_arg in ["--stream_samples", "--sample_start_row", "--resume"]
+                                       if str_arg in str_script]
+        # Destroy environment
+        shutil.rmtree(str_env)
+        # Evaluate
+        self.func_test_true(f_success)
+
+    def test_app_for_stream_missing_sample_file(self):
+        """
+        Test the scenario where a streamed sample file does not exist,
+        the run should fail before any job starts.
+        """
+        # Create test environment
+        str_env = os.path.join(self.str_test_directory,
+                               "test_app_for_stream_missing_sample_file")
+        self.func_make_dummy_dir(str_env)
+        str_command = " ".join([self.str_python,
+                                self.str_script_three_sample,
+                                "--concurrent_jobs",
+                                "2",
+                                "--stream_samples",
+                                "--sample_file",
+                                os.path.join(str_env, "missing.sample.txt"),
+                                "--log",
+                                os.path.join(str_env, self.str_log_file_name),
+                                "--out_dir",
+                                str_env])
+        x_result = Commandline.Commandline().func_CMD(str_command)
+        with open(os.path.join(str_env, PipelineRunner.C_STR_JOB_LOGGER_NAME), "r") as hndl_read:
+            f_logged = "Could not find the sample file" in hndl_read.read()
+        # Destroy environment
+        shutil.rmtree(str_env)
+        # Evaluate
+        self.func_test_true(not x_result and f_logged)
+
+    ####
+    ## Test merging 3 samples and resuming
+    ####
+    def test_app_for_merged_three_sample_resume(self):
+        """
+        Test the scenario where the commands of three samples are merged into
+        one pipeline, each sample should be made and recorded as completed
+        in the job ledger. The run is then resumed after a product of the
+        second sample is removed, completed samples are not ran again so it
+        should not be remade.
+        """
+        # Create test environment
+        str_env = os.path.join(self.str_test_directory,
+                               "test_app_for_merged_three_sample_resume")
+        self.func_make_dummy_dir(str_env)
+        lstr_samples = ["sample_one", "sample_two", "sample_three"]
+        str_removed = os.path.join(str_env, "sample_two", "dir3", "file7.txt")
+        str_removed_ok = os.path.join(str_env, "sample_two", "dir3", ".file7.txt.ok")
+        str_command = " ".join([self.str_python,
+                                self.str_script_three_sample,
+                                "--merge_samples",
+                                "--sample_file",
+                                self.str_sample_three_file,
+                                "--log",
+                                os.path.join(str_env, self.str_log_file_name),
+                                "--out_dir",
+                                str_env])
+        x_result = Commandline.Commandline().func_CMD(str_command)
+        # Check test environment for results
+        f_success = x_result
+        for str_sample in lstr_samples:
+            with open(os.path.join(str_env, str_sample, "dir3", "file7.txt"), "r") as hndl_read:
+                f_success = f_success and hndl_read.read() == str_sample
+        ldgr_jobs = JobLedger.JobLedger(str_env)
+        f_success = f_success and all([ldgr_jobs.func_is_completed(i_row, str_sample)
+                                       for i_row, str_sample in enumerate(lstr_samples)])
+        # Resume
+        self.func_remove_files([str_removed, str_removed_ok])
+        x_result = Commandline.Commandline().func_CMD(" ".join([str_command, "--resume"]))
+        f_success = f_success and x_result and not os.path.exists(str_removed)
+        # Destroy environment
+        shutil.rmtree(str_env)
+        # Evaluate
+        self.func_test_true(f_success)
+
     ####
     ## Test timestamp for no stale
     ####
@@ -4,7 +4,6 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
-from collections import deque
 
 STR_TYPE_VERTEX = "VERTEX"
 
@@ -26,6 +25,12 @@ class Graph:
         and singletons without loosing them.
         """
 
+        self.lvtx_ordered = None
+        """
+        Cache of the breadth-wise order of the vertices,
+        None indicates the graph changed since the order was made.
+        """
+
         # Every graph has root ("Groot")
         self.func_add_vertex(vtx_new=self.root)
 
@@ -35,7 +40,7 @@ class Graph:
         Turn vertices that are terminal.
         """
         return [cur_vtx for cur_vtx in self
-            if(not cur_vtx.func_get_children()
+            if(not cur_vtx.func_has_child()
                and (not cur_vtx.str_id == self.root.str_id))]
 
     # Tested
@@ -59,6 +64,7 @@ class Graph:
         """
         Note will write over any existing vertex with the same key / id.
         """
+        self.lvtx_ordered = None
         self.vertices[vtx_new.str_id] = vtx_new
 
         # If the vertex has no parent and is not Groot, attach to Groot
@@ -89,6 +95,7 @@ class Graph:
         # Deny invalid nodes
         if not vtx_parent or not vtx_child:
             return False
+        self.lvtx_ordered = None
 
         # Current working vertices
         vtx_cur_parent = vtx_parent
@@ -127,6 +134,7 @@ class Graph:
         """
         if not vtx_del in self:
             return
+        self.lvtx_ordered = None
         lvtx_children = vtx_del.func_get_children()
         lvtx_parents = vtx_del.func_get_parents()
         for vtx_child in lvtx_children:
@@ -164,39 +172,42 @@ class Graph:
                 self.func_add_edge(vtx_parent, vtx_cur_dep)
         return True
 
+    # Tested
+    def func_invalidate_order(self):
+        """
+        Forget the cached order of the vertices.
+        Changes made through the graph do this, call this after
+        linking vertices already in the graph directly
+        (Vertex.func_add_child, Vertex.func_add_parent, ...).
+        """
+        self.lvtx_ordered = None
+
     # Tested
     def __iter__(self):
         """
         Generator performs a breadth-wise traversal.
+        A vertex is visited after all of its parents are visited,
+        starting at root and visiting children in the order of func_get_children.
+        Vertices with a parent that can not be reached from root are not visited.
+        The order is cached until the graph is changed.
         """
-        dict_visited = { self.root: None }
-        """ Indicate which nodes are visted """
-        dq_cache = deque([self.root])
-        """ Cache of nodes to vist """
-        list_node_ordered = [self.root]
-        """ Ordered list of nodes visted to return """
-
-        # Iterate through cache and add children to cache
-        while len(dq_cache):
-            vtx_cur = dq_cache.popleft()
-            # Add children to cache from current nodes and indicated visited
-            for vtx_child in vtx_cur.func_get_children():
-            # Make sure you did not already see the child
-                if not vtx_child in dict_visited:
-                    # If we have not put this vertex in the cache,
-                    # We add it to the graph if all of it's other
-                    # parents have been seen,
-                    # add to cache and indicate it is visited.
-                    f_store = True
-                    for vtx_cur_parent in vtx_child.func_get_parents():
-                        if((not vtx_cur_parent in dict_visited)
-                            and (not vtx_cur_parent == vtx_cur)):
-                            f_store = False
-                    if f_store:
-                        dq_cache.append(vtx_child)
-                        dict_visited[vtx_child] = None
+        if self.lvtx_ordered is None:
+            # Kahn's algorithm, a vertex is ready when its last parent is visited.
+            dict_parents_left = {}
+            """ Number of parents not yet visited for vertices with a visited parent """
+            list_node_ordered = [self.root]
+            """ Ordered list of nodes visted to return, also the queue of nodes to visit """
+            i_next = 0
+            while i_next < len(list_node_ordered):
+                vtx_cur = list_node_ordered[i_next]
+                i_next += 1
+                for vtx_child in vtx_cur.func_get_children():
+                    i_left = dict_parents_left.get(vtx_child.str_id, len(vtx_child.dict_vtx_parents)) - 1
+                    dict_parents_left[vtx_child.str_id] = i_left
+                    if not i_left:
                         list_node_ordered.append(vtx_child)
-        return iter(list_node_ordered)
+            self.lvtx_ordered = list_node_ordered
+        return iter(self.lvtx_ordered)
 
     # Tested
     def __len__(self):
@@ -227,6 +238,10 @@ class Vertex:
         self.dict_vtx_parents = {}
         self.dict_vtx_children = {}
         self.str_type = STR_TYPE_VERTEX
+        self.lvtx_sorted_parents = None
+        """ Cache of the sorted parents, None indicates an edge changed """
+        self.lvtx_sorted_children = None
+        """ Cache of the sorted children, None indicates an edge changed """
 
     # Used in testing
     def __id__(self):
@@ -242,11 +257,13 @@ class Vertex:
         """
         if vtx_parent and vtx_parent.str_id:
             self.dict_vtx_parents[vtx_parent.str_id] = vtx_parent
+            self.lvtx_sorted_parents = None
 
     # Tested
     def func_remove_parent(self, vtx_parent):
         if vtx_parent.str_id in self.dict_vtx_parents:
             del self.dict_vtx_parents[vtx_parent.str_id]
+            self.lvtx_sorted_parents = None
 
     # Tested
     def func_has_parent(self):
@@ -267,6 +284,7 @@ class Vertex:
         """
         if vtx_child and vtx_child.str_id:
             self.dict_vtx_children[vtx_child.str_id] = vtx_child
+            self.lvtx_sorted_children = None
 
     # Tested
     def func_has_child(self):
@@ -276,14 +294,43 @@ class Vertex:
     def func_remove_child(self, vtx_child):
         if vtx_child.str_id in self.dict_vtx_children:
             del self.dict_vtx_children[vtx_child.str_id]
+            self.lvtx_sorted_children = None
 
     # Tested
     def func_get_parents(self):
-        return sorted(self.dict_vtx_parents.values())
+        """
+        Sorted parents, sorted once and reused until a parent is added or removed.
+        The list is shared, do not change it.
+        """
+        if self.lvtx_sorted_parents is None:
+            self.lvtx_sorted_parents = sorted(self.dict_vtx_parents.values())
+        return self.lvtx_sorted_parents
 
     # Tested
     def func_get_children(self):
-        return sorted(self.dict_vtx_children.values())
+        """
+        Sorted children, sorted once and reused until a child is added or removed.
+        The list is shared, do not change it.
+        """
+        if self.lvtx_sorted_children is None:
+            self.lvtx_sorted_children = sorted(self.dict_vtx_children.values())
+        return self.lvtx_sorted_children
+
+    # Tested
+    def func_iter_parents(self):
+        """
+        Iterator of the parents in no particular order, nothing is copied or sorted.
+        Do not add or remove parents while iterating.
+        """
+        return self.dict_vtx_parents.itervalues()
+
+    # Tested
+    def func_iter_children(self):
+        """
+        Iterator of the children in no particular order, nothing is copied or sorted.
+        Do not add or remove children while iterating.
+        """
+        return self.dict_vtx_children.itervalues()
 
     # Tested
     def __str__(self):
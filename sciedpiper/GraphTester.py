@@ -315,6 +315,53 @@ class GraphTester(ParentPipelineTester.ParentPipelineTester):
         str_result = str(sorted([vtx_child.str_id for vtx_child in cur_vertex.func_get_children()]))
         self.func_test_equals(str_answer, str_result)
 
+    def test_get_children_for_cached_sort(self):
+        """ The sorted children are reused until a child changes. """
+        cur_vertex = Graph.Vertex("ID")
+        cur_vertex.func_add_child(Graph.Vertex("Child09"))
+        lvtx_first = cur_vertex.func_get_children()
+        f_reused = lvtx_first is cur_vertex.func_get_children()
+        cur_vertex.func_add_child(Graph.Vertex("Child01"))
+        lvtx_added = cur_vertex.func_get_children()
+        cur_vertex.func_remove_child(Graph.Vertex("Child09"))
+        lvtx_removed = cur_vertex.func_get_children()
+        self.func_test_true(f_reused and len(lvtx_first) == 1 and len(lvtx_added) == 2 and
+                            [vtx_child.str_id for vtx_child in lvtx_removed] == ["Child01"])
+
+    def test_get_parents_for_cached_sort(self):
+        """ The sorted parents are reused until a parent changes. """
+        cur_vertex = Graph.Vertex("ID")
+        cur_vertex.func_add_parent(Graph.Vertex("Parent09"))
+        lvtx_first = cur_vertex.func_get_parents()
+        f_reused = lvtx_first is cur_vertex.func_get_parents()
+        cur_vertex.func_remove_parent(Graph.Vertex("Parent09"))
+        self.func_test_true(f_reused and len(lvtx_first) == 1 and cur_vertex.func_get_parents() == [])
+
+# func_iter_parents / func_iter_children
+    def test_iter_parents_for_multiple_parents(self):
+        """ The parent iterator gives every parent. """
+        str_answer = str(sorted(['Parent09', 'Parent01', 'Parent10']))
+        cur_vertex = Graph.Vertex("ID")
+        cur_vertex.func_add_parent(Graph.Vertex("Parent09"))
+        cur_vertex.func_add_parent(Graph.Vertex("Parent01"))
+        cur_vertex.func_add_parent(Graph.Vertex("Parent10"))
+        str_result = str(sorted([vtx_parent.str_id for vtx_parent in cur_vertex.func_iter_parents()]))
+        self.func_test_equals(str_answer, str_result)
+
+    def test_iter_children_for_multiple_children(self):
+        """ The child iterator gives every child. """
+        str_answer = str(sorted(['Child09', 'Child01', 'Child10']))
+        cur_vertex = Graph.Vertex("ID")
+        cur_vertex.func_add_child(Graph.Vertex("Child09"))
+        cur_vertex.func_add_child(Graph.Vertex("Child01"))
+        cur_vertex.func_add_child(Graph.Vertex("Child10"))
+        str_result = str(sorted([vtx_child.str_id for vtx_child in cur_vertex.func_iter_children()]))
+        self.func_test_equals(str_answer, str_result)
+
+    def test_iter_children_for_no_child(self):
+        """ The child iterator of a vertex without children is empty. """
+        self.func_test_equals("[]", str(list(Graph.Vertex("ID").func_iter_children())))
+
 # func_add_child
     def test_add_child_for_good_case(self):
         """ Testing add child for good case. """
@@ -521,6 +568,92 @@ class GraphTester(ParentPipelineTester.ParentPipelineTester):
       str_result = "\n".join(sorted(lstr_traversal))
       self.func_test_equals(str_answer, str_result)
 
+    def test_iter_for_child_after_all_parents(self):
+      """
+      A vertex is visited only after all its parents, even when one parent is deeper in the graph.
+      """
+      str_answer = ",".join(["_i_am_Groot_", "A", "B", "C", "D"])
+      cur_graph = Graph.Graph()
+      vtx_a = Graph.Vertex("A")
+      vtx_b = Graph.Vertex("B")
+      vtx_c = Graph.Vertex("C")
+      vtx_d = Graph.Vertex("D")
+      cur_graph.func_add_edge(vtx_a, vtx_b)
+      cur_graph.func_add_edge(vtx_b, vtx_c)
+      cur_graph.func_add_edge(vtx_c, vtx_d)
+      cur_graph.func_add_edge(vtx_a, vtx_d)
+      str_result = ",".join([vtx_node.str_id for vtx_node in cur_graph])
+      self.func_test_equals(str_answer, str_result)
+
+    def test_iter_for_cached_order(self):
+      """
+      The order is made once and reused while the graph does not change.
+      """
+      cur_graph = self.func_make_complex_graph()
+      list(cur_graph)
+      lvtx_first = cur_graph.lvtx_ordered
+      list(cur_graph)
+      self.func_test_true(lvtx_first is not None and lvtx_first is cur_graph.lvtx_ordered)
+
+    def test_iter_for_cache_reset_on_change(self):
+      """
+      Changing the graph makes a new order.
+      """
+      str_answer = str(sorted(["_i_am_Groot_", 21, "One", 22, 23, "Two", 24, "Four", "Three", "Five", "Seven", "Six", "Eight", "New"]))
+      cur_graph = self.func_make_complex_graph()
+      list(cur_graph)
+      cur_graph.func_delete_vertex(cur_graph.func_get_vertex(33))
+      cur_graph.func_add_edge(cur_graph.func_get_vertex("Eight"), Graph.Vertex("New"))
+      str_result = str(sorted([vtx_node.str_id for vtx_node in cur_graph]))
+      self.func_test_equals(str_answer, str_result)
+
+    def test_iter_for_invalidate_order(self):
+      """
+      Linking vertices directly is seen after the order is invalidated.
+      """
+      cur_graph = self.func_make_one_cycle_graph()
+      list(cur_graph)
+      vtx_new = Graph.Vertex(25)
+      vtx_24 = cur_graph.func_get_vertex(24)
+      cur_graph.vertices[25] = vtx_new
+      vtx_24.func_add_child(vtx_new)
+      vtx_new.func_add_parent(vtx_24)
+      f_before = 25 in [vtx_node.str_id for vtx_node in cur_graph]
+      cur_graph.func_invalidate_order()
+      f_after = 25 in [vtx_node.str_id for vtx_node in cur_graph]
+      self.func_test_true((not f_before) and f_after)
+
+    def func_make_layered_graph(self, i_vertices, i_width=100):
+      """
+      Layers of vertices where each vertex has two parents in the layer before.
+      """
+      cur_graph = Graph.Graph()
+      lvtx_previous = []
+      lvtx_layer = []
+      for i_index in range(i_vertices):
+        vtx_cur = Graph.Vertex(i_index + 1)
+        if lvtx_previous:
+          cur_graph.func_add_edge(lvtx_previous[i_index % len(lvtx_previous)], vtx_cur)
+          cur_graph.func_add_edge(lvtx_previous[(i_index + 1) % len(lvtx_previous)], vtx_cur)
+        else:
+          cur_graph.func_add_vertex(vtx_cur)
+        lvtx_layer.append(vtx_cur)
+        if len(lvtx_layer) == i_width:
+          lvtx_previous = lvtx_layer
+          lvtx_layer = []
+      return cur_graph
+
+    def test_iter_for_layered_graph(self):
+      """
+      Every vertex of a layered graph is visited once, after its parents.
+      """
+      cur_graph = self.func_make_layered_graph(50, i_width=10)
+      lvtx_ordered = list(cur_graph)
+      dict_position = dict([(vtx_node.str_id, i_position) for i_position, vtx_node in enumerate(lvtx_ordered)])
+      f_after_parents = all([dict_position[vtx_parent.str_id] < dict_position[vtx_node.str_id]
+                             for vtx_node in lvtx_ordered for vtx_parent in vtx_node.func_get_parents()])
+      self.func_test_true(len(lvtx_ordered) == 51 and len(dict_position) == 51 and f_after_parents)
+
 # _str_
     def test_str_for_empty_graph(self):
       """
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+import logging
+import Queue
+import Scheduler
+import subprocess
+import threading
+import time
+
+"""
+Runs jobs (eg. the script made for each sample in a sample file) on the
+command line, at most a given number at a time. A job starts as soon as a
+running job ends, the return code and duration of every job is kept and
+summarized when all have ended.
+"""
+
+__author__ = "Timothy Tickle"
+__copyright__ = "Copyright 2016"
+__credits__ = ["Timothy Tickle", "Brian Haas"]
+__license__ = "MIT"
+__maintainer__ = "Timothy Tickle"
+__email__ = "ttickle@broadinstitute.org"
+__status__ = "Development"
+
+
+# Return code of a job which could not be started
+I_RETURN_CODE_NOT_STARTED = 127
+
+# Indices of the results of a job
+I_RESULT_NAME = 0
+I_RESULT_RETURN_CODE = 1
+I_RESULT_SECONDS = 2
+
+
+# Tested
+def func_get_job_slots(i_max_jobs, i_commands_per_job=1, d_oversubscription=None, i_cores=None):
+    """
+    Number of jobs which may run at the same time.
+
+    * i_max_jobs : Most jobs to run at the same time ( --concurrent_jobs ).
+                 : Int
+    * i_commands_per_job : Commands each job may run at the same time ( --max_parallel_commands ).
+                         : Int
+    * d_oversubscription : Most commands running in all jobs per core, fewer jobs run if needed.
+                           If None, only i_max_jobs limits the jobs.
+                         : Float or None
+    * i_cores : Cores of the machine, if None the cores the machine reports.
+              : Int or None
+    * return : Number of jobs, at least 1.
+             : Int
+    """
+
+    i_slots = max(i_max_jobs, 1)
+    if d_oversubscription and d_oversubscription > 0:
+        i_cores = i_cores if i_cores else Scheduler.func_get_node_cores()
+        i_allowed = int(i_cores * d_oversubscription) // max(i_commands_per_job, 1)
+        i_slots = min(i_slots, max(i_allowed, 1))
+    return(i_slots)
+
+
+class JobExecutor:
+    """
+    Runs jobs on the command line, each in its own thread, no more than the slots at a time.
+    """
+
+    # Tested
+    def __init__(self, i_max_jobs=1, i_commands_per_job=1, d_oversubscription=None, i_cores=None, logr_cur=None):
+        """
+        Initializer
+
+        * i_max_jobs : Most jobs to run at the same time.
+                     : Int
+        * i_commands_per_job : Commands each job may run at the same time.
+                             : Int
+        * d_oversubscription : Most commands running in all jobs per core, if None no limit.
+                             : Float or None
+        * i_cores : Cores of the machine, if None the cores the machine reports.
+                  : Int or None
+        * logr_cur : Logger
+                   : Logger
+        """
+
+        self.logr_logger = logr_cur if logr_cur else logging.getLogger(__name__)
+        """ Logger, uses the default logger. """
+
+        self.i_slots = func_get_job_slots(i_max_jobs=i_max_jobs,
+                                          i_commands_per_job=i_commands_per_job,
+                                          d_oversubscription=d_oversubscription,
+                                          i_cores=i_cores)
+        """ Most jobs running at the same time. """
+
+        if self.i_slots < i_max_jobs:
+            self.logr_logger.info(" ".join(["JobExecutor:: Running", str(self.i_slots), "of the", str(i_max_jobs),
+                                            "requested concurrent jobs so jobs running", str(i_commands_per_job),
+                                            "commands each do not oversubscribe the cores."]))
+
+    def __func_run_job(self, i_job, str_name, str_job, q_finished):
+        """
+        Runs a job on the command line and places its index and ( name, return code, seconds ) on the queue.
+        Used as the body of the threads running jobs.
+        """
+
+        d_start = time.time()
+        i_return_code = I_RETURN_CODE_NOT_STARTED
+        try:
+            i_return_code = subprocess.Popen(["bash", "-c", str_job]).wait()
+        except Exception as e:
+            self.logr_logger.error(" ".join(["JobExecutor.func_run:: Could not run job", str_name,
+                                             "Command:", str_job, "Error =", str(e)]))
+        finally:
+            q_finished.put((i_job, (str_name, i_return_code, time.time() - d_start)))
+
+    # Tested
+    def func_run(self, ltpl_jobs, func_started=None, func_ended=None):
+        """
+        Runs jobs, starting the next job as soon as a running job ends.
+        All jobs are ran, a job which fails does not stop the others.
+        Jobs are taken from ltpl_jobs only when a slot is free, so a generator
+        can make each job ( eg. write its script ) just before it starts.
+
+        * ltpl_jobs : ( name, command ) of each job.
+                    : List or iterable of tuples
+        * func_started : Called with the index and name of a job when it starts.
+                       : Function or None
+        * func_ended : Called with the index and result of a job when it ends.
+                     : Function or None
+        * return : ( name, return code, seconds ) of each job in the order given.
+                 : List of tuples
+        """
+
+        q_finished = Queue.Queue()
+        # { index of job: result }
+        dict_results = {}
+        itr_jobs = iter(ltpl_jobs)
+        f_more_jobs = True
+        i_next = 0
+        i_running = 0
+        while f_more_jobs or i_running:
+            # Fill the free slots
+            while f_more_jobs and i_running < self.i_slots:
+                tpl_job = next(itr_jobs, None)
+                if tpl_job is None:
+                    f_more_jobs = False
+                    break
+                str_name, str_job = tpl_job
+                self.logr_logger.info(" ".join(["JobExecutor.func_run:: Start running job", str_name]))
+                if func_started:
+                    func_started(i_next, str_name)
+                thrd_job = threading.Thread(target=self.__func_run_job,
+                                            args=(i_next, str_name, str_job, q_finished))
+                thrd_job.daemon = True
+                thrd_job.start()
+                i_next += 1
+                i_running += 1
+            if not i_running:
+                break
+
+            # Wait for a job to end
+            i_job, tpl_result = q_finished.get()
+            i_running -= 1
+            dict_results[i_job] = tpl_result
+            self.logr_logger.info(" ".join(["JobExecutor.func_run:: Ended job", tpl_result[I_RESULT_NAME],
+                                            "Return code:", str(tpl_result[I_RESULT_RETURN_CODE]),
+                                            "Time::", str(round(tpl_result[I_RESULT_SECONDS]))]))
+            if func_ended:
+                func_ended(i_job, tpl_result)
+        return([dict_results[i_job] for i_job in range(i_next)])
+
+    # Tested
+    def func_summarize(self, ltpl_results):
+        """
+        Table of the return code and duration of each job.
+
+        * ltpl_results : Results from func_run
+                       : List of tuples
+        * return : Summary, one line per job.
+                 : String
+        """
+
+        lstr_summary = ["\t".join(["Job", "Status", "Return_code", "Seconds"])]
+        for str_name, i_return_code, d_seconds in ltpl_results:
+            lstr_summary.append("\t".join([str_name,
+                                           "OK" if i_return_code == 0 else "ERROR",
+                                           str(i_return_code),
+                                           str(round(d_seconds, 1))]))
+        i_failed = len([tpl_result for tpl_result in ltpl_results if tpl_result[I_RESULT_RETURN_CODE] != 0])
+        lstr_summary.append(" ".join([str(len(ltpl_results) - i_failed), "job(s) ran without error,",
+                                      str(i_failed), "job(s) failed."]))
+        return("\n".join(lstr_summary))
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+import JobExecutor
+import os
+import ParentPipelineTester
+import time
+import unittest
+
+
+"""
+Tests the JobExecutor module.
+"""
+
+
+__author__ = "Timothy Tickle"
+__copyright__ = "Copyright 2016"
+__credits__ = ["Timothy Tickle", "Brian Haas"]
+__license__ = "MIT"
+__maintainer__ = "Timothy Tickle"
+__email__ = "ttickle@broadinstitute.org"
+__status__ = "Development"
+
+
+class JobExecutorTester(ParentPipelineTester.ParentPipelineTester):
+    """
+    Tests running jobs a limited number at a time.
+    """
+
+    ########################
+    # func_get_job_slots
+    ########################
+    def test_func_get_job_slots(self):
+        """ Without oversubscription only the jobs requested limit the slots. """
+        self.func_test_equals(3, JobExecutor.func_get_job_slots(3, i_commands_per_job=8, i_cores=2))
+
+    def test_func_get_job_slots_for_oversubscription(self):
+        """ Jobs running many commands each get fewer slots, but always at least one. """
+        self.func_test_equals([2, 1, 4], [JobExecutor.func_get_job_slots(8, i_commands_per_job=4, d_oversubscription=1.0, i_cores=8),
+                                          JobExecutor.func_get_job_slots(8, i_commands_per_job=16, d_oversubscription=1.0, i_cores=8),
+                                          JobExecutor.func_get_job_slots(8, i_commands_per_job=4, d_oversubscription=2.0, i_cores=8)])
+
+    ########################
+    # func_run
+    ########################
+    def test_func_run_for_return_codes(self):
+        """ Every job runs even if one fails, the results are in the order of the jobs. """
+        exe_cur = JobExecutor.JobExecutor(i_max_jobs=2)
+        ltpl_results = exe_cur.func_run([("sample_1", "exit 0"), ("sample_2", "exit 3"), ("sample_3", "true")])
+        self.func_test_equals([("sample_1", 0), ("sample_2", 3), ("sample_3", 0)],
+                              [(tpl_result[JobExecutor.I_RESULT_NAME], tpl_result[JobExecutor.I_RESULT_RETURN_CODE])
+                               for tpl_result in ltpl_results])
+
+    def test_func_run_for_slots(self):
+        """ No more jobs than the slots run at a time and a job starts as soon as another ends. """
+        str_env = os.path.join(self.str_test_directory, "test_func_run_for_slots")
+        str_log = os.path.join(str_env, "log.txt")
+        self.func_make_dummy_dir(str_env)
+        ltpl_jobs = [("sample_1", "echo start >> " + str_log + "; sleep 1.5; echo end >> " + str_log)]
+        for i_job in range(2, 6):
+            ltpl_jobs.append(("sample_" + str(i_job), "echo start >> " + str_log + "; sleep 0.3; echo end >> " + str_log))
+        exe_cur = JobExecutor.JobExecutor(i_max_jobs=2)
+        d_start = time.time()
+        ltpl_results = exe_cur.func_run(ltpl_jobs)
+        d_seconds = time.time() - d_start
+        with open(str_log) as hndl_log:
+            lstr_log = [str_line.strip() for str_line in hndl_log]
+        os.remove(str_log)
+        self.func_remove_dirs([str_env])
+        i_running, i_most_running = 0, 0
+        for str_line in lstr_log:
+            i_running += 1 if str_line == "start" else -1
+            i_most_running = max(i_running, i_most_running)
+        # The four short jobs run one after the other beside the long job.
+        self.func_test_true(i_most_running == 2 and d_seconds < 2.5 and
+                            ltpl_results[0][JobExecutor.I_RESULT_SECONDS] >= 1.5)
+
+    def test_func_run_for_job_generator(self):
+        """ Jobs are taken from a generator only when a slot is free. """
+        str_env = os.path.join(self.str_test_directory, "test_func_run_for_job_generator")
+        str_log = os.path.join(str_env, "log.txt")
+        self.func_make_dummy_dir(str_env)
+        li_ended_before_made = []
+
+        def func_make_jobs():
+            for i_job in range(3):
+                i_ended = 0
+                if os.path.exists(str_log):
+                    with open(str_log) as hndl_log:
+                        i_ended = len(hndl_log.readlines())
+                li_ended_before_made.append(i_ended)
+                yield(("sample_" + str(i_job), "sleep 0.2; echo end >> " + str_log))
+
+        exe_cur = JobExecutor.JobExecutor(i_max_jobs=2)
+        ltpl_results = exe_cur.func_run(func_make_jobs())
+        os.remove(str_log)
+        self.func_remove_dirs([str_env])
+        self.func_test_true(li_ended_before_made == [0, 0, 1] and len(ltpl_results) == 3)
+
+    def test_func_run_for_started_and_ended(self):
+        """ Each job is reported when it starts and when it ends. """
+        ltpl_started = []
+        ltpl_ended = []
+        exe_cur = JobExecutor.JobExecutor(i_max_jobs=2)
+        exe_cur.func_run([("sample_1", "exit 0"), ("sample_2", "exit 1")],
+                         func_started=lambda i_job, str_name: ltpl_started.append((i_job, str_name)),
+                         func_ended=lambda i_job, tpl_result: ltpl_ended.append((i_job, tpl_result[JobExecutor.I_RESULT_RETURN_CODE])))
+        self.func_test_true(ltpl_started == [(0, "sample_1"), (1, "sample_2")] and
+                            sorted(ltpl_ended) == [(0, 0), (1, 1)])
+
+    ########################
+    # func_summarize
+    ########################
+    def test_func_summarize(self):
+        """ Each job has a line with its status, followed by the counts. """
+        exe_cur = JobExecutor.JobExecutor(i_max_jobs=1)
+        str_summary = exe_cur.func_summarize([("sample_1", 0, 1.04), ("sample_2", 2, 3.0)])
+        self.func_test_equals("\n".join(["Job\tStatus\tReturn_code\tSeconds",
+                                         "sample_1\tOK\t0\t1.0",
+                                         "sample_2\tERROR\t2\t3.0",
+                                         "1 job(s) ran without error, 1 job(s) failed."]), str_summary)
+
+
+#Creates a suite of tests
+def suite():
+    """ Suite aggregates tests and is used to run tests. """
+    return unittest.TestLoader().loadTestsFromTestCase(JobExecutorTester)
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+import json
+import logging
+import os
+import socket
+import time
+
+"""
+Records the state of each sample (row of the sample file) of a multi-sample
+run in one append-only file in the output directory, so a run which stopped
+part way can be resumed without starting the samples which completed.
+"""
+
+__author__ = "Timothy Tickle"
+__copyright__ = "Copyright 2016"
+__credits__ = ["Timothy Tickle", "Brian Haas"]
+__license__ = "MIT"
+__maintainer__ = "Timothy Tickle"
+__email__ = "ttickle@broadinstitute.org"
+__status__ = "Development"
+
+
+# Name of the ledger file in the output directory
+C_STR_LEDGER_FILE = ".sciedpiper_jobs.jsonl"
+
+# Keys in each record
+C_STR_ROW = "row"
+C_STR_SAMPLE = "sample"
+C_STR_STATE = "state"
+C_STR_RETURN_CODE = "return_code"
+C_STR_START = "start"
+C_STR_END = "end"
+C_STR_HOST = "host"
+
+# States of a sample
+STR_STATE_RUNNING = "running"
+STR_STATE_COMPLETED = "completed"
+STR_STATE_FAILED = "failed"
+
+
+class JobLedger:
+    """
+    Append-only record of the samples of a run.
+    Each line is a json record { row, sample, state, return_code, start, end, host },
+    later records for a row replace earlier ones. A sample recorded as running
+    which has no later record was stopped with the run. A partial last line
+    (eg. the run was killed) is ignored.
+    """
+
+    # Tested
+    def __init__(self, str_output_dir, logr_cur=None):
+        """
+        Initializer, reads the ledger if it exists.
+
+        * str_output_dir : Output directory the ledger is kept in.
+                         : String
+        * logr_cur : Logger
+                   : Logger
+        """
+
+        self.logr_logger = logr_cur if logr_cur else logging.getLogger(__name__)
+        """ Logger, uses the default logger. """
+
+        self.str_ledger = os.path.join(str_output_dir, C_STR_LEDGER_FILE)
+        """ Path to the ledger. """
+
+        self.dict_records = {}
+        """ Current record for each row { row: record } """
+
+        self.str_host = socket.gethostname()
+        """ Host this run is on. """
+
+        self.func_load()
+
+    # Tested
+    def func_load(self):
+        """
+        Read the ledger, the latest record for each row is kept.
+
+        * return : Number of records read.
+                 : Int
+        """
+
+        self.dict_records = {}
+        i_records = 0
+        if not os.path.exists(self.str_ledger):
+            return(i_records)
+        with open(self.str_ledger, "r") as hndl_ledger:
+            for str_line in hndl_ledger:
+                try:
+                    dict_record = json.loads(str_line)
+                    i_row = dict_record[C_STR_ROW]
+                except (ValueError, KeyError, TypeError):
+                    self.logr_logger.warning("JobLedger.func_load: Skipping an incomplete record in " + self.str_ledger)
+                    continue
+                i_records += 1
+                self.dict_records[i_row] = dict_record
+        self.logr_logger.info(" ".join(["JobLedger.func_load: Read", str(i_records), "records for",
+                                        str(len(self.dict_records)), "samples from", self.str_ledger]))
+        return(i_records)
+
+    def func_append(self, dict_record):
+        """
+        Append a record to the ledger and keep it in memory.
+        """
+
+        with open(self.str_ledger, "a") as hndl_ledger:
+            hndl_ledger.write(json.dumps(dict_record) + "\n")
+            hndl_ledger.flush()
+        self.dict_records[dict_record[C_STR_ROW]] = dict_record
+
+    # Tested
+    def func_record_start(self, i_row, str_sample):
+        """
+        Record a sample started.
+
+        * i_row : Row of the sample in the sample file ( base 0 ).
+                : Int
+        * str_sample : Name of the sample
+                     : String
+        """
+
+        self.func_append({C_STR_ROW: i_row, C_STR_SAMPLE: str_sample, C_STR_STATE: STR_STATE_RUNNING,
+                          C_STR_RETURN_CODE: None, C_STR_START: time.time(), C_STR_END: None,
+                          C_STR_HOST: self.str_host})
+
+    # Tested
+    def func_record_end(self, i_row, str_sample, i_return_code):
+        """
+        Record a sample ended, completed if the return code is 0 otherwise failed.
+
+        * i_row : Row of the sample in the sample file ( base 0 ).
+                : Int
+        * str_sample : Name of the sample
+                     : String
+        * i_return_code : Return code of the sample's job
+                        : Int
+        """
+
+        dict_started = self.dict_records.get(i_row, {})
+        d_start = dict_started.get(C_STR_START) if dict_started.get(C_STR_SAMPLE) == str_sample else None
+        self.func_append({C_STR_ROW: i_row, C_STR_SAMPLE: str_sample,
+                          C_STR_STATE: STR_STATE_COMPLETED if i_return_code == 0 else STR_STATE_FAILED,
+                          C_STR_RETURN_CODE: i_return_code, C_STR_START: d_start, C_STR_END: time.time(),
+                          C_STR_HOST: self.str_host})
+
+    # Tested
+    def func_get_state(self, i_row, str_sample):
+        """
+        State of a sample, None if the row was not recorded or was recorded for another
+        sample ( the sample file changed ).
+
+        * return : A STR_STATE_* value or None
+                 : String or None
+        """
+
+        dict_record = self.dict_records.get(i_row)
+        if not dict_record or dict_record.get(C_STR_SAMPLE) != str_sample:
+            return(None)
+        return(dict_record.get(C_STR_STATE))
+
+    # Tested
+    def func_is_completed(self, i_row, str_sample):
+        """
+        True indicates the sample completed without error.
+        """
+
+        return(self.func_get_state(i_row, str_sample) == STR_STATE_COMPLETED)
+
+    def __str__(self):
+        """
+        Counts of samples in each state.
+        """
+
+        dict_counts = {}
+        for dict_record in self.dict_records.values():
+            dict_counts[dict_record.get(C_STR_STATE)] = dict_counts.get(dict_record.get(C_STR_STATE), 0) + 1
+        return("JobLedger{" + ", ".join([str(str_state) + "=" + str(dict_counts[str_state])
+                                         for str_state in sorted(dict_counts)]) + "}")
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+import JobLedger
+import os
+import ParentPipelineTester
+import unittest
+
+
+"""
+Tests the JobLedger module.
+"""
+
+
+__author__ = "Timothy Tickle"
+__copyright__ = "Copyright 2016"
+__credits__ = ["Timothy Tickle", "Brian Haas"]
+__license__ = "MIT"
+__maintainer__ = "Timothy Tickle"
+__email__ = "ttickle@broadinstitute.org"
+__status__ = "Development"
+
+
+class JobLedgerTester(ParentPipelineTester.ParentPipelineTester):
+    """
+    Tests recording the state of samples in a run.
+    """
+
+    ########################
+    # func_record_start, func_record_end, func_get_state
+    ########################
+    def test_func_get_state_for_new_run(self):
+        """ The state of samples is read back when the ledger is read again. """
+        str_env = self.func_make_env("test_func_get_state_for_new_run")
+        ldgr_cur = JobLedger.JobLedger(str_env)
+        ldgr_cur.func_record_start(0, "sample_1")
+        ldgr_cur.func_record_start(1, "sample_2")
+        ldgr_cur.func_record_start(2, "sample_3")
+        ldgr_cur.func_record_end(0, "sample_1", 0)
+        ldgr_cur.func_record_end(1, "sample_2", 2)
+        ldgr_cur = JobLedger.JobLedger(str_env)
+        lstr_states = [ldgr_cur.func_get_state(0, "sample_1"),
+                       ldgr_cur.func_get_state(1, "sample_2"),
+                       ldgr_cur.func_get_state(2, "sample_3"),
+                       ldgr_cur.func_get_state(3, "sample_4")]
+        self.func_remove_dirs_recursively(str_env)
+        self.func_test_equals([JobLedger.STR_STATE_COMPLETED, JobLedger.STR_STATE_FAILED,
+                               JobLedger.STR_STATE_RUNNING, None], lstr_states)
+
+    def test_func_record_end_for_record(self):
+        """ The record of an ended sample has its return code, times and host. """
+        str_env = self.func_make_env("test_func_record_end_for_record")
+        ldgr_cur = JobLedger.JobLedger(str_env)
+        ldgr_cur.func_record_start(0, "sample_1")
+        ldgr_cur.func_record_end(0, "sample_1", 3)
+        dict_record = JobLedger.JobLedger(str_env).dict_records[0]
+        self.func_remove_dirs_recursively(str_env)
+        self.func_test_true(dict_record[JobLedger.C_STR_RETURN_CODE] == 3 and
+                            dict_record[JobLedger.C_STR_START] <= dict_record[JobLedger.C_STR_END] and
+                            dict_record[JobLedger.C_STR_HOST])
+
+    ########################
+    # func_is_completed
+    ########################
+    def test_func_is_completed_for_changed_sample_file(self):
+        """ A row completed for another sample ( the sample file changed ) is not completed. """
+        str_env = self.func_make_env("test_func_is_completed_for_changed_sample_file")
+        ldgr_cur = JobLedger.JobLedger(str_env)
+        ldgr_cur.func_record_start(0, "sample_1")
+        ldgr_cur.func_record_end(0, "sample_1", 0)
+        f_same = ldgr_cur.func_is_completed(0, "sample_1")
+        f_changed = ldgr_cur.func_is_completed(0, "sample_9")
+        self.func_remove_dirs_recursively(str_env)
+        self.func_test_true(f_same and not f_changed)
+
+    def test_func_load_for_partial_record(self):
+        """ A partial last record ( the run was killed while writing ) is skipped. """
+        str_env = self.func_make_env("test_func_load_for_partial_record")
+        ldgr_cur = JobLedger.JobLedger(str_env)
+        ldgr_cur.func_record_start(0, "sample_1")
+        ldgr_cur.func_record_end(0, "sample_1", 0)
+        with open(ldgr_cur.str_ledger, "a") as hndl_ledger:
+            hndl_ledger.write('{"row": 1, "sample": "sam')
+        ldgr_cur = JobLedger.JobLedger(str_env)
+        str_result = str(ldgr_cur)
+        self.func_remove_dirs_recursively(str_env)
+        self.func_test_equals("JobLedger{completed=1}", str_result)
+
+
+#Creates a suite of tests
+def suite():
+    """ Suite aggregates tests and is used to run tests. """
+    return unittest.TestLoader().loadTestsFromTestCase(JobLedgerTester)
@@ -0,0 +1,283 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+import io
+import logging
+import os
+import threading
+import time
+
+"""
+Exposes the progress of a run as Prometheus metrics in the text format,
+written to a file ( ending in .prom ) a node exporter's textfile collector
+reads. Updating a metric only changes a number in memory, the file is
+written from a thread every few seconds and replaced at once ( renamed
+from a temporary file ) so a scrape never reads a partial file.
+"""
+
+__author__ = "Timothy Tickle"
+__copyright__ = "Copyright 2016"
+__credits__ = ["Timothy Tickle", "Brian Haas"]
+__license__ = "MIT"
+__maintainer__ = "Timothy Tickle"
+__email__ = "ttickle@broadinstitute.org"
+__status__ = "Development"
+
+
+# Metric types
+C_STR_COUNTER = "counter"
+C_STR_GAUGE = "gauge"
+C_STR_HISTOGRAM = "histogram"
+
+# Metrics of a pipeline run
+C_STR_COMMANDS = "sciedpiper_commands"
+C_STR_COMMANDS_RUNNING = "sciedpiper_commands_running"
+C_STR_COMMANDS_DONE = "sciedpiper_commands_done_total"
+C_STR_COMMANDS_FAILED = "sciedpiper_commands_failed_total"
+C_STR_COMMANDS_SKIPPED = "sciedpiper_commands_skipped_total"
+C_STR_PRODUCED_BYTES = "sciedpiper_produced_bytes_total"
+C_STR_CLEANED_BYTES = "sciedpiper_cleaned_bytes_total"
+C_STR_COMPRESSION_INPUT_BYTES = "sciedpiper_compression_input_bytes_total"
+C_STR_COMPRESSION_OUTPUT_BYTES = "sciedpiper_compression_output_bytes_total"
+C_STR_COMPRESSION_RATIO = "sciedpiper_compression_ratio"
+C_STR_PRODUCT_WAIT_SECONDS = "sciedpiper_product_wait_seconds_total"
+C_STR_COMMAND_SECONDS = "sciedpiper_command_duration_seconds"
+
+# Metrics of samples ran as jobs
+C_STR_JOBS = "sciedpiper_jobs"
+C_STR_JOBS_RUNNING = "sciedpiper_jobs_running"
+C_STR_JOBS_DONE = "sciedpiper_jobs_done_total"
+C_STR_JOBS_FAILED = "sciedpiper_jobs_failed_total"
+C_STR_JOB_SECONDS = "sciedpiper_job_duration_seconds"
+
+# Written with every file
+C_STR_LAST_WRITE = "sciedpiper_metrics_last_write_timestamp_seconds"
+
+# { metric: ( type, help ) }
+C_DICT_METRICS = {C_STR_COMMANDS: (C_STR_GAUGE, "Commands in the pipeline."),
+                  C_STR_COMMANDS_RUNNING: (C_STR_GAUGE, "Commands running on the command line."),
+                  C_STR_COMMANDS_DONE: (C_STR_COUNTER, "Commands which ran without error."),
+                  C_STR_COMMANDS_FAILED: (C_STR_COUNTER, "Commands which ran with an error."),
+                  C_STR_COMMANDS_SKIPPED: (C_STR_COUNTER, "Commands skipped, their products are from a previous valid run."),
+                  C_STR_PRODUCED_BYTES: (C_STR_COUNTER, "Bytes of the products of commands which ran without error."),
+                  C_STR_CLEANED_BYTES: (C_STR_COUNTER, "Bytes of intermediate files removed by cleaning."),
+                  C_STR_COMPRESSION_INPUT_BYTES: (C_STR_COUNTER, "Bytes of the paths compressed."),
+                  C_STR_COMPRESSION_OUTPUT_BYTES: (C_STR_COUNTER, "Bytes of the paths compressed after compression."),
+                  C_STR_COMPRESSION_RATIO: (C_STR_GAUGE, "Bytes compressed per byte after compression."),
+                  C_STR_PRODUCT_WAIT_SECONDS: (C_STR_COUNTER, "Seconds waited for the products of commands to appear."),
+                  C_STR_COMMAND_SECONDS: (C_STR_HISTOGRAM, "Seconds commands ran on the command line."),
+                  C_STR_JOBS: (C_STR_GAUGE, "Samples to run as jobs."),
+                  C_STR_JOBS_RUNNING: (C_STR_GAUGE, "Jobs running."),
+                  C_STR_JOBS_DONE: (C_STR_COUNTER, "Jobs which ended without error."),
+                  C_STR_JOBS_FAILED: (C_STR_COUNTER, "Jobs which ended with an error."),
+                  C_STR_JOB_SECONDS: (C_STR_HISTOGRAM, "Seconds jobs ran."),
+                  C_STR_LAST_WRITE: (C_STR_GAUGE, "Time the metrics were written.")}
+
+# Upper bounds ( seconds ) of the buckets of durations, commands run from seconds to days
+C_LD_SECONDS_BUCKETS = [1, 5, 15, 30, 60, 300, 900, 1800, 3600, 7200, 14400, 28800, 86400]
+
+# Seconds between writing the file
+D_WRITE_SECONDS = 15.0
+
+
+# Tested
+def func_format_labels(dict_labels, tpl_extra=None):
+    """
+    Labels of a sample in the text format.
+
+    * dict_labels : { name: value }
+                  : Dict
+    * tpl_extra : ( name, value ) of one more label, added last.
+                : Tuple or None
+    * return : Labels with braces, empty without labels.
+             : String
+    """
+
+    ltpl_labels = sorted(dict_labels.items()) + ([tpl_extra] if tpl_extra else [])
+    if not ltpl_labels:
+        return("")
+    return("{" + ",".join([str_name + "=\"" + "{}".format(x_value).replace("\\", "\\\\").replace("\n", "\\n").replace("\"", "\\\"") + "\""
+                           for str_name, x_value in ltpl_labels]) + "}")
+
+
+# Tested
+def func_format_value(d_value):
+    """
+    Number in the text format, integers without a decimal point.
+    """
+
+    if d_value == int(d_value):
+        return(str(int(d_value)))
+    return(repr(float(d_value)))
+
+
+class MetricsExporter:
+    """
+    Metrics of a run, updated from any thread and written to a file periodically.
+    """
+
+    # Tested
+    def __init__(self, str_metrics_file, dict_labels=None, d_write_seconds=D_WRITE_SECONDS, logr_cur=None):
+        """
+        Initializer
+
+        * str_metrics_file : File the metrics are written to, should end in .prom for the textfile collector.
+                           : String
+        * dict_labels : Labels of every metric, distinguishes runs writing to the same collector.
+                      : Dict or None
+        * d_write_seconds : Seconds between writing the file.
+                          : Float
+        * logr_cur : Logger
+                   : Logger
+        """
+
+        self.logr_logger = logr_cur if logr_cur else logging.getLogger(__name__)
+        """ Logger, uses the default logger. """
+
+        self.str_metrics_file = str_metrics_file
+        """ File the metrics are written to. """
+
+        self.dict_labels = dict_labels if dict_labels else {}
+        """ Labels of every metric. """
+
+        self.d_write_seconds = d_write_seconds
+        """ Seconds between writing the file. """
+
+        self.dict_values = {}
+        """ { metric: value } of counters and gauges updated. """
+
+        self.dict_histograms = {}
+        """ { metric: [ count in each bucket, count, sum ] } of histograms observed. """
+
+        self.__lock = threading.Lock()
+        self.__evnt_stop = threading.Event()
+        self.__thrd_writer = None
+
+    # Tested
+    def func_add(self, str_metric, d_value=1):
+        """
+        Adds to a counter or gauge.
+        """
+
+        with self.__lock:
+            self.dict_values[str_metric] = self.dict_values.get(str_metric, 0) + d_value
+
+    # Tested
+    def func_set(self, str_metric, d_value):
+        """
+        Sets a gauge.
+        """
+
+        with self.__lock:
+            self.dict_values[str_metric] = d_value
+
+    # Tested
+    def func_observe(self, str_metric, d_value):
+        """
+        Adds an observation to a histogram.
+        """
+
+        with self.__lock:
+            if str_metric not in self.dict_histograms:
+                self.dict_histograms[str_metric] = [[0] * len(C_LD_SECONDS_BUCKETS), 0, 0.0]
+            lx_histogram = self.dict_histograms[str_metric]
+            for i_bucket, d_bound in enumerate(C_LD_SECONDS_BUCKETS):
+                if d_value <= d_bound:
+                    lx_histogram[0][i_bucket] += 1
+            lx_histogram[1] += 1
+            lx_histogram[2] += d_value
+
+    # Tested
+    def func_format(self):
+        """
+        Metrics in the Prometheus text format.
+
+        * return : Text of the file
+                 : String
+        """
+
+        with self.__lock:
+            dict_values = dict(self.dict_values)
+            dict_histograms = dict([(str_metric, [list(lx_histogram[0]), lx_histogram[1], lx_histogram[2]])
+                                    for str_metric, lx_histogram in self.dict_histograms.items()])
+        d_input = dict_values.get(C_STR_COMPRESSION_INPUT_BYTES, 0)
+        d_output = dict_values.get(C_STR_COMPRESSION_OUTPUT_BYTES, 0)
+        if d_input and d_output:
+            dict_values[C_STR_COMPRESSION_RATIO] = round(d_input / d_output, 4)
+        dict_values[C_STR_LAST_WRITE] = round(time.time(), 3)
+
+        str_labels = func_format_labels(self.dict_labels)
+        lstr_lines = []
+        for str_metric in sorted(set(dict_values) | set(dict_histograms)):
+            str_type, str_help = C_DICT_METRICS.get(str_metric, (C_STR_GAUGE, str_metric))
+            lstr_lines.append(" ".join(["# HELP", str_metric, str_help]))
+            lstr_lines.append(" ".join(["# TYPE", str_metric, str_type]))
+            if str_metric in dict_histograms:
+                li_buckets, i_count, d_sum = dict_histograms[str_metric]
+                for d_bound, i_bucket in zip(C_LD_SECONDS_BUCKETS, li_buckets):
+                    lstr_lines.append(str_metric + "_bucket" + func_format_labels(self.dict_labels, ("le", func_format_value(d_bound))) +
+                                      " " + str(i_bucket))
+                lstr_lines.append(str_metric + "_bucket" + func_format_labels(self.dict_labels, ("le", "+Inf")) + " " + str(i_count))
+                lstr_lines.append(str_metric + "_sum" + str_labels + " " + func_format_value(d_sum))
+                lstr_lines.append(str_metric + "_count" + str_labels + " " + str(i_count))
+            else:
+                lstr_lines.append(str_metric + str_labels + " " + func_format_value(dict_values[str_metric]))
+        return("\n".join(lstr_lines) + "\n")
+
+    # Tested
+    def func_write(self):
+        """
+        Replaces the file with the current metrics. The metrics are written to a
+        temporary file in the same directory which is renamed over the file.
+
+        * return : True indicates the file was written.
+                 : Boolean
+        """
+
+        str_temp = os.path.join(os.path.dirname(os.path.abspath(self.str_metrics_file)),
+                                "." + os.path.basename(self.str_metrics_file) + "." + str(os.getpid()) + ".tmp")
+        try:
+            with io.open(str_temp, "w", encoding="utf-8") as hndl_metrics:
+                hndl_metrics.write(self.func_format())
+            os.rename(str_temp, self.str_metrics_file)
+        except (IOError, OSError) as e:
+            self.logr_logger.warning(" ".join(["MetricsExporter.func_write: Could not write the metrics to",
+                                               self.str_metrics_file, "Error =", str(e)]))
+            return(False)
+        return(True)
+
+    # Tested
+    def func_start(self):
+        """
+        Writes the file now and then every d_write_seconds until stopped.
+        """
+
+        self.func_write()
+        if self.__thrd_writer is None:
+            self.__evnt_stop.clear()
+            self.__thrd_writer = threading.Thread(target=self.__func_write_periodically)
+            self.__thrd_writer.daemon = True
+            self.__thrd_writer.start()
+
+    # Tested
+    def func_stop(self):
+        """
+        Stops writing periodically and writes the final metrics.
+        """
+
+        if self.__thrd_writer is not None:
+            self.__evnt_stop.set()
+            self.__thrd_writer.join()
+            self.__thrd_writer = None
+        self.func_write()
+
+    def __func_write_periodically(self):
+        while not self.__evnt_stop.wait(self.d_write_seconds):
+            self.func_write()
+
+    def __str__(self):
+        return("MetricsExporter{ File: " + self.str_metrics_file + " Metrics: " +
+               str(len(self.dict_values) + len(self.dict_histograms)) + " }")
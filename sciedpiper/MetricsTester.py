@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+import io
+import Metrics
+import os
+import ParentPipelineTester
+import time
+import unittest
+
+
+"""
+Tests the Metrics module.
+"""
+
+
+__author__ = "Timothy Tickle"
+__copyright__ = "Copyright 2016"
+__credits__ = ["Timothy Tickle", "Brian Haas"]
+__license__ = "MIT"
+__maintainer__ = "Timothy Tickle"
+__email__ = "ttickle@broadinstitute.org"
+__status__ = "Development"
+
+
+class MetricsTester(ParentPipelineTester.ParentPipelineTester):
+    """
+    Tests exposing the progress of a run as Prometheus metrics.
+    """
+
+    def func_read(self, str_file):
+        """ Reads and removes a file. """
+        with io.open(str_file, encoding="utf-8") as hndl_metrics:
+            str_metrics = hndl_metrics.read()
+        os.remove(str_file)
+        return str_metrics
+
+    ########################
+    # func_format_labels
+    ########################
+    def test_func_format_labels(self):
+        """ Labels are sorted and their values escaped. """
+        self.func_test_equals("{a=\"1\",b=\"say \\\"hi\\\"\",le=\"5\"}",
+                              Metrics.func_format_labels({"b": "say \"hi\"", "a": 1}, ("le", "5")))
+
+    def test_func_format_labels_for_no_labels(self):
+        """ Without labels there are no braces. """
+        self.func_test_equals("", Metrics.func_format_labels({}))
+
+    ########################
+    # func_format_value
+    ########################
+    def test_func_format_value(self):
+        """ Whole numbers are written without a decimal point. """
+        self.func_test_true(["3", "0.25"] == [Metrics.func_format_value(3.0), Metrics.func_format_value(0.25)])
+
+    ########################
+    # func_format
+    ########################
+    def test_func_format(self):
+        """ Counters, gauges and histograms are written with their help, type and labels. """
+        mtrc_cur = Metrics.MetricsExporter("metrics.prom", {"pipeline": "test"})
+        mtrc_cur.func_set(Metrics.C_STR_COMMANDS, 4)
+        mtrc_cur.func_add(Metrics.C_STR_COMMANDS_DONE)
+        mtrc_cur.func_add(Metrics.C_STR_COMMANDS_DONE)
+        mtrc_cur.func_observe(Metrics.C_STR_COMMAND_SECONDS, 3)
+        mtrc_cur.func_observe(Metrics.C_STR_COMMAND_SECONDS, 20)
+        lstr_lines = mtrc_cur.func_format().split("\n")
+        self.func_test_true("# TYPE sciedpiper_commands gauge" in lstr_lines and
+                            "sciedpiper_commands{pipeline=\"test\"} 4" in lstr_lines and
+                            "# TYPE sciedpiper_commands_done_total counter" in lstr_lines and
+                            "sciedpiper_commands_done_total{pipeline=\"test\"} 2" in lstr_lines and
+                            "# TYPE sciedpiper_command_duration_seconds histogram" in lstr_lines and
+                            "sciedpiper_command_duration_seconds_bucket{pipeline=\"test\",le=\"1\"} 0" in lstr_lines and
+                            "sciedpiper_command_duration_seconds_bucket{pipeline=\"test\",le=\"5\"} 1" in lstr_lines and
+                            "sciedpiper_command_duration_seconds_bucket{pipeline=\"test\",le=\"30\"} 2" in lstr_lines and
+                            "sciedpiper_command_duration_seconds_bucket{pipeline=\"test\",le=\"+Inf\"} 2" in lstr_lines and
+                            "sciedpiper_command_duration_seconds_sum{pipeline=\"test\"} 23" in lstr_lines and
+                            "sciedpiper_command_duration_seconds_count{pipeline=\"test\"} 2" in lstr_lines)
+
+    def test_func_format_for_compression_ratio(self):
+        """ The compression ratio is the bytes compressed per byte after compression. """
+        mtrc_cur = Metrics.MetricsExporter("metrics.prom")
+        mtrc_cur.func_add(Metrics.C_STR_COMPRESSION_INPUT_BYTES, 1000)
+        mtrc_cur.func_add(Metrics.C_STR_COMPRESSION_OUTPUT_BYTES, 250)
+        self.func_test_true("sciedpiper_compression_ratio 4" in mtrc_cur.func_format().split("\n"))
+
+    ########################
+    # func_write
+    ########################
+    def test_func_write(self):
+        """ The metrics replace the file and no temporary file is left. """
+        str_env = self.func_make_env("test_func_write")
+        str_metrics = os.path.join(str_env, "metrics.prom")
+        with open(str_metrics, "w") as hndl_old:
+            hndl_old.write("old")
+        mtrc_cur = Metrics.MetricsExporter(str_metrics)
+        mtrc_cur.func_add(Metrics.C_STR_COMMANDS_FAILED)
+        f_written = mtrc_cur.func_write()
+        lstr_files = os.listdir(str_env)
+        str_written = self.func_read(str_metrics)
+        self.func_remove_dirs([str_env])
+        self.func_test_true(f_written and lstr_files == ["metrics.prom"] and
+                            "sciedpiper_commands_failed_total 1" in str_written.split("\n"))
+
+    ########################
+    # func_start, func_stop
+    ########################
+    def test_func_start(self):
+        """ The file is written periodically while started and once more when stopped. """
+        str_env = self.func_make_env("test_func_start")
+        str_metrics = os.path.join(str_env, "metrics.prom")
+        mtrc_cur = Metrics.MetricsExporter(str_metrics, d_write_seconds=0.05)
+        mtrc_cur.func_start()
+        mtrc_cur.func_add(Metrics.C_STR_COMMANDS_RUNNING)
+        time.sleep(0.3)
+        str_running = self.func_read(str_metrics)
+        mtrc_cur.func_add(Metrics.C_STR_COMMANDS_RUNNING, -1)
+        mtrc_cur.func_stop()
+        str_stopped = self.func_read(str_metrics)
+        self.func_remove_dirs([str_env])
+        self.func_test_true("sciedpiper_commands_running 1" in str_running.split("\n") and
+                            "sciedpiper_commands_running 0" in str_stopped.split("\n"))
+
+
+#Creates a suite of tests
+def suite():
+    """ Suite aggregates tests and is used to run tests. """
+    return unittest.TestLoader().loadTestsFromTestCase(MetricsTester)
@@ -0,0 +1,374 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+import errno
+import fcntl
+import Fingerprint
+import hashlib
+import json
+import logging
+import os
+import shutil
+import uuid
+
+"""
+Shares the products of commands between runs (eg. samples in different output
+directories running the same reference indexing). Products are stored in a
+cache directory under a key made from the command and the content of its
+dependencies, a command with a stored key has its products placed from the
+cache instead of running.
+
+Layout of the cache directory:
+  entries/<key[:2]>/<key>/info.json    products and size, its time stamp is the last use
+  entries/<key[:2]>/<key>/product_<i>  products in the order of Command.lstr_products
+  tmp/                                 entries being written or removed
+  lock                                 held while evicting
+  .sciedpiper_fingerprints.jsonl       hashes of dependencies ( Fingerprint.FingerprintStore )
+Entries are written in tmp and renamed into place, so an entry is either
+complete or not there and jobs sharing the cache never see part of one.
+Products are copied ( reflinked where the file system allows ) to and from
+the cache, never hard linked, so changing a product does not change the entry.
+"""
+
+__author__ = "Timothy Tickle"
+__copyright__ = "Copyright 2016"
+__credits__ = ["Timothy Tickle", "Brian Haas"]
+__license__ = "MIT"
+__maintainer__ = "Timothy Tickle"
+__email__ = "ttickle@broadinstitute.org"
+__status__ = "Development"
+
+
+C_STR_ENTRIES = "entries"
+C_STR_TMP = "tmp"
+C_STR_LOCK = "lock"
+C_STR_INFO = "info.json"
+C_STR_PRODUCT_PREFIX = "product_"
+
+# Keys in info.json
+C_STR_COMMAND = "command"
+C_STR_PRODUCTS = "products"
+C_STR_SIZE = "size"
+
+# linux/fs.h, clones a file sharing its blocks (copy on write) on file systems which support it.
+I_FICLONE = 0x40049409
+
+# Ways a product was placed
+STR_PLACED_REFLINK = "reflink"
+STR_PLACED_COPY = "copy"
+
+# Bytes in a GB
+I_BYTES_IN_GB = 1024 * 1024 * 1024
+
+
+# Tested
+def func_normalize_command(cmd_cur):
+    """
+    The command with whitespace collapsed and the paths of dependencies and products
+    replaced by their position, so the same command in different output directories matches.
+
+    * cmd_cur : Command
+    * return : String
+    """
+
+    str_command = " ".join(cmd_cur.str_id.split())
+    lstr_replace = [(rsc_file.str_id, "{dependency_" + str(i_index) + "}") for i_index, rsc_file in enumerate(cmd_cur.lstr_dependencies)]
+    lstr_replace.extend([(rsc_file.str_id, "{product_" + str(i_index) + "}") for i_index, rsc_file in enumerate(cmd_cur.lstr_products)])
+    # Longest paths first so a path which starts another path does not replace part of it.
+    for str_path, str_placeholder in sorted(lstr_replace, key=lambda tpl_replace: -len(tpl_replace[0])):
+        str_command = str_command.replace(str_path, str_placeholder)
+    return(str_command)
+
+
+# Tested
+def func_place_file(str_source, str_destination):
+    """
+    Places a file as a reflink if possible, otherwise a copy.
+    Either way the file placed does not share its inode with the source.
+
+    * return : How the file was placed
+             : String
+    """
+
+    try:
+        with open(str_source, "rb") as hndl_source:
+            with open(str_destination, "wb") as hndl_destination:
+                fcntl.ioctl(hndl_destination.fileno(), I_FICLONE, hndl_source.fileno())
+        shutil.copystat(str_source, str_destination)
+        return(STR_PLACED_REFLINK)
+    except (IOError, OSError):
+        pass
+    shutil.copy2(str_source, str_destination)
+    return(STR_PLACED_COPY)
+
+
+# Tested
+def func_place_path(str_source, str_destination):
+    """
+    Places a file or a directory and all of its files.
+
+    * return : How the files were placed, the last way used for directories
+             : String
+    """
+
+    if not os.path.isdir(str_source):
+        return(func_place_file(str_source, str_destination))
+    str_placed = STR_PLACED_COPY
+    for str_root, lstr_dirs, lstr_files in os.walk(str_source):
+        str_root_destination = os.path.join(str_destination, os.path.relpath(str_root, str_source))
+        if not os.path.exists(str_root_destination):
+            os.makedirs(str_root_destination)
+        for str_file in lstr_files:
+            str_placed = func_place_file(os.path.join(str_root, str_file), os.path.join(str_root_destination, str_file))
+    return(str_placed)
+
+
+# Tested
+def func_get_size(str_path):
+    """
+    Bytes used by a file or directory.
+    """
+
+    if not os.path.isdir(str_path):
+        return(os.path.getsize(str_path))
+    i_size = 0
+    for str_root, lstr_dirs, lstr_files in os.walk(str_path):
+        for str_file in lstr_files:
+            i_size += os.path.getsize(os.path.join(str_root, str_file))
+    return(i_size)
+
+
+class OutputCache:
+    """
+    Content-addressed cache of command products shared between runs.
+    """
+
+    # Tested
+    def __init__(self, str_cache_dir, d_max_gb=None, logr_cur=None, func_hash_paths=None):
+        """
+        Initializer
+
+        * str_cache_dir : Directory holding the cache, made if needed.
+                        : String
+        * d_max_gb : Most space (GB) the cache uses, entries used least recently are removed first.
+                     If None, entries are not removed.
+                   : Float or None
+        * logr_cur : Logger
+                   : Logger
+        * func_hash_paths : Function given a list of paths returning { path: hash },
+                            if None hashes are kept with the cache and reused while a file's
+                            inode, size and time stamp are unchanged.
+                          : Function or None
+        """
+
+        self.logr_logger = logr_cur if logr_cur else logging.getLogger(__name__)
+        """ Logger, uses the default logger. """
+
+        self.str_cache_dir = os.path.abspath(str_cache_dir)
+        """ Directory holding the cache. """
+
+        self.i_max_bytes = int(d_max_gb * I_BYTES_IN_GB) if d_max_gb and d_max_gb > 0 else None
+        """ Most bytes the cache uses, None is unlimited. """
+
+        for str_dir in [os.path.join(self.str_cache_dir, C_STR_ENTRIES), os.path.join(self.str_cache_dir, C_STR_TMP)]:
+            try:
+                os.makedirs(str_dir)
+            except OSError as e:
+                if e.errno != errno.EEXIST:
+                    raise
+
+        self.fngr_hashes = None if func_hash_paths else Fingerprint.FingerprintStore(self.str_cache_dir, logr_cur=self.logr_logger)
+        """ Hashes of dependencies kept with the cache, None if func_hash_paths is given. """
+
+        self.func_hash_paths = func_hash_paths if func_hash_paths else self.fngr_hashes.func_get_hashes
+        """ Hashes the dependencies of commands. """
+
+    # Tested
+    def func_get_key(self, cmd_cur):
+        """
+        Key of a command, a hash of the normalized command and the content of its dependencies.
+
+        * cmd_cur : Command
+        * return : Key, None if a dependency does not exist.
+                 : String or None
+        """
+
+        lstr_dependencies = [rsc_dependency.str_id for rsc_dependency in cmd_cur.lstr_dependencies]
+        dict_hashes = self.func_hash_paths(lstr_dependencies)
+        if None in [dict_hashes.get(str_path) for str_path in lstr_dependencies]:
+            return(None)
+        hash_key = hashlib.md5(func_normalize_command(cmd_cur).encode("utf-8"))
+        for str_path in lstr_dependencies:
+            hash_key.update(b"\0" + dict_hashes[str_path].encode("utf-8"))
+        return(hash_key.hexdigest())
+
+    def func_get_entry_path(self, str_key):
+        """
+        Directory of an entry.
+        """
+
+        return(os.path.join(self.str_cache_dir, C_STR_ENTRIES, str_key[:2], str_key))
+
+    # Tested
+    def func_restore(self, cmd_cur):
+        """
+        Places the products of a command from the cache if they are stored.
+        The products' paths should not exist ( Pipeline.func_prepare_command removes them ).
+
+        * cmd_cur : Command
+        * return : True indicates the products were placed and the command does not need to run.
+                 : Boolean
+        """
+
+        str_key = self.func_get_key(cmd_cur)
+        if not str_key:
+            return(False)
+        str_entry = self.func_get_entry_path(str_key)
+        str_info = os.path.join(str_entry, C_STR_INFO)
+        try:
+            with open(str_info, "r") as hndl_info:
+                dict_info = json.load(hndl_info)
+        except (IOError, OSError, ValueError):
+            return(False)
+        lstr_products = [rsc_product.str_id for rsc_product in cmd_cur.lstr_products]
+        if len(dict_info.get(C_STR_PRODUCTS, [])) != len(lstr_products):
+            return(False)
+        lstr_placed = []
+        try:
+            for i_index, str_product in enumerate(lstr_products):
+                str_placed = func_place_path(os.path.join(str_entry, C_STR_PRODUCT_PREFIX + str(i_index)), str_product)
+                lstr_placed.append(str_placed)
+                # Products are as new as if the command had just made them.
+                os.utime(str_product, None)
+            # The entry was used, it is removed last when evicting.
+            os.utime(str_info, None)
+        except (IOError, OSError) as e:
+            # The entry was evicted while placing, run the command instead.
+            self.logr_logger.warning(" ".join(["OutputCache.func_restore: Could not place cached products.",
+                                               "Error =", str(e), "Command:", cmd_cur.str_id]))
+            for str_product in lstr_products:
+                if os.path.isdir(str_product):
+                    shutil.rmtree(str_product)
+                elif os.path.exists(str_product):
+                    os.remove(str_product)
+            return(False)
+        self.logr_logger.info(" ".join(["OutputCache.func_restore: Placed products from the cache (" + ", ".join(sorted(set(lstr_placed))) + ").",
+                                        "Key:", str_key, "Command:", cmd_cur.str_id]))
+        return(True)
+
+    # Tested
+    def func_store(self, cmd_cur):
+        """
+        Stores the products of a command which completed, then removes entries used least recently if over the size limit.
+
+        * cmd_cur : Command
+        * return : True indicates the products are stored.
+                 : Boolean
+        """
+
+        str_key = self.func_get_key(cmd_cur)
+        if not str_key:
+            return(False)
+        str_entry = self.func_get_entry_path(str_key)
+        if os.path.exists(str_entry):
+            return(True)
+        lstr_products = [rsc_product.str_id for rsc_product in cmd_cur.lstr_products]
+        if not all([os.path.exists(str_product) for str_product in lstr_products]):
+            return(False)
+
+        # Write the entry in tmp and move it in place when complete.
+        str_tmp = os.path.join(self.str_cache_dir, C_STR_TMP, ".".join([str_key, uuid.uuid4().hex]))
+        try:
+            os.makedirs(str_tmp)
+            i_size = 0
+            for i_index, str_product in enumerate(lstr_products):
+                str_cached = os.path.join(str_tmp, C_STR_PRODUCT_PREFIX + str(i_index))
+                func_place_path(str_product, str_cached)
+                i_size += func_get_size(str_cached)
+            with open(os.path.join(str_tmp, C_STR_INFO), "w") as hndl_info:
+                json.dump({C_STR_COMMAND: func_normalize_command(cmd_cur),
+                           C_STR_PRODUCTS: [os.path.basename(str_product) for str_product in lstr_products],
+                           C_STR_SIZE: i_size}, hndl_info)
+            if not os.path.exists(os.path.dirname(str_entry)):
+                try:
+                    os.makedirs(os.path.dirname(str_entry))
+                except OSError as e:
+                    if e.errno != errno.EEXIST:
+                        raise
+            os.rename(str_tmp, str_entry)
+        except (IOError, OSError) as e:
+            # Another job stored the same entry first, or the cache could not be written.
+            if os.path.exists(str_tmp):
+                shutil.rmtree(str_tmp)
+            if os.path.exists(str_entry):
+                return(True)
+            self.logr_logger.warning(" ".join(["OutputCache.func_store: Could not store products.",
+                                               "Error =", str(e), "Command:", cmd_cur.str_id]))
+            return(False)
+        self.logr_logger.info(" ".join(["OutputCache.func_store: Stored products. Key:", str_key, "Command:", cmd_cur.str_id]))
+        self.func_evict()
+        return(True)
+
+    # Tested
+    def func_get_entries(self):
+        """
+        Entries in the cache.
+
+        * return : ( last used, size, entry directory ) for each entry, least recently used first.
+                 : List of tuples
+        """
+
+        ltpl_entries = []
+        str_entries = os.path.join(self.str_cache_dir, C_STR_ENTRIES)
+        for str_prefix in os.listdir(str_entries):
+            str_prefix_dir = os.path.join(str_entries, str_prefix)
+            if not os.path.isdir(str_prefix_dir):
+                continue
+            for str_key in os.listdir(str_prefix_dir):
+                str_entry = os.path.join(str_prefix_dir, str_key)
+                str_info = os.path.join(str_entry, C_STR_INFO)
+                try:
+                    with open(str_info, "r") as hndl_info:
+                        i_size = json.load(hndl_info)[C_STR_SIZE]
+                    ltpl_entries.append((os.path.getmtime(str_info), i_size, str_entry))
+                except (IOError, OSError, ValueError, KeyError):
+                    continue
+        return(sorted(ltpl_entries))
+
+    # Tested
+    def func_evict(self):
+        """
+        Removes the entries used least recently until the cache is within its size.
+        Only one job evicts at a time, entries are moved to tmp before being deleted.
+
+        * return : Number of entries removed
+                 : Int
+        """
+
+        if not self.i_max_bytes:
+            return(0)
+        i_removed = 0
+        with open(os.path.join(self.str_cache_dir, C_STR_LOCK), "a") as hndl_lock:
+            fcntl.flock(hndl_lock.fileno(), fcntl.LOCK_EX)
+            try:
+                ltpl_entries = self.func_get_entries()
+                i_total = sum([tpl_entry[1] for tpl_entry in ltpl_entries])
+                for d_used, i_size, str_entry in ltpl_entries:
+                    if i_total <= self.i_max_bytes:
+                        break
+                    str_tmp = os.path.join(self.str_cache_dir, C_STR_TMP, ".".join([os.path.basename(str_entry), uuid.uuid4().hex]))
+                    try:
+                        os.rename(str_entry, str_tmp)
+                        shutil.rmtree(str_tmp)
+                    except OSError:
+                        continue
+                    i_total -= i_size
+                    i_removed += 1
+            finally:
+                fcntl.flock(hndl_lock.fileno(), fcntl.LOCK_UN)
+        if i_removed:
+            self.logr_logger.info(" ".join(["OutputCache.func_evict: Removed", str(i_removed), "entries used least recently."]))
+        return(i_removed)
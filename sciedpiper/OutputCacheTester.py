@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+import Command
+import os
+import OutputCache
+import ParentPipelineTester
+import unittest
+
+
+"""
+Tests the OutputCache module.
+"""
+
+
+__author__ = "Timothy Tickle"
+__copyright__ = "Copyright 2016"
+__credits__ = ["Timothy Tickle", "Brian Haas"]
+__license__ = "MIT"
+__maintainer__ = "Timothy Tickle"
+__email__ = "ttickle@broadinstitute.org"
+__status__ = "Development"
+
+
+class OutputCacheTester(ParentPipelineTester.ParentPipelineTester):
+    """
+    Tests sharing products of commands between runs.
+    """
+
+    def func_write(self, str_path, str_content):
+        """ Writes content to a file, making its directory if needed. """
+        if not os.path.exists(os.path.dirname(str_path)):
+            os.makedirs(os.path.dirname(str_path))
+        with open(str_path, "w") as hndl_file:
+            hndl_file.write(str_content)
+
+    def func_read(self, str_path):
+        """ Reads the content of a file. """
+        with open(str_path, "r") as hndl_file:
+            return hndl_file.read()
+
+    def func_make_command(self, str_sample_dir, str_reference):
+        """ Command indexing a reference into a sample's output directory. """
+        str_index = os.path.join(str_sample_dir, "reference.idx")
+        return Command.Command(" ".join(["index", str_reference, ">", str_index]), [str_reference], [str_index])
+
+    ########################
+    # func_normalize_command
+    ########################
+    def test_func_normalize_command(self):
+        """ The same command in different output directories is the same once normalized. """
+        cmd_1 = self.func_make_command("/out/sample_1", "/ref/genome.fa")
+        cmd_2 = self.func_make_command("/out/sample_2", "/ref/genome.fa")
+        str_answer = "index {dependency_0} > {product_0}"
+        self.func_test_true(OutputCache.func_normalize_command(cmd_1) == str_answer and
+                            OutputCache.func_normalize_command(cmd_2) == str_answer)
+
+    ########################
+    # func_store, func_restore
+    ########################
+    def test_func_restore_for_other_output_directory(self):
+        """ Products stored from one output directory are placed in another. """
+        str_env = self.func_make_env("test_func_restore_for_other_output_directory")
+        str_reference = os.path.join(str_env, "genome.fa")
+        self.func_write(str_reference, "ACGT")
+        cmd_1 = self.func_make_command(os.path.join(str_env, "sample_1"), str_reference)
+        cmd_2 = self.func_make_command(os.path.join(str_env, "sample_2"), str_reference)
+        self.func_write(cmd_1.lstr_products[0].str_id, "index of ACGT")
+        os.makedirs(os.path.join(str_env, "sample_2"))
+        cche_cur = OutputCache.OutputCache(os.path.join(str_env, "cache"))
+        f_before = cche_cur.func_restore(cmd_2)
+        f_stored = cche_cur.func_store(cmd_1)
+        f_restored = cche_cur.func_restore(cmd_2)
+        str_content = self.func_read(cmd_2.lstr_products[0].str_id)
+        self.func_remove_dirs_recursively(str_env)
+        self.func_test_true(not f_before and f_stored and f_restored and str_content == "index of ACGT")
+
+    def test_func_restore_for_changed_dependency(self):
+        """ Products are not placed when a dependency's content differs. """
+        str_env = self.func_make_env("test_func_restore_for_changed_dependency")
+        str_reference = os.path.join(str_env, "genome.fa")
+        self.func_write(str_reference, "ACGT")
+        cmd_1 = self.func_make_command(os.path.join(str_env, "sample_1"), str_reference)
+        self.func_write(cmd_1.lstr_products[0].str_id, "index of ACGT")
+        cche_cur = OutputCache.OutputCache(os.path.join(str_env, "cache"))
+        cche_cur.func_store(cmd_1)
+        os.remove(cmd_1.lstr_products[0].str_id)
+        self.func_write(str_reference, "TTTT")
+        f_restored = cche_cur.func_restore(cmd_1)
+        self.func_remove_dirs_recursively(str_env)
+        self.func_test_true(not f_restored)
+
+    def test_func_restore_for_directory_product(self):
+        """ Products which are directories are placed with all of their files. """
+        str_env = self.func_make_env("test_func_restore_for_directory_product")
+        str_reference = os.path.join(str_env, "genome.fa")
+        self.func_write(str_reference, "ACGT")
+        str_index_1 = os.path.join(str_env, "sample_1", "index")
+        str_index_2 = os.path.join(str_env, "sample_2", "index")
+        self.func_write(os.path.join(str_index_1, "sub", "part.txt"), "part")
+        cmd_1 = Command.Command("index " + str_reference + " " + str_index_1, [str_reference], [str_index_1])
+        cmd_2 = Command.Command("index " + str_reference + " " + str_index_2, [str_reference], [str_index_2])
+        os.makedirs(os.path.join(str_env, "sample_2"))
+        cche_cur = OutputCache.OutputCache(os.path.join(str_env, "cache"))
+        cche_cur.func_store(cmd_1)
+        f_restored = cche_cur.func_restore(cmd_2)
+        str_content = self.func_read(os.path.join(str_index_2, "sub", "part.txt"))
+        self.func_remove_dirs_recursively(str_env)
+        self.func_test_true(f_restored and str_content == "part")
+
+    def test_func_restore_for_changed_product(self):
+        """ Changing a placed product does not change the stored entry, which is placed again unchanged. """
+        str_env = self.func_make_env("test_func_restore_for_changed_product")
+        str_reference = os.path.join(str_env, "genome.fa")
+        self.func_write(str_reference, "ACGT")
+        cmd_1 = self.func_make_command(os.path.join(str_env, "sample_1"), str_reference)
+        cmd_2 = self.func_make_command(os.path.join(str_env, "sample_2"), str_reference)
+        self.func_write(cmd_1.lstr_products[0].str_id, "index of ACGT")
+        os.makedirs(os.path.join(str_env, "sample_2"))
+        cche_cur = OutputCache.OutputCache(os.path.join(str_env, "cache"))
+        cche_cur.func_store(cmd_1)
+        with open(cmd_1.lstr_products[0].str_id, "a") as hndl_product:
+            hndl_product.write(" changed")
+        cche_cur.func_restore(cmd_2)
+        i_links = os.stat(cmd_2.lstr_products[0].str_id).st_nlink
+        with open(cmd_2.lstr_products[0].str_id, "a") as hndl_product:
+            hndl_product.write(" changed")
+        os.remove(cmd_2.lstr_products[0].str_id)
+        f_restored = cche_cur.func_restore(cmd_2)
+        str_content = self.func_read(cmd_2.lstr_products[0].str_id)
+        self.func_remove_dirs_recursively(str_env)
+        self.func_test_true(i_links == 1 and f_restored and str_content == "index of ACGT")
+
+    def test_func_get_key_for_unchanged_dependency(self):
+        """ Dependencies are read once while they are unchanged, also by a new cache object. """
+        str_env = self.func_make_env("test_func_get_key_for_unchanged_dependency")
+        str_reference = os.path.join(str_env, "genome.fa")
+        self.func_write(str_reference, "ACGT")
+        cmd_1 = self.func_make_command(os.path.join(str_env, "sample_1"), str_reference)
+        cche_cur = OutputCache.OutputCache(os.path.join(str_env, "cache"))
+        str_key_1 = cche_cur.func_get_key(cmd_1)
+        str_key_2 = cche_cur.func_get_key(cmd_1)
+        cche_new = OutputCache.OutputCache(os.path.join(str_env, "cache"))
+        str_key_3 = cche_new.func_get_key(cmd_1)
+        self.func_remove_dirs_recursively(str_env)
+        self.func_test_true(str_key_1 and str_key_1 == str_key_2 == str_key_3 and
+                            cche_cur.fngr_hashes.i_hashed == 1 and cche_new.fngr_hashes.i_hashed == 0)
+
+    ########################
+    # func_evict
+    ########################
+    def test_func_evict_for_least_recently_used(self):
+        """ Entries used least recently are removed first until the cache fits. """
+        str_env = self.func_make_env("test_func_evict_for_least_recently_used")
+        cche_cur = OutputCache.OutputCache(os.path.join(str_env, "cache"))
+        lcmd_commands = []
+        for i_index in range(3):
+            str_reference = os.path.join(str_env, "genome_" + str(i_index) + ".fa")
+            self.func_write(str_reference, "ACGT" * (i_index + 1))
+            cmd_cur = self.func_make_command(os.path.join(str_env, "sample"), str_reference)
+            self.func_write(cmd_cur.lstr_products[0].str_id, "x" * 100)
+            cche_cur.func_store(cmd_cur)
+            os.remove(cmd_cur.lstr_products[0].str_id)
+            lcmd_commands.append(cmd_cur)
+        # Use the first entry so the second is the least recently used
+        for i_index, cmd_cur in enumerate(lcmd_commands):
+            str_info = os.path.join(cche_cur.func_get_entry_path(cche_cur.func_get_key(cmd_cur)), OutputCache.C_STR_INFO)
+            os.utime(str_info, (1000 + i_index, 1000 + i_index))
+        f_used = cche_cur.func_restore(lcmd_commands[0])
+        os.remove(lcmd_commands[0].lstr_products[0].str_id)
+        cche_cur.i_max_bytes = 250
+        i_removed = cche_cur.func_evict()
+        f_first = cche_cur.func_restore(lcmd_commands[0])
+        os.remove(lcmd_commands[0].lstr_products[0].str_id)
+        f_second = cche_cur.func_restore(lcmd_commands[1])
+        f_third = cche_cur.func_restore(lcmd_commands[2])
+        self.func_remove_dirs_recursively(str_env)
+        self.func_test_true(f_used and i_removed == 1 and f_first and not f_second and f_third)
+
+
+#Creates a suite of tests
+def suite():
+    """ Suite aggregates tests and is used to run tests. """
+    return unittest.TestLoader().loadTestsFromTestCase(OutputCacheTester)
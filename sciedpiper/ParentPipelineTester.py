@@ -6,6 +6,7 @@ from __future__ import print_function
 from __future__ import unicode_literals
 import calendar
 import os
+import shutil
 import unittest
 import time
 
@@ -123,6 +124,20 @@ class ParentPipelineTester(unittest.TestCase):
                 return True
         return False
 
+    def func_make_env(self, str_name):
+        """
+        Makes an empty directory for a test in the test directory,
+        anything left in it by an earlier run is removed.
+        * str_name : String
+                     Name of the directory, usually the name of the test.
+        * Return : String
+                   Path to the directory.
+        """
+        str_env = os.path.join(self.str_test_directory, str_name)
+        self.func_remove_dirs_recursively(str_env)
+        self.func_make_dummy_dir(str_env)
+        return str_env
+
     def func_make_dummy_dirs(self, lstr_paths):
         """
         Creates a list of directories if they do not already exist.
@@ -159,6 +174,25 @@ class ParentPipelineTester(unittest.TestCase):
                 if os.path.exists(str_dir):
                     os.removedirs(str_dir)
 
+    def func_remove_dirs_recursively(self, lstr_dirs):
+        """
+        Removes a list of directories and everything in them if they exist.
+        * lstr_dirs : List of strings
+                      List of directory paths to delete with their contents if they exist.
+        """
+        # Handle in case a string is accidently given
+        if isinstance(lstr_dirs, basestring):
+            lstr_dirs = [lstr_dirs]
+
+        # Make sure root is not deleted
+        for str_dir in lstr_dirs:
+            if str_dir:
+                str_dir = str_dir.encode('utf-8')
+                if str_dir == os.path.sep:
+                    continue
+                if os.path.exists(str_dir):
+                    shutil.rmtree(str_dir)
+
     def func_remove_files(self, lstr_files):
         """
         Removes a list of files if they exist.
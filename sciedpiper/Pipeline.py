@@ -19,13 +19,28 @@ import Command
 import Commandline
 import Compression
 import DependencyTree
+import FileWatcher
+import Fingerprint
+import heapq
+import itertools
 import JSONManager
 import logging
+import Metrics
 import os
+import OutputCache
+import PipelineObserver
+import Queue
+import QueueLogging
 import shutil
 import Resource
+import ResourceHistory
+import RunManifest
+import Scheduler
+import StatCache
 import sys
+import threading
 import time
+import Trace
 
 # Constants
 # This is a list of paths that should never be allowed to be deleted
@@ -42,6 +57,8 @@ LSTR_COMPRESSION_HANDLING_CHOICES = [STR_COMPRESSION_NONE,
                                      STR_COMPRESSION_ARCHIVE,
                                      STR_COMPRESSION_FIRST_LEVEL_ONLY,
                                      STR_COMPRESSION_AS_YOU_GO ]
+# Threads reading the file system when planning which commands need to run
+I_PLAN_THREADS = 8
 
 
 class Pipeline:
@@ -83,6 +100,68 @@ class Pipeline:
         self.f_execute = True
         """ If false, the pipeline documents itself but does not execute """
 
+        self.mnfst_run = None
+        """
+        If set, the RunManifest recording valid products.
+        If None, ok files are used to record valid products.
+        """
+
+        self.fngr_store = None
+        """
+        If set, the FingerprintStore used to decide if commands need to run from the content of their files.
+        If None, ok files ( and optionally time stamps ) are used.
+        """
+
+        self.cche_output = None
+        """
+        If set, the OutputCache shared between runs which products of commands are placed from instead of running.
+        """
+
+        self.hist_resources = None
+        """
+        If set, the ResourceHistory the resources used by commands are recorded in
+        and predicted from.
+        """
+
+        self.dict_command_predictions = {}
+        """
+        Wall time and peak resident memory predicted from the resource history,
+        { command id: prediction } for commands with history.
+        """
+
+        self.obs_benchmark = None
+        """
+        If set, the BenchmarkObserver measuring the resources of each command of the run ( --benchmark ).
+        """
+
+        self.trc_run = None
+        """
+        If set, the TraceRecorder the spans of the run are recorded in ( --trace_out ).
+        """
+
+        self.mtrc_run = None
+        """
+        If set, the MetricsExporter the progress of the run is written to ( --metrics_out ).
+        """
+
+        self.obs_log = PipelineObserver.LogObserver()
+        """ Logs the events of runs, remove it with func_remove_observer to not log them. """
+
+        self.lobs_observers = [ self.obs_log ]
+        """
+        PipelineObservers told the events of runs ( func_add_observer ).
+        Replaced rather than changed so it can be read while commands run in parallel.
+        """
+
+        self.lobs_run_observers = []
+        """ Observers added for the benchmarking, tracing, metrics and resource history of the current run. """
+
+        self.stc_paths = StatCache.StatCache()
+        """
+        Listings and stats of paths used when checking products,
+        cleared whenever the pipeline or a command may change files.
+        """
+
         self.f_use_bash = False
         """
         If made true, will tell the commandline to be ran in bash
@@ -121,6 +200,59 @@ class Pipeline:
                 str_command, str_path = str_path.split( ":" )
                 self.dict_update_path[ str_command ] = str_path
 
+    # Tested
+    def func_add_observer( self, obs_cur ):
+        """
+        Adds an observer told the events of runs.
+
+        * obs_cur : Observer to add.
+                  : PipelineObserver.PipelineObserver
+        """
+
+        if not obs_cur in self.lobs_observers:
+            self.lobs_observers = self.lobs_observers + [ obs_cur ]
+
+    # Tested
+    def func_remove_observer( self, obs_cur ):
+        """
+        Removes an observer, it is no longer told the events of runs.
+
+        * obs_cur : Observer to remove.
+                  : PipelineObserver.PipelineObserver
+        """
+
+        self.lobs_observers = [ obs_added for obs_added in self.lobs_observers if not obs_added is obs_cur ]
+
+    # Tested
+    def func_observers_use_bytes( self ):
+        """
+        Checks if an observer uses the bytes of cleaned and compressed paths,
+        measuring paths is skipped otherwise.
+
+        * Return : Boolean
+                   True indicates bytes should be measured.
+        """
+
+        return self.f_execute and any( [ obs_cur.f_uses_bytes for obs_cur in self.lobs_observers ] )
+
+    # Tested
+    def func_notify( self, str_event, *args ):
+        """
+        Tells each observer an event, errors in observers are logged and otherwise ignored.
+        Callers check there are observers before gathering what the event needs.
+
+        * str_event : Event ( PipelineObserver.C_STR_ON_* ).
+                    : String
+        * args : Event details, after the pipeline.
+        """
+
+        for obs_cur in self.lobs_observers:
+            try:
+                getattr( obs_cur, str_event )( self, *args )
+            except Exception as e:
+                self.logr_logger.error( " ".join( [ "Pipeline.func_notify: Error in the observer", obs_cur.__class__.__name__,
+                                                    "on", str_event, "Error =", str( e ) ] ) )
+
     # Tested
     def func_check_files_exist( self, lstr_files ):
         """
@@ -308,6 +440,8 @@ class Pipeline:
     def func_make_logger( self, str_log_file = None, str_logging_level = logging.INFO ):
         """
         Sets up the logger for the pipeline.
+        Records are written by a thread from a bounded buffer ( QueueLogging ) so writing
+        the log does not hold up running commands.
 
         * str_log_to_file : String ( file path )
                             If a file path is given, logging will occur to the file.
@@ -333,7 +467,7 @@ class Pipeline:
                     os.makedirs( str_log_folder )
             hndl_logging = logging.FileHandler( filename = str_log_file, mode = "w" )
         hndl_logging.setFormatter( logging.Formatter( "%(asctime)s - %(name)s - %(levelname)s - %(message)s" ) )
-        logr_logger.addHandler( hndl_logging )
+        logr_logger.addHandler( QueueLogging.QueueHandler( hndl_logging ) )
         logr_logger.setLevel( str_logging_level )
         return logr_logger
 
@@ -530,7 +664,7 @@ class Pipeline:
                     os.makedirs( str_dir )
                     self.logr_logger.info( " ".join( [ "Pipeline.func_mkdirs: Created directory", str_dir ] ) )
                 else:
-                    self.logr_logger.info( " ".join( [ "Pipeline.func_mkdirs: Did not create the following directory because it already exists", str_dir ] ) )
+                    self.logr_logger.debug( " ".join( [ "Pipeline.func_mkdirs: Did not create the following directory because it already exists", str_dir ] ) )
             return True
         except Exception as e:
             self.logr_logger.error( " ".join( [ "Pipeline.func_mkdirs: Received an error while creating the", str_dir, "directory. Stopping analysis, premature termination of pipeline. Error = ", str( e ) ] ) )
@@ -547,10 +681,30 @@ class Pipeline:
                         : Path to file.
         * return : float
         """
-        if os.path.exists(str_file_path):
-            return(os.path.getmtime(str_file_path))
-        else:
-            return(os.path.getmtime(self.func_get_ok_file_path(str_file_path)))
+        if self.stc_paths.func_exists(str_file_path):
+            return(self.stc_paths.func_get_mtime(str_file_path))
+        # A missing path falls back to the time stamp recorded when it was made.
+        if not self.mnfst_run is None:
+            d_time_stamp = self.mnfst_run.func_get_time_stamp(str_file_path)
+            if not d_time_stamp is None:
+                return(d_time_stamp)
+        return(self.stc_paths.func_get_mtime(self.func_get_ok_file_path(str_file_path)))
+
+    # Tested
+    def func_is_valid_product(self,
+                              str_path):
+        """
+        Checks if a path was made by a command that completed without error.
+        Uses the run manifest if one is used, otherwise checks for the ok file.
+
+        * str_path : String
+                   : Path to check.
+        * return : Boolean
+                   True indicates the path is valid.
+        """
+        if not self.mnfst_run is None:
+            return(self.mnfst_run.func_is_valid(str_path))
+        return(self.stc_paths.func_exists(self.func_get_ok_file_path(str_path)))
 
 
     # Tested, could test more (products)
@@ -591,10 +745,9 @@ class Pipeline:
         # 2a. If time stamping is not on (the value None given) just make sure the parent has had a successful run (ok file exists)
         # 2b. If time stamping is on (a float value given ) make sure all parents are older than the children.
         # If the state of the parents is not trustworthy delete the ok file for all resources in the command and then return false
-        for rsc_file in cmd_command.lstr_dependencies if f_dependencies else cmd_command.lstr_products:
-            rsc_file_ok = self.func_get_ok_file_path(rsc_file.str_id)
+        for rsc_file in cmd_command.func_iter_parents() if f_dependencies else cmd_command.func_iter_children():
             # Check that the command has ran successfully
-            if not os.path.exists(rsc_file_ok):
+            if not self.func_is_valid_product(rsc_file.str_id):
                 self.logr_logger.info( "Pipeline.func_paths_are_from_valid_run: Not yet created without error. PATH=" + rsc_file.str_id )
                 f_return_valid = False
                 continue
@@ -604,7 +757,7 @@ class Pipeline:
             i_target_product_time_stamp = self.func_get_file_time_stamp(rsc_file.str_id)
             # Make sure each parent / dependency has an ok file.
             for rsc_parent_dep in rsc_file.func_get_dependencies():
-                if((not os.path.exists(self.func_get_ok_file_path(rsc_parent_dep.str_id))) and
+                if((not self.func_is_valid_product(rsc_parent_dep.str_id)) and
                    (not dt_deps.func_is_input(rsc_parent_dep))):
                     self.logr_logger.error( " ".join( [ "Pipeline.func_paths_are_from_valid_run: Parent dependency was not been created yet.",
                                                         "Target product PATH=" + rsc_file.str_id,
@@ -624,6 +777,159 @@ class Pipeline:
                         continue
         return f_return_valid
 
+    # Tested
+    def func_plan_commands( self, dt_dependencies, i_fuzzy_time = None, i_threads = I_PLAN_THREADS, lcmd_ran = None ):
+        """
+        Decides which commands need to run and which can be skipped before any command runs.
+        Every product, dependency and ok file is read at once using threads, then the commands are
+        checked in dependency order with func_paths_are_from_valid_run. A command which would be
+        skipped still runs if a command making one of its dependencies runs,
+        given its products would be made from dependencies which are about to change.
+        The plan is logged.
+
+        * dt_dependencies : DependencyTree
+                          : Tree holding all commands to check.
+
+        * i_fuzzy_time : int (seconds) or None
+                       : Passed to func_paths_are_from_valid_run.
+
+        * i_threads : Int
+                    : Number of threads reading the file system.
+
+        * lcmd_ran : List of Commands or None
+                   : Commands which already ran when re-planning, commands downstream of them are planned to run.
+
+        * Return : Dict
+                   { str_id: True } for commands to run, { str_id: False } for commands to skip.
+        """
+
+        d_start = time.time()
+        lcmd_ordered = dt_dependencies.func_get_commands()
+
+        # Read the listings and stats for every path checked and its ok file.
+        sstr_paths = set()
+        for cmd_cur in lcmd_ordered:
+            for rsc_file in itertools.chain( cmd_cur.func_iter_parents(), cmd_cur.func_iter_children() ):
+                sstr_paths.add( rsc_file.str_id )
+        self.stc_paths.func_prime( list( sstr_paths ) + [ self.func_get_ok_file_path( str_path ) for str_path in sstr_paths ],
+                                   i_threads = i_threads )
+        # Hash files changed since they were fingerprinted, in parallel.
+        if not self.fngr_store is None:
+            self.fngr_store.func_get_hashes( list( sstr_paths ), f_write = False )
+
+        dict_plan = {}
+        sstr_invalidated = set()
+        for cmd_ran in lcmd_ran if lcmd_ran else []:
+            sstr_invalidated.update( [ cmd_child.str_id for cmd_child in Scheduler.func_get_downstream_commands( cmd_ran ) ] )
+        for cmd_cur in lcmd_ordered:
+            if cmd_cur.str_id in sstr_invalidated:
+                self.logr_logger.info( " ".join( [ "Pipeline.func_plan_commands: A command making a dependency will run.",
+                                                   "Command:", cmd_cur.str_id ] ) )
+                dict_plan[ cmd_cur.str_id ] = True
+            else:
+                dict_plan[ cmd_cur.str_id ] = not self.func_command_is_from_valid_run( cmd_cur,
+                                                                                       dt_deps = dt_dependencies,
+                                                                                       i_fuzzy_time = i_fuzzy_time )
+            if dict_plan[ cmd_cur.str_id ]:
+                sstr_invalidated.update( [ cmd_child.str_id for cmd_child in Scheduler.func_get_downstream_commands( cmd_cur ) ] )
+
+        if self.lobs_observers:
+            self.func_notify( PipelineObserver.C_STR_ON_PLAN, dict_plan, lcmd_ordered, time.time() - d_start )
+        return dict_plan
+
+    # Tested
+    def func_predict_commands( self, lcmd_commands, dict_command_runtimes = None ):
+        """
+        Predicts the runtime and memory of commands from the resource history.
+        Commands which do not declare memory are given the memory predicted.
+
+        * lcmd_commands : Commands to predict
+                        : List of commands
+        * dict_command_runtimes : Runtimes given, these are kept over predictions.
+                                : Dict { command: seconds } or None
+        * Return : Runtimes (seconds) known or predicted
+                 : Dict { command: seconds }
+        """
+
+        self.dict_command_predictions = self.hist_resources.func_predict_commands( lcmd_commands )
+        dict_runtimes = {}
+        for cmd_cur in lcmd_commands:
+            dict_prediction = self.dict_command_predictions.get( cmd_cur.str_id )
+            if not dict_prediction:
+                continue
+            if not dict_prediction[ ResourceHistory.C_STR_WALL_SECONDS ] is None:
+                dict_runtimes[ cmd_cur.str_id ] = dict_prediction[ ResourceHistory.C_STR_WALL_SECONDS ]
+            if ( not dict_prediction[ ResourceHistory.C_STR_PEAK_RSS ] is None ) and not cmd_cur.d_memory:
+                cmd_cur.func_set_resources( d_memory = dict_prediction[ ResourceHistory.C_STR_PEAK_RSS ] / OutputCache.I_BYTES_IN_GB )
+        self.logr_logger.info( " ".join( [ "Pipeline.func_predict_commands: Predicted", str( len( self.dict_command_predictions ) ), "of",
+                                           str( len( lcmd_commands ) ), "commands from", self.hist_resources.str_history_file ] ) )
+        dict_runtimes.update( dict_command_runtimes if dict_command_runtimes else {} )
+        return dict_runtimes
+
+    # Tested
+    def func_format_prediction( self, cmd_cur ):
+        """
+        The predicted runtime and memory of a command for the plan.
+
+        * Return : Empty if there is no prediction.
+                 : List of strings
+        """
+
+        dict_prediction = self.dict_command_predictions.get( cmd_cur.str_id )
+        if not dict_prediction:
+            return []
+        lstr_prediction = [ "{:.1f}".format( dict_prediction[ ResourceHistory.C_STR_WALL_SECONDS ] ) + " s" ]
+        if not dict_prediction[ ResourceHistory.C_STR_PEAK_RSS ] is None:
+            lstr_prediction.append( Benchmarking.func_human_readable( dict_prediction[ ResourceHistory.C_STR_PEAK_RSS ] ) )
+        return [ "( predicted", ", ".join( lstr_prediction ), ")" ]
+
+    # Tested
+    def func_command_needs_to_run( self, cmd_command, dict_plan, dt_dependencies, i_fuzzy_time = None ):
+        """
+        Looks up if a command needs to run in the plan, commands not planned
+        ( eg. special commands ) are checked now.
+
+        * Return : Boolean
+                   True indicates the command needs to run.
+        """
+
+        if cmd_command.str_id in dict_plan:
+            return dict_plan[ cmd_command.str_id ]
+        return not self.func_command_is_from_valid_run( cmd_command,
+                                                        dt_deps = dt_dependencies,
+                                                        i_fuzzy_time = i_fuzzy_time )
+
+    # Tested
+    def func_command_is_from_valid_run( self, cmd_command, dt_deps, i_fuzzy_time = None ):
+        """
+        Checks if the products of a command are from a valid run so the command does not need to run.
+        Without fingerprints, this is func_paths_are_from_valid_run for the products.
+        With fingerprints, the command, its dependencies and its products must match the fingerprints
+        recorded when it completed ( time stamps are not used ), products and dependencies which are missing
+        must have been made without error ( eg. cleaned ). A command without fingerprints ( eg. ran before
+        fingerprints were used ) is checked by its ok files. Fingerprints are only recorded when a command
+        completes ( func_update_products_validity_status ), checking never writes them.
+
+        * cmd_command : Command
+                      : Command to check.
+        * Return : Boolean
+                   True indicates the command does not need to run.
+        """
+
+        if self.fngr_store is None:
+            return self.func_paths_are_from_valid_run( cmd_command,
+                                                       f_dependencies = False,
+                                                       dt_deps = dt_deps,
+                                                       i_fuzzy_time = i_fuzzy_time )
+        if not cmd_command.func_is_valid():
+            return False
+        if self.fngr_store.func_is_recorded( cmd_command ):
+            f_match = self.fngr_store.func_command_matches( cmd_command, func_is_valid_missing = self.func_is_valid_product )
+            if not f_match:
+                self.logr_logger.info( "Pipeline.func_command_is_from_valid_run: Fingerprints changed. Command: " + cmd_command.str_id )
+            return f_match
+        return self.func_paths_are_from_valid_run( cmd_command, f_dependencies = False, dt_deps = dt_deps, i_fuzzy_time = i_fuzzy_time )
+
     # Tested
     def func_remove_paths( self, cmd_command, str_output_directory, dt_dependency_tree, f_remove_products, f_test = False ):
         """
@@ -676,13 +982,17 @@ class Pipeline:
         lstr_paths_to_remove = cmd_command.lstr_products if f_remove_products else cmd_command.func_get_dependencies_to_clean_level( Resource.CLEAN_NEVER )
         lstr_paths_to_remove = [ rsc_remove.str_id for rsc_remove in lstr_paths_to_remove ]
         # Remove any input file
-        lstr_paths_to_remove = list( set( lstr_paths_to_remove ) - set( [rsc_file.str_id for rsc_file in dt_dependency_tree.lstr_inputs] ) )
+        lstr_paths_to_remove = list( set( lstr_paths_to_remove ) - dt_dependency_tree.sstr_input_ids )
 
         # If testing, indicate what files would be deleted and return
         if f_test:
             self.logr_logger.info( "".join( [ "In test mode, would have deleted the following paths: ",",".join( lstr_paths_to_remove ) ] ) )
             return True
 
+        # Products being removed are no longer valid
+        if f_remove_products and ( not self.mnfst_run is None ) and self.f_execute:
+            self.mnfst_run.func_record_invalid( lstr_paths_to_remove )
+
         for str_rsc in lstr_paths_to_remove:
             # Make sure paths are valid first, no playing in directories we are not supposed to be in
             if not self.func_is_valid_path_for_removal(str_path = str_rsc, str_output_directory = str_output_directory):
@@ -702,55 +1012,134 @@ class Pipeline:
         # 5. NO dependency will be removed if it is of clean level NEVER ( this logic is in func_get_dependencies_to_clean_level )
         # Also removes the ok file, this is done first so if there is an error during the path removal, the
         # Ok file will not be removed unless in product mode
-        for str_path in lstr_paths_to_remove:
-            # Checks to make sure the file exists.
-            # This is necessary because this function is used to clear out products from a
-            # command that error. Given an error is is unknown if the files actually exist
-            if not os.path.exists( str_path ):
-                continue
-
-            # If it is a dependency, if needed check if it is a dependency that is intermediate and used.
-            # If it is still needed, skip over it unless it is indicated
-            # To always be deleted...should not set a file to ALWAYS unless you mean it
-            if not f_remove_products:
-                cur_vertex = dt_dependency_tree.graph_commands.func_get_vertex( str_path )
-                i_clean_level = cur_vertex.i_clean
-
-                if i_clean_level == Resource.CLEAN_AS_TEMP:
-                    if not dt_dependency_tree.func_is_used_intermediate_file( cur_vertex ):
-                        self.logr_logger.info( " ".join( [ "Pipeline.func_remove_paths: Not removing the following path, it is still needed.", str_path ] ) )
-                        continue
-            else:
-                # Remove ok file first to invalidate
-                str_ok = self.func_get_ok_file_path( str_path = str_path )
+        # Removing the products of a command is traced here, paths cleaned and their size are told to observers
+        d_start = time.time()
+        lstr_cleaned = []
+        i_cleaned_bytes = 0 if self.func_observers_use_bytes() and not f_remove_products else None
+        with Trace.func_span( self.trc_run if f_remove_products else None, Trace.C_STR_SPAN_REMOVE_PRODUCTS,
+                              Trace.C_STR_CATEGORY_FILES, dict_args = { "command": cmd_command.str_id } ):
+            for str_path in lstr_paths_to_remove:
+                # Checks to make sure the file exists.
+                # This is necessary because this function is used to clear out products from a
+                # command that error. Given an error is is unknown if the files actually exist
+                if not self.stc_paths.func_exists( str_path ):
+                    continue
 
-                if os.path.exists( str_ok ):
-                    self.logr_logger.info( " ".join( [ "Pipeline.func_remove_paths: Removing the ok file:", str_ok ] ) )
+                # If it is a dependency, if needed check if it is a dependency that is intermediate and used.
+                # If it is still needed, skip over it unless it is indicated
+                # To always be deleted...should not set a file to ALWAYS unless you mean it
+                if not f_remove_products:
+                    cur_vertex = dt_dependency_tree.graph_commands.func_get_vertex( str_path )
+                    i_clean_level = cur_vertex.i_clean
+
+                    if i_clean_level == Resource.CLEAN_AS_TEMP:
+                        if not dt_dependency_tree.func_is_used_intermediate_file( cur_vertex ):
+                            self.logr_logger.debug( " ".join( [ "Pipeline.func_remove_paths: Not removing the following path, it is still needed.", str_path ] ) )
+                            continue
+                else:
+                    # Remove ok file first to invalidate
+                    str_ok = self.func_get_ok_file_path( str_path = str_path )
+
+                    if self.stc_paths.func_exists( str_ok ):
+                        self.logr_logger.debug( " ".join( [ "Pipeline.func_remove_paths: Removing the ok file:", str_ok ] ) )
+                        if self.f_execute:
+                            os.remove( str_ok )
+                            self.stc_paths.func_forget( [ str_ok ] )
+
+                lstr_cleaned.append( str_path )
+                if not i_cleaned_bytes is None:
+                    i_cleaned_bytes += OutputCache.func_get_size( str_path )
+
+                # Remove path
+                if self.stc_paths.func_is_file( str_path ):
+                    self.logr_logger.debug( " ".join( [ "Pipeline.func_remove_paths: Removing the file:", str_path ] ) )
                     if self.f_execute:
-                        os.remove( str_ok )
-
-            # Remove path
-            if os.path.isfile( str_path ):
-                self.logr_logger.info( " ".join( [ "Pipeline.func_remove_paths: Removing the file:", str_path ] ) )
-                if self.f_execute:
-                    os.remove( str_path )
-            else:
-                # If the path is a dir
-                self.logr_logger.info( " ".join( [ "Pipeline.func_remove_paths: Removing the directory:", str_path ] ) )
+                        os.remove( str_path )
+                else:
+                    # If the path is a dir
+                    self.logr_logger.debug( " ".join( [ "Pipeline.func_remove_paths: Removing the directory:", str_path ] ) )
+                    if self.f_execute:
+                        shutil.rmtree( str_path )
                 if self.f_execute:
-                    shutil.rmtree( str_path )
+                    self.stc_paths.func_forget( [ str_path ] )
+        if f_remove_products:
+            if lstr_cleaned:
+                self.logr_logger.info( " ".join( [ "Pipeline.func_remove_paths: Removed", str( len( lstr_cleaned ) ),
+                                                   "product(s) of the command. Command:", cmd_command.str_id ] ) )
+        elif self.lobs_observers:
+            self.func_notify( PipelineObserver.C_STR_ON_CLEAN, cmd_command, lstr_cleaned, i_cleaned_bytes, time.time() - d_start )
         # No errors occurred so returning true
         return True
 
 
+    # Tested
+    def func_merge_commands( self, llcmd_commands ):
+        """
+        Merges the commands of many samples into one list so they run in one dependency tree.
+        Commands which are identical ( same command, dependencies and products ), for example
+        indexing a reference all samples share, are kept once so they run once.
+        Different commands making the same product would race and can not be merged.
+        Special commands ( eg. changing directory ) act on the whole pipeline and can not be merged.
+
+        * llcmd_commands : Commands of each sample
+                         : List of lists of commands
+
+        * Return : Commands to run, None indicates commands conflict.
+                 : List of commands or None
+        """
+
+        lcmd_merged = []
+        # { command: ( dependencies, products ) } for commands kept
+        dict_commands = {}
+        # { product: command } for commands kept
+        dict_product_commands = {}
+        i_duplicates = 0
+        for lcmd_sample in llcmd_commands:
+            for cmd_cur in lcmd_sample:
+                # Special commands ( eg. changing directory ) would act on the commands of every sample.
+                if self.func_is_special_command( cmd_cur ):
+                    self.logr_logger.error( " ".join( [ "Pipeline.func_merge_commands: Special commands can not be merged,",
+                                                        "please run samples as separate jobs. Command:", cmd_cur.str_id ] ) )
+                    return None
+                tpl_files = ( sorted( [ rsc_dep.str_id for rsc_dep in cmd_cur.lstr_dependencies ] ),
+                              sorted( [ rsc_prod.str_id for rsc_prod in cmd_cur.lstr_products ] ) )
+                if cmd_cur.str_id in dict_commands:
+                    if dict_commands[ cmd_cur.str_id ] != tpl_files:
+                        self.logr_logger.error( " ".join( [ "Pipeline.func_merge_commands: The same command has different dependencies",
+                                                            "or products in different samples. Command:", cmd_cur.str_id ] ) )
+                        return None
+                    i_duplicates += 1
+                    continue
+                for str_product in tpl_files[ 1 ]:
+                    if str_product in dict_product_commands:
+                        self.logr_logger.error( " ".join( [ "Pipeline.func_merge_commands: Different commands make the same product.",
+                                                            "Product:", str_product, "Commands:",
+                                                            dict_product_commands[ str_product ], ",", cmd_cur.str_id ] ) )
+                        return None
+                    dict_product_commands[ str_product ] = cmd_cur.str_id
+                dict_commands[ cmd_cur.str_id ] = tpl_files
+                lcmd_merged.append( cmd_cur )
+        self.logr_logger.info( " ".join( [ "Pipeline.func_merge_commands: Merged", str( len( llcmd_commands ) ), "samples into",
+                                           str( len( lcmd_merged ) ), "commands,", str( i_duplicates ),
+                                           "identical command(s) shared by samples will run once." ] ) )
+        return lcmd_merged
+
+
     # Tested
     def func_run_commands( self, lcmd_commands, str_output_dir, f_clean = False, f_self_organize_commands=True,
                            li_wait=None, lstr_copy=None, str_move=None, str_compression_mode=None,
                            str_compression_type="gz", i_time_stamp_wiggle=None, str_dot_file=None,
-                           str_wdl=None, args_original=None, i_benchmark_secs=None ):
+                           str_wdl=None, args_original=None, i_benchmark_secs=None,
+                           i_max_parallel_commands=None, i_local_cores=None, d_local_memory=None,
+                           str_command_priority=None, dict_command_runtimes=None,
+                           str_product_detection=None, f_run_manifest=False, str_fingerprint_mode=None,
+                           str_output_cache=None, d_output_cache_gb=None, str_resource_history=None,
+                           str_trace_out=None, str_metrics_out=None ):
         """
-        Runs all commands in serial and logs the time each took.
+        Plans which commands need to run, then runs them in serial and logs the time each took.
         Will NOT stop on error but will attempt all commands.
+        If more than one parallel command is allowed, commands are instead ran as soon as their
+        dependencies are made, up to the given number at a time.
 
         * lcmd_commands : List of commands
                           Each command will be ran in order until completion or failure.
@@ -775,6 +1164,61 @@ class Pipeline:
         * i_benchmark_secs : Number seconds to wait between benchmarking memory. If None, benchmarking is not performed.
                            : int (secs) or None (default, turns off functionality)
 
+        * i_max_parallel_commands : The maximum number of commands to run at one time.
+                                    If None or 1, commands are ran in serial.
+                                  : int or None (default, serial)
+
+        * i_local_cores : The cores commands running in parallel may use together.
+                          If None, the cores of the machine are used.
+                        : int or None
+
+        * d_local_memory : The memory (GB) commands running in parallel may use together.
+                           If None, the memory of the machine is used.
+                         : float or None
+
+        * str_command_priority : Policy for which ready command starts first when running in parallel.
+                                 If None, commands on the longest (critical) path start first.
+                               : A value from Scheduler.LSTR_PRIORITY_CHOICES or None
+
+        * dict_command_runtimes : Historical runtimes (seconds) of commands, weights the critical path.
+                                : Dict { command: seconds } or None
+
+        * str_product_detection : How to wait for products after a command ends, at most the total of li_wait.
+                                  If None, products are watched for and found as soon as they appear.
+                                : A value from FileWatcher.LSTR_DETECTION_CHOICES or None
+
+        * f_run_manifest : Records valid products in one manifest file in the output directory instead of ok files.
+                           The first time, existing ok files in the output directory are imported.
+                         : Boolean
+
+        * str_fingerprint_mode : Decide if commands need to run from content hashes of their dependencies and products
+                                 recorded when they completed, instead of time stamps. If None, fingerprints are not used.
+                               : A value from Fingerprint.LSTR_FINGERPRINT_CHOICES or None
+
+        * str_output_cache : Directory of a cache shared between runs. Products of a command run with the same
+                             command and dependency content before are placed from the cache instead of running.
+                             If None, no cache is used.
+                           : String or None
+
+        * d_output_cache_gb : Most space (GB) the output cache uses, the entries used least recently are removed.
+                              If None, entries are not removed.
+                            : Float or None
+
+        * str_resource_history : SQLite file of the resources used by commands in past runs. Each command run is
+                                 recorded and the runtime and memory of commands are predicted from it,
+                                 weighting the critical path and sizing commands which do not declare memory.
+                                 If None, no history is used.
+                               : String or None
+
+        * str_trace_out : File a Chrome Trace Event timeline of the run is written to, which loads in
+                          chrome://tracing or Perfetto. If None, the run is not traced.
+                        : String or None
+
+        * str_metrics_out : File the progress of the run is written to as Prometheus metrics every
+                            few seconds, for a node exporter's textfile collector ( should end in .prom ).
+                            If None, no metrics are written.
+                          : String or None
+
         * Return : Boolean
                    True indicates no error occurred
         """
@@ -800,6 +1244,40 @@ class Pipeline:
             str_output_dir = str_current_path_for_abs_paths
         if not str_output_dir[ 0 ] == os.path.sep:
             str_output_dir = os.path.join( str_current_path_for_abs_paths, str_output_dir )
+        # Record valid products in a run manifest instead of ok files if requested.
+        self.mnfst_run = None
+        if f_run_manifest:
+            self.mnfst_run = RunManifest.RunManifest( str_output_dir, logr_cur = self.logr_logger )
+            # Migrate ok files made before the manifest was used.
+            if self.f_execute and not self.mnfst_run.f_existed:
+                self.mnfst_run.func_import_ok_files( str_output_dir )
+        # Decide if commands need to run from the content of their files if requested.
+        self.fngr_store = None
+        if str_fingerprint_mode in Fingerprint.LSTR_FINGERPRINT_CHOICES:
+            self.fngr_store = Fingerprint.FingerprintStore( str_output_dir, str_mode = str_fingerprint_mode, logr_cur = self.logr_logger )
+
+        # Share products of commands between runs if requested.
+        self.cche_output = None
+        if str_output_cache:
+            self.cche_output = OutputCache.OutputCache( str_output_cache, d_max_gb = d_output_cache_gb, logr_cur = self.logr_logger,
+                                                        func_hash_paths = self.fngr_store.func_get_hashes if self.fngr_store else None )
+
+        # Record and predict the resources commands use if requested.
+        self.hist_resources = None
+        self.dict_command_predictions = {}
+        if str_resource_history:
+            try:
+                self.hist_resources = ResourceHistory.ResourceHistory( self.str_name, str_resource_history, logr_cur = self.logr_logger )
+            except ( ResourceHistory.sqlite3.Error, OSError ) as e:
+                self.logr_logger.warning( " ".join( [ "Pipeline.func_run_commands: Not using the resource history",
+                                                      str_resource_history, "Error =", str( e ) ] ) )
+
+        # Record where the time of the run goes if requested.
+        self.trc_run = Trace.TraceRecorder( self.str_name ) if str_trace_out else None
+
+        # Start with nothing known about the files.
+        self.stc_paths.func_clear()
+
         # Update the paths of commands before the dependency tree is made, otherwise they will not match the current state of the commands
         for cmd_command in lcmd_commands:
             # Update the command with a path if needed.
@@ -807,9 +1285,12 @@ class Pipeline:
 
         # Load up the commands and build the dependency tree
         # This skips special commands
-        dt_dependencies = DependencyTree.DependencyTree( [ cmd_cur for cmd_cur in lcmd_commands
-                                                          if not self.func_is_special_command( cmd_cur ) ],
-                                                          self.logr_logger )
+        with Trace.func_span( self.trc_run, Trace.C_STR_SPAN_DAG ):
+            dt_dependencies = DependencyTree.DependencyTree( [ cmd_cur for cmd_cur in lcmd_commands
+                                                              if not self.func_is_special_command( cmd_cur ) ],
+                                                              self.logr_logger )
+        dt_dependencies.stc_paths = self.stc_paths
+        dt_dependencies.trc_run = self.trc_run
         # Make a wdl file
         if str_wdl:
             self.logr_logger.info( " ".join( [ "Pipeline.func_run_commands: Not running pipeline. Writing WDL to file:", str_wdl ] ) )
@@ -831,162 +1312,152 @@ class Pipeline:
                 hndl_dot.write( "\n".join( lstr_dot ) )
             return(True)
 
+        # Expose the progress of the run if requested.
+        self.mtrc_run = None
+        if str_metrics_out:
+            self.mtrc_run = Metrics.MetricsExporter( str_metrics_out, { "pipeline": self.str_name, "output_dir": str_output_dir },
+                                                     logr_cur = self.logr_logger )
+            self.mtrc_run.func_set( Metrics.C_STR_COMMANDS, len( lcmd_commands ) )
+            self.mtrc_run.func_start()
+        dt_dependencies.mtrc_run = self.mtrc_run
+
+        # Observe the run with the benchmarking, tracing, metrics and resource history used, replacing those of any previous run.
+        for obs_previous in self.lobs_run_observers:
+            self.func_remove_observer( obs_previous )
+        self.lobs_run_observers = []
+        self.obs_benchmark = PipelineObserver.BenchmarkObserver( i_benchmark_secs ) if i_benchmark_secs else None
+        if self.obs_benchmark:
+            self.lobs_run_observers.append( self.obs_benchmark )
+        if self.trc_run:
+            self.lobs_run_observers.append( PipelineObserver.TraceObserver( self.trc_run ) )
+        if self.mtrc_run:
+            self.lobs_run_observers.append( PipelineObserver.MetricsObserver( self.mtrc_run ) )
+        if self.hist_resources:
+            self.lobs_run_observers.append( PipelineObserver.HistoryObserver( self.hist_resources ) )
+        for obs_run in self.lobs_run_observers:
+            self.func_add_observer( obs_run )
+
         # Manage the wait for checking for products
         # Set the wait for checking for products
         if not li_wait is None:
             dt_dependencies.li_waits_for_products = li_wait
+        if str_product_detection in FileWatcher.LSTR_DETECTION_CHOICES:
+            dt_dependencies.str_product_detection = str_product_detection
         # If we are testing only, remove the wait
         if not self.f_execute:
             dt_dependencies.func_remove_wait()
 
         # Run each command until all are completed or a failure occurs.
-        # lstr_made_dependencies_to_compress tracks products that are mode which have yet to be compressed.
-        # Should be a set
-        sstr_made_dependencies_to_compress = set()
+        # sstr_made_dependencies_to_compress tracks products that are made which have yet to be compressed.
+        # Is None when compressing as you go is not requested.
+        sstr_made_dependencies_to_compress = None
+        if str_compression_mode and str_compression_mode.lower() == STR_COMPRESSION_AS_YOU_GO.lower():
+            sstr_made_dependencies_to_compress = set()
+
+        # Predict the runtime and memory of commands from the history.
+        if self.hist_resources:
+            dict_command_runtimes = self.func_predict_commands( dt_dependencies.func_get_commands(), dict_command_runtimes )
+
+        # Decide which commands need to run and which are from a previous valid run before running any.
+        dict_plan = self.func_plan_commands( dt_dependencies, i_fuzzy_time = i_time_stamp_wiggle )
+
+        # Run commands concurrently as their dependencies are made if requested.
+        # This is only possible when every command is tracked in the dependency tree.
+        if i_max_parallel_commands and i_max_parallel_commands > 1:
+            lcmd_untracked = [ cmd_cur for cmd_cur in lcmd_commands
+                               if self.func_is_special_command( cmd_cur ) or not cmd_cur.func_is_valid() ]
+            if lcmd_untracked:
+                self.logr_logger.warning( " ".join( [ "Pipeline.func_run_commands: Running commands in serial.",
+                                                      "Commands can only be ran in parallel when all have dependencies and products",
+                                                      "and none are special commands. Untracked command(s):",
+                                                      ", ".join( [ cmd_cur.str_id for cmd_cur in lcmd_untracked ] ) ] ) )
+            else:
+                f_success = self.func_run_commands_in_parallel( dt_dependencies = dt_dependencies,
+                                                                i_max_parallel_commands = i_max_parallel_commands,
+                                                                str_output_dir = str_output_dir,
+                                                                f_clean = f_clean,
+                                                                i_time_stamp_wiggle = i_time_stamp_wiggle,
+                                                                cur_compression = cur_compression,
+                                                                str_compression_type = str_compression_type,
+                                                                sstr_made_dependencies_to_compress = sstr_made_dependencies_to_compress,
+                                                                schd_local = Scheduler.LocalScheduler( i_cores = i_local_cores,
+                                                                                                       d_memory = d_local_memory,
+                                                                                                       logr_cur = self.logr_logger,
+                                                                                                       str_priority = str_command_priority,
+                                                                                                       dict_runtimes = dict_command_runtimes ),
+                                                                dict_plan = dict_plan )
+                lcmd_commands = []
 
         # Turn on graph organized commands if needed.
         # This allows the commands to be organized by the DAG not by the user.
-        if f_self_organize_commands:
+        if f_self_organize_commands and lcmd_commands:
             lcmd_commands = dt_dependencies.func_get_commands()
+        # Commands which needed to run so far, kept for re-planning.
+        lcmd_ran = []
         for cmd_command in lcmd_commands:
             # Log the start
             self.logr_logger.info( " ".join( [ "\n\nPipeline.func_run_commands: Starting", str( cmd_command.str_id ) ] ) )
 
             # Benchmark sciedpiper memory use.
-            ld_mem_info = Benchmarking.func_memory(str(os.getpid()))
-            if(-1 in ld_mem_info):
-                str_mem = b''.join([b'SciEDPipeR Memory benchmarking is only ',
-                                    b'compatible with Linux ',
-                                    b'operating systems.'])
-            else:
-                str_mem = b''.join([b'SciEDPipeR Memory: '+Benchmarking.func_human_readable(ld_mem_info[0]),
-                                    b' SciEDPipeR Resident Memory: '+Benchmarking.func_human_readable(ld_mem_info[1]),
-                                    b' SciEDPipeR Stack Size: '+Benchmarking.func_human_readable(ld_mem_info[2])])
-            self.logr_logger.info(b'SciEDPipeR Memory benchmark::'+str_mem)
+            self.func_log_pipeline_memory()
 
             # Do not execute if the products are already made.
             # We do want to clean up if they ask for it.
             # We do want to compress if they ask for it.
-            if(self.func_paths_are_from_valid_run(cmd_command,
-                                                  f_dependencies=False,
-                                                  dt_deps=dt_dependencies,
-                                                  i_fuzzy_time=i_time_stamp_wiggle)):
-                self.logr_logger.info( " ".join( [ "Pipeline.func_run_commands: Skipping command, resulting file already exist from previous valid command. Current command:", cmd_command.str_id ] ) )
-
-                # Complete the command in case it was not
-                dt_dependencies.func_complete_command( cmd_command, f_wait = False, f_test = not self.f_execute )
-
-                # Add cleaning dependencies
-                if f_clean:
-                    self.func_remove_paths( cmd_command = cmd_command, str_output_directory = str_output_dir,
-                                        dt_dependency_tree = dt_dependencies, f_remove_products = False, f_test = not self.f_execute )
-
-                # Compress if requested, cleaning is going to remove some files so it is easiest to let that happen,
-                # Then if the file still exists go ahead and compress if needed.
-                # I am at this point trusting all products were made ( because func_complete_command does this )
-                # and that things missing were cleaned.
-                if str_compression_mode and str_compression_mode.lower() == STR_COMPRESSION_AS_YOU_GO.lower():
-                    # Record products made, they may have been cleaned so check that they exist
-                    for rsc_product in cmd_command.lstr_products:
-                        if os.path.exists( rsc_product.str_id ):
-                            sstr_made_dependencies_to_compress.add( rsc_product )
-                    # Optionally compress paths if the system is done with the path
-                    sstr_removed = set()
-                    for str_product_compress in sstr_made_dependencies_to_compress:
-                        if not dt_dependencies.func_dependency_is_needed( str_product_compress ):
-                            self.logr_logger.info( "Pipeline.func_run_commands: Compressing " + str_product_compress.str_id )
-                            str_compression_success = cur_compression.func_compress( str_file_path=str_product_compress.str_id,
-                                                           str_output_directory = str_output_dir,
-                                                           str_compression_type=str_compression_type,
-                                                           str_compression_mode=STR_COMPRESSION_ARCHIVE.lower(),
-                                                           f_test = not self.f_execute )
-                            sstr_removed.add( str_product_compress )
-                            f_success = not str_compression_success is None
-                    sstr_made_dependencies_to_compress = sstr_made_dependencies_to_compress - sstr_removed
+            if not self.func_command_needs_to_run( cmd_command = cmd_command,
+                                                   dict_plan = dict_plan,
+                                                   dt_dependencies = dt_dependencies,
+                                                   i_fuzzy_time = i_time_stamp_wiggle ):
+                f_success = self.func_skip_command( cmd_command = cmd_command,
+                                                    dt_dependencies = dt_dependencies,
+                                                    str_output_dir = str_output_dir,
+                                                    f_clean = f_clean,
+                                                    cur_compression = cur_compression,
+                                                    str_compression_type = str_compression_type,
+                                                    sstr_made_dependencies_to_compress = sstr_made_dependencies_to_compress ) and f_success
                 continue
 
             # Attempt a command.
             # Start the timing
             d_start = time.time()
+            lcmd_ran.append( cmd_command )
 
             # Handle changing directories and other special commands
             if self.func_is_special_command( cmd_command ):
+                str_working_dir = os.getcwd()
                 f_success = self.func_do_special_command( cmd_command, f_test = not self.f_execute )
+                # The command may change the working directory which relative paths depend on,
+                # the commands left are planned again from the new directory.
+                self.stc_paths.func_clear()
+                if not os.getcwd() == str_working_dir:
+                    self.logr_logger.info( " ".join( [ "Pipeline.func_run_commands: Planning again after changing the working directory to",
+                                                       os.getcwd() ] ) )
+                    dict_plan = self.func_plan_commands( dt_dependencies, i_fuzzy_time = i_time_stamp_wiggle, lcmd_ran = lcmd_ran )
             else:
-                # This command had product paths that could have been invalid (given it was not skipped over before)
-                # Deleting the paths for those products (if they exist)
-                # This starts the command with a clear slate.
-                # Remove products
-                self.func_remove_paths(cmd_command=cmd_command,
-                                       str_output_directory=str_output_dir,
-                                       dt_dependency_tree=dt_dependencies,
-                                       f_remove_products=True,
-                                       f_test=not self.f_execute)
-
-                # Make directories needed for this command
-                self.func_make_all_needed_dirs([rsc_product.str_id
-                                                for rsc_product
-                                                in cmd_command.lstr_products])
-
-                # Add bsub prefix if needed to the command.
-                str_executed_command = "".join( [ self.str_prefix_command, cmd_command.str_id ] )
-                self.logr_logger.info( "".join( [ "Pipeline.func_run_commands: start command line: ", str_executed_command ] ) )
-                f_success = f_success and self.cmdl_execute.func_CMD(str_executed_command,
-                                                                     f_use_bash=self.f_use_bash,
-                                                                     f_test=not self.f_execute,
-                                                                     i_secs=i_benchmark_secs)
-                self.logr_logger.info( " ".join( [ "Pipeline.func_run_commands: end commandline." ] ) )
-                # If the command is successful, indicate it is complete and potentially clean up stale dependencies
-                if f_success:
-                    f_success = f_success and dt_dependencies.func_complete_command( cmd_command, f_test = not self.f_execute )
-                    self.logr_logger.info( " ".join( [ "Pipeline.func_run_commands: Updated dependencies.", str( f_success ) ] ) )
-                # Update the products so the pipeline knows they are from valid command calls
-                # Make sure that the products are indicated to be complete
-                if f_success and self.f_execute:
-                    if not self.func_update_products_validity_status( cmd_command = cmd_command, dt_tree = dt_dependencies ):
-                        self.logr_logger.error( "Pipeline.func_run_commands: Could not indicate to future commands that a product is valid" )
-                        self.logr_logger.error( " ".join([ "Pipeline.func_run_commands: The following files are invalid and should be removed if they exist,",
-                                                          "an attempt was made to remove them." ] + cmd_command.lstr_products ) )
-                        f_success = False
-                # Add cleaning dependencies if executing and cleaning
-                if f_success and f_clean:
-                    f_success = f_success and self.func_remove_paths( cmd_command = cmd_command, str_output_directory = str_output_dir,
-                                        dt_dependency_tree = dt_dependencies, f_remove_products = False, f_test = not self.f_execute )
-
-                if not f_success:
-                    # If the command was not successful, remove all products if cleaning.
-                    self.logr_logger.error( " ".join( [ "Pipeline.func_run_commands: Was not successful, deleting products produced by error." ] ) )
-
-                    # Remove products
-                    self.func_remove_paths( cmd_command = cmd_command, str_output_directory = str_output_dir,
-                                            dt_dependency_tree = dt_dependencies, f_remove_products = True, f_test = not self.f_execute )
-
-                if f_success and str_compression_mode and str_compression_mode.lower() == STR_COMPRESSION_AS_YOU_GO.lower():
-                    # Compress if requested, cleaning is going to remove some files so it is easiest to let that happen,
-                    # Then if the file still exists go ahead and compress if needed.
-                    # I am at this point trusting all products were made ( because func_complete_command does this )
-                    # and that things missing were cleaned.
-                    # Record products made, they may have been cleaned so check that they exist
-                    for str_product in cmd_command.lstr_products:
-                        if os.path.exists( str_product.str_id ):
-                            sstr_made_dependencies_to_compress.add( str_product )
-                    sstr_removed = set()
-                    for str_product_compress in sstr_made_dependencies_to_compress:
-                        if not dt_dependencies.func_dependency_is_needed( str_product_compress ):
-                            str_compression_success = cur_compression.func_compress( str_file_path = str_product_compress.str_id,
-                                                                                     str_output_directory = str_output_dir,
-                                                                                     str_compression_type = str_compression_type,
-                                                                                     str_compression_mode = STR_COMPRESSION_ARCHIVE.lower(),
-                                                                                     f_test = not self.f_execute )
-                            sstr_removed.add( str_product_compress )
-                            f_success = f_success and ( not str_compression_success is None )
-                    sstr_made_dependencies_to_compress = sstr_made_dependencies_to_compress - sstr_removed
+                str_executed_command = self.func_prepare_command( cmd_command = cmd_command,
+                                                                  dt_dependencies = dt_dependencies,
+                                                                  str_output_dir = str_output_dir )
+                if not self.func_restore_from_output_cache( cmd_command ):
+                    f_success = f_success and self.func_execute_command( cmd_command, str_executed_command )
+                f_success = self.func_finish_command( cmd_command = cmd_command,
+                                                      f_success = f_success,
+                                                      dt_dependencies = dt_dependencies,
+                                                      str_output_dir = str_output_dir,
+                                                      f_clean = f_clean,
+                                                      cur_compression = cur_compression,
+                                                      str_compression_type = str_compression_type,
+                                                      sstr_made_dependencies_to_compress = sstr_made_dependencies_to_compress )
             if self.f_execute:
                 self.logr_logger.info( " ".join( [ "Pipeline.func_run_commands: Time::", str( round( time.time() - d_start ) ) ] ) )
             # Indicate failure
             if ( not f_success ) and self.f_execute:
                 self.logr_logger.error( "Pipeline.func_run_commands: The last command was not successful. Pipeline run failed." )
 
+        self.logr_logger.info( " ".join( [ "Pipeline.func_run_commands: Checked files with", str( self.stc_paths ) ] ) )
+        if i_benchmark_secs:
+            self.logr_logger.info( " ".join( [ "Pipeline.func_run_commands: Benchmarked commands with",
+                                               str( self.cmdl_execute.func_get_engine().smplr_processes ) ] ) )
+
         # Log successful completion
         if f_success:
             self.logr_logger.info( " ".join( [ "Pipeline.func_run_commands: Successfully ended pipeline", self.str_name ] ) )
@@ -1002,6 +1473,8 @@ class Pipeline:
         else:
             self.logr_logger.error( "Pipeline.func_run_commands: The pipeline but was unsuccessful. Pipeline run failed." )
             if self.f_execute:
+                self.func_write_trace( str_trace_out )
+                self.func_stop_metrics()
                 return f_success
 
         # Compress output directory
@@ -1009,11 +1482,16 @@ class Pipeline:
         if f_success:
             str_target_output_directory = str_output_dir
             if str_compression_mode and ( str_compression_mode.lower() in [ STR_COMPRESSION_ARCHIVE.lower(), STR_COMPRESSION_FIRST_LEVEL_ONLY.lower() ] ):
+                d_start = time.time()
+                i_bytes = OutputCache.func_get_size( str_output_dir ) if self.func_observers_use_bytes() else None
                 str_target_output_directory = cur_compression.func_compress( str_file_path=str_output_dir,
                                                                              str_output_directory = str_output_dir,
                                                                              str_compression_type = str_compression_type,
                                                                              str_compression_mode = str_compression_mode.lower(),
                                                                              f_test = not self.f_execute )
+                if self.lobs_observers:
+                    self.func_notify( PipelineObserver.C_STR_ON_COMPRESS, str_output_dir, str_target_output_directory,
+                                      i_bytes, time.time() - d_start )
             # Move or copy output directory if indicated
             if str_target_output_directory:
                 if lstr_copy:
@@ -1021,21 +1499,512 @@ class Pipeline:
                         self.logr_logger.error("Pipeline.func_run_commands: Could not copy the output, archiving turned off.")
                         f_success = False
                     else:
-                        f_success = f_success and self.func_copy_move( lstr_destination=lstr_copy,
-                                                           str_archive=str_target_output_directory,
-                                                           f_copy=True, f_test = not self.f_execute )
+                        f_success = f_success and self.func_archive( lstr_destination = lstr_copy,
+                                                                     str_archive = str_target_output_directory, f_copy = True )
                 if str_move:
                     if not self.f_archive:
                         self.logr_logger.error("Pipeline.func_run_commands: Could not move the output, archiving turned off.")
                         f_success = False
                     else:
-                        f_success = f_success and self.func_copy_move( lstr_destination=[ str_move ],
-                                                           str_archive=str_target_output_directory,
-                                                           f_copy=False, f_test = not self.f_execute )
+                        f_success = f_success and self.func_archive( lstr_destination = [ str_move ],
+                                                                     str_archive = str_target_output_directory, f_copy = False )
 
+        self.func_write_trace( str_trace_out )
+        self.func_stop_metrics()
         # Return success
         return f_success
 
+    # Tested through func_run_commands
+    def func_write_trace( self, str_trace_out ):
+        """
+        Writes the spans recorded in the run to the trace file if tracing.
+
+        * str_trace_out : File to write, None when not tracing.
+                        : String or None
+        """
+
+        if ( self.trc_run is None ) or ( not str_trace_out ):
+            return
+        try:
+            self.trc_run.func_write( str_trace_out )
+            self.logr_logger.info( " ".join( [ "Pipeline.func_run_commands: Wrote the timeline of the run to", str_trace_out,
+                                               str( self.trc_run ) ] ) )
+        except ( IOError, OSError ) as e:
+            self.logr_logger.error( " ".join( [ "Pipeline.func_run_commands: Could not write the timeline of the run to",
+                                                str_trace_out, "Error =", str( e ) ] ) )
+
+    # Tested through func_run_commands
+    def func_stop_metrics( self ):
+        """
+        Writes the final metrics of the run if they are written.
+        """
+
+        if self.mtrc_run is None:
+            return
+        self.mtrc_run.func_stop()
+        self.logr_logger.info( " ".join( [ "Pipeline.func_run_commands: Wrote the metrics of the run", str( self.mtrc_run ) ] ) )
+
+    # Tested through func_run_commands
+    def func_archive( self, lstr_destination, str_archive, f_copy ):
+        """
+        Copies or moves the output of the run ( func_copy_move ) and tells observers.
+
+        * lstr_destination : Where to copy / move the output, when moving a list of 1 path.
+                           : List of strings
+        * str_archive : Output to copy / move.
+                      : String
+        * f_copy : True indicates copy, False indicates move.
+                   : Boolean
+        * return : True indicates no error occurred.
+                 : Boolean
+        """
+
+        d_start = time.time()
+        f_success = self.func_copy_move( lstr_destination = lstr_destination, str_archive = str_archive,
+                                         f_copy = f_copy, f_test = not self.f_execute )
+        if self.lobs_observers:
+            self.func_notify( PipelineObserver.C_STR_ON_ARCHIVE, str_archive, lstr_destination, f_copy, f_success, time.time() - d_start )
+        return f_success
+
+
+    # Tested
+    def func_run_commands_in_parallel( self, dt_dependencies, i_max_parallel_commands, str_output_dir, f_clean = False,
+                                       i_time_stamp_wiggle = None, cur_compression = None,
+                                       str_compression_type = "gz", sstr_made_dependencies_to_compress = None,
+                                       schd_local = None, dict_plan = None ):
+        """
+        Runs the commands of a dependency tree, starting every command whose dependencies
+        are made as soon as a slot is free and the cores and memory it declares are free. Commands run on the command line in worker threads,
+        all bookkeeping (checking validity, completing commands, ok files, cleaning and compressing)
+        happens in the calling thread one command at a time so the dependency tree is never
+        updated concurrently. When a command fails, no new commands are started but commands
+        already running are allowed to finish.
+
+        * dt_dependencies : DependencyTree
+                          : Tree holding all commands to run.
+
+        * i_max_parallel_commands : Int
+                                  : The maximum number of commands running at one time.
+
+        * str_output_dir : String
+                         : Absolute path to the output directory.
+
+        * f_clean : Boolean
+                    True indicates files should be deleted when no longer needed dependent on their clean level.
+
+        * i_time_stamp_wiggle : int or None to turn off
+                                Time stamps must be more than this difference in order to be evaluated, otherwise they pass.
+
+        * cur_compression : Compression
+                          : Compression object used when compressing products as they are no longer needed.
+
+        * str_compression_type : String
+                               : Type of compression to use.
+
+        * sstr_made_dependencies_to_compress : Set or None
+                                             : Products waiting to be compressed, None turns off compressing as you go.
+
+        * schd_local : LocalScheduler
+                     : Decides if a command fits in the cores and memory free and the order ready commands start.
+                       If not given, the machine's cores and memory are used with the critical path priority.
+
+        * dict_plan : Dict or None
+                    : Commands to run { str_id: True } or skip { str_id: False } ( func_plan_commands ).
+                      If None the plan is made here.
+
+        * Return : Boolean
+                   True indicates no error occurred
+        """
+
+        f_success = True
+
+        # Decide which commands need to run.
+        if dict_plan is None:
+            dict_plan = self.func_plan_commands( dt_dependencies, i_fuzzy_time = i_time_stamp_wiggle )
+
+        # Decides if the cores and memory are available to start a command
+        # and the order ready commands start.
+        if not schd_local:
+            schd_local = Scheduler.LocalScheduler( logr_cur = self.logr_logger )
+
+        # Breadth-wise order of the commands, the scheduler's priority policy orders ready commands.
+        lcmd_ordered = dt_dependencies.func_get_commands()
+        dict_order = schd_local.func_get_order_keys( lcmd_ordered )
+
+        # For each command, the commands making its dependencies which have not yet completed
+        # and the commands waiting on its products.
+        dict_waiting_on = {}
+        dict_children = dict( [ ( cmd_cur.str_id, [] ) for cmd_cur in lcmd_ordered ] )
+        for cmd_cur in lcmd_ordered:
+            sstr_parents = set()
+            for rsc_dependency in cmd_cur.func_iter_parents():
+                for vtx_maker in rsc_dependency.func_iter_parents():
+                    if vtx_maker.str_id in dict_children:
+                        sstr_parents.add( vtx_maker.str_id )
+            for str_parent in sstr_parents:
+                dict_children[ str_parent ].append( cmd_cur )
+            dict_waiting_on[ cmd_cur.str_id ] = len( sstr_parents )
+
+        # Commands ready to start, ordered by priority.
+        li_ready = [ ( dict_order[ cmd_cur.str_id ], cmd_cur ) for cmd_cur in lcmd_ordered
+                     if not dict_waiting_on[ cmd_cur.str_id ] ]
+        heapq.heapify( li_ready )
+
+        # Commands currently running and when they started
+        dict_running = {}
+        # Slot ( trace track ) of each running command, from 1
+        dict_slots = {}
+        q_finished = Queue.Queue()
+        # Commands checked and found to need running (not from a previous valid run)
+        sstr_needs_to_run = set()
+
+        def func_release_children( cmd_done ):
+            # Any child with all its dependencies made is ready
+            for cmd_child in dict_children[ cmd_done.str_id ]:
+                dict_waiting_on[ cmd_child.str_id ] -= 1
+                if not dict_waiting_on[ cmd_child.str_id ]:
+                    heapq.heappush( li_ready, ( dict_order[ cmd_child.str_id ], cmd_child ) )
+
+        self.logr_logger.info( " ".join( [ "Pipeline.func_run_commands_in_parallel: Running up to",
+                                           str( i_max_parallel_commands ), "commands at a time.", str( schd_local ) ] ) )
+        while li_ready or dict_running:
+            # Start ready commands in order while there are free slots and they fit in the cores and memory free.
+            # Commands that do not fit wait for running commands to end.
+            li_waiting = []
+            while f_success and li_ready and len( dict_running ) < i_max_parallel_commands:
+                tpl_order, cmd_command = heapq.heappop( li_ready )
+
+                # The first time a command is ready check if it needs to run.
+                if not cmd_command.str_id in sstr_needs_to_run:
+                    self.logr_logger.info( " ".join( [ "\n\nPipeline.func_run_commands: Starting", str( cmd_command.str_id ) ] ) )
+                    self.func_log_pipeline_memory()
+
+                    # Do not execute if the products are already made.
+                    if not self.func_command_needs_to_run( cmd_command = cmd_command,
+                                                           dict_plan = dict_plan,
+                                                           dt_dependencies = dt_dependencies,
+                                                           i_fuzzy_time = i_time_stamp_wiggle ):
+                        f_success = self.func_skip_command( cmd_command = cmd_command,
+                                                            dt_dependencies = dt_dependencies,
+                                                            str_output_dir = str_output_dir,
+                                                            f_clean = f_clean,
+                                                            cur_compression = cur_compression,
+                                                            str_compression_type = str_compression_type,
+                                                            sstr_made_dependencies_to_compress = sstr_made_dependencies_to_compress ) and f_success
+                        func_release_children( cmd_command )
+                        continue
+                    sstr_needs_to_run.add( cmd_command.str_id )
+
+                # Wait if the command does not fit in the resources left
+                if not schd_local.func_admit( cmd_command ):
+                    li_waiting.append( ( tpl_order, cmd_command ) )
+                    continue
+
+                str_executed_command = self.func_prepare_command( cmd_command = cmd_command,
+                                                                  dt_dependencies = dt_dependencies,
+                                                                  str_output_dir = str_output_dir )
+                dict_running[ cmd_command.str_id ] = time.time()
+                # Products placed from the output cache complete without running.
+                if self.func_restore_from_output_cache( cmd_command ):
+                    q_finished.put( ( cmd_command, True ) )
+                    continue
+                dict_slots[ cmd_command.str_id ] = min( set( range( 1, i_max_parallel_commands + 1 ) ) - set( dict_slots.values() ) )
+                thrd_command = threading.Thread( target = self.__func_run_command_line,
+                                                 args = ( cmd_command, str_executed_command, q_finished,
+                                                          dict_slots[ cmd_command.str_id ] ) )
+                thrd_command.daemon = True
+                thrd_command.start()
+            for tpl_waiting in li_waiting:
+                heapq.heappush( li_ready, tpl_waiting )
+
+            # Nothing is running and nothing more will be started
+            if not dict_running:
+                break
+
+            # Wait for a command to end and complete it
+            cmd_command, f_command_success = q_finished.get()
+            d_start = dict_running.pop( cmd_command.str_id )
+            dict_slots.pop( cmd_command.str_id, None )
+            schd_local.func_release( cmd_command )
+            f_command_success = self.func_finish_command( cmd_command = cmd_command,
+                                                          f_success = f_command_success,
+                                                          dt_dependencies = dt_dependencies,
+                                                          str_output_dir = str_output_dir,
+                                                          f_clean = f_clean,
+                                                          cur_compression = cur_compression,
+                                                          str_compression_type = str_compression_type,
+                                                          sstr_made_dependencies_to_compress = sstr_made_dependencies_to_compress )
+            if self.f_execute:
+                self.logr_logger.info( " ".join( [ "Pipeline.func_run_commands: Time::", str( round( time.time() - d_start ) ),
+                                                   cmd_command.str_id ] ) )
+            if f_command_success:
+                func_release_children( cmd_command )
+            else:
+                f_success = False
+                if self.f_execute:
+                    self.logr_logger.error( " ".join( [ "Pipeline.func_run_commands: The command was not successful.",
+                                                        "No new commands will be started. Pipeline run failed. Command:",
+                                                        cmd_command.str_id ] ) )
+        return f_success
+
+    def __func_run_command_line( self, cmd_command, str_executed_command, q_finished, i_slot = 1 ):
+        """
+        Runs a command on the command line and places the command and it's success on the queue.
+        Used as the body of the threads running commands in parallel.
+        """
+
+        f_command_success = False
+        try:
+            f_command_success = self.func_execute_command( cmd_command, str_executed_command, i_slot = i_slot )
+        except Exception as e:
+            self.logr_logger.error( " ".join( [ "Pipeline.func_run_commands_in_parallel: Error running command.",
+                                                str_executed_command, "Error =", str( e ) ] ) )
+        finally:
+            q_finished.put( ( cmd_command, f_command_success ) )
+
+    # Tested through func_run_commands
+    def func_execute_command( self, cmd_command, str_executed_command, i_slot = 1 ):
+        """
+        Runs a command on the command line, observers are told when it starts and ends
+        ( with the seconds it ran, its return code and the resources it used ).
+        The resources are measured when benchmarking ( obs_benchmark ).
+
+        * cmd_command : Command to be ran
+                      : Command
+        * str_executed_command : Command line to run ( func_prepare_command ).
+                               : String
+        * i_slot : Parallel slot the command runs in, from 1.
+                 : Integer
+        * return : True indicates the command ran without error.
+                 : Boolean
+        """
+
+        if self.lobs_observers:
+            self.func_notify( PipelineObserver.C_STR_ON_COMMAND_START, cmd_command, str_executed_command, i_slot )
+        obs_benchmark = self.obs_benchmark
+        prof_memory = obs_benchmark.func_get_profile( cmd_command ) if obs_benchmark else None
+        # The return code is given when the command ends, there is none if it did not run.
+        li_return_code = []
+        d_start = time.time()
+        try:
+            return self.cmdl_execute.func_CMD( str_executed_command,
+                                               f_use_bash = self.f_use_bash,
+                                               f_test = not self.f_execute,
+                                               i_secs = obs_benchmark.i_secs if prof_memory else None,
+                                               prof_memory = prof_memory,
+                                               func_ended = li_return_code.append )
+        finally:
+            if self.lobs_observers:
+                self.func_notify( PipelineObserver.C_STR_ON_COMMAND_END, cmd_command, i_slot, time.time() - d_start,
+                                  li_return_code[ 0 ] if li_return_code else None, prof_memory )
+
+    def func_log_pipeline_memory( self ):
+        """
+        Logs the memory used by SciEDPipeR (this process).
+        """
+
+        ld_mem_info = Benchmarking.func_memory(str(os.getpid()))
+        if(-1 in ld_mem_info):
+            str_mem = b''.join([b'SciEDPipeR Memory benchmarking is only ',
+                                b'compatible with Linux ',
+                                b'operating systems.'])
+        else:
+            str_mem = b''.join([b'SciEDPipeR Memory: '+Benchmarking.func_human_readable(ld_mem_info[0]),
+                                b' SciEDPipeR Resident Memory: '+Benchmarking.func_human_readable(ld_mem_info[1]),
+                                b' SciEDPipeR Stack Size: '+Benchmarking.func_human_readable(ld_mem_info[2])])
+        self.logr_logger.info(b'SciEDPipeR Memory benchmark::'+str_mem)
+
+    # Tested through func_run_commands
+    def func_skip_command( self, cmd_command, dt_dependencies, str_output_dir, f_clean = False, cur_compression = None,
+                           str_compression_type = "gz", sstr_made_dependencies_to_compress = None ):
+        """
+        Handles a command which does not need to be ran because its products are from a previous valid run.
+        The command is completed, cleaned and compressed as if it had just been ran.
+
+        * cmd_command : Command
+                      : Command being skipped.
+
+        * Return : Boolean
+                   True indicates no error occurred
+        """
+
+        if self.lobs_observers:
+            self.func_notify( PipelineObserver.C_STR_ON_COMMAND_SKIP, cmd_command )
+
+        # Complete the command in case it was not
+        dt_dependencies.func_complete_command( cmd_command, f_wait = False, f_test = not self.f_execute )
+
+        # Add cleaning dependencies
+        if f_clean:
+            self.func_remove_paths( cmd_command = cmd_command, str_output_directory = str_output_dir,
+                                    dt_dependency_tree = dt_dependencies, f_remove_products = False, f_test = not self.f_execute )
+
+        # Compress if requested, cleaning is going to remove some files so it is easiest to let that happen,
+        # Then if the file still exists go ahead and compress if needed.
+        # I am at this point trusting all products were made ( because func_complete_command does this )
+        # and that things missing were cleaned.
+        return self.func_compress_as_you_go( cmd_command = cmd_command,
+                                             dt_dependencies = dt_dependencies,
+                                             str_output_dir = str_output_dir,
+                                             cur_compression = cur_compression,
+                                             str_compression_type = str_compression_type,
+                                             sstr_made_dependencies_to_compress = sstr_made_dependencies_to_compress )
+
+    # Tested through func_run_commands
+    def func_prepare_command( self, cmd_command, dt_dependencies, str_output_dir ):
+        """
+        Readies the output directory for a command which is about to run.
+        This command had product paths that could have been invalid (given it was not skipped over before),
+        the paths for those products are deleted (if they exist). This starts the command with a clear slate.
+        Then the directories needed for the products are made.
+
+        * cmd_command : Command
+                      : Command about to run.
+
+        * Return : String
+                   The command line to execute.
+        """
+
+        # Remove products
+        self.func_remove_paths(cmd_command=cmd_command,
+                               str_output_directory=str_output_dir,
+                               dt_dependency_tree=dt_dependencies,
+                               f_remove_products=True,
+                               f_test=not self.f_execute)
+
+        # Make directories needed for this command
+        self.func_make_all_needed_dirs([rsc_product.str_id
+                                        for rsc_product
+                                        in cmd_command.lstr_products])
+
+        # The command is about to change files, what is known about them will be out of date.
+        self.stc_paths.func_clear()
+
+        # Add bsub prefix if needed to the command.
+        return "".join( [ self.str_prefix_command, cmd_command.str_id ] )
+
+    # Tested through func_run_commands
+    def func_restore_from_output_cache( self, cmd_command ):
+        """
+        Places the products of a command from the output cache if it is used and has them,
+        in which case the command does not need to run.
+
+        * cmd_command : Command
+                      : Command about to run ( func_prepare_command was called ).
+
+        * Return : Boolean
+                   True indicates the products were placed.
+        """
+
+        if ( self.cche_output is None ) or ( not self.f_execute ) or ( not cmd_command.func_is_valid() ):
+            return False
+        return self.cche_output.func_restore( cmd_command )
+
+    # Tested through func_run_commands
+    def func_finish_command( self, cmd_command, f_success, dt_dependencies, str_output_dir, f_clean = False,
+                             cur_compression = None, str_compression_type = "gz", sstr_made_dependencies_to_compress = None ):
+        """
+        Handles a command after it ran on the command line.
+        On success the command is completed, products are indicated to be valid (ok files),
+        dependencies are cleaned and products compressed as requested.
+        On failure the products of the command are removed.
+
+        * cmd_command : Command
+                      : Command which ran.
+
+        * f_success : Boolean
+                    : True indicates the command ran without error.
+
+        * Return : Boolean
+                   True indicates no error occurred
+        """
+
+        # The command changed files, what is known about them is out of date.
+        self.stc_paths.func_clear()
+
+        # If the command is successful, indicate it is complete and potentially clean up stale dependencies
+        if f_success:
+            f_success = f_success and dt_dependencies.func_complete_command( cmd_command, f_test = not self.f_execute )
+            self.logr_logger.info( " ".join( [ "Pipeline.func_run_commands: Updated dependencies.", str( f_success ) ] ) )
+        # Update the products so the pipeline knows they are from valid command calls
+        # Make sure that the products are indicated to be complete
+        if f_success and self.f_execute:
+            if not self.func_update_products_validity_status( cmd_command = cmd_command, dt_tree = dt_dependencies ):
+                self.logr_logger.error( "Pipeline.func_run_commands: Could not indicate to future commands that a product is valid" )
+                self.logr_logger.error( " ".join([ "Pipeline.func_run_commands: The following files are invalid and should be removed if they exist,",
+                                                  "an attempt was made to remove them." ] + [ rsc_product.str_id for rsc_product in cmd_command.lstr_products ] ) )
+                f_success = False
+        # Share the products with other runs ( before cleaning removes dependencies )
+        if f_success and self.f_execute and ( not self.cche_output is None ):
+            self.cche_output.func_store( cmd_command )
+        # Add cleaning dependencies if executing and cleaning
+        if f_success and f_clean:
+            f_success = f_success and self.func_remove_paths( cmd_command = cmd_command, str_output_directory = str_output_dir,
+                                dt_dependency_tree = dt_dependencies, f_remove_products = False, f_test = not self.f_execute )
+
+        if not f_success:
+            # If the command was not successful, remove all products if cleaning.
+            self.logr_logger.error( " ".join( [ "Pipeline.func_run_commands: Was not successful, deleting products produced by error." ] ) )
+
+            # Remove products
+            self.func_remove_paths( cmd_command = cmd_command, str_output_directory = str_output_dir,
+                                    dt_dependency_tree = dt_dependencies, f_remove_products = True, f_test = not self.f_execute )
+
+        if f_success:
+            # Compress if requested, cleaning is going to remove some files so it is easiest to let that happen,
+            # Then if the file still exists go ahead and compress if needed.
+            # I am at this point trusting all products were made ( because func_complete_command does this )
+            # and that things missing were cleaned.
+            f_success = self.func_compress_as_you_go( cmd_command = cmd_command,
+                                                      dt_dependencies = dt_dependencies,
+                                                      str_output_dir = str_output_dir,
+                                                      cur_compression = cur_compression,
+                                                      str_compression_type = str_compression_type,
+                                                      sstr_made_dependencies_to_compress = sstr_made_dependencies_to_compress )
+        return f_success
+
+    # Tested through func_run_commands
+    def func_compress_as_you_go( self, cmd_command, dt_dependencies, str_output_dir, cur_compression = None,
+                                 str_compression_type = "gz", sstr_made_dependencies_to_compress = None ):
+        """
+        Records the products of a completed command and compresses any recorded product no longer needed.
+
+        * sstr_made_dependencies_to_compress : Set or None
+                                             : Products waiting to be compressed, updated in place.
+                                               None indicates compressing as you go is off.
+
+        * Return : Boolean
+                   True indicates no error occurred
+        """
+
+        if sstr_made_dependencies_to_compress is None or not cur_compression:
+            return True
+
+        f_success = True
+        # Record products made, they may have been cleaned so check that they exist
+        for rsc_product in cmd_command.lstr_products:
+            if os.path.exists( rsc_product.str_id ):
+                sstr_made_dependencies_to_compress.add( rsc_product )
+        # Optionally compress paths if the system is done with the path
+        sstr_removed = set()
+        for rsc_product_compress in sstr_made_dependencies_to_compress:
+            if not dt_dependencies.func_dependency_is_needed( rsc_product_compress ):
+                d_start = time.time()
+                i_bytes = OutputCache.func_get_size( rsc_product_compress.str_id ) if self.func_observers_use_bytes() else None
+                str_compression_success = cur_compression.func_compress( str_file_path = rsc_product_compress.str_id,
+                                                                         str_output_directory = str_output_dir,
+                                                                         str_compression_type = str_compression_type,
+                                                                         str_compression_mode = STR_COMPRESSION_ARCHIVE.lower(),
+                                                                         f_test = not self.f_execute )
+                if self.lobs_observers:
+                    self.func_notify( PipelineObserver.C_STR_ON_COMPRESS, rsc_product_compress.str_id, str_compression_success,
+                                      i_bytes, time.time() - d_start )
+                sstr_removed.add( rsc_product_compress )
+                self.stc_paths.func_forget( [ rsc_product_compress.str_id ] )
+                f_success = f_success and ( not str_compression_success is None )
+        sstr_made_dependencies_to_compress.difference_update( sstr_removed )
+        return f_success
+
 
     # 5 tests
     def func_update_command_path( self, cmd_cur, dict_update_cur ):
@@ -1095,11 +2064,23 @@ class Pipeline:
             self.logr_logger.error( "Pipeline.func_update_products_validity_status: Was to validate a command's products, some of which were missing. Did not update.")
             return False
 
+        # Record the fingerprints of the command if used
+        if self.f_execute and ( not self.fngr_store is None ):
+            self.fngr_store.func_record_command( cmd_command )
+
+        # Record the products in the run manifest if used
+        if self.f_execute and ( not self.mnfst_run is None ):
+            with Trace.func_span( self.trc_run, Trace.C_STR_SPAN_MANIFEST, Trace.C_STR_CATEGORY_FILES ):
+                self.mnfst_run.func_record_valid( [ rsc_product.str_id for rsc_product in cmd_command.lstr_products ], cmd_command.str_id )
+            return True
+
         # Make the ok file, empty with no content
         if self.f_execute:
-            for rsc_product in cmd_command.lstr_products:
-                str_product = rsc_product.str_id
-                open( self.func_get_ok_file_path( str_product ), "w" ).close()
+            with Trace.func_span( self.trc_run, Trace.C_STR_SPAN_OK_FILES, Trace.C_STR_CATEGORY_FILES ):
+                for rsc_product in cmd_command.lstr_products:
+                    str_product = rsc_product.str_id
+                    open( self.func_get_ok_file_path( str_product ), "w" ).close()
+                    self.stc_paths.func_forget( [ self.func_get_ok_file_path( str_product ) ] )
         return True
 
 
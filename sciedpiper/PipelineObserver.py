@@ -0,0 +1,333 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+import Benchmarking
+import Metrics
+import os
+import OutputCache
+import time
+import Trace
+
+"""
+Observers are told what a pipeline does while it runs: the plan, each command
+skipped, started and ended ( with its duration, return code and the
+resources it used ), cleaning, compression and archiving ( copying or moving
+the output ). Observers are added to a pipeline with
+Pipeline.func_add_observer and only implement the events they use.
+Logging, benchmarking, tracing, metrics and the resource history of a run are observers.
+"""
+
+__author__ = "Timothy Tickle"
+__copyright__ = "Copyright 2016"
+__credits__ = ["Timothy Tickle", "Brian Haas"]
+__license__ = "MIT"
+__maintainer__ = "Timothy Tickle"
+__email__ = "ttickle@broadinstitute.org"
+__status__ = "Development"
+
+
+# Events
+C_STR_ON_PLAN = "on_plan"
+C_STR_ON_COMMAND_SKIP = "on_command_skip"
+C_STR_ON_COMMAND_START = "on_command_start"
+C_STR_ON_COMMAND_END = "on_command_end"
+C_STR_ON_CLEAN = "on_clean"
+C_STR_ON_COMPRESS = "on_compress"
+C_STR_ON_ARCHIVE = "on_archive"
+C_LSTR_EVENTS = [C_STR_ON_PLAN, C_STR_ON_COMMAND_SKIP, C_STR_ON_COMMAND_START, C_STR_ON_COMMAND_END,
+                 C_STR_ON_CLEAN, C_STR_ON_COMPRESS, C_STR_ON_ARCHIVE]
+
+
+class PipelineObserver:
+    """
+    Observer of a pipeline run which does nothing on each event, observers
+    override the events they use. Events are given the pipeline first.
+    on_command_start and on_command_end are called from the thread running
+    the command, which is not the pipeline's thread when commands run in
+    parallel. Errors in observers are logged and do not stop the run.
+    """
+
+    f_uses_bytes = False
+    """
+    True indicates the observer uses the bytes of cleaned and compressed paths,
+    which are only measured when an observer uses them.
+    """
+
+    def on_plan(self, pline_cur, dict_plan, lcmd_ordered, d_seconds):
+        """
+        Before any command runs, which commands need to run.
+
+        * dict_plan : { str_id: True } for commands to run, { str_id: False } for commands to skip.
+                    : Dict
+        * lcmd_ordered : Commands planned in dependency order.
+                       : List of Commands
+        * d_seconds : Seconds planning took.
+                    : Float
+        """
+
+        pass
+
+    def on_command_skip(self, pline_cur, cmd_command):
+        """
+        A command is skipped, its products are from a previous valid run.
+        """
+
+        pass
+
+    def on_command_start(self, pline_cur, cmd_command, str_executed_command, i_slot):
+        """
+        A command is about to run on the command line.
+
+        * str_executed_command : Command line ran.
+                               : String
+        * i_slot : Parallel slot the command runs in, from 1.
+                 : Integer
+        """
+
+        pass
+
+    def on_command_end(self, pline_cur, cmd_command, i_slot, d_seconds, i_return_code, prof_memory):
+        """
+        A command ended on the command line.
+
+        * i_slot : Parallel slot the command ran in, from 1.
+                 : Integer
+        * d_seconds : Seconds the command ran.
+                    : Float
+        * i_return_code : Return code, None if the command did not run ( test mode or it could not start ).
+                        : Integer or None
+        * prof_memory : Resources used by the command's process tree, None if not benchmarked.
+                      : Benchmarking.ProcessTreeProfile or None
+        """
+
+        pass
+
+    def on_clean(self, pline_cur, cmd_command, lstr_paths, i_bytes, d_seconds):
+        """
+        Intermediate files no longer needed after a command were removed.
+
+        * lstr_paths : Paths removed.
+                     : List of strings
+        * i_bytes : Bytes of the paths removed, None if no observer uses bytes.
+                  : Integer or None
+        * d_seconds : Seconds cleaning took.
+                    : Float
+        """
+
+        pass
+
+    def on_compress(self, pline_cur, str_path, str_compressed, i_bytes, d_seconds):
+        """
+        A path was compressed.
+
+        * str_path : Path compressed.
+                   : String
+        * str_compressed : Path after compression, None if compression failed.
+                         : String or None
+        * i_bytes : Bytes of the path before compression, None if no observer uses bytes.
+                  : Integer or None
+        * d_seconds : Seconds compression took.
+                    : Float
+        """
+
+        pass
+
+    def on_archive(self, pline_cur, str_archive, lstr_destination, f_copy, f_success, d_seconds):
+        """
+        The output of the run was copied or moved.
+
+        * str_archive : Path copied or moved.
+                      : String
+        * lstr_destination : Where the path was copied or moved to.
+                           : List of strings
+        * f_copy : True indicates a copy, False a move.
+                 : Boolean
+        * f_success : True indicates no error occurred.
+                    : Boolean
+        * d_seconds : Seconds the copy or move took.
+                    : Float
+        """
+
+        pass
+
+
+class LogObserver(PipelineObserver):
+    """
+    Logs the events of a run to the pipeline's logger.
+    """
+
+    def on_plan(self, pline_cur, dict_plan, lcmd_ordered, d_seconds):
+        i_run = len([f_run for f_run in dict_plan.values() if f_run])
+        pline_cur.logr_logger.info("\n".join([" ".join(["Pipeline.func_plan_commands: Plan::", str(i_run), "command(s) to run,",
+                                                        str(len(dict_plan) - i_run), "to skip. Planned in",
+                                                        "{:.2f}".format(d_seconds), "seconds.", str(pline_cur.stc_paths)])] +
+                                             [" ".join(["RUN " if dict_plan[cmd_cur.str_id] else "SKIP", cmd_cur.str_id] +
+                                                       pline_cur.func_format_prediction(cmd_cur))
+                                              for cmd_cur in lcmd_ordered]))
+
+    def on_command_skip(self, pline_cur, cmd_command):
+        pline_cur.logr_logger.info(" ".join(["Pipeline.func_run_commands: Skipping command, resulting file already exist",
+                                             "from previous valid command. Current command:", cmd_command.str_id]))
+
+    def on_command_start(self, pline_cur, cmd_command, str_executed_command, i_slot):
+        pline_cur.logr_logger.info("".join(["Pipeline.func_run_commands: start command line: ", str_executed_command]))
+
+    def on_command_end(self, pline_cur, cmd_command, i_slot, d_seconds, i_return_code, prof_memory):
+        pline_cur.logr_logger.info(" ".join(["Pipeline.func_run_commands: end commandline. Return code:", str(i_return_code),
+                                             "Seconds:", "{:.2f}".format(d_seconds), "Command:", cmd_command.str_id]))
+        if prof_memory:
+            pline_cur.logr_logger.info(b"Memory benchmark::" + str(prof_memory))
+
+    def on_clean(self, pline_cur, cmd_command, lstr_paths, i_bytes, d_seconds):
+        if lstr_paths:
+            pline_cur.logr_logger.info(" ".join(["Pipeline.func_remove_paths: Cleaned", str(len(lstr_paths)), "path(s)" +
+                                                 ("" if i_bytes is None else ", " + Benchmarking.func_human_readable(i_bytes)) + ".",
+                                                 "Command:", cmd_command.str_id]))
+
+    def on_compress(self, pline_cur, str_path, str_compressed, i_bytes, d_seconds):
+        pline_cur.logr_logger.info(" ".join(["Pipeline.func_run_commands: Compressed", str_path, "to", str(str_compressed),
+                                             "in", "{:.2f}".format(d_seconds), "seconds."]))
+
+    def on_archive(self, pline_cur, str_archive, lstr_destination, f_copy, f_success, d_seconds):
+        pline_cur.logr_logger.info(" ".join(["Pipeline.func_run_commands:", "Copied" if f_copy else "Moved", str_archive,
+                                             "to", ", ".join(lstr_destination), "in", "{:.2f}".format(d_seconds), "seconds.",
+                                             "" if f_success else "An error occurred."]).strip())
+
+
+class BenchmarkObserver(PipelineObserver):
+    """
+    Measures the resources used by the process tree of each command while it runs.
+    Each command is given a profile when it starts, the pipeline runs the
+    command with it ( func_get_profile ).
+    """
+
+    def __init__(self, i_secs):
+        """
+        * i_secs : Seconds between measuring the resources of a command.
+                 : Integer
+        """
+
+        self.i_secs = i_secs
+        """ Seconds between measuring the resources of a command. """
+
+        self.dict_command_profiles = {}
+        """
+        Resources used by each command ran,
+        { command id: Benchmarking.ProcessTreeProfile } of the command's process tree.
+        """
+
+    def on_command_start(self, pline_cur, cmd_command, str_executed_command, i_slot):
+        self.dict_command_profiles[cmd_command.str_id] = Benchmarking.ProcessTreeProfile()
+
+    def func_get_profile(self, cmd_command):
+        """
+        Profile filled while the command runs, None if the command did not start.
+
+        * return : Benchmarking.ProcessTreeProfile or None
+        """
+
+        return(self.dict_command_profiles.get(cmd_command.str_id))
+
+
+class TraceObserver(PipelineObserver):
+    """
+    Records the events of a run as spans, each command on the track of its slot.
+    """
+
+    f_uses_bytes = True
+
+    def __init__(self, trc_cur):
+        """
+        * trc_cur : Recorder of the run.
+                  : Trace.TraceRecorder
+        """
+
+        self.trc_cur = trc_cur
+        """ Recorder of the run. """
+
+    def on_plan(self, pline_cur, dict_plan, lcmd_ordered, d_seconds):
+        i_run = len([f_run for f_run in dict_plan.values() if f_run])
+        self.trc_cur.func_add_span(Trace.C_STR_SPAN_PLAN, Trace.C_STR_CATEGORY_PIPELINE, time.time() - d_seconds,
+                                   dict_args={"run": i_run, "skip": len(dict_plan) - i_run})
+
+    def on_command_end(self, pline_cur, cmd_command, i_slot, d_seconds, i_return_code, prof_memory):
+        self.trc_cur.func_add_span(cmd_command.str_id, Trace.C_STR_CATEGORY_COMMAND, time.time() - d_seconds,
+                                   i_track=i_slot, dict_args={"return_code": i_return_code})
+
+    def on_clean(self, pline_cur, cmd_command, lstr_paths, i_bytes, d_seconds):
+        self.trc_cur.func_add_span(Trace.C_STR_SPAN_CLEAN, Trace.C_STR_CATEGORY_FILES, time.time() - d_seconds,
+                                   dict_args={"command": cmd_command.str_id, "paths": len(lstr_paths), "bytes": i_bytes})
+
+    def on_compress(self, pline_cur, str_path, str_compressed, i_bytes, d_seconds):
+        self.trc_cur.func_add_span(Trace.C_STR_SPAN_COMPRESS, Trace.C_STR_CATEGORY_FILES, time.time() - d_seconds,
+                                   dict_args={"path": str_path})
+
+    def on_archive(self, pline_cur, str_archive, lstr_destination, f_copy, f_success, d_seconds):
+        self.trc_cur.func_add_span(Trace.C_STR_SPAN_COPY if f_copy else Trace.C_STR_SPAN_MOVE, Trace.C_STR_CATEGORY_FILES,
+                                   time.time() - d_seconds, dict_args={"path": str_archive})
+
+
+class MetricsObserver(PipelineObserver):
+    """
+    Counts the events of a run in its metrics.
+    """
+
+    f_uses_bytes = True
+
+    def __init__(self, mtrc_cur):
+        """
+        * mtrc_cur : Metrics of the run.
+                   : Metrics.MetricsExporter
+        """
+
+        self.mtrc_cur = mtrc_cur
+        """ Metrics of the run. """
+
+    def on_command_skip(self, pline_cur, cmd_command):
+        self.mtrc_cur.func_add(Metrics.C_STR_COMMANDS_SKIPPED)
+
+    def on_command_start(self, pline_cur, cmd_command, str_executed_command, i_slot):
+        self.mtrc_cur.func_add(Metrics.C_STR_COMMANDS_RUNNING, 1)
+
+    def on_command_end(self, pline_cur, cmd_command, i_slot, d_seconds, i_return_code, prof_memory):
+        self.mtrc_cur.func_add(Metrics.C_STR_COMMANDS_RUNNING, -1)
+        self.mtrc_cur.func_observe(Metrics.C_STR_COMMAND_SECONDS, d_seconds)
+        if i_return_code is None:
+            return
+        self.mtrc_cur.func_add(Metrics.C_STR_COMMANDS_DONE if i_return_code == 0 else Metrics.C_STR_COMMANDS_FAILED)
+        if i_return_code == 0:
+            self.mtrc_cur.func_add(Metrics.C_STR_PRODUCED_BYTES, sum([OutputCache.func_get_size(rsc_product.str_id)
+                                                                     for rsc_product in cmd_command.lstr_products
+                                                                     if os.path.exists(rsc_product.str_id)]))
+
+    def on_clean(self, pline_cur, cmd_command, lstr_paths, i_bytes, d_seconds):
+        self.mtrc_cur.func_add(Metrics.C_STR_CLEANED_BYTES, i_bytes)
+
+    def on_compress(self, pline_cur, str_path, str_compressed, i_bytes, d_seconds):
+        if (not str_compressed) or str_compressed == str_path or not os.path.exists(str_compressed):
+            return
+        self.mtrc_cur.func_add(Metrics.C_STR_COMPRESSION_INPUT_BYTES, i_bytes)
+        self.mtrc_cur.func_add(Metrics.C_STR_COMPRESSION_OUTPUT_BYTES, OutputCache.func_get_size(str_compressed))
+
+
+class HistoryObserver(PipelineObserver):
+    """
+    Records the resources each command used in the resource history.
+    """
+
+    def __init__(self, hist_cur):
+        """
+        * hist_cur : History commands are recorded in.
+                   : ResourceHistory.ResourceHistory
+        """
+
+        self.hist_cur = hist_cur
+        """ History commands are recorded in. """
+
+    def on_command_end(self, pline_cur, cmd_command, i_slot, d_seconds, i_return_code, prof_memory):
+        if i_return_code is None:
+            return
+        self.hist_cur.func_record(cmd_command, d_seconds, f_success=i_return_code == 0, prof_memory=prof_memory)
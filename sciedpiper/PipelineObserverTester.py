@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+import Benchmarking
+import Command
+import Metrics
+import ParentPipelineTester
+import Pipeline
+import PipelineObserver
+import time
+import Trace
+import unittest
+
+
+"""
+Tests the PipelineObserver module.
+"""
+
+
+__author__ = "Timothy Tickle"
+__copyright__ = "Copyright 2016"
+__credits__ = ["Timothy Tickle", "Brian Haas"]
+__license__ = "MIT"
+__maintainer__ = "Timothy Tickle"
+__email__ = "ttickle@broadinstitute.org"
+__status__ = "Development"
+
+
+class RecordingHistory:
+    """ Records what would be written to a resource history. """
+
+    def __init__(self):
+        self.ltpl_records = []
+
+    def func_record(self, cmd_cur, d_wall_seconds, f_success=True, prof_memory=None):
+        self.ltpl_records.append((cmd_cur.str_id, d_wall_seconds, f_success))
+
+
+class PipelineObserverTester(ParentPipelineTester.ParentPipelineTester):
+    """
+    Tests the observers built into the pipeline.
+    """
+
+    ########################
+    # PipelineObserver
+    ########################
+    def test_pipeline_observer(self):
+        """ The base observer has every event and does nothing. """
+        obs_cur = PipelineObserver.PipelineObserver()
+        self.func_test_true(all([getattr(obs_cur, str_event).__name__ == str_event
+                                 for str_event in PipelineObserver.C_LSTR_EVENTS]))
+
+    ########################
+    # LogObserver
+    ########################
+    def test_log_observer_for_clean_without_bytes(self):
+        """ Cleaning is logged without bytes when paths were not measured. """
+        obs_cur = PipelineObserver.LogObserver()
+        pline_cur = Pipeline.Pipeline(str_name="test_log_observer_for_clean_without_bytes")
+        obs_cur.on_clean(pline_cur, Command.Command("command", [], []), ["intermediate.txt"], None, 0.1)
+        self.func_test_true(not obs_cur.f_uses_bytes)
+
+    ########################
+    # BenchmarkObserver
+    ########################
+    def test_benchmark_observer(self):
+        """ Each command started is given a new profile, commands which did not start have none. """
+        obs_cur = PipelineObserver.BenchmarkObserver(2)
+        cmd_cur = Command.Command("command", [], [])
+        prof_before = obs_cur.func_get_profile(cmd_cur)
+        obs_cur.on_command_start(None, cmd_cur, "command", 1)
+        prof_first = obs_cur.func_get_profile(cmd_cur)
+        obs_cur.on_command_start(None, cmd_cur, "command", 1)
+        self.func_test_true(prof_before is None and isinstance(prof_first, Benchmarking.ProcessTreeProfile) and
+                            not obs_cur.func_get_profile(cmd_cur) is prof_first and obs_cur.i_secs == 2)
+
+    ########################
+    # TraceObserver
+    ########################
+    def test_trace_observer_for_command_end(self):
+        """ A command ending is a span on the track of its slot, ending now and lasting the seconds it ran. """
+        trc_cur = Trace.TraceRecorder("run")
+        obs_cur = PipelineObserver.TraceObserver(trc_cur)
+        d_now = time.time()
+        obs_cur.on_command_end(None, Command.Command("sleep 2", [], []), 3, 2.0, 0, None)
+        dict_span = trc_cur.ldict_events[0]
+        self.func_test_true(dict_span["name"] == "sleep 2" and dict_span["tid"] == 3 and
+                            dict_span["cat"] == Trace.C_STR_CATEGORY_COMMAND and
+                            dict_span["args"] == {"return_code": 0} and
+                            abs(dict_span["dur"] - 2000000) < 1000 and
+                            abs((trc_cur.d_origin + dict_span["ts"] / 1000000.0) - (d_now - 2.0)) < 0.5)
+
+    ########################
+    # MetricsObserver
+    ########################
+    def test_metrics_observer_for_commands(self):
+        """ Commands are counted by return code and commands which did not run are not counted as done or failed. """
+        mtrc_cur = Metrics.MetricsExporter("metrics.prom")
+        obs_cur = PipelineObserver.MetricsObserver(mtrc_cur)
+        cmd_cur = Command.Command("command", [], [])
+        for i_return_code in [1, None, 2]:
+            obs_cur.on_command_start(None, cmd_cur, "command", 1)
+            obs_cur.on_command_end(None, cmd_cur, 1, 0.5, i_return_code, None)
+        obs_cur.on_command_skip(None, cmd_cur)
+        self.func_test_true(mtrc_cur.dict_values == {Metrics.C_STR_COMMANDS_RUNNING: 0,
+                                                     Metrics.C_STR_COMMANDS_FAILED: 2,
+                                                     Metrics.C_STR_COMMANDS_SKIPPED: 1} and
+                            mtrc_cur.dict_histograms[Metrics.C_STR_COMMAND_SECONDS][1] == 3)
+
+    def test_metrics_observer_for_failed_compression(self):
+        """ Paths which failed to compress are not counted in the compression. """
+        mtrc_cur = Metrics.MetricsExporter("metrics.prom")
+        obs_cur = PipelineObserver.MetricsObserver(mtrc_cur)
+        obs_cur.on_compress(None, "product.txt", None, 100, 0.1)
+        obs_cur.on_clean(None, Command.Command("command", [], []), ["intermediate.txt"], 10, 0.1)
+        self.func_test_true(mtrc_cur.dict_values == {Metrics.C_STR_CLEANED_BYTES: 10})
+
+    ########################
+    # HistoryObserver
+    ########################
+    def test_history_observer(self):
+        """ Commands which ran are recorded with their success, commands which did not run are not. """
+        hist_cur = RecordingHistory()
+        obs_cur = PipelineObserver.HistoryObserver(hist_cur)
+        cmd_cur = Command.Command("command", [], [])
+        obs_cur.on_command_end(None, cmd_cur, 1, 1.5, 0, None)
+        obs_cur.on_command_end(None, cmd_cur, 1, 2.5, 1, None)
+        obs_cur.on_command_end(None, cmd_cur, 1, 0.0, None, None)
+        self.func_test_true(hist_cur.ltpl_records == [("command", 1.5, True), ("command", 2.5, False)])
+
+
+#Creates a suite of tests
+def suite():
+    """ Suite aggregates tests and is used to run tests. """
+    return unittest.TestLoader().loadTestsFromTestCase(PipelineObserverTester)
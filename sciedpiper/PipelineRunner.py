@@ -19,13 +19,22 @@ import argparse
 import Arguments
 import ConfigManager
 import Commandline
+import copy
 import csv
 import Dispatcher
+import FileWatcher
+import Fingerprint
+import itertools
+import JobExecutor
+import JobLedger
 import JSONManager
 import logging
+import Metrics
 import os
 import Pipeline
-import multiprocessing
+import QueueLogging
+import ResourceHistory
+import Scheduler
 import stat
 import sys
 
@@ -50,7 +59,9 @@ class PipelineRunner:
         self.ns_arguments = None
         self.dict_args_info = None
         self.str_orig_output_dir = None
+        self.str_orig_metrics_out = None
         self.f_is_multi_job = False
+        self.f_is_merged_samples = False
         self.prog = "custom"
 
         # Retrieve and manage arguments
@@ -68,6 +79,8 @@ class PipelineRunner:
 
         # Set in func_parse_jobs()
         self.str_possible_config_file = None
+        self.ldgr_jobs = None
+        self.li_job_rows = []
         self.llstr_sample_data = self.func_parse_jobs()
 
         # Check version
@@ -174,10 +187,14 @@ class PipelineRunner:
         grp_builtin.add_argument("--mem_benchmark",
                                  default=None,
                                  dest="i_mem_benchmark",
-                                 type=int,
+                                 type=float,
                                  help="".join(["The amount of seconds wait",
                                                " between polling commands ",
-                                               "when benchmarking memory. ",
+                                               "when benchmarking memory ",
+                                               "(fractions of a second are allowed). ",
+                                               "The memory, CPU time and I/O ",
+                                               "of each command and all the ",
+                                               "processes it starts are logged. ",
                                                "By default turned off. "]))
 
         grp_builtin.add_argument("--clean",
@@ -187,6 +204,78 @@ class PipelineRunner:
                                  help="".join(["Turns on (true) or off (false)",
                                                " cleaning of intermediary ",
                                                "product files."]))
+        grp_builtin.add_argument("--fingerprint",
+                                 dest="str_fingerprint_mode",
+                                 default=Fingerprint.STR_FINGERPRINT_NONE,
+                                 choices=[Fingerprint.STR_FINGERPRINT_NONE] + Fingerprint.LSTR_FINGERPRINT_CHOICES,
+                                 help="".join(["Decide if commands need to ",
+                                               "run from content hashes of ",
+                                               "their dependencies and ",
+                                               "products (recorded when ",
+                                               "they complete) instead of ",
+                                               "time stamps. ",
+                                               Fingerprint.STR_FINGERPRINT_SAMPLED,
+                                               " hashes evenly spaced parts ",
+                                               "of very large files."]))
+        grp_builtin.add_argument("--output_cache",
+                                 dest="str_output_cache",
+                                 default=None,
+                                 help="".join(["Directory of a cache shared ",
+                                               "between runs. Products of ",
+                                               "commands ran before with the ",
+                                               "same command and dependency ",
+                                               "content are placed from the ",
+                                               "cache instead of running."]))
+        grp_builtin.add_argument("--output_cache_size",
+                                 dest="d_output_cache_gb",
+                                 default=None,
+                                 type=float,
+                                 help="".join(["Most space (GB) the output ",
+                                               "cache uses, the entries used ",
+                                               "least recently are removed."]))
+        grp_builtin.add_argument("--resource_history",
+                                 dest="str_resource_history",
+                                 default=None,
+                                 nargs="?",
+                                 const=ResourceHistory.func_get_default_history_file(),
+                                 help="".join(["Record the time, memory, CPU ",
+                                               "and I/O of each command in a ",
+                                               "SQLite file kept between runs ",
+                                               "and predict the runtime and ",
+                                               "memory of commands from it. ",
+                                               "Without a file, ",
+                                               ResourceHistory.func_get_default_history_file(),
+                                               " is used."]))
+        grp_builtin.add_argument("--metrics_out",
+                                 dest="str_metrics_out",
+                                 default=None,
+                                 help="".join(["Write the progress of the run ",
+                                               "as Prometheus metrics to this ",
+                                               "file (.prom, for a node ",
+                                               "exporter's textfile collector) ",
+                                               "every ",
+                                               str(int(Metrics.D_WRITE_SECONDS)),
+                                               " seconds. With a sample file, ",
+                                               "each sample writes to its own ",
+                                               "file tagged with its name."]))
+        grp_builtin.add_argument("--trace_out",
+                                 dest="str_trace_out",
+                                 default=None,
+                                 help="".join(["Write a timeline of the run ",
+                                               "(Chrome Trace Event JSON, ",
+                                               "opens in chrome://tracing or ",
+                                               "Perfetto) to this file."]))
+        grp_builtin.add_argument("--run_manifest",
+                                 dest="f_run_manifest",
+                                 default=False,
+                                 action="store_true",
+                                 help="".join(["Records products made ",
+                                               "without error in one ",
+                                               "manifest file in the output ",
+                                               "directory instead of a ",
+                                               "hidden ok file per product. ",
+                                               "Existing ok files are ",
+                                               "imported the first time."]))
         grp_builtin.add_argument("--copy",
                                  metavar="Copy_location",
                                  dest="lstr_copy",
@@ -219,6 +308,52 @@ class PipelineRunner:
                                  default=None,
                                  help="".join(["Write script to a JSON file. ",
                                                "(Does not execute pipeline.)"]))
+        grp_builtin.add_argument("--max_parallel_commands",
+                                 metavar="Max_parallel_commands",
+                                 dest="i_max_parallel_commands",
+                                 type=int,
+                                 default=1,
+                                 help="".join(["The maximum number of ",
+                                               "commands to run at the same ",
+                                               "time. Commands are started ",
+                                               "as soon as their dependencies",
+                                               " are made. By default ",
+                                               "commands run one at a time."]))
+        grp_builtin.add_argument("--local_cores",
+                                 metavar="Local_cores",
+                                 dest="i_local_cores",
+                                 type=int,
+                                 default=None,
+                                 help="".join(["The number of cores commands ",
+                                               "running in parallel may use ",
+                                               "together. By default the ",
+                                               "cores the machine reports."]))
+        grp_builtin.add_argument("--local_memory",
+                                 metavar="Local_memory",
+                                 dest="d_local_memory",
+                                 type=float,
+                                 default=None,
+                                 help="".join(["The memory (GB) commands ",
+                                               "running in parallel may use ",
+                                               "together. By default the ",
+                                               "memory the machine reports."]))
+        grp_builtin.add_argument("--command_priority",
+                                 metavar="Command_priority",
+                                 dest="str_command_priority",
+                                 choices=Scheduler.LSTR_PRIORITY_CHOICES,
+                                 default=Scheduler.STR_PRIORITY_CRITICAL_PATH,
+                                 help="".join(["Which ready command starts ",
+                                               "first when running commands ",
+                                               "in parallel. ",
+                                               Scheduler.STR_PRIORITY_CRITICAL_PATH,
+                                               " starts commands with the ",
+                                               "longest chain of commands ",
+                                               "after them first, ",
+                                               Scheduler.STR_PRIORITY_BREADTH,
+                                               " starts commands in the ",
+                                               "order of the dependency ",
+                                               "graph. Choices: ",
+                                               ",".join(Scheduler.LSTR_PRIORITY_CHOICES)]))
         grp_builtin.add_argument("--move",
                                  metavar="Move_location",
                                  dest="str_move_dir",
@@ -305,6 +440,23 @@ class PipelineRunner:
                                                "three seconds, then try again",
                                                " after 10 seconds, and lastly",
                                                " wait for 20 seconds."]))
+        grp_builtin.add_argument("--product_detection",
+                                 metavar="Product_detection",
+                                 dest="str_product_detection",
+                                 choices=FileWatcher.LSTR_DETECTION_CHOICES,
+                                 default=FileWatcher.STR_DETECTION_WATCH,
+                                 help="".join(["How to wait for products ",
+                                               "after a command ends, never ",
+                                               "waiting longer than the ",
+                                               "total of --wait. ",
+                                               FileWatcher.STR_DETECTION_WATCH,
+                                               " continues as soon as the ",
+                                               "products appear (inotify on ",
+                                               "linux and polling), ",
+                                               FileWatcher.STR_DETECTION_RETRY,
+                                               " checks again after each ",
+                                               "wait in --wait. Choices: ",
+                                               ",".join(FileWatcher.LSTR_DETECTION_CHOICES)]))
 
         # Job submission associated
         str_jobs_name = "".join(["Job Submission ",
@@ -328,6 +480,52 @@ class PipelineRunner:
                               default=1,
                               help="".join(["The maximum number of jobs to ",
                                             "run concurrently."]))
+        grp_jobs.add_argument("--stream_samples",
+                              dest="f_stream_samples",
+                              default=False,
+                              action="store_true",
+                              help="".join(["Read the sample file one row at ",
+                                            "a time as jobs start instead of ",
+                                            "all at once, for very large ",
+                                            "sample files."]))
+        grp_jobs.add_argument("--sample_start_row",
+                              metavar="Start_row",
+                              dest="i_sample_start_row",
+                              type=int,
+                              default=0,
+                              help="".join(["Skip the rows of the sample file ",
+                                            "before this row (starting at 0), ",
+                                            "used to resume a run. The row of ",
+                                            "each job is in the job log."]))
+        grp_jobs.add_argument("--resume",
+                              dest="f_resume",
+                              default=False,
+                              action="store_true",
+                              help="".join(["Do not run samples which ",
+                                            "completed in an earlier run, as ",
+                                            "recorded in the job ledger (",
+                                            JobLedger.C_STR_LEDGER_FILE,
+                                            ") in the output directory."]))
+        grp_jobs.add_argument("--job_oversubscription",
+                              metavar="Commands_per_core",
+                              dest="d_job_oversubscription",
+                              type=float,
+                              default=None,
+                              help="".join(["Most commands running in all ",
+                                            "concurrent jobs per core, ",
+                                            "counting --max_parallel_commands ",
+                                            "per job. Fewer jobs run at a time ",
+                                            "if needed. By default only ",
+                                            "--concurrent_jobs limits jobs."]))
+        grp_jobs.add_argument("--merge_samples",
+                              dest="f_merge_samples",
+                              default=False,
+                              action="store_true",
+                              help="".join(["Run the commands of all samples in ",
+                                            "one pipeline, commands shared by ",
+                                            "samples run once and samples run ",
+                                            "together up to --concurrent_jobs ",
+                                            "commands at a time."]))
         grp_jobs.add_argument("--job_system",
                               metavar="Queueing_System",
                               dest=C_STR_JOB_SYSTEM_DEST,
@@ -422,7 +620,7 @@ class PipelineRunner:
     # TODO Test
     def func_make_job_logger(self):
         """
-        Make logger for job runner.
+        Make logger for job runner, written by a thread from a bounded buffer ( QueueLogging ).
 
         * return: Logger for the job runner
                 : Logger
@@ -434,7 +632,7 @@ class PipelineRunner:
                                                              C_STR_JOB_LOGGER_NAME),
                                                              mode="w")
         hdlr_job.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
-        logr_job.addHandler(hdlr_job)
+        logr_job.addHandler(QueueLogging.QueueHandler(hdlr_job))
         logr_job.setLevel(logging.INFO)
         return(logr_job)
 
@@ -489,6 +687,7 @@ class PipelineRunner:
 
         # Original output file
         self.str_orig_output_dir = self.ns_arguments.str_out_dir
+        self.str_orig_metrics_out = getattr(self.ns_arguments, "str_metrics_out", None)
 
     # TODO Test
     def func_manage_output_dir(self):
@@ -516,19 +715,43 @@ class PipelineRunner:
         # to manage depending in the number of samples or existence of a sample
         # sheet.
         llstr_sample_data = [None]
-        if self.ns_arguments.str_sample_file:
-            with open(self.ns_arguments.str_sample_file, "r") as hndl_samples:
-                llstr_sample_data = [lstr_row for lstr_row in csv.reader(hndl_samples, delimiter = b"\t")]
+        i_start_row = max(getattr(self.ns_arguments, "i_sample_start_row", 0), 0)
+        f_stream = bool(self.ns_arguments.str_sample_file and
+                        getattr(self.ns_arguments, "f_stream_samples", False))
+        # Streamed rows are not read until jobs start, check the file now.
+        if f_stream and not os.path.isfile(self.ns_arguments.str_sample_file):
+            self.logr_job.error("".join(["PipelineRunner.func_parse_jobs:: ",
+                                         "Could not find the sample file: ",
+                                         self.ns_arguments.str_sample_file]))
+            exit(995)
+        if f_stream:
+            # Rows are read as jobs start, the number of samples is not known.
+            llstr_sample_data = func_read_sample_rows(self.ns_arguments.str_sample_file,
+                                                      i_start_row=i_start_row)
+        elif self.ns_arguments.str_sample_file:
+            llstr_sample_data = list(func_read_sample_rows(self.ns_arguments.str_sample_file,
+                                                           i_start_row=i_start_row))
+        if i_start_row and self.ns_arguments.str_sample_file:
+            self.logr_job.info("".join(["PipelineRunner.func_parse_jobs:: ",
+                                        "Starting at row ", str(i_start_row),
+                                        " of the sample file."]))
 
         # Turn on Job running
-        if len(llstr_sample_data) > 1 and self.ns_arguments.i_number_jobs > 1:
+        if f_stream:
+            self.f_is_multi_job = self.ns_arguments.i_number_jobs > 1
+        elif len(llstr_sample_data) > 1 and self.ns_arguments.i_number_jobs > 1:
             self.f_is_multi_job = True
         else:
             self.f_is_multi_job = False
 
+        # Run all samples in one merged pipeline
+        self.f_is_merged_samples = bool(self.ns_arguments.str_sample_file and
+                                        getattr(self.ns_arguments, "f_merge_samples", False))
+
         # No more job threads than number of jobs requested
-        self.ns_arguments.i_number_jobs = min(self.ns_arguments.i_number_jobs,
-                                              len(llstr_sample_data))
+        if not f_stream:
+            self.ns_arguments.i_number_jobs = min(self.ns_arguments.i_number_jobs,
+                                                  len(llstr_sample_data))
 
         # To run multiple samples, a pipeline config is required
         if self.ns_arguments.str_pipeline_config_file:
@@ -539,6 +762,11 @@ class PipelineRunner:
             self.logr_job.error("All jobs with sample files need pipeline config files.")
             exit(997)
 
+        # Record the state of each sample to resume runs
+        if self.ns_arguments.str_sample_file:
+            self.ldgr_jobs = JobLedger.JobLedger(self.ns_arguments.str_out_dir,
+                                                 logr_cur=self.logr_job)
+
         return(llstr_sample_data)
 
     # TODO Test
@@ -547,7 +775,9 @@ class PipelineRunner:
         Runs housekeeping code before the pipeline is ran.
         This is the function that is called by children objects to run.
         """
-        if self.f_is_multi_job:
+        if self.f_is_merged_samples:
+            exit(0 if self.func_run_merged_samples() else 999)
+        elif self.f_is_multi_job:
             self.func_run_many_jobs()
         else:
             self.func_run_jobs_locally()
@@ -561,14 +791,18 @@ class PipelineRunner:
             exit(998)
 
         f_error_occured = False
-        for lstr_sample_data in self.llstr_sample_data:
+        for i_row, lstr_sample_data in self.func_enumerate_samples():
             str_current_job = "= " + lstr_sample_data[0] if lstr_sample_data else ""
             self.logr_job.info("".join(["PipelineRunner.func_run_jobs_locally::",
                                         " Start Running job ",
                                         str_current_job]))
+            if self.ldgr_jobs and lstr_sample_data:
+                self.ldgr_jobs.func_record_start(i_row, lstr_sample_data[0])
             # Run a sample
 #            try:
             f_return = self.func_run_sample(lstr_sample_data)
+            if self.ldgr_jobs and lstr_sample_data:
+                self.ldgr_jobs.func_record_end(i_row, lstr_sample_data[0], 0 if f_return else 1)
             if f_return:
                 self.logr_job.info("".join(["PipelineRunner.func_run_jobs",
                                             "_locally:: Ran WITHOUT error,",
@@ -704,6 +938,9 @@ class PipelineRunner:
             str_updated_script_path = cur_config_manager.func_update_script_path(sys.argv[0])
             str_precommands = cur_config_manager.func_get_precommands()
             str_postcommands = cur_config_manager.func_get_postcommands()
+        # Each sample writes its metrics to its own file.
+        if self.str_orig_metrics_out and lstr_sample_info:
+            self.ns_arguments.str_metrics_out = self.func_tag_file(self.str_orig_metrics_out, lstr_sample_info[0])
         # Make a bash script
         ## Make output directory
         PipelineRunner.func_make_output_dir(self.ns_arguments)
@@ -723,20 +960,58 @@ class PipelineRunner:
         # Return script to run.
         return(str_script_to_run)
 
-    # TODO Test
+    # Tested
+    def func_enumerate_samples(self):
+        """
+        Samples to run with their row in the sample file. With --resume,
+        samples the job ledger records as completed are skipped without
+        making or running their scripts.
+
+        * return: ( row, sample info ) for each sample
+                : Generator of tuples
+        """
+
+        i_row = max(getattr(self.ns_arguments, "i_sample_start_row", 0), 0)
+        f_resume = bool(self.ldgr_jobs and getattr(self.ns_arguments, "f_resume", False))
+        i_skipped = 0
+        for lstr_sample_info in self.llstr_sample_data:
+            if f_resume and lstr_sample_info and self.ldgr_jobs.func_is_completed(i_row, lstr_sample_info[0]):
+                i_skipped += 1
+            else:
+                yield((i_row, lstr_sample_info))
+            i_row += 1
+        if f_resume:
+            self.logr_job.info("".join(["PipelineRunner.func_enumerate_samples:: ",
+                                        "Skipped ", str(i_skipped), " sample(s) ",
+                                        "completed in an earlier run."]))
+
+    # Tested
     def func_get_job_commands(self):
         """
-        Update the command per sample and return a list of commands to run.
+        Update the command per sample and return the commands to run.
         This triggers the creation of bash scripts to run the commands given
-        the provided sample information.
+        the provided sample information. Commands are made one at a time as
+        they are asked for, so each script is written just before its job
+        starts and a streamed sample file is read as jobs start. Samples
+        completed in an earlier run are skipped with --resume.
+
+        * return: ( sample name, command ) for each sample
+                : Generator of tuples
         """
 
-        lstr_cmds = []
-        for lstr_sample_info in self.llstr_sample_data:
+        self.li_job_rows = []
+        for i_row, lstr_sample_info in self.func_enumerate_samples():
             str_cmd = self.func_update_command(lstr_sample_info)
             if str_cmd:
-                lstr_cmds.append(self.dispr_cur(str_cmd))
-        return lstr_cmds
+                str_sample_name = lstr_sample_info[0] if lstr_sample_info else self.func_base_file(self.prog)
+                self.logr_job.info("".join(["PipelineRunner.func_get_job_commands:: ",
+                                            "Sample file row ", str(i_row), " ",
+                                            str_sample_name, " script: ", str_cmd]))
+                # Jobs start in the order they are made, the row of each job is kept for the ledger.
+                self.li_job_rows.append(i_row)
+                # The script is read by bash instead of executed, executing a script fails
+                # ( text file busy ) while a job starting at the same time holds it open.
+                yield((str_sample_name, " ".join(["bash", str_cmd])))
 
     # TODO Test
     def func_run_sample(self, lstr_sample_info):
@@ -760,42 +1035,8 @@ class PipelineRunner:
             # Holds the commands to run
             lcmd_commands = []
 
-            ## Output dir related
-            # If the output dir is not specified then move and copy functions are disabled
-            f_archive = True
-            if(not hasattr(self.ns_arguments, Arguments.C_STR_OUTPUT_DIR)
-               or not self.ns_arguments.str_out_dir):
-                f_archive = False
-
-            ## Make output directory
-            PipelineRunner.func_make_output_dir(self.ns_arguments)
-
             # Make pipeline object and indicate Log file
-            pline_cur = Pipeline.Pipeline(str_name=self.prog,
-                                          str_log_to_file=self.ns_arguments.str_log_file if hasattr(self.ns_arguments, "str_log_file") else os.path.join(self.ns_arguments.str_out_dir, "custom_log.txt"),
-                                          str_update_source_path=self.ns_arguments.str_update_classpath if hasattr(self.ns_arguments, "str_update_classpath") else None)
-            # Update the logger with the arguments
-            if self.version:
-                str_version_log = "".join(["PipelineRunner.func_run_sample:: ",
-                                           "Pipeline version:",
-                                           str(self.version), "\n",
-                                           "PipelineRunner.func_run_sample:: ",
-                                           "The call to the pipeline was: ",
-                                           " ".join(["\n"] + sys.argv + ["\n"]),
-                                           "PipelineRunner.func_run_sample:: ",
-                                           "This run was started with the ",
-                                           "following arg.\n"])
-                str_args_log = "\n".join([str(str_namespace_key) + " = " + str(str_namespace_value)
-                                          for str_namespace_key, str_namespace_value in vars(self.ns_arguments).items()] + ["\n"])
-                pline_cur.logr_logger.info(str_version_log)
-                pline_cur.logr_logger.info(str_args_log)
-            # Put pipeline in test mode if needed.
-            if hasattr(self.ns_arguments, "f_Test") and self.ns_arguments.f_Test:
-                pline_cur.func_test_mode()
-            # Turn off archiving if output directory was not given
-            if hasattr(self.ns_arguments, "f_archive") and not f_archive:
-                pline_cur.logr_logger.warning("PipelineRunner.func_run_sample:: Turning off archiving, please specify an output directory if you want this feature enabled.")
-                pline_cur.f_archive = False
+            pline_cur = self.func_make_pipeline()
             # Run the user based pipeline
             # If the commands are not existent (parsed from JSON)
             # then build them from script
@@ -825,56 +1066,271 @@ class PipelineRunner:
                 return(True)
 
             # Run commands
-            if not hasattr(self.ns_arguments, "lstr_copy"):
-                setattr(self.ns_arguments, "lstr_copy", None)
-            if not hasattr(self.ns_arguments, "str_move_dir"):
-                setattr(self.ns_arguments, "str_move_dir", None)
-            if not hasattr(self.ns_arguments, "str_compress"):
-                setattr(self.ns_arguments, "str_compress",  "none")
-            if not hasattr(self.ns_arguments, "f_clean"):
-                setattr(self.ns_arguments, "f_clean", False)
-            if not hasattr(self.ns_arguments, "i_time_stamp_diff"):
-                setattr(self.ns_arguments, "i_time_stamp_diff", None)
-            return(pline_cur.func_run_commands(lcmd_commands=lcmd_commands,
-                                               str_output_dir=self.ns_arguments.str_out_dir,
-                                               f_clean=self.ns_arguments.f_clean,
-                                               f_self_organize_commands=self.ns_arguments.f_graph_organize,
-                                               li_wait=[int(str_wait) for str_wait in self.ns_arguments.lstr_wait.split(",")],
-                                               lstr_copy=self.ns_arguments.lstr_copy if self.ns_arguments.lstr_copy else None,
-                                               str_move=self.ns_arguments.str_move_dir if self.ns_arguments.str_move_dir else None,
-                                               str_compression_mode=self.ns_arguments.str_compress,
-                                               i_time_stamp_wiggle=self.ns_arguments.i_time_stamp_diff,
-                                               #str_wdl=self.ns_arguments.str_wdl,
-                                               str_dot_file=self.ns_arguments.str_dot_path,
-                                               i_benchmark_secs=self.ns_arguments.i_mem_benchmark,
-                                               args_original=None ))
-                                               #args_original = (self.ns_arguments if self.ns_arguments.str_wdl else None)))
+            return(self.func_run_pipeline_commands(pline_cur, lcmd_commands))
+
+    # TODO Test
+    def func_make_pipeline(self):
+        """
+        Makes the output directory and a pipeline logging to it,
+        set up with the pipeline arguments.
+
+        * return: Pipeline to run commands in
+                : Pipeline
+        """
+
+        ## Output dir related
+        # If the output dir is not specified then move and copy functions are disabled
+        f_archive = True
+        if(not hasattr(self.ns_arguments, Arguments.C_STR_OUTPUT_DIR)
+           or not self.ns_arguments.str_out_dir):
+            f_archive = False
+
+        ## Make output directory
+        PipelineRunner.func_make_output_dir(self.ns_arguments)
+
+        # Make pipeline object and indicate Log file
+        pline_cur = Pipeline.Pipeline(str_name=self.prog,
+                                      str_log_to_file=self.ns_arguments.str_log_file if hasattr(self.ns_arguments, "str_log_file") else os.path.join(self.ns_arguments.str_out_dir, "custom_log.txt"),
+                                      str_update_source_path=self.ns_arguments.str_update_classpath if hasattr(self.ns_arguments, "str_update_classpath") else None)
+        # Update the logger with the arguments
+        if self.version:
+            str_version_log = "".join(["PipelineRunner.func_make_pipeline:: ",
+                                       "Pipeline version:",
+                                       str(self.version), "\n",
+                                       "PipelineRunner.func_make_pipeline:: ",
+                                       "The call to the pipeline was: ",
+                                       " ".join(["\n"] + sys.argv + ["\n"]),
+                                       "PipelineRunner.func_make_pipeline:: ",
+                                       "This run was started with the ",
+                                       "following arg.\n"])
+            str_args_log = "\n".join([str(str_namespace_key) + " = " + str(str_namespace_value)
+                                      for str_namespace_key, str_namespace_value in vars(self.ns_arguments).items()] + ["\n"])
+            pline_cur.logr_logger.info(str_version_log)
+            pline_cur.logr_logger.info(str_args_log)
+        # Put pipeline in test mode if needed.
+        if hasattr(self.ns_arguments, "f_Test") and self.ns_arguments.f_Test:
+            pline_cur.func_test_mode()
+        # Turn off archiving if output directory was not given
+        if hasattr(self.ns_arguments, "f_archive") and not f_archive:
+            pline_cur.logr_logger.warning("PipelineRunner.func_make_pipeline:: Turning off archiving, please specify an output directory if you want this feature enabled.")
+            pline_cur.f_archive = False
+        return(pline_cur)
 
     # TODO Test
+    def func_run_pipeline_commands(self, pline_cur, lcmd_commands, i_max_parallel_commands=None):
+        """
+        Runs commands in a pipeline with the pipeline arguments.
+
+        * pline_cur: Pipeline made with func_make_pipeline
+                   : Pipeline
+        * lcmd_commands: Commands to run
+                       : List of commands
+        * i_max_parallel_commands: If given, used instead of --max_parallel_commands
+                                 : int or None
+        * return: True indicates no error occurred
+                : Boolean
+        """
+
+        if not hasattr(self.ns_arguments, "lstr_copy"):
+            setattr(self.ns_arguments, "lstr_copy", None)
+        if not hasattr(self.ns_arguments, "str_move_dir"):
+            setattr(self.ns_arguments, "str_move_dir", None)
+        if not hasattr(self.ns_arguments, "str_compress"):
+            setattr(self.ns_arguments, "str_compress",  "none")
+        if not hasattr(self.ns_arguments, "f_clean"):
+            setattr(self.ns_arguments, "f_clean", False)
+        if not hasattr(self.ns_arguments, "f_run_manifest"):
+            setattr(self.ns_arguments, "f_run_manifest", False)
+        if not hasattr(self.ns_arguments, "str_fingerprint_mode"):
+            setattr(self.ns_arguments, "str_fingerprint_mode", Fingerprint.STR_FINGERPRINT_NONE)
+        if not hasattr(self.ns_arguments, "str_output_cache"):
+            setattr(self.ns_arguments, "str_output_cache", None)
+        if not hasattr(self.ns_arguments, "d_output_cache_gb"):
+            setattr(self.ns_arguments, "d_output_cache_gb", None)
+        if not hasattr(self.ns_arguments, "str_resource_history"):
+            setattr(self.ns_arguments, "str_resource_history", None)
+        if not hasattr(self.ns_arguments, "str_trace_out"):
+            setattr(self.ns_arguments, "str_trace_out", None)
+        if not hasattr(self.ns_arguments, "str_metrics_out"):
+            setattr(self.ns_arguments, "str_metrics_out", None)
+        if not hasattr(self.ns_arguments, "i_time_stamp_diff"):
+            setattr(self.ns_arguments, "i_time_stamp_diff", None)
+        if not hasattr(self.ns_arguments, "i_max_parallel_commands"):
+            setattr(self.ns_arguments, "i_max_parallel_commands", 1)
+        if not hasattr(self.ns_arguments, "i_local_cores"):
+            setattr(self.ns_arguments, "i_local_cores", None)
+        if not hasattr(self.ns_arguments, "d_local_memory"):
+            setattr(self.ns_arguments, "d_local_memory", None)
+        if not hasattr(self.ns_arguments, "str_command_priority"):
+            setattr(self.ns_arguments, "str_command_priority", Scheduler.STR_PRIORITY_CRITICAL_PATH)
+        if not hasattr(self.ns_arguments, "str_product_detection"):
+            setattr(self.ns_arguments, "str_product_detection", FileWatcher.STR_DETECTION_WATCH)
+        return(pline_cur.func_run_commands(lcmd_commands=lcmd_commands,
+                                           str_output_dir=self.ns_arguments.str_out_dir,
+                                           f_clean=self.ns_arguments.f_clean,
+                                           f_self_organize_commands=self.ns_arguments.f_graph_organize,
+                                           li_wait=[int(str_wait) for str_wait in self.ns_arguments.lstr_wait.split(",")],
+                                           lstr_copy=self.ns_arguments.lstr_copy if self.ns_arguments.lstr_copy else None,
+                                           str_move=self.ns_arguments.str_move_dir if self.ns_arguments.str_move_dir else None,
+                                           str_compression_mode=self.ns_arguments.str_compress,
+                                           i_time_stamp_wiggle=self.ns_arguments.i_time_stamp_diff,
+                                           #str_wdl=self.ns_arguments.str_wdl,
+                                           str_dot_file=self.ns_arguments.str_dot_path,
+                                           i_benchmark_secs=self.ns_arguments.i_mem_benchmark,
+                                           i_max_parallel_commands=i_max_parallel_commands if i_max_parallel_commands else self.ns_arguments.i_max_parallel_commands,
+                                           i_local_cores=self.ns_arguments.i_local_cores,
+                                           d_local_memory=self.ns_arguments.d_local_memory,
+                                           str_command_priority=self.ns_arguments.str_command_priority,
+                                           str_product_detection=self.ns_arguments.str_product_detection,
+                                           f_run_manifest=self.ns_arguments.f_run_manifest,
+                                           str_fingerprint_mode=self.ns_arguments.str_fingerprint_mode,
+                                           str_output_cache=self.ns_arguments.str_output_cache,
+                                           d_output_cache_gb=self.ns_arguments.d_output_cache_gb,
+                                           str_resource_history=self.ns_arguments.str_resource_history,
+                                           str_trace_out=self.ns_arguments.str_trace_out,
+                                           str_metrics_out=self.ns_arguments.str_metrics_out,
+                                           args_original=None ))
+                                           #args_original = (self.ns_arguments if self.ns_arguments.str_wdl else None)))
+
+    # Tested
+    def func_run_merged_samples(self):
+        """
+        Runs the commands of all samples in one pipeline. The commands of each
+        sample are made with the sample's arguments and merged into one
+        dependency tree, so commands shared by samples (eg. indexing a
+        reference) run once and commands of different samples run together
+        (up to the larger of --concurrent_jobs and --max_parallel_commands).
+        Unlike running each sample as a job, the pipeline config's path and
+        pre / post commands are not applied per sample. Samples are recorded
+        in the job ledger with the result of the merged pipeline and with
+        --resume samples completed in an earlier run are not made or ran.
+        """
+
+        llcmd_samples = []
+        f_config = os.path.exists(self.str_possible_config_file) and self.ns_arguments.f_use_pipeline_config
+        if f_config:
+            cur_config_manager = ConfigManager.ConfigManager(self.str_possible_config_file)
+            if cur_config_manager.func_get_precommands() or cur_config_manager.func_get_postcommands():
+                self.logr_job.warning("".join(["PipelineRunner.func_run_merged_samples:: ",
+                                               "Pre and post commands in the pipeline ",
+                                               "config are not ran when merging samples."]))
+            # Paths are the same for all samples, update the environment once.
+            cur_config_manager.func_update_env_path()
+            cur_config_manager.func_update_python_path()
+
+        # The pipeline logs to and keeps its run state in the original output directory.
+        self.ns_arguments.str_out_dir = self.str_orig_output_dir
+        pline_cur = self.func_make_pipeline()
+        ns_original = self.ns_arguments
+        ltpl_samples = []
+        for i_row, lstr_sample_info in self.func_enumerate_samples():
+            ltpl_samples.append((i_row, lstr_sample_info[0]))
+            # Make each sample's commands with its own arguments.
+            ns_sample = copy.deepcopy(ns_original)
+            if f_config:
+                ns_sample = cur_config_manager.func_update_arguments(args_parsed=ns_sample,
+                                                                     dict_args_info=self.dict_args_info,
+                                                                     lstr_sample_arguments=lstr_sample_info,
+                                                                     lstr_locked_arguments=Arguments.C_LSTR_LOCKED_ARGS)
+            PipelineRunner.func_make_output_dir(ns_sample)
+            self.ns_arguments = ns_sample
+            llcmd_samples.append(self.func_make_commands(args_parsed=ns_sample,
+                                                         cur_pipeline=pline_cur))
+        self.ns_arguments = ns_original
+        if not ltpl_samples:
+            self.logr_job.info("".join(["PipelineRunner.func_run_merged_samples:: ",
+                                        "No samples to run."]))
+            return(True)
+
+        lcmd_commands = pline_cur.func_merge_commands(llcmd_samples)
+        if lcmd_commands is None:
+            self.logr_job.error("".join(["PipelineRunner.func_run_merged_samples:: ",
+                                         "Could not merge the commands of the samples."]))
+            return(False)
+        self.logr_job.info("".join(["PipelineRunner.func_run_merged_samples:: ",
+                                    "Running ", str(len(lcmd_commands)),
+                                    " commands for ", str(len(llcmd_samples)),
+                                    " samples."]))
+        for i_row, str_sample in ltpl_samples:
+            self.ldgr_jobs.func_record_start(i_row, str_sample)
+        i_max_parallel_commands = max(self.ns_arguments.i_number_jobs,
+                                      getattr(self.ns_arguments, "i_max_parallel_commands", 1))
+        f_success = self.func_run_pipeline_commands(pline_cur, lcmd_commands,
+                                                    i_max_parallel_commands=i_max_parallel_commands)
+        for i_row, str_sample in ltpl_samples:
+            self.ldgr_jobs.func_record_end(i_row, str_sample, 0 if f_success else 1)
+        self.logr_job.info("PipelineRunner.func_run_merged_samples:: Samples in the run " + str(self.ldgr_jobs))
+        return(f_success)
+
+    # Tested
     def func_run_many_jobs(self):
         """
-        Run jobs in a multiprocessing pool. Each process is one job.
+        Run jobs, each job is one sample. At most --concurrent_jobs run at a
+        time (fewer with --job_oversubscription) and a job starts as soon as
+        another ends. Exits with an error if any job failed, after logging
+        the return code and duration of each. With --metrics_out the progress
+        of the jobs is written to the metrics file ( each sample's pipeline
+        writes its own ).
         """
 
-        try:
-            pool = multiprocessing.Pool()
-            lrslt_success = pool.map_async(func_run_job,
-                                           self.func_get_job_commands())
-            lf_success = [f_success for f_success in lrslt_success.get()]
-        except Exception as e:
-            f_error_occured = True
-            self.logr_job.info("".join(["PipelineRunner.func_run_many_jobs:: ",
-                                        "Serious error occured for job"]))
-            self.logr_job.info("PipelineRunner.func_run_many_jobs:: \n" + str(e))
+        # Progress of the jobs
+        mtrc_jobs = None
+        if self.str_orig_metrics_out:
+            mtrc_jobs = Metrics.MetricsExporter(self.str_orig_metrics_out,
+                                                {"pipeline": self.prog, "output_dir": self.str_orig_output_dir},
+                                                logr_cur=self.logr_job)
+            if isinstance(self.llstr_sample_data, list):
+                mtrc_jobs.func_set(Metrics.C_STR_JOBS, len(self.llstr_sample_data))
+            mtrc_jobs.func_start()
+
+        def func_started(i_job, str_name):
+            self.ldgr_jobs.func_record_start(self.li_job_rows[i_job], str_name)
+            if mtrc_jobs:
+                mtrc_jobs.func_add(Metrics.C_STR_JOBS_RUNNING, 1)
+
+        def func_ended(i_job, tpl_result):
+            self.ldgr_jobs.func_record_end(self.li_job_rows[i_job],
+                                           tpl_result[JobExecutor.I_RESULT_NAME],
+                                           tpl_result[JobExecutor.I_RESULT_RETURN_CODE])
+            if mtrc_jobs:
+                mtrc_jobs.func_add(Metrics.C_STR_JOBS_RUNNING, -1)
+                mtrc_jobs.func_add(Metrics.C_STR_JOBS_DONE if tpl_result[JobExecutor.I_RESULT_RETURN_CODE] == 0
+                                   else Metrics.C_STR_JOBS_FAILED)
+                mtrc_jobs.func_observe(Metrics.C_STR_JOB_SECONDS, tpl_result[JobExecutor.I_RESULT_SECONDS])
+
+        i_commands_per_job = getattr(self.ns_arguments, "i_max_parallel_commands", 1)
+        exe_jobs = JobExecutor.JobExecutor(i_max_jobs=self.ns_arguments.i_number_jobs,
+                                           i_commands_per_job=i_commands_per_job if i_commands_per_job else 1,
+                                           d_oversubscription=getattr(self.ns_arguments, "d_job_oversubscription", None),
+                                           logr_cur=self.logr_job)
+        ltpl_results = exe_jobs.func_run(self.func_get_job_commands(),
+                                         func_started=func_started,
+                                         func_ended=func_ended)
+        if mtrc_jobs:
+            mtrc_jobs.func_stop()
+        self.logr_job.info("PipelineRunner.func_run_many_jobs:: Summary of jobs\n" +
+                           exe_jobs.func_summarize(ltpl_results))
+        self.logr_job.info("PipelineRunner.func_run_many_jobs:: Samples in the run " + str(self.ldgr_jobs))
+        if [tpl_result for tpl_result in ltpl_results
+            if tpl_result[JobExecutor.I_RESULT_RETURN_CODE] != 0]:
+            exit(999)
+        else:
+            exit(0)
 
 
-# TODO Test
-# Do no move from top level of module.
-# Needs to be here do to pickling and multiprocessing and the pain of it all.
-def func_run_job(str_job):
+# Tested
+def func_read_sample_rows(str_sample_file, i_start_row=0):
     """
-    Run the command for the job on the commandline.
+    Reads the rows of a tab delimited sample file one at a time.
+
+    * str_sample_file: Sample file
+                     : String
+    * i_start_row: Rows before this (base 0) are skipped, used to resume.
+                 : int
+    * return: Rows of the sample file
+            : Generator of lists of strings
     """
 
-    return(Commandline.Commandline().func_CMD(str_job,
-                                              f_use_bash=True))
+    with open(str_sample_file, "r") as hndl_samples:
+        for lstr_row in itertools.islice(csv.reader(hndl_samples, delimiter=b"\t"), i_start_row, None):
+            yield(lstr_row)
@@ -12,16 +12,74 @@ __email__ = "ttickle@broadinstitute.org"
 __status__ = "Development"
 
 
+import Benchmarking
 import Command
 import DependencyTree
+import Fingerprint
+import json
 import os
 import Pipeline
 import ParentPipelineTester
+import PipelineObserver
 import Resource
+import ResourceHistory
+import RunManifest
+import shutil
 import time
+import Trace
 import unittest
 
 
+class RecordingObserver(PipelineObserver.PipelineObserver):
+    """ Records the events of a run. """
+
+    def __init__(self):
+        self.lstr_events = []
+
+    def on_plan(self, pline_cur, dict_plan, lcmd_ordered, d_seconds):
+        self.lstr_events.append("on_plan " + str(len([f_run for f_run in dict_plan.values() if f_run])))
+
+    def on_command_skip(self, pline_cur, cmd_command):
+        self.lstr_events.append("on_command_skip")
+
+    def on_command_start(self, pline_cur, cmd_command, str_executed_command, i_slot):
+        self.lstr_events.append("on_command_start")
+
+    def on_command_end(self, pline_cur, cmd_command, i_slot, d_seconds, i_return_code, prof_memory):
+        self.lstr_events.append("on_command_end " + str(i_return_code))
+
+    def on_clean(self, pline_cur, cmd_command, lstr_paths, i_bytes, d_seconds):
+        self.lstr_events.append("on_clean " + str(len(lstr_paths)))
+
+
+class BytesObserver(PipelineObserver.PipelineObserver):
+    """ Records the bytes cleaned after each command. """
+
+    def __init__(self, f_uses_bytes):
+        self.f_uses_bytes = f_uses_bytes
+        self.li_bytes = []
+
+    def on_clean(self, pline_cur, cmd_command, lstr_paths, i_bytes, d_seconds):
+        self.li_bytes.append(i_bytes)
+
+
+class PlanObserver(PipelineObserver.PipelineObserver):
+    """ Records each plan made. """
+
+    def __init__(self):
+        self.ldict_plans = []
+
+    def on_plan(self, pline_cur, dict_plan, lcmd_ordered, d_seconds):
+        self.ldict_plans.append(dict(dict_plan))
+
+
+class FailingObserver(PipelineObserver.PipelineObserver):
+    """ Fails on every command. """
+
+    def on_command_start(self, pline_cur, cmd_command, str_executed_command, i_slot):
+        raise ValueError("observer failed")
+
+
 class PipelineTester(ParentPipelineTester.ParentPipelineTester):
     """
     Tests the Pipeline object
@@ -769,6 +827,95 @@ class PipelineTester(ParentPipelineTester.ParentPipelineTester):
         self.func_remove_dirs([str_env])
         self.func_test_true(not f_result)
 
+    def test_func_paths_are_from_valid_run_for_stat_cache(self):
+        """
+        Checking commands from a valid run as when resuming a pipeline lists the output
+        directory once and stats each path at most once.
+        """
+        cur_pipe = Pipeline.Pipeline(str_name = "test_func_paths_are_from_valid_run_for_stat_cache")
+        str_env = os.path.join(self.str_test_directory, "test_func_paths_are_from_valid_run_for_stat_cache")
+        lcmd_commands, dt_tree = self.func_make_remove_paths_tree(str_env, 5)
+        lstr_products = [rsc_product.str_id for cmd_cur in lcmd_commands for rsc_product in cmd_cur.lstr_products]
+        lstr_ok_files = [cur_pipe.func_get_ok_file_path(str_product) for str_product in lstr_products]
+        for str_path in lstr_products + lstr_ok_files:
+            self.func_make_dummy_file(str_path)
+        f_valid = all([cur_pipe.func_paths_are_from_valid_run(cmd_cur, f_dependencies = False, dt_deps = dt_tree, i_fuzzy_time = 5)
+                       for cmd_cur in lcmd_commands])
+        self.func_remove_files(lstr_products + lstr_ok_files + [os.path.join(str_env, "input.txt")])
+        self.func_remove_dirs([str_env])
+        self.func_test_true(f_valid)
+        self.func_test_equals(1, cur_pipe.stc_paths.i_listings)
+        self.func_test_true(cur_pipe.stc_paths.i_stats <= len(lstr_products + lstr_ok_files) + 1)
+
+# func_plan_commands
+    def func_make_plan_chain(self, str_env, cur_pipe, lf_valid):
+        """
+        A chain of commands each using the product of the command before.
+        Products are made with ok files for the commands indicated to be from a valid run.
+        """
+        self.func_make_dummy_dir(str_env)
+        str_previous = os.path.join(str_env, "input.txt")
+        self.func_make_dummy_file(str_previous)
+        lcmd_commands = []
+        lstr_files = [str_previous]
+        for i_index, f_valid in enumerate(lf_valid):
+            str_product = os.path.join(str_env, "product_" + str(i_index) + ".txt")
+            lcmd_commands.append(Command.Command("command " + str(i_index), [str_previous], [str_product]))
+            self.func_make_dummy_file(str_product)
+            lstr_files.append(str_product)
+            if f_valid:
+                self.func_make_dummy_file(cur_pipe.func_get_ok_file_path(str_product))
+                lstr_files.append(cur_pipe.func_get_ok_file_path(str_product))
+            str_previous = str_product
+        return lcmd_commands, lstr_files
+
+    def test_func_plan_commands_for_all_valid(self):
+        """ Commands from a valid run are all skipped. """
+        cur_pipe = Pipeline.Pipeline(str_name = "test_func_plan_commands_for_all_valid")
+        str_env = os.path.join(self.str_test_directory, "test_func_plan_commands_for_all_valid")
+        lcmd_commands, lstr_files = self.func_make_plan_chain(str_env, cur_pipe, [True, True, True])
+        dict_plan = cur_pipe.func_plan_commands(DependencyTree.DependencyTree(lcmd_commands))
+        self.func_remove_files(lstr_files)
+        self.func_remove_dirs([str_env])
+        self.func_test_equals({"command 0": False, "command 1": False, "command 2": False}, dict_plan)
+
+    def test_func_plan_commands_for_downstream_invalidation(self):
+        """ Commands from a valid run still run when a command making their dependency runs. """
+        cur_pipe = Pipeline.Pipeline(str_name = "test_func_plan_commands_for_downstream_invalidation")
+        str_env = os.path.join(self.str_test_directory, "test_func_plan_commands_for_downstream_invalidation")
+        lcmd_commands, lstr_files = self.func_make_plan_chain(str_env, cur_pipe, [True, False, True, True])
+        dict_plan = cur_pipe.func_plan_commands(DependencyTree.DependencyTree(lcmd_commands), i_threads = 1)
+        self.func_remove_files(lstr_files)
+        self.func_remove_dirs([str_env])
+        self.func_test_equals({"command 0": False, "command 1": True, "command 2": True, "command 3": True}, dict_plan)
+
+    def test_func_plan_commands_for_commands_ran(self):
+        """ When planning again, commands downstream of commands which already ran are planned to run. """
+        cur_pipe = Pipeline.Pipeline(str_name = "test_func_plan_commands_for_commands_ran")
+        str_env = os.path.join(self.str_test_directory, "test_func_plan_commands_for_commands_ran")
+        lcmd_commands, lstr_files = self.func_make_plan_chain(str_env, cur_pipe, [True, True, True])
+        dict_plan = cur_pipe.func_plan_commands(DependencyTree.DependencyTree(lcmd_commands), lcmd_ran = lcmd_commands[:1])
+        self.func_remove_files(lstr_files)
+        self.func_remove_dirs([str_env])
+        self.func_test_equals({"command 0": False, "command 1": True, "command 2": True}, dict_plan)
+
+    def test_func_plan_commands_for_stat_cache(self):
+        """ Planning commands from a valid run as when resuming a pipeline lists the output directory once. """
+        cur_pipe = Pipeline.Pipeline(str_name = "test_func_plan_commands_for_stat_cache")
+        str_env = os.path.join(self.str_test_directory, "test_func_plan_commands_for_stat_cache")
+        i_commands = 5
+        lcmd_commands, dt_tree = self.func_make_remove_paths_tree(str_env, i_commands)
+        lstr_products = [rsc_product.str_id for cmd_cur in lcmd_commands for rsc_product in cmd_cur.lstr_products]
+        lstr_ok_files = [cur_pipe.func_get_ok_file_path(str_product) for str_product in lstr_products]
+        for str_path in lstr_products + lstr_ok_files:
+            self.func_make_dummy_file(str_path)
+        dict_plan = cur_pipe.func_plan_commands(dt_tree, i_fuzzy_time = 5)
+        self.func_remove_files(lstr_products + lstr_ok_files + [os.path.join(str_env, "input.txt")])
+        self.func_remove_dirs([str_env])
+        self.func_test_equals(i_commands, len(dict_plan))
+        self.func_test_true(not any(dict_plan.values()))
+        self.func_test_equals(1, cur_pipe.stc_paths.i_listings)
+
 # func_do_special_command
     def test_func_do_special_command_for_good_case_rm(self):
         """ RM should be handled with a false """
@@ -1583,6 +1730,39 @@ class PipelineTester(ParentPipelineTester.ParentPipelineTester):
         self.func_remove_dirs([str_env])
         self.func_test_true(not f_success and f_not_removed_files and f_other_files_remain)
 
+    def func_make_remove_paths_tree(self, str_env, i_commands):
+        """
+        A chain of commands, each with the previous main product as the dependency and a main and side product
+        ( 2 resources per command ). Dependency files are made so they are checked for removal.
+        """
+        lcmd_commands = []
+        str_previous = os.path.join(str_env, "input.txt")
+        for i_index in range(i_commands):
+            str_main = os.path.join(str_env, "main_" + str(i_index) + ".txt")
+            str_side = os.path.join(str_env, "side_" + str(i_index) + ".txt")
+            lcmd_commands.append(Command.Command("step " + str(i_index), [str_previous], [str_main, str_side]))
+            str_previous = str_main
+        self.func_make_dummy_dir(str_env)
+        self.func_make_dummy_files([rsc_dep.str_id for cmd_cur in lcmd_commands for rsc_dep in cmd_cur.lstr_dependencies])
+        return (lcmd_commands, DependencyTree.DependencyTree(lcmd_commands))
+
+    def test_func_remove_paths_for_needed_chain(self):
+        """
+        Removing dependencies along a chain of commands keeps every dependency, each is still needed.
+        """
+        cur_pipe = Pipeline.Pipeline(str_name = "test_func_remove_paths_for_needed_chain")
+        str_env = os.path.join(self.str_test_directory, "test_func_remove_paths_for_needed_chain")
+        lcmd_commands, dt_tree = self.func_make_remove_paths_tree(str_env, 20)
+        f_success = True
+        for cmd_cur in lcmd_commands:
+            f_success = cur_pipe.func_remove_paths(cmd_command = cmd_cur, str_output_directory = str_env,
+                                                   dt_dependency_tree = dt_tree, f_remove_products = False) and f_success
+        lstr_dependencies = [cmd_cur.lstr_dependencies[0].str_id for cmd_cur in lcmd_commands]
+        i_remaining = len([str_dependency for str_dependency in lstr_dependencies if os.path.exists(str_dependency)])
+        self.func_remove_files(lstr_dependencies)
+        self.func_remove_dirs([str_env])
+        self.func_test_true(f_success and i_remaining == 20)
+
 # func_run_commands
     def test_func_run_commands_for_no_commands(self):
         """ Test running commands for no commands. """
@@ -1657,6 +1837,410 @@ class PipelineTester(ParentPipelineTester.ParentPipelineTester):
         self.func_remove_dirs([ str_env])
         self.func_test_true(f_files_equal)
 
+    def func_run_manifest_pipeline(self, str_name, f_run_manifest, **dict_run_args):
+        """ Runs two commands which log each time they run, returns the number of times they ran. """
+        cur_pipe = Pipeline.Pipeline(str_name = str_name)
+        str_env = os.path.join(self.str_test_directory, str_name)
+        str_file_1 = os.path.join(str_env, "test_func_run_commands_file_1.txt")
+        str_file_2 = os.path.join(str_env, "test_func_run_commands_file_2.txt")
+        str_file_3 = os.path.join(str_env, "test_func_run_commands_file_3.txt")
+        str_log = os.path.join(str_env, "test_func_run_commands_log.txt")
+        cur_cmd_1 = Command.Command(" ".join(["echo ran >>", str_log, "; cat", str_file_1, ">", str_file_2]),
+                                     [str_file_1],
+                                     [str_file_2])
+        cur_cmd_2 = Command.Command(" ".join(["echo ran >>", str_log, "; cat", str_file_2, ">", str_file_3]),
+                                     [str_file_2],
+                                     [str_file_3])
+        f_success = cur_pipe.func_run_commands([cur_cmd_1, cur_cmd_2], str_env, f_clean = False,
+                                               li_wait = [0,0,0], f_run_manifest = f_run_manifest, **dict_run_args)
+        i_ran = 0
+        if os.path.exists(str_log):
+            with open(str_log) as hndl_log:
+                i_ran = len(hndl_log.readlines())
+        return f_success, i_ran
+
+    def func_remove_run_manifest_env(self, str_name):
+        """ Removes the files made by func_run_manifest_pipeline. """
+        str_env = os.path.join(self.str_test_directory, str_name)
+        for str_file in os.listdir(str_env):
+            os.remove(os.path.join(str_env, str_file))
+        self.func_remove_dirs([str_env])
+
+    def test_func_run_commands_for_run_manifest(self):
+        """ Tests a run manifest is written instead of ok files and commands are not ran again. """
+        str_name = "test_func_run_commands_for_run_manifest"
+        str_env = os.path.join(self.str_test_directory, str_name)
+        str_file_1 = os.path.join(str_env, "test_func_run_commands_file_1.txt")
+        self.func_make_dummy_dir(str_env)
+        self.func_make_dummy_file(str_file_1)
+        f_success_1, i_ran_1 = self.func_run_manifest_pipeline(str_name, True)
+        lstr_ok_files = [str_file for str_file in os.listdir(str_env) if str_file.endswith(".ok")]
+        f_manifest = os.path.exists(os.path.join(str_env, RunManifest.C_STR_MANIFEST_FILE))
+        f_success_2, i_ran_2 = self.func_run_manifest_pipeline(str_name, True)
+        self.func_remove_run_manifest_env(str_name)
+        self.func_test_true(f_success_1 and f_success_2 and f_manifest and not lstr_ok_files and
+                            i_ran_1 == 2 and i_ran_2 == 2)
+
+    def test_func_run_commands_for_run_manifest_modified_product(self):
+        """ Tests with a run manifest, a command is ran again when its dependency changed after the manifest was written. """
+        str_name = "test_func_run_commands_for_run_manifest_modified_product"
+        str_env = os.path.join(self.str_test_directory, str_name)
+        str_file_1 = os.path.join(str_env, "test_func_run_commands_file_1.txt")
+        str_file_2 = os.path.join(str_env, "test_func_run_commands_file_2.txt")
+        self.func_make_dummy_dir(str_env)
+        self.func_make_dummy_file(str_file_1)
+        f_success_1, i_ran_1 = self.func_run_manifest_pipeline(str_name, True, i_time_stamp_wiggle = 0)
+        # Change the first command's product after it was recorded
+        with open(str_file_2, "a") as hndl_file:
+            hndl_file.write("more")
+        d_future = time.time() + 1000
+        os.utime(str_file_2, (d_future, d_future))
+        f_success_2, i_ran_2 = self.func_run_manifest_pipeline(str_name, True, i_time_stamp_wiggle = 0)
+        self.func_remove_run_manifest_env(str_name)
+        self.func_test_true(f_success_1 and f_success_2 and i_ran_1 == 2 and i_ran_2 == 3)
+
+    def test_func_run_commands_for_run_manifest_import_ok_files(self):
+        """ Tests products with ok files from a run without a manifest are not made again. """
+        str_name = "test_func_run_commands_for_run_manifest_import_ok_files"
+        str_env = os.path.join(self.str_test_directory, str_name)
+        str_file_1 = os.path.join(str_env, "test_func_run_commands_file_1.txt")
+        self.func_make_dummy_dir(str_env)
+        self.func_make_dummy_file(str_file_1)
+        f_success_1, i_ran_1 = self.func_run_manifest_pipeline(str_name, False)
+        f_manifest_1 = os.path.exists(os.path.join(str_env, RunManifest.C_STR_MANIFEST_FILE))
+        f_success_2, i_ran_2 = self.func_run_manifest_pipeline(str_name, True)
+        mnfst_cur = RunManifest.RunManifest(str_env)
+        self.func_remove_run_manifest_env(str_name)
+        self.func_test_true(f_success_1 and f_success_2 and not f_manifest_1 and
+                            i_ran_1 == 2 and i_ran_2 == 2 and len(mnfst_cur) == 2)
+
+    def test_func_run_commands_for_rerun_parent(self):
+        """ Tests a command from a valid run is ran again when the command making its dependency is ran again. """
+        str_name = "test_func_run_commands_for_rerun_parent"
+        str_env = os.path.join(self.str_test_directory, str_name)
+        str_file_1 = os.path.join(str_env, "test_func_run_commands_file_1.txt")
+        str_file_2 = os.path.join(str_env, "test_func_run_commands_file_2.txt")
+        self.func_make_dummy_dir(str_env)
+        self.func_make_dummy_file(str_file_1)
+        f_success_1, i_ran_1 = self.func_run_manifest_pipeline(str_name, False)
+        # Invalidate the first command's product
+        os.remove(Pipeline.Pipeline(str_name).func_get_ok_file_path(str_file_2))
+        f_success_2, i_ran_2 = self.func_run_manifest_pipeline(str_name, False)
+        self.func_remove_run_manifest_env(str_name)
+        self.func_test_true(f_success_1 and f_success_2 and i_ran_1 == 2 and i_ran_2 == 4)
+
+    def test_func_run_commands_for_fingerprint(self):
+        """ Tests with fingerprints, commands are not ran again when a time stamp changes but are when content changes. """
+        str_name = "test_func_run_commands_for_fingerprint"
+        str_env = os.path.join(self.str_test_directory, str_name)
+        str_file_1 = os.path.join(str_env, "test_func_run_commands_file_1.txt")
+        self.func_make_dummy_dir(str_env)
+        self.func_make_dummy_file(str_file_1)
+        f_success_1, i_ran_1 = self.func_run_manifest_pipeline(str_name, False, str_fingerprint_mode = "full", i_time_stamp_wiggle = 0)
+        # Newer time stamp, same content
+        d_future = time.time() + 1000
+        os.utime(str_file_1, (d_future, d_future))
+        f_success_2, i_ran_2 = self.func_run_manifest_pipeline(str_name, False, str_fingerprint_mode = "full", i_time_stamp_wiggle = 0)
+        # New content
+        with open(str_file_1, "a") as hndl_file:
+            hndl_file.write("more")
+        f_success_3, i_ran_3 = self.func_run_manifest_pipeline(str_name, False, str_fingerprint_mode = "full", i_time_stamp_wiggle = 0)
+        self.func_remove_run_manifest_env(str_name)
+        self.func_test_true(f_success_1 and f_success_2 and f_success_3 and i_ran_1 == 2 and i_ran_2 == 2 and i_ran_3 == 4)
+
+    def test_func_run_commands_for_fingerprint_test_mode(self):
+        """ Tests fingerprints are not written when commands are only planned ( test mode ), but are when they run. """
+        str_env = os.path.join(self.str_test_directory, "test_func_run_commands_for_fingerprint_test_mode")
+        str_input = os.path.join(str_env, "input.txt")
+        str_product = os.path.join(str_env, "product.txt")
+        str_fingerprints = os.path.join(str_env, Fingerprint.C_STR_FINGERPRINT_FILE)
+        self.func_make_dummy_dir(str_env)
+        self.func_make_dummy_file(str_input)
+        lf_written = []
+        for f_test in [True, False]:
+            cur_pipe = Pipeline.Pipeline(str_name = "test_func_run_commands_for_fingerprint_test_mode")
+            if f_test:
+                cur_pipe.func_test_mode()
+            cur_pipe.func_run_commands([Command.Command(" ".join(["cat", str_input, ">", str_product]), [str_input], [str_product])],
+                                       str_env, li_wait = [0,0,0], str_fingerprint_mode = "full")
+            lf_written.append(os.path.exists(str_fingerprints))
+        shutil.rmtree(str_env)
+        self.func_test_true(lf_written == [False, True])
+
+    def test_func_run_commands_for_output_cache(self):
+        """ Tests a command ran in one output directory is placed from the output cache in another instead of running. """
+        str_env = os.path.join(self.str_test_directory, "test_func_run_commands_for_output_cache")
+        str_cache = os.path.join(str_env, "cache")
+        str_input = os.path.join(str_env, "input.txt")
+        str_log = os.path.join(str_env, "log.txt")
+        self.func_make_dummy_dir(str_env)
+        with open(str_input, "w") as hndl_input:
+            hndl_input.write("input")
+        lf_success = []
+        lstr_products = []
+        for str_sample in ["sample_1", "sample_2"]:
+            str_sample_dir = os.path.join(str_env, str_sample)
+            str_product = os.path.join(str_sample_dir, "product.txt")
+            self.func_make_dummy_dir(str_sample_dir)
+            cur_cmd = Command.Command(" ".join(["echo ran >>", str_log, "; cat", str_input, ">", str_product]),
+                                      [str_input], [str_product])
+            cur_pipe = Pipeline.Pipeline(str_name = "test_func_run_commands_for_output_cache")
+            lf_success.append(cur_pipe.func_run_commands([cur_cmd], str_sample_dir, f_clean = False,
+                                                         li_wait = [0,0,0], str_output_cache = str_cache))
+            lstr_products.append(str_product)
+        with open(str_log) as hndl_log:
+            i_ran = len(hndl_log.readlines())
+        with open(lstr_products[1]) as hndl_product:
+            str_content = hndl_product.read()
+        shutil.rmtree(str_env)
+        self.func_test_true(all(lf_success) and i_ran == 1 and str_content == "input")
+
+    def test_func_run_commands_for_command_profiles(self):
+        """ Tests the memory of the tools a command's shell starts is recorded for the command. """
+        str_env = os.path.join(self.str_test_directory, "test_func_run_commands_for_command_profiles")
+        str_input = os.path.join(str_env, "input.txt")
+        str_product = os.path.join(str_env, "product.txt")
+        self.func_make_dummy_dir(str_env)
+        with open(str_input, "w") as hndl_input:
+            hndl_input.write("input")
+        cur_cmd = Command.Command(" ".join(["python -c \"import time; s = bytearray(64 * 1024 * 1024); time.sleep(1.5)\";",
+                                            "cat", str_input, ">", str_product]), [str_input], [str_product])
+        cur_pipe = Pipeline.Pipeline(str_name = "test_func_run_commands_for_command_profiles")
+        f_success = cur_pipe.func_run_commands([cur_cmd], str_env, f_clean = False,
+                                               li_wait = [0,0,0], i_benchmark_secs = 1)
+        prof_command = cur_pipe.obs_benchmark.func_get_profile(cur_cmd)
+        shutil.rmtree(str_env)
+        self.func_test_true(f_success and prof_command.func_get_peak(Benchmarking.c_STR_SAMPLE_RSS) >= 64 * 1024 * 1024 and
+                            prof_command.func_get_peak(Benchmarking.c_STR_SAMPLE_PROCESSES) >= 2)
+
+    def test_func_run_commands_for_resource_history(self):
+        """ Tests a command ran on one sample is predicted for the next sample and shown in the plan. """
+        str_env = os.path.join(self.str_test_directory, "test_func_run_commands_for_resource_history")
+        str_history = os.path.join(str_env, "history.sqlite")
+        self.func_make_dummy_dir(str_env)
+        lf_success = []
+        for str_sample in ["sample_1", "sample_2"]:
+            str_sample_dir = os.path.join(str_env, str_sample)
+            str_input = os.path.join(str_sample_dir, "input.txt")
+            str_product = os.path.join(str_sample_dir, "product.txt")
+            self.func_make_dummy_dir(str_sample_dir)
+            with open(str_input, "w") as hndl_input:
+                hndl_input.write("input")
+            cur_cmd = Command.Command(" ".join(["sleep 0.2; cat", str_input, ">", str_product]), [str_input], [str_product])
+            cur_pipe = Pipeline.Pipeline(str_name = "test_func_run_commands_for_resource_history")
+            lf_success.append(cur_pipe.func_run_commands([cur_cmd], str_sample_dir, f_clean = False,
+                                                         li_wait = [0,0,0], str_resource_history = str_history))
+        dict_prediction = cur_pipe.dict_command_predictions.get(cur_cmd.str_id)
+        lstr_plan = cur_pipe.func_format_prediction(cur_cmd)
+        shutil.rmtree(str_env)
+        self.func_test_true(all(lf_success) and dict_prediction[ResourceHistory.C_STR_WALL_SECONDS] >= 0.2 and
+                            lstr_plan[0] == "( predicted")
+
+    def test_func_run_commands_for_trace_out(self):
+        """ Tests the timeline of a parallel run has the pipeline's work and a track for each command running at the same time. """
+        str_env = os.path.join(self.str_test_directory, "test_func_run_commands_for_trace_out")
+        str_input = os.path.join(str_env, "input.txt")
+        str_trace = os.path.join(str_env, "trace.json")
+        self.func_make_dummy_dir(str_env)
+        with open(str_input, "w") as hndl_input:
+            hndl_input.write("input")
+        lcmd_commands = [Command.Command(" ".join(["sleep 0.2; cat", str_input, ">", os.path.join(str_env, str_name)]),
+                                         [str_input], [os.path.join(str_env, str_name)])
+                         for str_name in ["product_1.txt", "product_2.txt"]]
+        cur_pipe = Pipeline.Pipeline(str_name = "test_func_run_commands_for_trace_out")
+        f_success = cur_pipe.func_run_commands(lcmd_commands, str_env, f_clean = True, li_wait = [0,0,0],
+                                               i_max_parallel_commands = 2, i_local_cores = 2, str_trace_out = str_trace)
+        with open(str_trace) as hndl_trace:
+            ldict_events = json.load(hndl_trace)["traceEvents"]
+        shutil.rmtree(str_env)
+        sstr_spans = set([dict_event["name"] for dict_event in ldict_events if dict_event["ph"] == "X" and dict_event["tid"] == 0])
+        sstr_tracks = set([dict_event["args"]["name"] for dict_event in ldict_events if dict_event["name"] == "thread_name"])
+        li_command_tracks = sorted([dict_event["tid"] for dict_event in ldict_events if dict_event.get("cat") == Trace.C_STR_CATEGORY_COMMAND])
+        self.func_test_true(f_success and li_command_tracks == [1, 2] and
+                            sstr_tracks == set(["pipeline", "command slot 1", "command slot 2"]) and
+                            set([Trace.C_STR_SPAN_DAG, Trace.C_STR_SPAN_PLAN, Trace.C_STR_SPAN_PRODUCT_WAIT,
+                                 Trace.C_STR_SPAN_OK_FILES, Trace.C_STR_SPAN_CLEAN]) <= sstr_spans)
+
+    def test_func_run_commands_for_metrics_out(self):
+        """ Tests the metrics of a run count the commands, their durations and the bytes made and cleaned, and skipped commands when ran again. """
+        str_env = os.path.join(self.str_test_directory, "test_func_run_commands_for_metrics_out")
+        str_input = os.path.join(str_env, "input.txt")
+        str_intermediate = os.path.join(str_env, "intermediate.txt")
+        str_product = os.path.join(str_env, "product.txt")
+        str_metrics = os.path.join(str_env, "metrics.prom")
+        self.func_make_dummy_dir(str_env)
+        with open(str_input, "w") as hndl_input:
+            hndl_input.write("input")
+        llstr_metrics = []
+        for i_run in range(2):
+            lcmd_commands = [Command.Command(" ".join(["cat", str_input, str_input, ">", str_intermediate]), [str_input], [str_intermediate]),
+                             Command.Command(" ".join(["cat", str_intermediate, ">", str_product]), [str_intermediate], [str_product])]
+            cur_pipe = Pipeline.Pipeline(str_name = "test_func_run_commands_for_metrics_out")
+            cur_pipe.func_run_commands(lcmd_commands, str_env, f_clean = i_run == 0, li_wait = [0,0,0], str_metrics_out = str_metrics)
+            with open(str_metrics) as hndl_metrics:
+                llstr_metrics.append(hndl_metrics.read().split("\n"))
+        shutil.rmtree(str_env)
+        str_labels = "{output_dir=\"" + str_env + "\",pipeline=\"test_func_run_commands_for_metrics_out\"}"
+        self.func_test_true("sciedpiper_commands" + str_labels + " 2" in llstr_metrics[0] and
+                            "sciedpiper_commands_done_total" + str_labels + " 2" in llstr_metrics[0] and
+                            "sciedpiper_commands_running" + str_labels + " 0" in llstr_metrics[0] and
+                            "sciedpiper_command_duration_seconds_count" + str_labels + " 2" in llstr_metrics[0] and
+                            "sciedpiper_produced_bytes_total" + str_labels + " 20" in llstr_metrics[0] and
+                            "sciedpiper_cleaned_bytes_total" + str_labels + " 10" in llstr_metrics[0] and
+                            "sciedpiper_commands_skipped_total" + str_labels + " 2" in llstr_metrics[1])
+
+    def test_func_run_commands_for_observer(self):
+        """ Tests an observer is told the plan, each command starting and ending with its return code, cleaning, and skips when ran again. """
+        str_env = os.path.join(self.str_test_directory, "test_func_run_commands_for_observer")
+        str_input = os.path.join(str_env, "input.txt")
+        str_intermediate = os.path.join(str_env, "intermediate.txt")
+        str_product = os.path.join(str_env, "product.txt")
+        self.func_make_dummy_dir(str_env)
+        with open(str_input, "w") as hndl_input:
+            hndl_input.write("input")
+        llstr_events = []
+        for i_run in range(2):
+            lcmd_commands = [Command.Command(" ".join(["cat", str_input, ">", str_intermediate]), [str_input], [str_intermediate]),
+                             Command.Command(" ".join(["cat", str_intermediate, ">", str_product]), [str_intermediate], [str_product])]
+            obs_record = RecordingObserver()
+            cur_pipe = Pipeline.Pipeline(str_name = "test_func_run_commands_for_observer")
+            cur_pipe.func_add_observer(obs_record)
+            cur_pipe.func_run_commands(lcmd_commands, str_env, f_clean = True, li_wait = [0,0,0])
+            llstr_events.append(obs_record.lstr_events)
+        shutil.rmtree(str_env)
+        self.func_test_true(llstr_events[0] == ["on_plan 2", "on_command_start", "on_command_end 0", "on_clean 0",
+                                                "on_command_start", "on_command_end 0", "on_clean 1"] and
+                            llstr_events[1] == ["on_plan 0", "on_command_skip", "on_clean 0", "on_command_skip", "on_clean 0"])
+
+    def test_func_run_commands_for_failing_observer(self):
+        """ Tests an error in an observer does not stop the run and removed observers are not told events. """
+        str_env = os.path.join(self.str_test_directory, "test_func_run_commands_for_failing_observer")
+        str_input = os.path.join(str_env, "input.txt")
+        str_product = os.path.join(str_env, "product.txt")
+        self.func_make_dummy_dir(str_env)
+        self.func_make_dummy_file(str_input)
+        obs_record = RecordingObserver()
+        cur_pipe = Pipeline.Pipeline(str_name = "test_func_run_commands_for_failing_observer")
+        cur_pipe.func_add_observer(FailingObserver())
+        cur_pipe.func_add_observer(obs_record)
+        cur_pipe.func_remove_observer(obs_record)
+        cur_pipe.func_remove_observer(cur_pipe.obs_log)
+        f_success = cur_pipe.func_run_commands([Command.Command(" ".join(["cat", str_input, ">", str_product]), [str_input], [str_product])],
+                                               str_env, li_wait = [0,0,0])
+        f_made = os.path.exists(str_product)
+        shutil.rmtree(str_env)
+        self.func_test_true(f_success and f_made and obs_record.lstr_events == [] and len(cur_pipe.lobs_observers) == 1)
+
+    def test_func_run_commands_for_observer_bytes(self):
+        """ Tests cleaned paths are only measured when an observer uses bytes. """
+        str_env = os.path.join(self.str_test_directory, "test_func_run_commands_for_observer_bytes")
+        str_input = os.path.join(str_env, "input.txt")
+        str_intermediate = os.path.join(str_env, "intermediate.txt")
+        str_product = os.path.join(str_env, "product.txt")
+        lli_bytes = []
+        lf_use_bytes = []
+        for f_uses_bytes in [False, True]:
+            self.func_make_dummy_dir(str_env)
+            with open(str_input, "w") as hndl_input:
+                hndl_input.write("input")
+            lcmd_commands = [Command.Command(" ".join(["cat", str_input, ">", str_intermediate]), [str_input], [str_intermediate]),
+                             Command.Command(" ".join(["cat", str_intermediate, ">", str_product]), [str_intermediate], [str_product])]
+            obs_bytes = BytesObserver(f_uses_bytes)
+            cur_pipe = Pipeline.Pipeline(str_name = "test_func_run_commands_for_observer_bytes")
+            lf_use_bytes.append(cur_pipe.func_observers_use_bytes())
+            cur_pipe.func_add_observer(obs_bytes)
+            lf_use_bytes.append(cur_pipe.func_observers_use_bytes())
+            cur_pipe.func_run_commands(lcmd_commands, str_env, f_clean = True, li_wait = [0,0,0])
+            lli_bytes.append(obs_bytes.li_bytes)
+            shutil.rmtree(str_env)
+        self.func_test_true(lf_use_bytes == [False, False, False, True] and
+                            lli_bytes == [[None, None], [0, 5]])
+
+    def test_func_run_commands_for_cd_planning_again(self):
+        """ Tests the commands left are planned again after a cd, keeping commands downstream of commands which ran. """
+        str_env = os.path.join(self.str_test_directory, "test_func_run_commands_for_cd_planning_again")
+        str_input = os.path.join(str_env, "input.txt")
+        str_intermediate = os.path.join(str_env, "intermediate.txt")
+        str_product = os.path.join(str_env, "product.txt")
+        str_current_location = os.getcwd()
+        self.func_make_dummy_dir(os.path.join(str_env, "moved"))
+        with open(str_input, "w") as hndl_input:
+            hndl_input.write("input")
+        str_first = " ".join(["cat", str_input, ">", str_intermediate])
+        str_second = " ".join(["cat", str_intermediate, ">", str_product])
+        lcmd_commands = [Command.Command(str_first, [str_input], [str_intermediate]),
+                         Command.Command(" ".join(["cd", os.path.join(str_env, "moved")]), [], []),
+                         Command.Command(str_second, [str_intermediate], [str_product])]
+        obs_plans = PlanObserver()
+        cur_pipe = Pipeline.Pipeline(str_name = "test_func_run_commands_for_cd_planning_again")
+        cur_pipe.func_add_observer(obs_plans)
+        f_success = cur_pipe.func_run_commands(lcmd_commands, str_env, f_self_organize_commands = False, li_wait = [0,0,0])
+        str_moved_to = os.getcwd()
+        os.chdir(str_current_location)
+        f_product = os.path.exists(str_product)
+        shutil.rmtree(str_env)
+        self.func_test_true(f_success and f_product and str_moved_to == os.path.join(str_env, "moved"))
+        self.func_test_true(obs_plans.ldict_plans == [{str_first: True, str_second: True},
+                                                      {str_first: False, str_second: True}])
+
+    def func_make_sample_commands(self, str_env, str_sample, str_log):
+        """ Commands of a sample, indexing a shared reference then using the index, each logs when it runs. """
+        str_reference = os.path.join(str_env, "reference.txt")
+        str_index = os.path.join(str_env, "reference.idx")
+        str_product = os.path.join(str_env, str_sample + ".txt")
+        cmd_index = Command.Command(" ".join(["echo index >>", str_log, "; cat", str_reference, ">", str_index]),
+                                    [str_reference], [str_index])
+        cmd_sample = Command.Command(" ".join(["echo", str_sample, ">>", str_log, "; cat", str_index, ">", str_product]),
+                                     [str_index], [str_product])
+        return [cmd_index, cmd_sample]
+
+    def test_func_merge_commands(self):
+        """ Tests commands shared by samples are kept once and the commands of each sample are kept. """
+        cur_pipe = Pipeline.Pipeline(str_name = "test_func_merge_commands")
+        str_env = os.path.join(self.str_test_directory, "test_func_merge_commands")
+        str_log = os.path.join(str_env, "log.txt")
+        llcmd_samples = [self.func_make_sample_commands(str_env, str_sample, str_log)
+                         for str_sample in ["sample_1", "sample_2", "sample_3"]]
+        lcmd_merged = cur_pipe.func_merge_commands(llcmd_samples)
+        lstr_answer = [llcmd_samples[0][0].str_id] + [lcmd_sample[1].str_id for lcmd_sample in llcmd_samples]
+        self.func_test_equals(lstr_answer, [cmd_cur.str_id for cmd_cur in lcmd_merged])
+
+    def test_func_merge_commands_for_conflicting_products(self):
+        """ Tests different commands making the same product are not merged. """
+        cur_pipe = Pipeline.Pipeline(str_name = "test_func_merge_commands_for_conflicting_products")
+        str_env = os.path.join(self.str_test_directory, "test_func_merge_commands_for_conflicting_products")
+        str_product = os.path.join(str_env, "product.txt")
+        cmd_1 = Command.Command("make product 1", [os.path.join(str_env, "input_1.txt")], [str_product])
+        cmd_2 = Command.Command("make product 2", [os.path.join(str_env, "input_2.txt")], [str_product])
+        self.func_test_equals(None, cur_pipe.func_merge_commands([[cmd_1], [cmd_2]]))
+
+    def test_func_merge_commands_for_special_command(self):
+        """ Tests samples with special commands are not merged. """
+        cur_pipe = Pipeline.Pipeline(str_name = "test_func_merge_commands_for_special_command")
+        str_env = os.path.join(self.str_test_directory, "test_func_merge_commands_for_special_command")
+        str_log = os.path.join(str_env, "log.txt")
+        llcmd_samples = [[Command.Command(" ".join(["cd", os.path.join(str_env, str_sample)]), [], [])] +
+                         self.func_make_sample_commands(str_env, str_sample, str_log)
+                         for str_sample in ["sample_1", "sample_2"]]
+        self.func_test_equals(None, cur_pipe.func_merge_commands(llcmd_samples))
+
+    def test_func_run_commands_for_merged_samples(self):
+        """ Tests a command shared by samples runs once when the samples' commands are merged. """
+        cur_pipe = Pipeline.Pipeline(str_name = "test_func_run_commands_for_merged_samples")
+        str_env = os.path.join(self.str_test_directory, "test_func_run_commands_for_merged_samples")
+        str_log = os.path.join(str_env, "log.txt")
+        self.func_make_dummy_dir(str_env)
+        self.func_make_dummy_file(os.path.join(str_env, "reference.txt"))
+        lstr_samples = ["sample_1", "sample_2", "sample_3"]
+        lcmd_merged = cur_pipe.func_merge_commands([self.func_make_sample_commands(str_env, str_sample, str_log)
+                                                    for str_sample in lstr_samples])
+        f_success = cur_pipe.func_run_commands(lcmd_merged, str_env, f_clean = False, li_wait = [0,0,0],
+                                               i_max_parallel_commands = 3)
+        with open(str_log) as hndl_log:
+            lstr_ran = sorted([str_line.strip() for str_line in hndl_log])
+        shutil.rmtree(str_env)
+        self.func_test_true(f_success and lstr_ran == ["index"] + lstr_samples)
+
     def test_func_run_commands_for_one_command_clean_after_error(self):
         """
         When using clean, the run command should clean up any product.
@@ -2084,7 +2668,7 @@ class PipelineTester(ParentPipelineTester.ParentPipelineTester):
                                       [str_dependency_3],
                                       [str_product_2])
         cmd_test_3 = Command.Command(" ".join(["cat",str_product_1,"1>",str_product_3,
-                                                  "2>",str_product_4,"&>",str_product_5]),
+                                                  "2>",str_product_4,">",str_product_5]),
                                       [str_product_1, str_product_2],
                                       [str_product_3, str_product_4, str_product_5])
         cmd_test_4 = Command.Command(" ".join(["cat",str_product_5,">",str_product_6]),
@@ -2245,6 +2829,155 @@ class PipelineTester(ParentPipelineTester.ParentPipelineTester):
         self.func_remove_dirs(str_env)
         self.func_test_true(f_success)
 
+# func_run_commands_in_parallel
+    def test_func_run_commands_for_parallel_diamond(self):
+        """
+        Tests running commands in parallel with a diamond workflow.
+        Two independent commands are made from the input and merged.
+        """
+        cur_pipe = Pipeline.Pipeline(str_name = "test_func_run_commands_for_parallel_diamond")
+        str_env = os.path.join(self.str_test_directory, "test_func_run_commands_for_parallel_diamond")
+        str_file_1 = os.path.join(str_env, "test_func_run_commands_file_1.txt")
+        str_file_2 = os.path.join(str_env, "test_func_run_commands_file_2.txt")
+        str_file_3 = os.path.join(str_env, "test_func_run_commands_file_3.txt")
+        str_file_4 = os.path.join(str_env, "test_func_run_commands_file_4.txt")
+        self.func_make_dummy_dir(str_env)
+        self.func_make_dummy_file(str_file_1)
+        cur_cmd_1 = Command.Command(" ".join(["cat", str_file_1, ">", str_file_2]),
+                                     [str_file_1],
+                                     [str_file_2])
+        cur_cmd_2 = Command.Command(" ".join(["cat", str_file_1, ">", str_file_3]),
+                                     [str_file_1],
+                                     [str_file_3])
+        cur_cmd_3 = Command.Command(" ".join(["cat", str_file_2, str_file_3, ">", str_file_4]),
+                                     [str_file_2, str_file_3],
+                                     [str_file_4])
+        f_success = cur_pipe.func_run_commands([cur_cmd_3, cur_cmd_2, cur_cmd_1], str_env, f_clean = False,
+                                               li_wait = [0,0,0], i_max_parallel_commands = 2)
+        f_files_equal = self.func_are_files_equivalent(str_file_1, str_file_2)
+        f_files_equal = f_files_equal and self.func_are_files_equivalent(str_file_1, str_file_3)
+        f_files_equal = f_files_equal and (os.path.getsize(str_file_4) == 2 * os.path.getsize(str_file_1))
+        f_ok = os.path.exists(cur_pipe.func_get_ok_file_path(str_file_4))
+        self.func_remove_files([str_file_1, str_file_2, str_file_3, str_file_4,
+                                cur_pipe.func_get_ok_file_path(str_file_2),
+                                cur_pipe.func_get_ok_file_path(str_file_3),
+                                cur_pipe.func_get_ok_file_path(str_file_4)])
+        self.func_remove_dirs([str_env])
+        self.func_test_true(f_success and f_files_equal and f_ok)
+
+    def test_func_run_commands_for_parallel_clean(self):
+        """
+        Tests running commands in parallel with cleaning.
+        Intermediary products should be cleaned but not inputs or outputs.
+        """
+        cur_pipe = Pipeline.Pipeline(str_name = "test_func_run_commands_for_parallel_clean")
+        str_env = os.path.join(self.str_test_directory, "test_func_run_commands_for_parallel_clean")
+        str_file_1 = os.path.join(str_env, "test_func_run_commands_file_1.txt")
+        str_file_2 = os.path.join(str_env, "test_func_run_commands_file_2.txt")
+        str_file_3 = os.path.join(str_env, "test_func_run_commands_file_3.txt")
+        str_file_4 = os.path.join(str_env, "test_func_run_commands_file_4.txt")
+        self.func_make_dummy_dir(str_env)
+        self.func_make_dummy_file(str_file_1)
+        cur_cmd_1 = Command.Command(" ".join(["cat", str_file_1, ">", str_file_2]),
+                                     [str_file_1],
+                                     [str_file_2])
+        cur_cmd_2 = Command.Command(" ".join(["cat", str_file_2, ">", str_file_3]),
+                                     [str_file_2],
+                                     [str_file_3])
+        cur_cmd_3 = Command.Command(" ".join(["cat", str_file_2, ">", str_file_4]),
+                                     [str_file_2],
+                                     [str_file_4])
+        f_success = cur_pipe.func_run_commands([cur_cmd_1, cur_cmd_2, cur_cmd_3], str_env, f_clean = True,
+                                               li_wait = [0,0,0], i_max_parallel_commands = 2)
+        f_files_equal = self.func_are_files_equivalent(str_file_1, str_file_3)
+        f_files_equal = f_files_equal and self.func_are_files_equivalent(str_file_1, str_file_4)
+        f_clean = not os.path.exists(str_file_2)
+        self.func_remove_files([str_file_1, str_file_2, str_file_3, str_file_4,
+                                cur_pipe.func_get_ok_file_path(str_file_2),
+                                cur_pipe.func_get_ok_file_path(str_file_3),
+                                cur_pipe.func_get_ok_file_path(str_file_4)])
+        self.func_remove_dirs([str_env])
+        self.func_test_true(f_success and f_files_equal and f_clean)
+
+    def test_func_run_commands_for_parallel_error_stops_children(self):
+        """
+        Tests running commands in parallel when a command fails.
+        The failed command's products are removed and it's children are not ran.
+        """
+        cur_pipe = Pipeline.Pipeline(str_name = "test_func_run_commands_for_parallel_error_stops_children")
+        str_env = os.path.join(self.str_test_directory, "test_func_run_commands_for_parallel_error_stops_children")
+        str_file_1 = os.path.join(str_env, "test_func_run_commands_file_1.txt")
+        str_file_2 = os.path.join(str_env, "test_func_run_commands_file_2.txt")
+        str_file_3 = os.path.join(str_env, "test_func_run_commands_file_3.txt")
+        self.func_make_dummy_dir(str_env)
+        self.func_make_dummy_file(str_file_1)
+        cur_cmd_1 = Command.Command(" ".join(["catddssdsds", str_file_1, ">", str_file_2]),
+                                     [str_file_1],
+                                     [str_file_2])
+        cur_cmd_2 = Command.Command(" ".join(["cat", str_file_2, ">", str_file_3]),
+                                     [str_file_2],
+                                     [str_file_3])
+        f_success = cur_pipe.func_run_commands([cur_cmd_1, cur_cmd_2], str_env, f_clean = False,
+                                               li_wait = [0,0,0], i_max_parallel_commands = 2)
+        f_not_made = not os.path.exists(str_file_2) and not os.path.exists(str_file_3)
+        self.func_remove_files([str_file_1, str_file_2, str_file_3])
+        self.func_remove_dirs([str_env])
+        self.func_test_true(not f_success and f_not_made)
+
+    def test_func_run_commands_for_parallel_runs_concurrently(self):
+        """
+        Tests that independent commands run at the same time.
+        Three commands each sleeping a second should take well under three seconds
+        (given three cores to use, independent of the test machine).
+        """
+        cur_pipe = Pipeline.Pipeline(str_name = "test_func_run_commands_for_parallel_runs_concurrently")
+        str_env = os.path.join(self.str_test_directory, "test_func_run_commands_for_parallel_runs_concurrently")
+        str_file_1 = os.path.join(str_env, "test_func_run_commands_file_1.txt")
+        lstr_products = [os.path.join(str_env, "test_func_run_commands_product_" + str(i_index) + ".txt")
+                         for i_index in range(3)]
+        self.func_make_dummy_dir(str_env)
+        self.func_make_dummy_file(str_file_1)
+        lcmd_commands = [Command.Command(" ".join(["sleep 1; cat", str_file_1, ">", str_product]),
+                                         [str_file_1],
+                                         [str_product]) for str_product in lstr_products]
+        d_start = time.time()
+        f_success = cur_pipe.func_run_commands(lcmd_commands, str_env, f_clean = False,
+                                               li_wait = [0,0,0], i_max_parallel_commands = 3,
+                                               i_local_cores = 3)
+        d_duration = time.time() - d_start
+        f_made = all([os.path.exists(str_product) for str_product in lstr_products])
+        self.func_remove_files([str_file_1] + lstr_products +
+                               [cur_pipe.func_get_ok_file_path(str_product) for str_product in lstr_products])
+        self.func_remove_dirs([str_env])
+        self.func_test_true(f_success and f_made and d_duration < 2.5)
+
+    def test_func_run_commands_for_parallel_memory_limit(self):
+        """
+        Tests that independent commands which together need more memory than is
+        available do not run at the same time.
+        """
+        cur_pipe = Pipeline.Pipeline(str_name = "test_func_run_commands_for_parallel_memory_limit")
+        str_env = os.path.join(self.str_test_directory, "test_func_run_commands_for_parallel_memory_limit")
+        str_file_1 = os.path.join(str_env, "test_func_run_commands_file_1.txt")
+        lstr_products = [os.path.join(str_env, "test_func_run_commands_product_" + str(i_index) + ".txt")
+                         for i_index in range(2)]
+        self.func_make_dummy_dir(str_env)
+        self.func_make_dummy_file(str_file_1)
+        lcmd_commands = [Command.Command(" ".join(["sleep 1; cat", str_file_1, ">", str_product]),
+                                         [str_file_1],
+                                         [str_product],
+                                         d_memory = 8) for str_product in lstr_products]
+        d_start = time.time()
+        f_success = cur_pipe.func_run_commands(lcmd_commands, str_env, f_clean = False,
+                                               li_wait = [0,0,0], i_max_parallel_commands = 2,
+                                               i_local_cores = 2, d_local_memory = 10)
+        d_duration = time.time() - d_start
+        f_made = all([os.path.exists(str_product) for str_product in lstr_products])
+        self.func_remove_files([str_file_1] + lstr_products +
+                               [cur_pipe.func_get_ok_file_path(str_product) for str_product in lstr_products])
+        self.func_remove_dirs([str_env])
+        self.func_test_true(f_success and f_made and d_duration >= 2)
+
 # func_update_command_path
     def test_func_update_command_path_for_no_update_case(self):
         """ Tst updating a command when there is no need for an update."""
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+import atexit
+import logging
+import os
+import Queue
+import threading
+
+"""
+Logs from a bounded buffer written by a thread, so writing the log ( a file
+on NFS or a slow terminal ) does not hold up the code logging.
+A QueueHandler queues each record for the writer thread which passes it to
+the handler that writes it ( eg. a FileHandler ), records are written in the
+order they were logged. When the buffer is full logging waits for the
+writer, the memory used stays bounded and no message is lost.
+The logging module flushes handlers when the process exits, flushing a
+QueueHandler waits for the records queued to be written. The writer is
+stopped when the process exits, before the logging module closes the handlers.
+"""
+
+__author__ = "Timothy Tickle"
+__copyright__ = "Copyright 2016"
+__credits__ = ["Timothy Tickle", "Brian Haas"]
+__license__ = "MIT"
+__maintainer__ = "Timothy Tickle"
+__email__ = "ttickle@broadinstitute.org"
+__status__ = "Development"
+
+
+# Records buffered before logging waits for the writer
+I_MAX_RECORDS = 10000
+# Queued to stop the writer thread
+C_TPL_STOP = (None, None)
+
+
+class LogWriter:
+    """
+    Thread writing the records queued by QueueHandlers, started when the first record is queued.
+    """
+
+    # Tested
+    def __init__(self, i_max_records=I_MAX_RECORDS):
+        """
+        Initializer
+
+        * i_max_records : Records buffered before logging waits for the writer.
+                        : Integer
+        """
+
+        self.i_max_records = i_max_records
+        """ Records buffered before logging waits for the writer. """
+
+        self.q_records = None
+        """ ( handler, record ) queued to be written. """
+
+        self.i_pid = None
+        """ Process the thread was started in, a forked process starts its own. """
+
+        self.thrd_writer = None
+        """ Thread writing the records. """
+
+        self.f_stop_at_exit = False
+        """ True indicates the writer is stopped when the process exits. """
+
+        self.__lock = threading.Lock()
+
+    # Tested
+    def func_put(self, hndl_target, rec_log):
+        """
+        Queues a record to be written by a handler, waits if the buffer is full.
+
+        * hndl_target : Handler writing the record.
+                      : logging.Handler
+        * rec_log : Record to write.
+                  : logging.LogRecord
+        """
+
+        if self.i_pid != os.getpid():
+            self.func_start()
+        self.q_records.put((hndl_target, rec_log))
+
+    def func_start(self):
+        """
+        Starts the writer thread in this process if it is not running.
+        The writer is stopped when the process exits, exit functions run in the reverse order
+        they are registered so this runs before the logging module closes the handlers.
+        """
+
+        with self.__lock:
+            if self.i_pid == os.getpid():
+                return
+            self.q_records = Queue.Queue(maxsize=self.i_max_records)
+            self.thrd_writer = threading.Thread(target=self.__func_write)
+            self.thrd_writer.daemon = True
+            self.thrd_writer.start()
+            self.i_pid = os.getpid()
+            if not self.f_stop_at_exit:
+                atexit.register(self.func_stop)
+                self.f_stop_at_exit = True
+
+    # Tested
+    def func_stop(self):
+        """
+        Writes the records queued in this process and stops the writer thread,
+        it is started again if more records are queued.
+        Otherwise the thread may still be waiting for records while the interpreter
+        shuts down and fail as the modules it uses are cleared.
+        """
+
+        with self.__lock:
+            if self.i_pid != os.getpid():
+                return
+            self.q_records.put(C_TPL_STOP)
+            self.thrd_writer.join()
+            self.thrd_writer = None
+            self.i_pid = None
+
+    # Tested
+    def func_flush(self):
+        """
+        Waits for the records queued in this process to be written.
+        """
+
+        if self.i_pid == os.getpid():
+            self.q_records.join()
+
+    def __func_write(self):
+        q_records = self.q_records
+        while True:
+            tpl_record = q_records.get()
+            if tpl_record is C_TPL_STOP:
+                q_records.task_done()
+                return
+            hndl_target, rec_log = tpl_record
+            try:
+                hndl_target.handle(rec_log)
+            except Exception:
+                hndl_target.handleError(rec_log)
+            finally:
+                q_records.task_done()
+
+    def __str__(self):
+        return("LogWriter{ Buffer: " + str(self.i_max_records) + " Queued: " +
+               str(self.q_records.qsize() if self.q_records else 0) + " }")
+
+
+c_wrtr_shared = LogWriter()
+""" Writer shared by the loggers of the process. """
+
+
+class QueueHandler(logging.Handler):
+    """
+    Handler queueing records for a LogWriter to pass to the handler which writes them.
+    """
+
+    # Tested
+    def __init__(self, hndl_target, wrtr_cur=None):
+        """
+        Initializer
+
+        * hndl_target : Handler writing the records, with its formatter.
+                      : logging.Handler
+        * wrtr_cur : Writer of the records, None uses the writer shared by the process.
+                   : LogWriter or None
+        """
+
+        logging.Handler.__init__(self)
+
+        self.hndl_target = hndl_target
+        """ Handler writing the records. """
+
+        self.wrtr_cur = wrtr_cur if wrtr_cur else c_wrtr_shared
+        """ Writer of the records. """
+
+    def emit(self, rec_log):
+        try:
+            self.wrtr_cur.func_put(self.hndl_target, self.func_prepare(rec_log))
+        except Exception:
+            self.handleError(rec_log)
+
+    # Tested
+    def func_prepare(self, rec_log):
+        """
+        Makes the message and traceback of a record now,
+        what they are made from may change before the record is written.
+
+        * rec_log : Record
+                  : logging.LogRecord
+        * return : The record, updated.
+                 : logging.LogRecord
+        """
+
+        rec_log.msg = rec_log.getMessage()
+        rec_log.args = None
+        if rec_log.exc_info:
+            rec_log.exc_text = logging.Formatter().formatException(rec_log.exc_info)
+            rec_log.exc_info = None
+        return(rec_log)
+
+    def flush(self):
+        self.wrtr_cur.func_flush()
+        self.hndl_target.flush()
+
+    def close(self):
+        self.flush()
+        self.hndl_target.close()
+        logging.Handler.close(self)
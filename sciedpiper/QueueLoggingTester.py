@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+import logging
+import os
+import ParentPipelineTester
+import QueueLogging
+import subprocess
+import sys
+import threading
+import unittest
+
+
+"""
+Tests the QueueLogging module.
+"""
+
+
+__author__ = "Timothy Tickle"
+__copyright__ = "Copyright 2016"
+__credits__ = ["Timothy Tickle", "Brian Haas"]
+__license__ = "MIT"
+__maintainer__ = "Timothy Tickle"
+__email__ = "ttickle@broadinstitute.org"
+__status__ = "Development"
+
+
+class ListHandler(logging.Handler):
+    """ Keeps the messages written and the threads writing them. """
+
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.lstr_messages = []
+        self.sstr_threads = set()
+
+    def emit(self, rec_log):
+        self.lstr_messages.append(self.format(rec_log))
+        self.sstr_threads.add(threading.current_thread().name)
+
+
+class QueueLoggingTester(ParentPipelineTester.ParentPipelineTester):
+    """
+    Tests logging from a bounded buffer written by a thread.
+    """
+
+    def func_make_logger(self, str_name, hndl_target, wrtr_cur=None):
+        """ Makes a logger writing through a queue handler only. """
+        logr_cur = logging.getLogger(str_name)
+        logr_cur.propagate = False
+        logr_cur.setLevel(logging.INFO)
+        hndl_queue = QueueLogging.QueueHandler(hndl_target, wrtr_cur)
+        logr_cur.addHandler(hndl_queue)
+        return(logr_cur, hndl_queue)
+
+    ########################
+    # func_put, func_flush
+    ########################
+    def test_func_put(self):
+        """ Records are written in the order logged by the writer's thread once flushed. """
+        hndl_list = ListHandler()
+        logr_cur, hndl_queue = self.func_make_logger("test_func_put", hndl_list, QueueLogging.LogWriter())
+        for i_message in range(100):
+            logr_cur.info("message %d", i_message)
+        hndl_queue.flush()
+        self.func_test_true(hndl_list.lstr_messages == ["message " + str(i_message) for i_message in range(100)] and
+                            not threading.current_thread().name in hndl_list.sstr_threads)
+
+    ########################
+    # func_start
+    ########################
+    def test_func_start(self):
+        """ The buffer is bounded and the writer starts once in a process. """
+        wrtr_cur = QueueLogging.LogWriter(i_max_records=5)
+        wrtr_cur.func_start()
+        q_first = wrtr_cur.q_records
+        wrtr_cur.func_start()
+        self.func_test_true(wrtr_cur.q_records is q_first and q_first.maxsize == 5 and wrtr_cur.i_pid == os.getpid())
+
+    ########################
+    # func_prepare
+    ########################
+    def test_func_prepare(self):
+        """ The message is made when logged, later changes to its arguments are not written. """
+        hndl_list = ListHandler()
+        logr_cur, hndl_queue = self.func_make_logger("test_func_prepare", hndl_list, QueueLogging.LogWriter())
+        lstr_paths = ["a.txt"]
+        logr_cur.info("Paths %s", lstr_paths)
+        lstr_paths.append("b.txt")
+        hndl_queue.flush()
+        self.func_test_true(hndl_list.lstr_messages == ["Paths [u'a.txt']"])
+
+    def test_func_prepare_for_exception(self):
+        """ The traceback of an exception is made when logged. """
+        hndl_list = ListHandler()
+        logr_cur, hndl_queue = self.func_make_logger("test_func_prepare_for_exception", hndl_list, QueueLogging.LogWriter())
+        try:
+            raise ValueError("failed")
+        except ValueError:
+            logr_cur.exception("Error")
+        hndl_queue.flush()
+        self.func_test_true(len(hndl_list.lstr_messages) == 1 and hndl_list.lstr_messages[0].startswith("Error\nTraceback") and
+                            hndl_list.lstr_messages[0].endswith("ValueError: failed"))
+
+    ########################
+    # func_stop
+    ########################
+    def test_func_stop(self):
+        """ Stopping writes the records queued and ends the thread, logging again starts it again. """
+        hndl_list = ListHandler()
+        wrtr_cur = QueueLogging.LogWriter()
+        logr_cur, hndl_queue = self.func_make_logger("test_func_stop", hndl_list, wrtr_cur)
+        logr_cur.info("Before")
+        thrd_writer = wrtr_cur.thrd_writer
+        wrtr_cur.func_stop()
+        f_stopped = not thrd_writer.is_alive() and wrtr_cur.i_pid is None
+        logr_cur.info("After")
+        hndl_queue.flush()
+        wrtr_cur.func_stop()
+        self.func_test_true(f_stopped and hndl_list.lstr_messages == ["Before", "After"])
+
+    def test_func_stop_for_exit(self):
+        """ A process logging through the queue and exiting writes its records and nothing to stderr. """
+        str_script = "; ".join(["import logging, sys, QueueLogging",
+                                "logr_cur = logging.getLogger('test_func_stop_for_exit')",
+                                "logr_cur.addHandler(QueueLogging.QueueHandler(logging.StreamHandler(sys.stdout)))",
+                                "logr_cur.warning('Written')",
+                                "exit()"])
+        dict_env = dict(os.environ)
+        dict_env["PYTHONPATH"] = os.path.dirname(os.path.abspath(QueueLogging.__file__))
+        ltpl_output = []
+        for i_run in range(20):
+            prc_child = subprocess.Popen([sys.executable, "-c", str_script], env=dict_env,
+                                         stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            ltpl_output.append(prc_child.communicate())
+        self.func_test_true(all([tpl_output == (b"Written\n", b"") for tpl_output in ltpl_output]))
+
+    ########################
+    # close
+    ########################
+    def test_close(self):
+        """ Closing writes the records queued and closes the file. """
+        str_env = os.path.join(self.str_test_directory, "test_close")
+        self.func_make_dummy_dir(str_env)
+        str_log = os.path.join(str_env, "test.log")
+        hndl_file = logging.FileHandler(str_log, mode="w")
+        logr_cur, hndl_queue = self.func_make_logger("test_close", hndl_file)
+        logr_cur.info("Written")
+        logr_cur.removeHandler(hndl_queue)
+        hndl_queue.close()
+        with open(str_log) as hndl_log:
+            str_written = hndl_log.read()
+        self.func_remove_files([str_log])
+        self.func_remove_dirs([str_env])
+        self.func_test_true(str_written == "Written\n" and hndl_file.stream is None)
+
+
+#Creates a suite of tests
+def suite():
+    """ Suite aggregates tests and is used to run tests. """
+    return unittest.TestLoader().loadTestsFromTestCase(QueueLoggingTester)
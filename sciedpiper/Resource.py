@@ -91,8 +91,8 @@ class Resource(Graph.Vertex):
         Get the parents / dependencies this file is dependent on.
         """
         lrsc_return = []
-        for cur_vertex in self.func_get_parents():
-            for rsc_dep in cur_vertex.func_get_parents():
+        for cur_vertex in self.func_iter_parents():
+            for rsc_dep in cur_vertex.func_iter_parents():
                 lrsc_return.append(rsc_dep)
         return lrsc_return
 
@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+import Benchmarking
+import logging
+import os
+import OutputCache
+import re
+import socket
+import sqlite3
+import time
+
+"""
+Keeps the resources used by each command a pipeline runs (wall time, peak
+resident memory, CPU time, bytes read and written and the size of its
+inputs) in a SQLite file which persists between runs. Commands are matched
+by a template of the tool and its flags without the paths of samples, so
+the history of a command run on one sample predicts the same command on
+another sample.
+"""
+
+__author__ = "Timothy Tickle"
+__copyright__ = "Copyright 2016"
+__credits__ = ["Timothy Tickle", "Brian Haas"]
+__license__ = "MIT"
+__maintainer__ = "Timothy Tickle"
+__email__ = "ttickle@broadinstitute.org"
+__status__ = "Development"
+
+
+# Default history file in the user's cache directory
+C_STR_HISTORY_DIR = "sciedpiper"
+C_STR_HISTORY_FILE = "resource_history.sqlite"
+
+# Columns of a record
+C_STR_PIPELINE = "pipeline"
+C_STR_TEMPLATE = "template"
+C_STR_COMMAND = "command"
+C_STR_START = "start"
+C_STR_WALL_SECONDS = "wall_seconds"
+C_STR_PEAK_RSS = "peak_rss"
+C_STR_CPU_SECONDS = "cpu_seconds"
+C_STR_READ_BYTES = "read_bytes"
+C_STR_WRITE_BYTES = "write_bytes"
+C_STR_INPUT_BYTES = "input_bytes"
+C_STR_SUCCESS = "success"
+C_STR_HOST = "host"
+C_LSTR_COLUMNS = [C_STR_PIPELINE, C_STR_TEMPLATE, C_STR_COMMAND, C_STR_START,
+                  C_STR_WALL_SECONDS, C_STR_PEAK_RSS, C_STR_CPU_SECONDS,
+                  C_STR_READ_BYTES, C_STR_WRITE_BYTES, C_STR_INPUT_BYTES,
+                  C_STR_SUCCESS, C_STR_HOST]
+
+# Placeholder for paths in a template which are not dependencies or products
+C_STR_PATH_PLACEHOLDER = "{path}"
+
+# Most recent records of a template used to predict
+I_PREDICT_RECORDS = 50
+
+# Seconds to wait for another run writing to the history
+D_LOCK_TIMEOUT = 30.0
+
+
+# Tested
+def func_get_default_history_file():
+    """
+    History file in the user's cache directory ( $XDG_CACHE_HOME or ~/.cache ).
+
+    * return : Path
+             : String
+    """
+
+    str_cache = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return(os.path.join(str_cache, C_STR_HISTORY_DIR, C_STR_HISTORY_FILE))
+
+
+# Tested
+def func_get_command_template(cmd_cur):
+    """
+    The tool and flags of a command without sample specific paths.
+    Dependencies and products are replaced by their position, other paths by a
+    placeholder and the tool by its name without its directory.
+
+    * cmd_cur : Command
+    * return : Template
+             : String
+    """
+
+    lstr_tokens = OutputCache.func_normalize_command(cmd_cur).split(" ")
+    if lstr_tokens:
+        lstr_tokens[0] = os.path.basename(lstr_tokens[0])
+    return(" ".join([C_STR_PATH_PLACEHOLDER if (os.sep in str_token and not re.match(r"^\{(dependency|product)_\d+\}$", str_token))
+                     else str_token for str_token in lstr_tokens]))
+
+
+# Tested
+def func_fit(ltpl_points, d_x):
+    """
+    Predicts y at x from points by least squares. When the points do not
+    have different x or y falls as x grows, the mean of y is given instead.
+
+    * ltpl_points : ( x, y ) of each point
+                  : List of tuples
+    * d_x : x to predict at
+          : Float
+    * return : Prediction, None without points.
+             : Float or None
+    """
+
+    if not ltpl_points:
+        return(None)
+    i_points = len(ltpl_points)
+    d_mean_x = sum([tpl_point[0] for tpl_point in ltpl_points]) / i_points
+    d_mean_y = sum([tpl_point[1] for tpl_point in ltpl_points]) / i_points
+    d_var_x = sum([(tpl_point[0] - d_mean_x) ** 2 for tpl_point in ltpl_points])
+    if d_var_x <= 0:
+        return(d_mean_y)
+    d_slope = sum([(tpl_point[0] - d_mean_x) * (tpl_point[1] - d_mean_y) for tpl_point in ltpl_points]) / d_var_x
+    if d_slope < 0:
+        return(d_mean_y)
+    return(max(d_mean_y + d_slope * (d_x - d_mean_x), 0.0))
+
+
+class ResourceHistory:
+    """
+    History of the resources used by the commands of a pipeline.
+    """
+
+    # Tested
+    def __init__(self, str_pipeline, str_history_file=None, logr_cur=None):
+        """
+        Initializer, makes the history file if needed.
+
+        * str_pipeline : Name of the pipeline the commands belong to.
+                       : String
+        * str_history_file : SQLite file of the history, if None the file in the user's cache directory.
+                           : String or None
+        * logr_cur : Logger
+                   : Logger
+        """
+
+        self.logr_logger = logr_cur if logr_cur else logging.getLogger(__name__)
+        """ Logger, uses the default logger. """
+
+        self.str_pipeline = str_pipeline if str_pipeline else ""
+        """ Name of the pipeline. """
+
+        self.str_history_file = str_history_file if str_history_file else func_get_default_history_file()
+        """ Path to the history. """
+
+        self.str_host = socket.gethostname()
+        """ Host this run is on. """
+
+        str_dir = os.path.dirname(os.path.abspath(self.str_history_file))
+        if not os.path.exists(str_dir):
+            os.makedirs(str_dir)
+        with self.func_connect() as conn_history:
+            conn_history.execute("".join(["CREATE TABLE IF NOT EXISTS history (",
+                                          ", ".join([C_STR_PIPELINE + " TEXT", C_STR_TEMPLATE + " TEXT",
+                                                     C_STR_COMMAND + " TEXT", C_STR_START + " REAL",
+                                                     C_STR_WALL_SECONDS + " REAL", C_STR_PEAK_RSS + " INTEGER",
+                                                     C_STR_CPU_SECONDS + " REAL", C_STR_READ_BYTES + " INTEGER",
+                                                     C_STR_WRITE_BYTES + " INTEGER", C_STR_INPUT_BYTES + " INTEGER",
+                                                     C_STR_SUCCESS + " INTEGER", C_STR_HOST + " TEXT"]), ")"]))
+            conn_history.execute(" ".join(["CREATE INDEX IF NOT EXISTS history_template ON history (",
+                                           C_STR_PIPELINE + ",", C_STR_TEMPLATE + ",", C_STR_START, ")"]))
+        conn_history.close()
+
+    def func_connect(self):
+        """
+        Opens the history, a connection is opened for each use so the history
+        can be used from many threads and runs.
+
+        * return : Connection, used with "with" commits or rolls back.
+                 : sqlite3.Connection
+        """
+
+        return(sqlite3.connect(self.str_history_file, timeout=D_LOCK_TIMEOUT))
+
+    # Tested
+    def func_get_input_bytes(self, cmd_cur):
+        """
+        Total size of the dependencies of a command which exist.
+        """
+
+        return(sum([OutputCache.func_get_size(rsc_file.str_id) for rsc_file in cmd_cur.lstr_dependencies
+                    if os.path.exists(rsc_file.str_id)]))
+
+    # Tested
+    def func_record(self, cmd_cur, d_wall_seconds, f_success=True, prof_memory=None):
+        """
+        Record one run of a command.
+        The memory, CPU time and I/O are only known when the command was benchmarked.
+
+        * cmd_cur : Command ran.
+                  : Command
+        * d_wall_seconds : Seconds the command ran.
+                         : Float
+        * f_success : True indicates the command ran without error.
+                    : Boolean
+        * prof_memory : Resources used by the command's process tree, None if not benchmarked.
+                      : Benchmarking.ProcessTreeProfile or None
+        """
+
+        dict_record = {C_STR_PIPELINE: self.str_pipeline,
+                       C_STR_TEMPLATE: func_get_command_template(cmd_cur),
+                       C_STR_COMMAND: cmd_cur.str_id,
+                       C_STR_START: time.time() - d_wall_seconds,
+                       C_STR_WALL_SECONDS: d_wall_seconds,
+                       C_STR_PEAK_RSS: None,
+                       C_STR_CPU_SECONDS: None,
+                       C_STR_READ_BYTES: None,
+                       C_STR_WRITE_BYTES: None,
+                       C_STR_INPUT_BYTES: self.func_get_input_bytes(cmd_cur),
+                       C_STR_SUCCESS: 1 if f_success else 0,
+                       C_STR_HOST: self.str_host}
+        if prof_memory and prof_memory.i_samples:
+            dict_record[C_STR_PEAK_RSS] = prof_memory.func_get_peak(Benchmarking.c_STR_SAMPLE_RSS)
+            dict_record[C_STR_CPU_SECONDS] = prof_memory.func_get_peak(Benchmarking.c_STR_SAMPLE_CPU)
+            dict_record[C_STR_READ_BYTES] = prof_memory.func_get_peak(Benchmarking.c_STR_SAMPLE_READ)
+            dict_record[C_STR_WRITE_BYTES] = prof_memory.func_get_peak(Benchmarking.c_STR_SAMPLE_WRITE)
+        try:
+            with self.func_connect() as conn_history:
+                conn_history.execute("".join(["INSERT INTO history (", ", ".join(C_LSTR_COLUMNS), ") VALUES (",
+                                              ", ".join(["?"] * len(C_LSTR_COLUMNS)), ")"]),
+                                     [dict_record[str_column] for str_column in C_LSTR_COLUMNS])
+            conn_history.close()
+        except sqlite3.Error as e:
+            self.logr_logger.warning(" ".join(["ResourceHistory.func_record: Could not record the command",
+                                               cmd_cur.str_id, "in", self.str_history_file, "Error =", str(e)]))
+
+    # Tested
+    def func_get_records(self, str_template, i_records=I_PREDICT_RECORDS):
+        """
+        Most recent records of a template in this pipeline which ran without error.
+
+        * return : { column: value } of each record, most recent first.
+                 : List of dicts
+        """
+
+        with self.func_connect() as conn_history:
+            lltpl_rows = conn_history.execute(" ".join(["SELECT", ", ".join(C_LSTR_COLUMNS), "FROM history WHERE",
+                                                        C_STR_PIPELINE, "= ? AND", C_STR_TEMPLATE, "= ? AND",
+                                                        C_STR_SUCCESS, "= 1 ORDER BY", C_STR_START, "DESC LIMIT ?"]),
+                                              [self.str_pipeline, str_template, i_records]).fetchall()
+        conn_history.close()
+        return([dict(zip(C_LSTR_COLUMNS, tpl_row)) for tpl_row in lltpl_rows])
+
+    # Tested
+    def func_predict(self, cmd_cur):
+        """
+        Estimate the wall time and peak resident memory of a command from the size of its
+        inputs and the past runs of its template.
+
+        * cmd_cur : Command
+        * return : { wall_seconds: seconds, peak_rss: bytes or None }, None without history.
+                 : Dict or None
+        """
+
+        ldict_records = self.func_get_records(func_get_command_template(cmd_cur))
+        if not ldict_records:
+            return(None)
+        i_input_bytes = self.func_get_input_bytes(cmd_cur)
+        dict_prediction = {}
+        for str_measure in [C_STR_WALL_SECONDS, C_STR_PEAK_RSS]:
+            dict_prediction[str_measure] = func_fit([(dict_record[C_STR_INPUT_BYTES], dict_record[str_measure])
+                                                     for dict_record in ldict_records
+                                                     if dict_record[str_measure] is not None], i_input_bytes)
+        return(dict_prediction)
+
+    # Tested
+    def func_predict_commands(self, lcmd_commands):
+        """
+        Predictions for each command with history.
+
+        * return : { command id: prediction from func_predict }
+                 : Dict
+        """
+
+        dict_predictions = {}
+        for cmd_cur in lcmd_commands:
+            try:
+                dict_prediction = self.func_predict(cmd_cur)
+            except sqlite3.Error as e:
+                self.logr_logger.warning(" ".join(["ResourceHistory.func_predict_commands: Could not read",
+                                                   self.str_history_file, "Error =", str(e)]))
+                return(dict_predictions)
+            if dict_prediction:
+                dict_predictions[cmd_cur.str_id] = dict_prediction
+        return(dict_predictions)
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+import Benchmarking
+import Command
+import os
+import ParentPipelineTester
+import ResourceHistory
+import unittest
+
+
+"""
+Tests the ResourceHistory module.
+"""
+
+
+__author__ = "Timothy Tickle"
+__copyright__ = "Copyright 2016"
+__credits__ = ["Timothy Tickle", "Brian Haas"]
+__license__ = "MIT"
+__maintainer__ = "Timothy Tickle"
+__email__ = "ttickle@broadinstitute.org"
+__status__ = "Development"
+
+
+class ResourceHistoryTester(ParentPipelineTester.ParentPipelineTester):
+    """
+    Tests recording and predicting the resources commands use.
+    """
+
+    def func_make_command(self, str_env, str_sample, i_input_bytes):
+        """ Makes a command for a sample with an input of the given size. """
+        str_input = os.path.join(str_env, str_sample + ".fastq")
+        with open(str_input, "w") as hndl_input:
+            hndl_input.write("A" * i_input_bytes)
+        return Command.Command(" ".join(["/usr/bin/aligner -t 4 --reference /data/ref.fa", str_input,
+                                         ">", os.path.join(str_env, str_sample + ".bam")]),
+                               [str_input], [os.path.join(str_env, str_sample + ".bam")])
+
+    ########################
+    # func_get_default_history_file
+    ########################
+    def test_func_get_default_history_file(self):
+        """ The history is in the user's cache directory. """
+        str_cache = os.environ.get("XDG_CACHE_HOME")
+        os.environ["XDG_CACHE_HOME"] = "/cache"
+        str_result = ResourceHistory.func_get_default_history_file()
+        if str_cache is None:
+            del os.environ["XDG_CACHE_HOME"]
+        else:
+            os.environ["XDG_CACHE_HOME"] = str_cache
+        self.func_test_equals("/cache/sciedpiper/resource_history.sqlite", str_result)
+
+    ########################
+    # func_get_command_template
+    ########################
+    def test_func_get_command_template(self):
+        """ The same command on different samples has one template of the tool and flags. """
+        str_env = self.func_make_env("test_func_get_command_template")
+        str_template_1 = ResourceHistory.func_get_command_template(self.func_make_command(str_env, "sample_1", 1))
+        str_template_2 = ResourceHistory.func_get_command_template(self.func_make_command(str_env, "sample_2", 1))
+        self.func_remove_dirs_recursively(str_env)
+        self.func_test_true(str_template_1 == str_template_2 ==
+                            "aligner -t 4 --reference {path} {dependency_0} > {product_0}")
+
+    ########################
+    # func_fit
+    ########################
+    def test_func_fit(self):
+        """ Predictions grow with x, fall back to the mean when x does not explain y. """
+        self.func_test_equals([30.0, 15.0, 15.0, None],
+                              [ResourceHistory.func_fit([(100, 10.0), (200, 20.0)], 300),
+                               ResourceHistory.func_fit([(100, 10.0), (100, 20.0)], 300),
+                               ResourceHistory.func_fit([(100, 20.0), (200, 10.0)], 300),
+                               ResourceHistory.func_fit([], 300)])
+
+    ########################
+    # func_record, func_predict
+    ########################
+    def test_func_predict(self):
+        """ Runtime and memory are predicted from the size of the inputs of past runs. """
+        str_env = self.func_make_env("test_func_predict")
+        hist_cur = ResourceHistory.ResourceHistory("pipeline", os.path.join(str_env, "history.sqlite"))
+        prof_memory = Benchmarking.ProcessTreeProfile()
+        prof_memory.func_add_sample(dict([(str_measure, 1000) for str_measure in Benchmarking.c_LSTR_SAMPLE_MEASURES]))
+        hist_cur.func_record(self.func_make_command(str_env, "sample_1", 100), 10.0, prof_memory=prof_memory)
+        hist_cur.func_record(self.func_make_command(str_env, "sample_2", 200), 20.0)
+        dict_prediction = hist_cur.func_predict(self.func_make_command(str_env, "sample_3", 300))
+        self.func_remove_dirs_recursively(str_env)
+        self.func_test_equals({ResourceHistory.C_STR_WALL_SECONDS: 30.0, ResourceHistory.C_STR_PEAK_RSS: 1000.0},
+                              dict_prediction)
+
+    def test_func_predict_for_other_runs(self):
+        """ Failed runs and runs of other pipelines are not used to predict. """
+        str_env = self.func_make_env("test_func_predict_for_other_runs")
+        str_history = os.path.join(str_env, "history.sqlite")
+        hist_cur = ResourceHistory.ResourceHistory("pipeline", str_history)
+        hist_cur.func_record(self.func_make_command(str_env, "sample_1", 100), 10.0, f_success=False)
+        ResourceHistory.ResourceHistory("other_pipeline", str_history).func_record(self.func_make_command(str_env, "sample_2", 100), 10.0)
+        dict_prediction = hist_cur.func_predict(self.func_make_command(str_env, "sample_3", 100))
+        i_records = len(ResourceHistory.ResourceHistory("other_pipeline", str_history).func_get_records(
+            ResourceHistory.func_get_command_template(self.func_make_command(str_env, "sample_3", 100))))
+        self.func_remove_dirs_recursively(str_env)
+        self.func_test_true(dict_prediction is None and i_records == 1)
+
+
+#Creates a suite of tests
+def suite():
+    """ Suite aggregates tests and is used to run tests. """
+    return unittest.TestLoader().loadTestsFromTestCase(ResourceHistoryTester)
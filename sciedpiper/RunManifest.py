@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+import json
+import logging
+import os
+
+"""
+Records which products were made by commands which completed without error.
+Replaces the per product hidden ok files with one append-only file in the
+output directory, read once in bulk when a run starts.
+"""
+
+__author__ = "Timothy Tickle"
+__copyright__ = "Copyright 2016"
+__credits__ = ["Timothy Tickle", "Brian Haas"]
+__license__ = "MIT"
+__maintainer__ = "Timothy Tickle"
+__email__ = "ttickle@broadinstitute.org"
+__status__ = "Development"
+
+
+# Name of the manifest file in the output directory
+C_STR_MANIFEST_FILE = ".sciedpiper_manifest.jsonl"
+
+# Keys in each record
+C_STR_PATH = "path"
+C_STR_SIZE = "size"
+C_STR_MTIME = "mtime"
+C_STR_COMMAND = "command"
+C_STR_VALID = "valid"
+
+# Ok files are hidden files named .<product>.ok
+C_STR_OK_PREFIX = "."
+C_STR_OK_SUFFIX = ".ok"
+
+
+class RunManifest:
+    """
+    Append-only record of valid products.
+    Each line is a json record { path, size, mtime, command, valid }, later
+    records for a path replace earlier ones. Removing a product appends an
+    invalid record. A partial last line (eg. the pipeline was killed) is ignored.
+    """
+
+    # Tested
+    def __init__(self, str_output_dir, logr_cur=None):
+        """
+        Initializer, reads the manifest if it exists.
+
+        * str_output_dir : Output directory the manifest is kept in.
+                         : String
+        * logr_cur : Logger
+                   : Logger
+        """
+
+        self.logr_logger = logr_cur if logr_cur else logging.getLogger(__name__)
+        """ Logger, uses the default logger. """
+
+        self.str_manifest = os.path.join(str_output_dir, C_STR_MANIFEST_FILE)
+        """ Path to the manifest. """
+
+        self.dict_records = {}
+        """ Current record for each path { path: record } """
+
+        self.f_existed = os.path.exists(self.str_manifest)
+        """ True indicates the manifest was made in an earlier run. """
+
+        self.func_load()
+
+    # Tested
+    def func_load(self):
+        """
+        Read the manifest, the latest record for each path is kept.
+
+        * return : Number of records read.
+                 : Int
+        """
+
+        self.dict_records = {}
+        i_records = 0
+        if not os.path.exists(self.str_manifest):
+            return(i_records)
+        with open(self.str_manifest, "r") as hndl_manifest:
+            for str_line in hndl_manifest:
+                try:
+                    dict_record = json.loads(str_line)
+                    str_path = dict_record[C_STR_PATH]
+                except (ValueError, KeyError, TypeError):
+                    self.logr_logger.warning("RunManifest.func_load: Skipping an incomplete record in " + self.str_manifest)
+                    continue
+                i_records += 1
+                if dict_record.get(C_STR_VALID, True):
+                    self.dict_records[str_path] = dict_record
+                else:
+                    self.dict_records.pop(str_path, None)
+        self.logr_logger.info(" ".join(["RunManifest.func_load: Read", str(i_records), "records for",
+                                        str(len(self.dict_records)), "valid products from", self.str_manifest]))
+        return(i_records)
+
+    # Tested
+    def func_is_valid(self, str_path):
+        """
+        True indicates the path was made by a command which completed.
+        """
+
+        return(str_path in self.dict_records)
+
+    # Tested
+    def func_get_time_stamp(self, str_path):
+        """
+        Modification time of the path when it was recorded, None if not recorded.
+        """
+
+        dict_record = self.dict_records.get(str_path)
+        return(dict_record[C_STR_MTIME] if dict_record else None)
+
+    def func_make_record(self, str_path, str_command, f_valid=True):
+        """
+        Record for a path, the size and time stamp are read from the path.
+        """
+
+        dict_record = {C_STR_PATH: str_path, C_STR_VALID: f_valid}
+        if f_valid:
+            try:
+                stat_path = os.stat(str_path)
+                dict_record[C_STR_SIZE] = stat_path.st_size
+                dict_record[C_STR_MTIME] = stat_path.st_mtime
+            except OSError:
+                dict_record[C_STR_SIZE] = 0
+                dict_record[C_STR_MTIME] = 0.0
+            dict_record[C_STR_COMMAND] = str_command
+        return(dict_record)
+
+    def func_append(self, ldict_records):
+        """
+        Append records to the manifest and keep them in memory.
+        """
+
+        if not ldict_records:
+            return
+        str_directory = os.path.dirname(self.str_manifest)
+        if not os.path.exists(str_directory):
+            os.makedirs(str_directory)
+        with open(self.str_manifest, "a") as hndl_manifest:
+            hndl_manifest.write("".join([json.dumps(dict_record) + "\n" for dict_record in ldict_records]))
+            hndl_manifest.flush()
+        for dict_record in ldict_records:
+            if dict_record[C_STR_VALID]:
+                self.dict_records[dict_record[C_STR_PATH]] = dict_record
+            else:
+                self.dict_records.pop(dict_record[C_STR_PATH], None)
+
+    # Tested
+    def func_record_valid(self, lstr_paths, str_command):
+        """
+        Record products made by a command which completed.
+
+        * lstr_paths : Paths of the products
+                     : List of strings
+        * str_command : Command which made the products
+                      : String
+        """
+
+        self.func_append([self.func_make_record(str_path, str_command) for str_path in lstr_paths])
+
+    # Tested
+    def func_record_invalid(self, lstr_paths):
+        """
+        Record products are no longer valid (eg. removed after an error).
+
+        * lstr_paths : Paths of the products
+                     : List of strings
+        """
+
+        self.func_append([self.func_make_record(str_path, None, f_valid=False)
+                          for str_path in lstr_paths if str_path in self.dict_records])
+
+    # Tested
+    def func_import_ok_files(self, str_directory):
+        """
+        Migrate ok files into the manifest.
+        Finds ok files under a directory and records the products they mark as valid.
+        Products already in the manifest are not changed. The ok files are left in place.
+
+        * str_directory : Directory to search for ok files
+                        : String
+        * return : Number of products imported
+                 : Int
+        """
+
+        ldict_imported = []
+        for str_root, lstr_dirs, lstr_files in os.walk(str_directory):
+            for str_file in lstr_files:
+                if not (str_file.startswith(C_STR_OK_PREFIX) and str_file.endswith(C_STR_OK_SUFFIX)):
+                    continue
+                str_product_name = str_file[len(C_STR_OK_PREFIX):-len(C_STR_OK_SUFFIX)]
+                if not str_product_name:
+                    continue
+                str_product = os.path.join(str_root, str_product_name)
+                if str_product in self.dict_records:
+                    continue
+                dict_record = self.func_make_record(str_product, None)
+                # Products which are gone (eg. cleaned) keep the time of the ok file
+                if not os.path.exists(str_product):
+                    dict_record[C_STR_MTIME] = os.path.getmtime(os.path.join(str_root, str_file))
+                ldict_imported.append(dict_record)
+        self.func_append(ldict_imported)
+        self.logr_logger.info(" ".join(["RunManifest.func_import_ok_files: Imported", str(len(ldict_imported)),
+                                        "ok files from", str_directory]))
+        return(len(ldict_imported))
+
+    def __len__(self):
+        return(len(self.dict_records))
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+import os
+import ParentPipelineTester
+import RunManifest
+import unittest
+
+
+"""
+Tests the RunManifest module.
+"""
+
+
+__author__ = "Timothy Tickle"
+__copyright__ = "Copyright 2016"
+__credits__ = ["Timothy Tickle", "Brian Haas"]
+__license__ = "MIT"
+__maintainer__ = "Timothy Tickle"
+__email__ = "ttickle@broadinstitute.org"
+__status__ = "Development"
+
+
+class RunManifestTester(ParentPipelineTester.ParentPipelineTester):
+    """
+    Tests recording valid products in a run manifest.
+    """
+
+    ########################
+    # __init__ and func_load
+    ########################
+    def test_init_for_no_manifest(self):
+        """ A new manifest is empty and did not exist before. """
+        str_env = self.func_make_env("test_init_for_no_manifest")
+        mnfst_cur = RunManifest.RunManifest(str_env)
+        self.func_remove_dirs_recursively(str_env)
+        self.func_test_true(not mnfst_cur.f_existed and len(mnfst_cur) == 0)
+
+    def test_func_load_for_reload(self):
+        """ Records written are read by a new manifest. """
+        str_env = self.func_make_env("test_func_load_for_reload")
+        str_product = os.path.join(str_env, "product.txt")
+        self.func_make_dummy_file(str_product)
+        RunManifest.RunManifest(str_env).func_record_valid([str_product], "touch product.txt")
+        mnfst_cur = RunManifest.RunManifest(str_env)
+        f_result = mnfst_cur.f_existed and mnfst_cur.func_is_valid(str_product)
+        d_time_stamp = mnfst_cur.func_get_time_stamp(str_product)
+        d_mtime = os.path.getmtime(str_product)
+        self.func_remove_dirs_recursively(str_env)
+        self.func_test_true(f_result and d_time_stamp == d_mtime)
+
+    def test_func_load_for_incomplete_line(self):
+        """ A partial line (eg. the pipeline was killed while writing) is skipped. """
+        str_env = self.func_make_env("test_func_load_for_incomplete_line")
+        str_product = os.path.join(str_env, "product.txt")
+        self.func_make_dummy_file(str_product)
+        mnfst_cur = RunManifest.RunManifest(str_env)
+        mnfst_cur.func_record_valid([str_product], "touch product.txt")
+        with open(mnfst_cur.str_manifest, "a") as hndl_manifest:
+            hndl_manifest.write("{\"path\": \"" + str_env)
+        mnfst_cur = RunManifest.RunManifest(str_env)
+        i_records = mnfst_cur.func_load()
+        f_result = mnfst_cur.func_is_valid(str_product)
+        self.func_remove_dirs_recursively(str_env)
+        self.func_test_true(f_result and i_records == 1)
+
+    ########################
+    # func_record_valid and func_record_invalid
+    ########################
+    def test_func_record_invalid_for_later_record(self):
+        """ An invalid record replaces an earlier valid record, also after reading again. """
+        str_env = self.func_make_env("test_func_record_invalid_for_later_record")
+        str_product_1 = os.path.join(str_env, "product_1.txt")
+        str_product_2 = os.path.join(str_env, "product_2.txt")
+        self.func_make_dummy_files([str_product_1, str_product_2])
+        mnfst_cur = RunManifest.RunManifest(str_env)
+        mnfst_cur.func_record_valid([str_product_1, str_product_2], "make")
+        mnfst_cur.func_record_invalid([str_product_1])
+        f_memory = not mnfst_cur.func_is_valid(str_product_1) and mnfst_cur.func_is_valid(str_product_2)
+        mnfst_cur = RunManifest.RunManifest(str_env)
+        f_reload = not mnfst_cur.func_is_valid(str_product_1) and mnfst_cur.func_is_valid(str_product_2)
+        self.func_remove_dirs_recursively(str_env)
+        self.func_test_true(f_memory and f_reload)
+
+    def test_func_record_invalid_for_unrecorded_path(self):
+        """ Paths never recorded do not add records. """
+        str_env = self.func_make_env("test_func_record_invalid_for_unrecorded_path")
+        mnfst_cur = RunManifest.RunManifest(str_env)
+        mnfst_cur.func_record_invalid([os.path.join(str_env, "product.txt")])
+        f_result = os.path.exists(mnfst_cur.str_manifest)
+        self.func_remove_dirs_recursively(str_env)
+        self.func_test_true(not f_result)
+
+    def test_func_record_valid_for_missing_directory(self):
+        """ The output directory is made when the first record is written. """
+        str_env = self.func_make_env("test_func_record_valid_for_missing_directory")
+        str_output = os.path.join(str_env, "output")
+        mnfst_cur = RunManifest.RunManifest(str_output)
+        mnfst_cur.func_record_valid([os.path.join(str_output, "product.txt")], "make")
+        f_result = os.path.exists(mnfst_cur.str_manifest)
+        self.func_remove_dirs_recursively(str_env)
+        self.func_test_true(f_result)
+
+    ########################
+    # func_import_ok_files
+    ########################
+    def test_func_import_ok_files(self):
+        """ Ok files, also in sub directories, are imported and other files are not. """
+        str_env = self.func_make_env("test_func_import_ok_files")
+        str_sub = os.path.join(str_env, "sub")
+        self.func_make_dummy_dir(str_sub)
+        str_product_1 = os.path.join(str_env, "product_1.txt")
+        str_product_2 = os.path.join(str_sub, "product_2.txt")
+        str_product_3 = os.path.join(str_env, "product_3.txt")
+        self.func_make_dummy_files([str_product_1, str_product_2, str_product_3,
+                                    os.path.join(str_env, ".product_1.txt.ok"),
+                                    os.path.join(str_sub, ".product_2.txt.ok")])
+        mnfst_cur = RunManifest.RunManifest(str_env)
+        i_imported = mnfst_cur.func_import_ok_files(str_env)
+        mnfst_cur = RunManifest.RunManifest(str_env)
+        f_result = (mnfst_cur.func_is_valid(str_product_1) and mnfst_cur.func_is_valid(str_product_2) and
+                    not mnfst_cur.func_is_valid(str_product_3))
+        self.func_remove_dirs_recursively(str_env)
+        self.func_test_true(f_result and i_imported == 2)
+
+    def test_func_import_ok_files_for_removed_product(self):
+        """ A product removed after it was made keeps the time of the ok file. """
+        str_env = self.func_make_env("test_func_import_ok_files_for_removed_product")
+        str_product = os.path.join(str_env, "product.txt")
+        str_ok = os.path.join(str_env, ".product.txt.ok")
+        self.func_make_dummy_file(str_ok)
+        mnfst_cur = RunManifest.RunManifest(str_env)
+        mnfst_cur.func_import_ok_files(str_env)
+        f_result = mnfst_cur.func_get_time_stamp(str_product) == os.path.getmtime(str_ok)
+        self.func_remove_dirs_recursively(str_env)
+        self.func_test_true(f_result)
+
+    def test_func_import_ok_files_for_recorded_product(self):
+        """ Products already in the manifest are not imported again. """
+        str_env = self.func_make_env("test_func_import_ok_files_for_recorded_product")
+        str_product = os.path.join(str_env, "product.txt")
+        self.func_make_dummy_files([str_product, os.path.join(str_env, ".product.txt.ok")])
+        mnfst_cur = RunManifest.RunManifest(str_env)
+        mnfst_cur.func_record_valid([str_product], "make")
+        i_imported = mnfst_cur.func_import_ok_files(str_env)
+        self.func_remove_dirs_recursively(str_env)
+        self.func_test_equals(0, i_imported)
+
+
+#Creates a suite of tests
+def suite():
+    """ Suite aggregates tests and is used to run tests. """
+    return unittest.TestLoader().loadTestsFromTestCase(RunManifestTester)
@@ -0,0 +1,314 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+import Command
+import logging
+import multiprocessing
+import os
+
+"""
+Decides which ready commands can run at the same time on the local machine
+without using more cores or memory than the machine has.
+"""
+
+__author__ = "Timothy Tickle"
+__copyright__ = "Copyright 2016"
+__credits__ = ["Timothy Tickle", "Brian Haas"]
+__license__ = "MIT"
+__maintainer__ = "Timothy Tickle"
+__email__ = "ttickle@broadinstitute.org"
+__status__ = "Development"
+
+
+# File describing memory on linux
+c_STR_MEMINFO = os.sep + os.sep.join(["proc", "meminfo"])
+c_STR_MEM_TOTAL = "MemTotal"
+# KB in a GB
+c_I_KB_IN_GB = 1024 * 1024
+
+# Policies for the order ready commands are started
+## In the breadth-wise order of the dependency graph
+STR_PRIORITY_BREADTH = "breadth"
+## Commands with the longest path of commands after them first
+STR_PRIORITY_CRITICAL_PATH = "critical_path"
+LSTR_PRIORITY_CHOICES = [STR_PRIORITY_CRITICAL_PATH, STR_PRIORITY_BREADTH]
+
+
+# Tested
+def func_get_node_cores():
+    """
+    Number of cores the machine reports.
+
+    * return : Number of cores, 1 if it can not be determined.
+             : Int
+    """
+
+    try:
+        return(max(multiprocessing.cpu_count(), 1))
+    except NotImplementedError:
+        return(1)
+
+
+# Tested
+def func_get_node_memory():
+    """
+    Memory the machine reports in GB.
+    ** Reads /proc/meminfo, if that is not available the page count is used. **
+
+    * return : Memory in GB, None if it can not be determined.
+             : Float or None
+    """
+
+    try:
+        with open(c_STR_MEMINFO, "r") as hndl_mem:
+            for str_line in hndl_mem:
+                if str_line.startswith(c_STR_MEM_TOTAL):
+                    return(float(str_line.split()[1]) / c_I_KB_IN_GB)
+    except (IOError, OSError, IndexError, ValueError):
+        pass
+    try:
+        return(float(os.sysconf(str("SC_PAGE_SIZE")) * os.sysconf(str("SC_PHYS_PAGES"))) / (c_I_KB_IN_GB * 1024))
+    except (AttributeError, ValueError, OSError):
+        return(None)
+
+
+# Tested
+def func_get_downstream_commands(cmd_cur):
+    """
+    Commands which use the products of a command.
+
+    * cmd_cur : Command
+    * return : List of commands
+    """
+
+    dict_commands = {}
+    for rsc_product in cmd_cur.func_iter_children():
+        for vtx_user in rsc_product.func_iter_children():
+            if vtx_user.str_type == Command.STR_TYPE:
+                dict_commands[vtx_user.str_id] = vtx_user
+    return(dict_commands.values())
+
+
+# Tested
+def func_get_critical_path_lengths(lcmd_ordered, dict_runtimes=None):
+    """
+    For each command, the length of the longest path of commands starting at
+    the command and following products to the commands using them, including
+    the command itself. Each command on a path counts as its historical
+    runtime when known; commands without a runtime count as the average
+    known runtime (or 1 when no runtimes are known).
+
+    * lcmd_ordered : Commands in an order where a command comes after the
+                     commands making its dependencies
+                     (eg. DependencyTree.func_get_commands()).
+                   : List of commands
+    * dict_runtimes : Historical runtimes (seconds) { str_id: runtime }
+                    : Dict or None
+    * return : Path length for each command { str_id: length }
+             : Dict
+    """
+
+    dict_runtimes = dict_runtimes if dict_runtimes else {}
+    ld_known = [dict_runtimes[cmd_cur.str_id] for cmd_cur in lcmd_ordered
+                if cmd_cur.str_id in dict_runtimes]
+    d_default = (sum(ld_known) / len(ld_known)) if ld_known else 1.0
+
+    # Walk from the last command to the first so children are always known
+    dict_lengths = {}
+    for cmd_cur in reversed(lcmd_ordered):
+        d_longest_after = 0.0
+        for cmd_child in func_get_downstream_commands(cmd_cur):
+            d_longest_after = max(d_longest_after, dict_lengths.get(cmd_child.str_id, 0.0))
+        dict_lengths[cmd_cur.str_id] = dict_runtimes.get(cmd_cur.str_id, d_default) + d_longest_after
+    return(dict_lengths)
+
+
+class LocalScheduler:
+    """
+    Packs commands onto the local machine.
+    Commands are admitted in the order they are offered as long as their
+    cores and memory (Command.i_cores, Command.d_memory) fit in what is left
+    of the budget. Commands which do not fit stay queued until running
+    commands are released.
+    """
+
+    # Tested
+    def __init__(self, i_cores=None, d_memory=None, logr_cur=None,
+                 str_priority=STR_PRIORITY_CRITICAL_PATH, dict_runtimes=None):
+        """
+        Initializer
+
+        * i_cores : Cores available to commands, if None the machine's cores are used.
+                  : Int or None
+        * d_memory : Memory (GB) available to commands, if None the machine's memory is used.
+                   : Float or None
+        * logr_cur : Logger to log decisions to.
+                   : Logger
+        * str_priority : Policy for the order ready commands are started.
+                       : A value from LSTR_PRIORITY_CHOICES
+        * dict_runtimes : Historical runtimes (seconds) of commands { str_id: runtime }
+                          used to weight the critical path.
+                        : Dict or None
+        """
+
+        self.logr_logger = logr_cur if logr_cur else logging.getLogger(__name__)
+        """ Logger, uses the default logger. """
+
+        self.i_cores = i_cores if i_cores and i_cores > 0 else func_get_node_cores()
+        """ Total cores that can be used. """
+
+        self.d_memory = float(d_memory) if d_memory and d_memory > 0 else func_get_node_memory()
+        """ Total memory that can be used (GB), None indicates memory is not limited. """
+
+        self.i_cores_used = 0
+        """ Cores used by running commands. """
+
+        self.d_memory_used = 0.0
+        """ Memory used by running commands (GB). """
+
+        self.dict_running = {}
+        """ Commands admitted and not yet released { str_id: (cores, memory) } """
+
+        self.sstr_queued = set()
+        """ Commands which were offered but did not fit, used to log once. """
+
+        self.str_priority = str_priority if str_priority in LSTR_PRIORITY_CHOICES else STR_PRIORITY_CRITICAL_PATH
+        """ Policy for the order ready commands are started. """
+
+        self.dict_runtimes = dict_runtimes if dict_runtimes else {}
+        """ Historical runtimes of commands. """
+
+    # Tested
+    def func_get_order_keys(self, lcmd_ordered):
+        """
+        Keys used to order ready commands, ready commands with the smallest key start first.
+        For the breadth policy this is the position in the breadth-wise order. For the
+        critical path policy commands with the longest path after them come first, ties
+        broken by the breadth-wise order.
+
+        * lcmd_ordered : Commands in breadth-wise order (DependencyTree.func_get_commands()).
+                       : List of commands
+        * return : { str_id: key }
+                 : Dict
+        """
+
+        if self.str_priority == STR_PRIORITY_BREADTH:
+            return(dict([(cmd_cur.str_id, (i_index,)) for i_index, cmd_cur in enumerate(lcmd_ordered)]))
+        dict_lengths = func_get_critical_path_lengths(lcmd_ordered, self.dict_runtimes)
+        if dict_lengths:
+            self.logr_logger.info(" ".join(["Pipeline.func_run_commands: Scheduler:: Critical path length",
+                                            str(max(dict_lengths.values())),
+                                            "(seconds)" if self.dict_runtimes else "(commands)"]))
+        return(dict([(cmd_cur.str_id, (-dict_lengths[cmd_cur.str_id], i_index))
+                     for i_index, cmd_cur in enumerate(lcmd_ordered)]))
+
+    # Tested
+    def func_get_request(self, cmd_cur):
+        """
+        Cores and memory a command asks for, limited to the budget so a
+        command larger than the machine can still run (alone).
+
+        * cmd_cur : Command
+        * return : (cores, memory)
+                 : Tuple (Int, Float)
+        """
+
+        i_cores = min(max(getattr(cmd_cur, "i_cores", 1), 1), self.i_cores)
+        d_memory = max(getattr(cmd_cur, "d_memory", 0.0), 0.0)
+        if self.d_memory is not None:
+            d_memory = min(d_memory, self.d_memory)
+        return((i_cores, d_memory))
+
+    # Tested
+    def func_get_memory_headroom(self):
+        """
+        Memory (GB) not used by running commands, None if memory is not limited.
+        """
+
+        if self.d_memory is None:
+            return(None)
+        return(self.d_memory - self.d_memory_used)
+
+    # Tested
+    def func_can_admit(self, cmd_cur):
+        """
+        Checks if a command fits in the cores and memory currently free.
+
+        * cmd_cur : Command
+        * return : True indicates the command fits.
+                 : Boolean
+        """
+
+        i_cores, d_memory = self.func_get_request(cmd_cur)
+        if i_cores > (self.i_cores - self.i_cores_used):
+            return(False)
+        if (self.d_memory is not None) and (d_memory > self.func_get_memory_headroom()):
+            return(False)
+        return(True)
+
+    # Tested
+    def func_admit(self, cmd_cur):
+        """
+        Admits a command if it fits, reserving its cores and memory.
+        Logs the decision (admitted or queued).
+
+        * cmd_cur : Command
+        * return : True indicates the command was admitted and may start.
+                 : Boolean
+        """
+
+        i_cores, d_memory = self.func_get_request(cmd_cur)
+        if not self.func_can_admit(cmd_cur):
+            if cmd_cur.str_id not in self.sstr_queued:
+                self.sstr_queued.add(cmd_cur.str_id)
+                self.logr_logger.info(" ".join(["Pipeline.func_run_commands: Scheduler:: Queued, needs",
+                                                str(i_cores), "cores and", self.func_format_memory(d_memory),
+                                                "with", str(self.i_cores - self.i_cores_used), "cores and",
+                                                self.func_format_memory(self.func_get_memory_headroom()),
+                                                "free. Command:", cmd_cur.str_id]))
+            return(False)
+        self.sstr_queued.discard(cmd_cur.str_id)
+        self.dict_running[cmd_cur.str_id] = (i_cores, d_memory)
+        self.i_cores_used += i_cores
+        self.d_memory_used += d_memory
+        self.logr_logger.info(" ".join(["Pipeline.func_run_commands: Scheduler:: Admitted with",
+                                        str(i_cores), "cores and", self.func_format_memory(d_memory) + ".",
+                                        "Cores used", str(self.i_cores_used) + "/" + str(self.i_cores) + ".",
+                                        "Memory headroom", self.func_format_memory(self.func_get_memory_headroom()) + ".",
+                                        "Command:", cmd_cur.str_id]))
+        return(True)
+
+    # Tested
+    def func_release(self, cmd_cur):
+        """
+        Returns the cores and memory of a command which is no longer running.
+
+        * cmd_cur : Command
+        """
+
+        if cmd_cur.str_id not in self.dict_running:
+            return
+        i_cores, d_memory = self.dict_running.pop(cmd_cur.str_id)
+        self.i_cores_used -= i_cores
+        self.d_memory_used = max(self.d_memory_used - d_memory, 0.0)
+        self.logr_logger.info(" ".join(["Pipeline.func_run_commands: Scheduler:: Released",
+                                        str(i_cores), "cores and", self.func_format_memory(d_memory) + ".",
+                                        "Memory headroom", self.func_format_memory(self.func_get_memory_headroom()) + ".",
+                                        "Command:", cmd_cur.str_id]))
+
+    def func_format_memory(self, d_memory):
+        """
+        Human readable memory in GB.
+        """
+
+        if d_memory is None:
+            return("unlimited memory")
+        return("{:.2f} GB".format(d_memory))
+
+    def __str__(self):
+        return(" ".join(["LocalScheduler{ Cores:", str(self.i_cores),
+                         "Memory:", self.func_format_memory(self.d_memory),
+                         "Priority:", self.str_priority, "}"]))
@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+import Command
+import DependencyTree
+import heapq
+import logging
+import ParentPipelineTester
+import Scheduler
+import unittest
+
+
+"""
+Tests the Scheduler module.
+"""
+
+
+__author__ = "Timothy Tickle"
+__copyright__ = "Copyright 2016"
+__credits__ = ["Timothy Tickle", "Brian Haas"]
+__license__ = "MIT"
+__maintainer__ = "Timothy Tickle"
+__email__ = "ttickle@broadinstitute.org"
+__status__ = "Development"
+
+
+class SchedulerTester(ParentPipelineTester.ParentPipelineTester):
+    """
+    Tests the LocalScheduler object.
+    """
+
+    def setUp(self):
+        self.func_remove_log_handlers()
+
+    def tearDown(self):
+        self.func_remove_log_handlers()
+
+    def func_remove_log_handlers(self):
+        """
+        Removes handlers left on the scheduler's and the root logger by earlier tests,
+        the scheduler's records propagate to the root logger and would be written once per handler.
+        """
+        for logr_cur in [logging.getLogger(Scheduler.__name__), logging.getLogger()]:
+            for hndl_cur in list(logr_cur.handlers):
+                logr_cur.removeHandler(hndl_cur)
+                hndl_cur.close()
+
+    def func_make_command(self, str_name, i_cores=1, d_memory=0.0):
+        """ Quick command with resources. """
+        return(Command.Command("cat " + str_name, ["in_" + str_name], ["out_" + str_name],
+                               i_cores=i_cores, d_memory=d_memory))
+
+    def func_make_wide_and_deep_tree(self, i_chains, i_chain_length, i_wide):
+        """
+        Synthetic DAG with deep chains of commands next to many independent (wide) commands.
+        Returns the tree and historical runtimes, chain commands are slower than wide commands.
+        """
+        lcmd_commands = []
+        dict_runtimes = {}
+        for i_chain in range(i_chains):
+            str_previous = "chain_" + str(i_chain) + "_0"
+            for i_link in range(1, i_chain_length + 1):
+                str_next = "chain_" + str(i_chain) + "_" + str(i_link)
+                cmd_link = Command.Command("link " + str_next, [str_previous], [str_next])
+                lcmd_commands.append(cmd_link)
+                dict_runtimes[cmd_link.str_id] = 5.0
+                str_previous = str_next
+        for i_index in range(i_wide):
+            cmd_wide = Command.Command("wide " + str(i_index), ["wide_in_" + str(i_index)],
+                                       ["wide_out_" + str(i_index)])
+            lcmd_commands.append(cmd_wide)
+            dict_runtimes[cmd_wide.str_id] = 1.0
+        return((DependencyTree.DependencyTree(lcmd_commands), dict_runtimes))
+
+    def func_simulate_makespan(self, lcmd_ordered, dict_keys, dict_runtimes, i_slots):
+        """
+        Simulates running commands with a number of slots, starting ready commands
+        by smallest key, and returns the time the last command ends.
+        """
+        dict_waiting_on = {}
+        for cmd_cur in lcmd_ordered:
+            dict_waiting_on[cmd_cur.str_id] = len(set([vtx_maker.str_id
+                                                       for rsc_dependency in cmd_cur.func_get_parents()
+                                                       for vtx_maker in rsc_dependency.func_get_parents()
+                                                       if vtx_maker.str_type == Command.STR_TYPE]))
+        li_ready = [(dict_keys[cmd_cur.str_id], cmd_cur) for cmd_cur in lcmd_ordered
+                    if not dict_waiting_on[cmd_cur.str_id]]
+        heapq.heapify(li_ready)
+        li_running = []
+        d_now = 0.0
+        while li_ready or li_running:
+            while li_ready and len(li_running) < i_slots:
+                tpl_key, cmd_cur = heapq.heappop(li_ready)
+                heapq.heappush(li_running, (d_now + dict_runtimes[cmd_cur.str_id], tpl_key, cmd_cur))
+            d_now, tpl_key, cmd_done = heapq.heappop(li_running)
+            for cmd_child in Scheduler.func_get_downstream_commands(cmd_done):
+                dict_waiting_on[cmd_child.str_id] -= 1
+                if not dict_waiting_on[cmd_child.str_id]:
+                    heapq.heappush(li_ready, (dict_keys[cmd_child.str_id], cmd_child))
+        return(d_now)
+
+    ########################
+    # Machine resources
+    ########################
+    def test_func_get_node_cores(self):
+        """ The machine should report at least one core. """
+        self.func_test_true(Scheduler.func_get_node_cores() >= 1)
+
+    def test_func_get_node_memory(self):
+        """ The machine should report memory (linux). """
+        d_memory = Scheduler.func_get_node_memory()
+        self.func_test_true(d_memory is None or d_memory > 0)
+
+    ########################
+    # __init__
+    ########################
+    def test_init_for_budget(self):
+        """ A given budget is used. """
+        schd_cur = Scheduler.LocalScheduler(i_cores=3, d_memory=10)
+        self.func_test_equals("LocalScheduler{ Cores: 3 Memory: 10.00 GB Priority: critical_path }", str(schd_cur))
+
+    def test_init_for_bad_priority(self):
+        """ An unknown priority policy falls back to the critical path. """
+        schd_cur = Scheduler.LocalScheduler(i_cores=3, str_priority="fastest")
+        self.func_test_equals(Scheduler.STR_PRIORITY_CRITICAL_PATH, schd_cur.str_priority)
+
+    def test_init_for_default_budget(self):
+        """ Without a budget the machine's cores are used. """
+        schd_cur = Scheduler.LocalScheduler()
+        self.func_test_equals(Scheduler.func_get_node_cores(), schd_cur.i_cores)
+
+    ########################
+    # func_get_downstream_commands
+    ########################
+    def test_func_get_downstream_commands(self):
+        """ Commands using any product of a command are found once. """
+        cmd_one = Command.Command("one", ["in"], ["a", "b"])
+        cmd_two = Command.Command("two", ["a", "b"], ["c"])
+        cmd_three = Command.Command("three", ["b"], ["d"])
+        cmd_four = Command.Command("four", ["c"], ["e"])
+        DependencyTree.DependencyTree([cmd_one, cmd_two, cmd_three, cmd_four])
+        self.func_test_equals(str(sorted(["two", "three"])),
+                              str(sorted([cmd_cur.str_id for cmd_cur in Scheduler.func_get_downstream_commands(cmd_one)])))
+
+    ########################
+    # func_get_critical_path_lengths
+    ########################
+    def test_func_get_critical_path_lengths_for_unit_weights(self):
+        """ Without runtimes each command counts as one. """
+        cmd_one = Command.Command("one", ["in"], ["a"])
+        cmd_two = Command.Command("two", ["a"], ["b"])
+        cmd_three = Command.Command("three", ["b"], ["c"])
+        cmd_four = Command.Command("four", ["in"], ["d"])
+        dt_tree = DependencyTree.DependencyTree([cmd_one, cmd_two, cmd_three, cmd_four])
+        dict_lengths = Scheduler.func_get_critical_path_lengths(dt_tree.func_get_commands())
+        self.func_test_equals(str([3.0, 2.0, 1.0, 1.0]),
+                              str([dict_lengths[str_id] for str_id in ["one", "two", "three", "four"]]))
+
+    def test_func_get_critical_path_lengths_for_runtimes(self):
+        """ The longest path follows the slowest branch, unknown runtimes use the average. """
+        cmd_one = Command.Command("one", ["in"], ["a"])
+        cmd_fast = Command.Command("fast", ["a"], ["b"])
+        cmd_slow = Command.Command("slow", ["a"], ["c"])
+        cmd_unknown = Command.Command("unknown", ["b"], ["d"])
+        dt_tree = DependencyTree.DependencyTree([cmd_one, cmd_fast, cmd_slow, cmd_unknown])
+        dict_lengths = Scheduler.func_get_critical_path_lengths(dt_tree.func_get_commands(),
+                                                                {"one": 2.0, "fast": 1.0, "slow": 9.0})
+        self.func_test_equals(str([11.0, 5.0, 9.0, 4.0]),
+                              str([dict_lengths[str_id] for str_id in ["one", "fast", "slow", "unknown"]]))
+
+    ########################
+    # func_get_order_keys
+    ########################
+    def test_func_get_order_keys_for_breadth(self):
+        """ The breadth policy keeps the breadth-wise order. """
+        cmd_one = Command.Command("one", ["in"], ["a"])
+        cmd_two = Command.Command("two", ["a"], ["b"])
+        cmd_three = Command.Command("three", ["in"], ["c"])
+        lcmd_ordered = DependencyTree.DependencyTree([cmd_one, cmd_two, cmd_three]).func_get_commands()
+        schd_cur = Scheduler.LocalScheduler(i_cores=2, str_priority=Scheduler.STR_PRIORITY_BREADTH)
+        dict_keys = schd_cur.func_get_order_keys(lcmd_ordered)
+        self.func_test_equals(str([cmd_cur.str_id for cmd_cur in lcmd_ordered]),
+                              str(sorted(dict_keys, key=dict_keys.get)))
+
+    def test_func_get_order_keys_for_critical_path(self):
+        """ The command starting the longest chain comes first. """
+        cmd_one = Command.Command("one", ["in"], ["a"])
+        cmd_two = Command.Command("two", ["a"], ["b"])
+        lcmd_short = [Command.Command("short_" + str(i_index), ["in"], ["s" + str(i_index)]) for i_index in range(5)]
+        lcmd_ordered = DependencyTree.DependencyTree(lcmd_short + [cmd_one, cmd_two]).func_get_commands()
+        schd_cur = Scheduler.LocalScheduler(i_cores=2)
+        dict_keys = schd_cur.func_get_order_keys(lcmd_ordered)
+        self.func_test_equals("one", min(dict_keys, key=dict_keys.get))
+
+    def test_func_get_order_keys_for_makespan(self):
+        """
+        On a small wide and deep DAG the critical path order finishes before the
+        breadth-wise order (simulated makespan), at the longest chain.
+        """
+        dt_tree, dict_runtimes = self.func_make_wide_and_deep_tree(2, 4, 12)
+        lcmd_ordered = dt_tree.func_get_commands()
+        schd_breadth = Scheduler.LocalScheduler(i_cores=3, str_priority=Scheduler.STR_PRIORITY_BREADTH)
+        schd_critical = Scheduler.LocalScheduler(i_cores=3, dict_runtimes=dict_runtimes)
+        d_breadth = self.func_simulate_makespan(lcmd_ordered, schd_breadth.func_get_order_keys(lcmd_ordered),
+                                                dict_runtimes, 3)
+        d_critical = self.func_simulate_makespan(lcmd_ordered, schd_critical.func_get_order_keys(lcmd_ordered),
+                                                 dict_runtimes, 3)
+        self.func_test_true(d_critical < d_breadth and d_critical == 4 * 5.0)
+
+    ########################
+    # func_get_request
+    ########################
+    def test_func_get_request_for_default_command(self):
+        """ A command without declared resources needs 1 core and no memory. """
+        schd_cur = Scheduler.LocalScheduler(i_cores=4, d_memory=10)
+        self.func_test_equals(str((1, 0.0)), str(schd_cur.func_get_request(self.func_make_command("1"))))
+
+    def test_func_get_request_for_too_large_command(self):
+        """ A command larger than the budget is limited to the budget. """
+        schd_cur = Scheduler.LocalScheduler(i_cores=4, d_memory=10)
+        cmd_cur = self.func_make_command("1", i_cores=8, d_memory=32)
+        self.func_test_equals(str((4, 10.0)), str(schd_cur.func_get_request(cmd_cur)))
+
+    ########################
+    # func_admit / func_release
+    ########################
+    def test_func_admit_for_cores(self):
+        """ Commands are admitted until the cores are used. """
+        schd_cur = Scheduler.LocalScheduler(i_cores=4, d_memory=10)
+        lf_admitted = [schd_cur.func_admit(self.func_make_command(str(i_index), i_cores=2))
+                       for i_index in range(3)]
+        self.func_test_equals(str([True, True, False]), str(lf_admitted))
+
+    def test_func_admit_for_memory(self):
+        """ Two commands which would use more memory than the budget do not run together. """
+        schd_cur = Scheduler.LocalScheduler(i_cores=8, d_memory=40)
+        cmd_star_1 = self.func_make_command("1", i_cores=2, d_memory=32)
+        cmd_star_2 = self.func_make_command("2", i_cores=2, d_memory=32)
+        cmd_small = self.func_make_command("3", i_cores=1, d_memory=4)
+        lf_admitted = [schd_cur.func_admit(cmd_star_1),
+                       schd_cur.func_admit(cmd_star_2),
+                       schd_cur.func_admit(cmd_small)]
+        self.func_test_equals(str([True, False, True]), str(lf_admitted))
+
+    def test_func_admit_for_too_large_command_alone(self):
+        """ A command larger than the budget runs when nothing else runs. """
+        schd_cur = Scheduler.LocalScheduler(i_cores=2, d_memory=4)
+        self.func_test_true(schd_cur.func_admit(self.func_make_command("1", i_cores=16, d_memory=64)))
+
+    def test_func_release(self):
+        """ Releasing a command frees its resources for the next. """
+        schd_cur = Scheduler.LocalScheduler(i_cores=8, d_memory=40)
+        cmd_star_1 = self.func_make_command("1", i_cores=2, d_memory=32)
+        cmd_star_2 = self.func_make_command("2", i_cores=2, d_memory=32)
+        schd_cur.func_admit(cmd_star_1)
+        f_before = schd_cur.func_admit(cmd_star_2)
+        schd_cur.func_release(cmd_star_1)
+        f_after = schd_cur.func_admit(cmd_star_2)
+        self.func_test_true((not f_before) and f_after and schd_cur.i_cores_used == 2)
+
+    def test_func_get_memory_headroom(self):
+        """ Headroom is the memory not used by running commands. """
+        schd_cur = Scheduler.LocalScheduler(i_cores=8, d_memory=40)
+        schd_cur.func_admit(self.func_make_command("1", d_memory=12.5))
+        self.func_test_equals(27.5, schd_cur.func_get_memory_headroom())
+
+
+#Creates a suite of tests
+def suite():
+    """ Suite aggregates tests and is used to run tests. """
+    return unittest.TestLoader().loadTestsFromTestCase(SchedulerTester)
@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+from multiprocessing.pool import ThreadPool
+import os
+import stat
+
+"""
+Answers existence, type and time stamp questions about paths from one listing
+of their directory instead of a call to the file system for each question.
+Meant to be used for one pass over the commands (eg. checking which commands
+need to run) and cleared whenever the pipeline or a command may change files.
+"""
+
+__author__ = "Timothy Tickle"
+__copyright__ = "Copyright 2016"
+__credits__ = ["Timothy Tickle", "Brian Haas"]
+__license__ = "MIT"
+__maintainer__ = "Timothy Tickle"
+__email__ = "ttickle@broadinstitute.org"
+__status__ = "Development"
+
+
+# Tested
+def func_list_names(str_directory):
+    """
+    Names in a directory, None if the directory can not be listed.
+    """
+
+    try:
+        return(set(os.listdir(str_directory)))
+    except OSError:
+        return(None)
+
+
+# Tested
+def func_stat(str_path):
+    """
+    Stat of a path (following links), None if the path does not exist.
+    """
+
+    try:
+        return(os.stat(str_path))
+    except OSError:
+        return(None)
+
+
+class StatCache:
+    """
+    Cache of directory listings and stats.
+    A directory is listed the first time a path in it is asked about, afterwards
+    existence for every entry is answered from the listing. Stats (time stamps,
+    types) are read once per path.
+    """
+
+    # Tested
+    def __init__(self):
+        self.dict_listings = {}
+        """ Entries of each listed directory { directory: set of names }, None for a directory which does not exist. """
+
+        self.dict_stats = {}
+        """ Stat of each path asked about { path: stat }, None for a path which does not exist. """
+
+        self.i_listings = 0
+        """ Number of directories listed, used to report how much the cache saved. """
+
+        self.i_stats = 0
+        """ Number of paths stat-ed. """
+
+    # Tested
+    def func_clear(self):
+        """
+        Forget everything, used after files may have changed.
+        """
+
+        self.dict_listings = {}
+        self.dict_stats = {}
+
+    # Tested
+    def func_forget(self, lstr_paths):
+        """
+        Forget the paths and the listings of the directories they are in,
+        used when only these paths may have changed.
+
+        * lstr_paths : Paths
+                     : List of strings
+        """
+
+        for str_path in lstr_paths:
+            str_path = os.path.abspath(str_path)
+            self.dict_stats.pop(str_path, None)
+            self.dict_listings.pop(str_path, None)
+            self.dict_listings.pop(os.path.dirname(str_path), None)
+
+    def func_list_directory(self, str_directory):
+        """
+        Names in a directory, listed once.
+
+        * str_directory : Absolute path of the directory
+                        : String
+        * return : Names in the directory, None if the directory does not exist.
+                 : Set of strings or None
+        """
+
+        if str_directory in self.dict_listings:
+            return(self.dict_listings[str_directory])
+        self.i_listings += 1
+        sstr_names = func_list_names(str_directory)
+        self.dict_listings[str_directory] = sstr_names
+        return(sstr_names)
+
+    # Tested
+    def func_is_listed(self, str_path):
+        """
+        Replaces os.path.lexists, answered from the listing of the path's directory.
+        """
+
+        str_path = os.path.abspath(str_path)
+        str_directory, str_name = os.path.split(str_path)
+        if not str_name:
+            return(os.path.lexists(str_path))
+        sstr_names = self.func_list_directory(str_directory)
+        return(bool(sstr_names) and (str_name in sstr_names))
+
+    # Tested
+    def func_exists(self, str_path):
+        """
+        Replaces os.path.exists. Paths missing from the listing of their directory
+        do not exist, listed paths are stat-ed once so a broken link does not exist.
+        """
+
+        return(not self.func_get_stat(str_path) is None)
+
+    def func_get_stat(self, str_path):
+        """
+        Stat of a path, read once.
+
+        * str_path : Path
+                   : String
+        * return : Stat (following links) or None if the path does not exist.
+        """
+
+        str_path = os.path.abspath(str_path)
+        if str_path in self.dict_stats:
+            return(self.dict_stats[str_path])
+        stat_path = None
+        if self.func_is_listed(str_path):
+            self.i_stats += 1
+            stat_path = func_stat(str_path)
+        self.dict_stats[str_path] = stat_path
+        return(stat_path)
+
+    # Tested
+    def func_get_mtime(self, str_path):
+        """
+        Replaces os.path.getmtime.
+        Raises OSError if the path does not exist, as os.path.getmtime does.
+        """
+
+        stat_path = self.func_get_stat(str_path)
+        if stat_path is None:
+            raise OSError(2, "No such file or directory", str_path)
+        return(stat_path.st_mtime)
+
+    # Tested
+    def func_is_dir(self, str_path):
+        """
+        Replaces os.path.isdir.
+        """
+
+        stat_path = self.func_get_stat(str_path)
+        return((not stat_path is None) and stat.S_ISDIR(stat_path.st_mode))
+
+    # Tested
+    def func_is_file(self, str_path):
+        """
+        Replaces os.path.isfile.
+        """
+
+        stat_path = self.func_get_stat(str_path)
+        return((not stat_path is None) and stat.S_ISREG(stat_path.st_mode))
+
+    # Tested
+    def func_is_empty_dir(self, str_path):
+        """
+        True indicates the path is a directory with nothing in it.
+        """
+
+        if not self.func_is_dir(str_path):
+            return(False)
+        sstr_names = self.func_list_directory(os.path.abspath(str_path))
+        return((not sstr_names is None) and (len(sstr_names) == 0))
+
+    # Tested
+    def func_prime(self, lstr_paths, i_threads=1):
+        """
+        Reads what is needed to answer questions about many paths at once, using threads
+        so the waits on the file system (eg. network storage) overlap.
+        The directories of the paths are listed, then the paths which exist are stat-ed.
+        The cache itself is only updated in the calling thread.
+
+        * lstr_paths : Paths which will be asked about
+                     : List of strings
+        * i_threads : Number of threads reading from the file system
+                    : Int
+        """
+
+        lstr_paths = list(set([os.path.abspath(str_path) for str_path in lstr_paths]))
+        pool_cur = ThreadPool(i_threads) if i_threads > 1 else None
+        func_map = pool_cur.map if pool_cur else map
+        try:
+            lstr_directories = list(set([os.path.dirname(str_path) for str_path in lstr_paths]) - set(self.dict_listings))
+            for str_directory, sstr_names in zip(lstr_directories, func_map(func_list_names, lstr_directories)):
+                self.dict_listings[str_directory] = sstr_names
+            self.i_listings += len(lstr_directories)
+            lstr_stat = [str_path for str_path in lstr_paths
+                         if (not str_path in self.dict_stats) and self.func_is_listed(str_path)]
+            for str_path, stat_path in zip(lstr_stat, func_map(func_stat, lstr_stat)):
+                self.dict_stats[str_path] = stat_path
+            self.i_stats += len(lstr_stat)
+        finally:
+            if pool_cur:
+                pool_cur.close()
+                pool_cur.join()
+
+    def __str__(self):
+        return(" ".join(["StatCache{ Directories listed:", str(self.i_listings),
+                         "Paths stat-ed:", str(self.i_stats), "}"]))
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+import os
+import ParentPipelineTester
+import StatCache
+import unittest
+
+
+"""
+Tests the StatCache module.
+"""
+
+
+__author__ = "Timothy Tickle"
+__copyright__ = "Copyright 2016"
+__credits__ = ["Timothy Tickle", "Brian Haas"]
+__license__ = "MIT"
+__maintainer__ = "Timothy Tickle"
+__email__ = "ttickle@broadinstitute.org"
+__status__ = "Development"
+
+
+class StatCacheTester(ParentPipelineTester.ParentPipelineTester):
+    """
+    Tests answering questions about paths from cached listings and stats.
+    """
+
+    ########################
+    # func_exists
+    ########################
+    def test_func_exists_for_one_listing(self):
+        """ All paths in a directory are answered from one listing, only paths in it are stat-ed. """
+        str_env = os.path.join(self.str_test_directory, "test_func_exists_for_one_listing")
+        lstr_files = [os.path.join(str_env, "file_" + str(i_index) + ".txt") for i_index in range(5)]
+        self.func_make_dummy_dir(str_env)
+        self.func_make_dummy_files(lstr_files)
+        stc_cur = StatCache.StatCache()
+        f_result = all([stc_cur.func_exists(str_file) for str_file in lstr_files])
+        f_missing = stc_cur.func_exists(os.path.join(str_env, "missing.txt"))
+        self.func_remove_files(lstr_files)
+        self.func_remove_dirs([str_env])
+        self.func_test_true(f_result and not f_missing and stc_cur.i_listings == 1 and stc_cur.i_stats == 5)
+
+    def test_func_exists_for_broken_link(self):
+        """ A link to a path which does not exist is listed but does not exist, as with os.path.exists. """
+        str_env = os.path.join(self.str_test_directory, "test_func_exists_for_broken_link")
+        str_link = os.path.join(str_env, "link.txt")
+        self.func_make_dummy_dir(str_env)
+        os.symlink(os.path.join(str_env, "missing.txt"), str_link)
+        stc_cur = StatCache.StatCache()
+        f_listed = stc_cur.func_is_listed(str_link)
+        f_exists = stc_cur.func_exists(str_link)
+        f_answer = os.path.exists(str_link)
+        os.remove(str_link)
+        self.func_remove_dirs([str_env])
+        self.func_test_true(f_listed and not f_exists and not f_answer)
+
+    def test_func_exists_for_missing_directory(self):
+        """ Paths in a directory which does not exist do not exist. """
+        stc_cur = StatCache.StatCache()
+        str_path = os.path.join(self.str_test_directory, "test_func_exists_for_missing_directory", "file.txt")
+        self.func_test_true(not stc_cur.func_exists(str_path))
+
+    def test_func_exists_for_cached_answer(self):
+        """ Files made after a directory is listed are not seen until forgotten. """
+        str_env = os.path.join(self.str_test_directory, "test_func_exists_for_cached_answer")
+        str_file = os.path.join(str_env, "file.txt")
+        self.func_make_dummy_dir(str_env)
+        stc_cur = StatCache.StatCache()
+        f_before = stc_cur.func_exists(str_file)
+        self.func_make_dummy_file(str_file)
+        f_cached = stc_cur.func_exists(str_file)
+        stc_cur.func_forget([str_file])
+        f_forgotten = stc_cur.func_exists(str_file)
+        self.func_remove_files([str_file])
+        f_still = stc_cur.func_exists(str_file)
+        stc_cur.func_clear()
+        f_cleared = stc_cur.func_exists(str_file)
+        self.func_remove_dirs([str_env])
+        self.func_test_true(not f_before and not f_cached and f_forgotten and f_still and not f_cleared)
+
+    ########################
+    # func_get_mtime, func_is_dir, func_is_file, func_is_empty_dir
+    ########################
+    def test_func_get_mtime(self):
+        """ The time stamp matches os.path.getmtime and is read once. """
+        str_env = os.path.join(self.str_test_directory, "test_func_get_mtime")
+        str_file = os.path.join(str_env, "file.txt")
+        self.func_make_dummy_dir(str_env)
+        self.func_make_dummy_file(str_file)
+        stc_cur = StatCache.StatCache()
+        d_first = stc_cur.func_get_mtime(str_file)
+        d_second = stc_cur.func_get_mtime(str_file)
+        d_answer = os.path.getmtime(str_file)
+        self.func_remove_files([str_file])
+        self.func_remove_dirs([str_env])
+        self.func_test_true(d_first == d_answer and d_second == d_answer and stc_cur.i_stats == 1)
+
+    def test_func_get_mtime_for_missing_path(self):
+        """ A missing path raises an OSError like os.path.getmtime. """
+        stc_cur = StatCache.StatCache()
+        try:
+            stc_cur.func_get_mtime(os.path.join(self.str_test_directory, "test_func_get_mtime_for_missing_path"))
+            f_raised = False
+        except OSError:
+            f_raised = True
+        self.func_test_true(f_raised)
+
+    def test_func_is_dir_and_file(self):
+        """ Directories and files are told apart. """
+        str_env = os.path.join(self.str_test_directory, "test_func_is_dir_and_file")
+        str_file = os.path.join(str_env, "file.txt")
+        self.func_make_dummy_dir(str_env)
+        self.func_make_dummy_file(str_file)
+        stc_cur = StatCache.StatCache()
+        f_result = (stc_cur.func_is_dir(str_env) and not stc_cur.func_is_file(str_env) and
+                    stc_cur.func_is_file(str_file) and not stc_cur.func_is_dir(str_file) and
+                    not stc_cur.func_is_file(os.path.join(str_env, "missing.txt")))
+        self.func_remove_files([str_file])
+        self.func_remove_dirs([str_env])
+        self.func_test_true(f_result)
+
+    def test_func_is_empty_dir(self):
+        """ Only a directory with nothing in it is empty. """
+        str_env = os.path.join(self.str_test_directory, "test_func_is_empty_dir")
+        str_empty = os.path.join(str_env, "empty")
+        str_file = os.path.join(str_env, "file.txt")
+        self.func_make_dummy_dirs([str_env, str_empty])
+        self.func_make_dummy_file(str_file)
+        stc_cur = StatCache.StatCache()
+        f_result = (stc_cur.func_is_empty_dir(str_empty) and not stc_cur.func_is_empty_dir(str_env) and
+                    not stc_cur.func_is_empty_dir(str_file))
+        self.func_remove_files([str_file])
+        self.func_remove_dirs([str_empty, str_env])
+        self.func_test_true(f_result)
+
+    ########################
+    # func_prime
+    ########################
+    def test_func_prime(self):
+        """ Priming lists each directory once and stats the paths which exist, later questions are answered from the cache. """
+        str_env = os.path.join(self.str_test_directory, "test_func_prime")
+        str_sub = os.path.join(str_env, "sub")
+        lstr_files = [os.path.join(str_env, "file_1.txt"), os.path.join(str_env, "file_2.txt"), os.path.join(str_sub, "file_3.txt")]
+        str_missing = os.path.join(str_env, "missing.txt")
+        self.func_make_dummy_dirs([str_env, str_sub])
+        self.func_make_dummy_files(lstr_files)
+        stc_cur = StatCache.StatCache()
+        stc_cur.func_prime(lstr_files + [str_missing], i_threads = 4)
+        i_listings = stc_cur.i_listings
+        i_stats = stc_cur.i_stats
+        f_result = all([stc_cur.func_exists(str_file) and stc_cur.func_is_file(str_file) for str_file in lstr_files])
+        f_result = f_result and not stc_cur.func_exists(str_missing)
+        self.func_remove_files(lstr_files)
+        self.func_remove_dirs([str_sub, str_env])
+        self.func_test_true(f_result and i_listings == 2 and i_stats == 3 and
+                            stc_cur.i_listings == 2 and stc_cur.i_stats == 3)
+
+
+#Creates a suite of tests
+def suite():
+    """ Suite aggregates tests and is used to run tests. """
+    return unittest.TestLoader().loadTestsFromTestCase(StatCacheTester)
@@ -21,18 +21,32 @@ __status__="Development"
 
 import ArgumentsTester
 import BenchmarkingTester
+import CommandEngineTester
 import CommandlineTester
 import CommandTester
 import CompressionTester
 import ConfigManagerTester
 import DependencyGraphTester
 import DependencyTreeTester
+import FileWatcherTester
+import FingerprintTester
 ##import Dispatcher
 #import FunctionalTester
 import GraphTester
+import JobExecutorTester
+import JobLedgerTester
 import JSONManagerTester
+import MetricsTester
+import OutputCacheTester
+import PipelineObserverTester
 import PipelineTester
+import QueueLoggingTester
+import RunManifestTester
 import ResourceTester
+import ResourceHistoryTester
+import SchedulerTester
+import StatCacheTester
+import TraceTester
 import unittest
 
 
@@ -40,18 +54,32 @@ import unittest
 suite=unittest.TestSuite()
 suite.addTest(ArgumentsTester.suite())
 suite.addTest(BenchmarkingTester.suite())
+suite.addTest(CommandEngineTester.suite())
 suite.addTest(CommandlineTester.suite())
 suite.addTest(CommandTester.suite()) # Running
 suite.addTest(CompressionTester.suite())
 suite.addTest(ConfigManagerTester.suite()) # 1 methods but ok for now.
 suite.addTest(DependencyGraphTester.suite())
 suite.addTest(DependencyTreeTester.suite())
+suite.addTest(FileWatcherTester.suite())
+suite.addTest(FingerprintTester.suite())
 ##suite.addTest(DispatcherTester.suite()) # 5 methods, local works
 #suite.addTest(FunctionalTester.suite()) # 3 methods but ok for now
 suite.addTest(GraphTester.suite())
+suite.addTest(JobExecutorTester.suite())
+suite.addTest(JobLedgerTester.suite())
 suite.addTest(JSONManagerTester.suite()) # 1 method, push Read JSON to parent script. Fix sort.
+suite.addTest(MetricsTester.suite())
+suite.addTest(OutputCacheTester.suite())
+suite.addTest(PipelineObserverTester.suite())
 suite.addTest(PipelineTester.suite())
+suite.addTest(QueueLoggingTester.suite())
 suite.addTest(ResourceTester.suite())
+suite.addTest(ResourceHistoryTester.suite())
+suite.addTest(RunManifestTester.suite())
+suite.addTest(SchedulerTester.suite())
+suite.addTest(StatCacheTester.suite())
+suite.addTest(TraceTester.suite())
 
 runner = unittest.TextTestRunner()
 runner.run(suite)
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+import json
+import os
+import threading
+import time
+
+"""
+Records where the wall time of a pipeline run goes as spans ( building the
+dependency tree, checking which commands need to run, running each command,
+waiting for products, writing ok files, cleaning, compressing, copying and
+moving ) and writes them as a Chrome Trace Event file which loads in
+chrome://tracing or Perfetto ( https://ui.perfetto.dev ).
+Work done by the pipeline itself is on one track, each command running at
+the same time is on the track of the slot it ran in.
+"""
+
+__author__ = "Timothy Tickle"
+__copyright__ = "Copyright 2016"
+__credits__ = ["Timothy Tickle", "Brian Haas"]
+__license__ = "MIT"
+__maintainer__ = "Timothy Tickle"
+__email__ = "ttickle@broadinstitute.org"
+__status__ = "Development"
+
+
+# Categories of spans
+C_STR_CATEGORY_PIPELINE = "pipeline"
+C_STR_CATEGORY_COMMAND = "command"
+C_STR_CATEGORY_WAIT = "wait"
+C_STR_CATEGORY_FILES = "files"
+
+# Names of spans
+C_STR_SPAN_DAG = "build dependency tree"
+C_STR_SPAN_PLAN = "check validity"
+C_STR_SPAN_PRODUCT_WAIT = "wait for products"
+C_STR_SPAN_OK_FILES = "write ok files"
+C_STR_SPAN_MANIFEST = "record run manifest"
+C_STR_SPAN_CLEAN = "clean"
+C_STR_SPAN_REMOVE_PRODUCTS = "remove products"
+C_STR_SPAN_COMPRESS = "compress"
+C_STR_SPAN_COPY = "copy"
+C_STR_SPAN_MOVE = "move"
+
+# Track of the work done by the pipeline, commands are on tracks from 1
+I_TRACK_PIPELINE = 0
+C_STR_TRACK_PIPELINE = "pipeline"
+C_STR_TRACK_SLOT = "command slot "
+
+
+class NoSpan:
+    """
+    Span used when nothing is traced, does nothing.
+    """
+
+    def __enter__(self):
+        return(self)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return(False)
+
+
+c_span_none = NoSpan()
+
+
+class Span:
+    """
+    Span recorded when it ends, used with "with".
+    """
+
+    def __init__(self, trc_cur, str_name, str_category, i_track, dict_args):
+        self.trc_cur = trc_cur
+        self.str_name = str_name
+        self.str_category = str_category
+        self.i_track = i_track
+        self.dict_args = dict_args
+        self.d_start = None
+
+    def __enter__(self):
+        self.d_start = time.time()
+        return(self)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.trc_cur.func_add_span(self.str_name, self.str_category, self.d_start,
+                                   i_track=self.i_track, dict_args=self.dict_args)
+        return(False)
+
+
+# Tested
+def func_span(trc_cur, str_name, str_category=C_STR_CATEGORY_PIPELINE, i_track=I_TRACK_PIPELINE, dict_args=None):
+    """
+    Span of the code in a "with" block. When not tracing ( trc_cur is None )
+    nothing is measured, so spans can be left in place at no cost.
+
+    * trc_cur : Recorder of the run, None when not tracing.
+              : TraceRecorder or None
+    * str_name : Name of the span.
+               : String
+    * str_category : Category of the span.
+                   : String
+    * i_track : Track of the span.
+              : Integer
+    * dict_args : Details shown with the span.
+                : Dict or None
+    * return : Context manager
+    """
+
+    if trc_cur is None:
+        return(c_span_none)
+    return(Span(trc_cur, str_name, str_category, i_track, dict_args))
+
+
+class TraceRecorder:
+    """
+    Spans of a run, added from any thread.
+    """
+
+    # Tested
+    def __init__(self, str_name=None):
+        """
+        Initializer, times of spans are relative to when the recorder is made.
+
+        * str_name : Name of the run, shown as the process.
+                   : String or None
+        """
+
+        self.str_name = str_name if str_name else "sciedpiper"
+        """ Name of the run. """
+
+        self.d_origin = time.time()
+        """ Time spans are relative to. """
+
+        self.i_pid = os.getpid()
+        """ Process the spans are in. """
+
+        self.ldict_events = []
+        """ Trace events of the spans recorded. """
+
+        self.dict_tracks = {I_TRACK_PIPELINE: C_STR_TRACK_PIPELINE}
+        """ { track: name } of the tracks used. """
+
+        self.__lock = threading.Lock()
+
+    # Tested
+    def func_add_span(self, str_name, str_category, d_start, d_end=None, i_track=I_TRACK_PIPELINE, dict_args=None):
+        """
+        Records a span which already ended.
+
+        * d_start : Time the span started ( time.time() ).
+                  : Float
+        * d_end : Time the span ended, None is now.
+                : Float or None
+        """
+
+        d_end = time.time() if d_end is None else d_end
+        dict_event = {"name": str_name, "cat": str_category, "ph": "X",
+                      "ts": int(round((d_start - self.d_origin) * 1000000)),
+                      "dur": max(int(round((d_end - d_start) * 1000000)), 0),
+                      "pid": self.i_pid, "tid": i_track}
+        if dict_args:
+            dict_event["args"] = dict_args
+        with self.__lock:
+            self.ldict_events.append(dict_event)
+            if i_track not in self.dict_tracks:
+                self.dict_tracks[i_track] = C_STR_TRACK_SLOT + str(i_track)
+
+    # Tested
+    def func_get_events(self):
+        """
+        Trace events of the run, the names of the process and tracks followed by the spans.
+
+        * return : Trace events
+                 : List of dicts
+        """
+
+        with self.__lock:
+            ldict_spans = list(self.ldict_events)
+            dict_tracks = dict(self.dict_tracks)
+        ldict_names = [{"name": "process_name", "ph": "M", "pid": self.i_pid, "tid": I_TRACK_PIPELINE,
+                        "args": {"name": self.str_name}}]
+        for i_track in sorted(dict_tracks):
+            ldict_names.append({"name": "thread_name", "ph": "M", "pid": self.i_pid, "tid": i_track,
+                                "args": {"name": dict_tracks[i_track]}})
+            ldict_names.append({"name": "thread_sort_index", "ph": "M", "pid": self.i_pid, "tid": i_track,
+                                "args": {"sort_index": i_track}})
+        return(ldict_names + sorted(ldict_spans, key=lambda dict_span: dict_span["ts"]))
+
+    # Tested
+    def func_write(self, str_file):
+        """
+        Writes the trace as Chrome Trace Event JSON.
+
+        * str_file : File to write.
+                   : String
+        """
+
+        with open(str_file, "w") as hndl_trace:
+            json.dump({"traceEvents": self.func_get_events(), "displayTimeUnit": "ms"}, hndl_trace)
+
+    def __str__(self):
+        return("TraceRecorder{ Spans: " + str(len(self.ldict_events)) +
+               " Tracks: " + str(len(self.dict_tracks)) + " }")
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+import json
+import os
+import ParentPipelineTester
+import Trace
+import unittest
+
+
+"""
+Tests the Trace module.
+"""
+
+
+__author__ = "Timothy Tickle"
+__copyright__ = "Copyright 2016"
+__credits__ = ["Timothy Tickle", "Brian Haas"]
+__license__ = "MIT"
+__maintainer__ = "Timothy Tickle"
+__email__ = "ttickle@broadinstitute.org"
+__status__ = "Development"
+
+
+class TraceTester(ParentPipelineTester.ParentPipelineTester):
+    """
+    Tests recording the timeline of a run.
+    """
+
+    ########################
+    # func_span
+    ########################
+    def test_func_span_for_no_recorder(self):
+        """ Without a recorder nothing is recorded. """
+        with Trace.func_span(None, "span") as span_cur:
+            pass
+        self.func_test_true(span_cur is Trace.c_span_none)
+
+    def test_func_span(self):
+        """ A span covers the code in the with block. """
+        trc_cur = Trace.TraceRecorder("run")
+        with Trace.func_span(trc_cur, "span", Trace.C_STR_CATEGORY_FILES, i_track=2, dict_args={"path": "a"}):
+            pass
+        dict_span = trc_cur.ldict_events[0]
+        self.func_test_true(len(trc_cur.ldict_events) == 1 and dict_span["name"] == "span" and
+                            dict_span["cat"] == Trace.C_STR_CATEGORY_FILES and dict_span["ph"] == "X" and
+                            dict_span["tid"] == 2 and dict_span["args"] == {"path": "a"} and
+                            dict_span["ts"] >= 0 and dict_span["dur"] >= 0)
+
+    ########################
+    # func_add_span
+    ########################
+    def test_func_add_span(self):
+        """ Times are microseconds from when the recorder was made. """
+        trc_cur = Trace.TraceRecorder("run")
+        trc_cur.func_add_span("span", Trace.C_STR_CATEGORY_COMMAND, trc_cur.d_origin + 1.5, trc_cur.d_origin + 2.0)
+        self.func_test_equals([1500000, 500000], [trc_cur.ldict_events[0]["ts"], trc_cur.ldict_events[0]["dur"]])
+
+    ########################
+    # func_get_events
+    ########################
+    def test_func_get_events(self):
+        """ The process and each track used are named before the spans, which are in time order. """
+        trc_cur = Trace.TraceRecorder("run")
+        trc_cur.func_add_span("second", Trace.C_STR_CATEGORY_COMMAND, trc_cur.d_origin + 2, i_track=1)
+        trc_cur.func_add_span("first", Trace.C_STR_CATEGORY_PIPELINE, trc_cur.d_origin + 1)
+        ldict_events = trc_cur.func_get_events()
+        self.func_test_true([dict_event["name"] for dict_event in ldict_events] ==
+                            ["process_name", "thread_name", "thread_sort_index", "thread_name", "thread_sort_index", "first", "second"] and
+                            [dict_event["args"]["name"] for dict_event in ldict_events if dict_event["name"] == "thread_name"] ==
+                            ["pipeline", "command slot 1"])
+
+    ########################
+    # func_write
+    ########################
+    def test_func_write(self):
+        """ The trace is written as a Chrome Trace Event JSON object. """
+        str_env = os.path.join(self.str_test_directory, "test_func_write")
+        self.func_make_dummy_dir(str_env)
+        str_trace = os.path.join(str_env, "trace.json")
+        trc_cur = Trace.TraceRecorder("run")
+        trc_cur.func_add_span("span", Trace.C_STR_CATEGORY_PIPELINE, trc_cur.d_origin)
+        trc_cur.func_write(str_trace)
+        with open(str_trace) as hndl_trace:
+            dict_trace = json.load(hndl_trace)
+        self.func_remove_files([str_trace])
+        self.func_remove_dirs([str_env])
+        self.func_test_true(dict_trace["traceEvents"] == trc_cur.func_get_events())
+
+
+#Creates a suite of tests
+def suite():
+    """ Suite aggregates tests and is used to run tests. """
+    return unittest.TestLoader().loadTestsFromTestCase(TraceTester)
@@ -0,0 +1,48 @@
+__author__ = "Timothy Tickle"
+__copyright__ = "Copyright 2016"
+__credits__ = [ "Timothy Tickle", "Brian Haas" ]
+__license__ = "MIT"
+__maintainer__ = "Timothy Tickle"
+__email__ = "ttickle@broadinstitute.org"
+__status__ = "Development"
+
+"""
+Measures the time building a dependency tree takes as the number of commands
+grows. Commands are like a per-sample per-chromosome pipeline: chains of 4
+steps which start at a shared reference. The time per command should not grow
+with the size of the tree.
+"""
+
+import argparse
+import Command
+import DependencyTree
+import os
+import time
+
+
+def func_make_sample_chromosome_commands( str_env, i_commands ):
+    """
+    Commands like a per-sample per-chromosome pipeline, chains of 4 steps which start at a shared reference.
+    """
+
+    lcmd_commands = []
+    for i_index in range( i_commands ):
+        str_chain = "sample_" + str( i_index // 4 )
+        str_in = ( os.path.join( str_env, "reference.fa" ) if not i_index % 4
+                   else os.path.join( str_env, str_chain + "_step_" + str( ( i_index % 4 ) - 1 ) ) )
+        lcmd_commands.append( Command.Command( "step " + str( i_index ), [ str_in ],
+                                               [ os.path.join( str_env, str_chain + "_step_" + str( i_index % 4 ) ) ] ) )
+    return( lcmd_commands )
+
+
+prsr_arguments = argparse.ArgumentParser( prog = "benchmark_dependency_tree.py", description = "Measures the time building dependency trees of growing numbers of commands takes.", conflict_handler="resolve", formatter_class = argparse.ArgumentDefaultsHelpFormatter )
+prsr_arguments.add_argument( "-c", "--commands", metavar = "Commands", dest = "str_commands", default = "1000,10000,100000", help = "Comma delimited numbers of commands in the trees built." )
+args_cur = prsr_arguments.parse_args()
+
+print( "\t".join( [ "Commands", "Built (s)", "Per command (us)" ] ) )
+for i_commands in [ int( str_commands ) for str_commands in args_cur.str_commands.split( "," ) ]:
+    lcmd_commands = func_make_sample_chromosome_commands( os.path.join( os.sep, "benchmark" ), i_commands )
+    d_start = time.time()
+    dt_tree = DependencyTree.DependencyTree( lcmd_commands )
+    d_built = time.time() - d_start
+    print( "\t".join( [ str( len( dt_tree.func_get_commands() ) ), "{:.3f}".format( d_built ), "{:.2f}".format( d_built * 1000000 / i_commands ) ] ) )
@@ -0,0 +1,58 @@
+__author__ = "Timothy Tickle"
+__copyright__ = "Copyright 2016"
+__credits__ = [ "Timothy Tickle", "Brian Haas" ]
+__license__ = "MIT"
+__maintainer__ = "Timothy Tickle"
+__email__ = "ttickle@broadinstitute.org"
+__status__ = "Development"
+
+"""
+Measures the time ordering the vertices of a graph takes as the graph grows.
+Graphs are layers of vertices where each vertex has two parents in the layer
+before. The time per vertex should not grow with the size of the graph, and
+ordering again without changing the graph uses the cached order.
+"""
+
+import argparse
+import Graph
+import time
+
+
+def func_make_layered_graph( i_vertices, i_width ):
+    """
+    Layers of vertices where each vertex has two parents in the layer before.
+    """
+
+    cur_graph = Graph.Graph()
+    lvtx_previous = []
+    lvtx_layer = []
+    for i_index in range( i_vertices ):
+        vtx_cur = Graph.Vertex( i_index + 1 )
+        if lvtx_previous:
+            cur_graph.func_add_edge( lvtx_previous[ i_index % len( lvtx_previous ) ], vtx_cur )
+            cur_graph.func_add_edge( lvtx_previous[ ( i_index + 1 ) % len( lvtx_previous ) ], vtx_cur )
+        else:
+            cur_graph.func_add_vertex( vtx_cur )
+        lvtx_layer.append( vtx_cur )
+        if len( lvtx_layer ) == i_width:
+            lvtx_previous = lvtx_layer
+            lvtx_layer = []
+    return( cur_graph )
+
+
+prsr_arguments = argparse.ArgumentParser( prog = "benchmark_graph_order.py", description = "Measures the time ordering the vertices of growing graphs takes.", conflict_handler="resolve", formatter_class = argparse.ArgumentDefaultsHelpFormatter )
+prsr_arguments.add_argument( "-v", "--vertices", metavar = "Vertices", dest = "str_vertices", default = "1000,10000,100000", help = "Comma delimited sizes of the graphs ordered." )
+prsr_arguments.add_argument( "-w", "--width", metavar = "Width", type = int, dest = "i_width", default = 100, help = "Vertices in each layer of the graphs." )
+args_cur = prsr_arguments.parse_args()
+
+print( "\t".join( [ "Vertices", "Ordered (s)", "Per vertex (us)", "Cached (s)" ] ) )
+for i_vertices in [ int( str_vertices ) for str_vertices in args_cur.str_vertices.split( "," ) ]:
+    cur_graph = func_make_layered_graph( i_vertices, args_cur.i_width )
+    d_start = time.time()
+    i_visited = len( list( cur_graph ) )
+    d_ordered = time.time() - d_start
+    d_start = time.time()
+    list( cur_graph )
+    d_cached = time.time() - d_start
+    print( "\t".join( [ str( i_visited - 1 ), "{:.4f}".format( d_ordered ), "{:.2f}".format( d_ordered * 1000000 / i_vertices ),
+                        "{:.4f}".format( d_cached ) ] ) )
@@ -0,0 +1,71 @@
+__author__ = "Timothy Tickle"
+__copyright__ = "Copyright 2016"
+__credits__ = [ "Timothy Tickle", "Brian Haas" ]
+__license__ = "MIT"
+__maintainer__ = "Timothy Tickle"
+__email__ = "ttickle@broadinstitute.org"
+__status__ = "Development"
+
+"""
+Measures the time checking the dependencies of commands for cleaning takes as
+the dependency tree grows. Commands are a chain, each with the previous main
+product as the dependency and a main and side product ( 2 resources per
+command ). Dependencies are still needed so nothing is removed but every
+dependency is checked. The time per command should not grow with the size of
+the tree.
+"""
+
+import argparse
+import Command
+import DependencyTree
+import logging
+import os
+import Pipeline
+import shutil
+import tempfile
+import time
+
+
+def func_make_remove_paths_tree( str_env, i_commands ):
+    """
+    A chain of commands, each with the previous main product as the dependency and a main and side product.
+    Dependency files are made so they are checked for removal.
+    """
+
+    lcmd_commands = []
+    str_previous = os.path.join( str_env, "input.txt" )
+    for i_index in range( i_commands ):
+        str_main = os.path.join( str_env, "main_" + str( i_index ) + ".txt" )
+        str_side = os.path.join( str_env, "side_" + str( i_index ) + ".txt" )
+        lcmd_commands.append( Command.Command( "step " + str( i_index ), [ str_previous ], [ str_main, str_side ] ) )
+        str_previous = str_main
+    os.makedirs( str_env )
+    for cmd_cur in lcmd_commands:
+        with open( cmd_cur.lstr_dependencies[ 0 ].str_id, "w" ) as hndl_dependency:
+            hndl_dependency.write( "dependency" )
+    return( ( lcmd_commands, DependencyTree.DependencyTree( lcmd_commands ) ) )
+
+
+prsr_arguments = argparse.ArgumentParser( prog = "benchmark_remove_paths.py", description = "Measures the time checking dependencies for cleaning takes in growing dependency trees.", conflict_handler="resolve", formatter_class = argparse.ArgumentDefaultsHelpFormatter )
+prsr_arguments.add_argument( "-c", "--commands", metavar = "Commands", dest = "str_commands", default = "1000,10000", help = "Comma delimited numbers of commands in the chains checked." )
+args_cur = prsr_arguments.parse_args()
+
+str_tmp = tempfile.mkdtemp( prefix = "benchmark_remove_paths_" )
+try:
+    pline_cur = Pipeline.Pipeline( str_name = "benchmark_remove_paths", str_log_to_file = os.path.join( str_tmp, "benchmark.log" ) )
+    pline_cur.logr_logger.setLevel( logging.WARNING )
+    print( "\t".join( [ "Commands", "Resources", "Checked (s)", "Per command (ms)", "Removed" ] ) )
+    for i_commands in [ int( str_commands ) for str_commands in args_cur.str_commands.split( "," ) ]:
+        str_env = os.path.join( str_tmp, str( i_commands ) )
+        lcmd_commands, dt_tree = func_make_remove_paths_tree( str_env, i_commands )
+        d_start = time.time()
+        for cmd_cur in lcmd_commands:
+            pline_cur.func_remove_paths( cmd_command = cmd_cur, str_output_directory = str_env,
+                                         dt_dependency_tree = dt_tree, f_remove_products = False )
+        d_checked = time.time() - d_start
+        i_removed = len( [ cmd_cur for cmd_cur in lcmd_commands if not os.path.exists( cmd_cur.lstr_dependencies[ 0 ].str_id ) ] )
+        print( "\t".join( [ str( i_commands ), str( len( dt_tree.graph_commands ) - i_commands - 1 ), "{:.3f}".format( d_checked ),
+                            "{:.3f}".format( d_checked * 1000 / i_commands ), str( i_removed ) ] ) )
+        shutil.rmtree( str_env )
+finally:
+    shutil.rmtree( str_tmp )
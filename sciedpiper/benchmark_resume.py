@@ -0,0 +1,77 @@
+__author__ = "Timothy Tickle"
+__copyright__ = "Copyright 2016"
+__credits__ = [ "Timothy Tickle", "Brian Haas" ]
+__license__ = "MIT"
+__maintainer__ = "Timothy Tickle"
+__email__ = "ttickle@broadinstitute.org"
+__status__ = "Development"
+
+"""
+Measures checking and planning which commands need to run when resuming a
+pipeline whose commands are all from a valid run. Commands are a chain, each with the previous
+main product as the dependency and a main and side product, all with ok files.
+Reports the time of each and the file system calls made ( directories listed
+and paths stat-ed ), the output directory should be listed once and each path
+stat-ed at most once.
+"""
+
+import argparse
+import Command
+import DependencyTree
+import logging
+import os
+import Pipeline
+import shutil
+import tempfile
+import time
+
+
+def func_make_valid_chain( str_env, pline_cur, i_commands ):
+    """
+    A chain of commands, each with the previous main product as the dependency and a main and side product.
+    The input, products and ok files of the products are made.
+    """
+
+    lcmd_commands = []
+    str_previous = os.path.join( str_env, "input.txt" )
+    lstr_files = [ str_previous ]
+    for i_index in range( i_commands ):
+        str_main = os.path.join( str_env, "main_" + str( i_index ) + ".txt" )
+        str_side = os.path.join( str_env, "side_" + str( i_index ) + ".txt" )
+        lcmd_commands.append( Command.Command( "step " + str( i_index ), [ str_previous ], [ str_main, str_side ] ) )
+        lstr_files.extend( [ str_main, str_side, pline_cur.func_get_ok_file_path( str_main ), pline_cur.func_get_ok_file_path( str_side ) ] )
+        str_previous = str_main
+    os.makedirs( str_env )
+    for str_file in lstr_files:
+        with open( str_file, "w" ) as hndl_file:
+            hndl_file.write( "file" )
+    return( ( lcmd_commands, DependencyTree.DependencyTree( lcmd_commands ) ) )
+
+
+prsr_arguments = argparse.ArgumentParser( prog = "benchmark_resume.py", description = "Measures checking and planning which commands need to run when resuming a pipeline.", conflict_handler="resolve", formatter_class = argparse.ArgumentDefaultsHelpFormatter )
+prsr_arguments.add_argument( "-c", "--commands", metavar = "Commands", dest = "str_commands", default = "1000,10000", help = "Comma delimited numbers of commands in the chains checked and planned." )
+args_cur = prsr_arguments.parse_args()
+
+str_tmp = tempfile.mkdtemp( prefix = "benchmark_resume_" )
+try:
+    print( "\t".join( [ "Commands", "Checked (s)", "Listings", "Stats", "Valid", "Planned (s)", "To run" ] ) )
+    for i_commands in [ int( str_commands ) for str_commands in args_cur.str_commands.split( "," ) ]:
+        str_env = os.path.join( str_tmp, str( i_commands ) )
+        pline_cur = Pipeline.Pipeline( str_name = "benchmark_resume", str_log_to_file = os.path.join( str_tmp, "benchmark.log" ) )
+        pline_cur.logr_logger.setLevel( logging.WARNING )
+        lcmd_commands, dt_tree = func_make_valid_chain( str_env, pline_cur, i_commands )
+        d_start = time.time()
+        f_valid = all( [ pline_cur.func_paths_are_from_valid_run( cmd_cur, f_dependencies = False, dt_deps = dt_tree, i_fuzzy_time = 5 )
+                         for cmd_cur in lcmd_commands ] )
+        d_checked = time.time() - d_start
+        i_listings, i_stats = pline_cur.stc_paths.i_listings, pline_cur.stc_paths.i_stats
+        pline_plan = Pipeline.Pipeline( str_name = "benchmark_resume", str_log_to_file = os.path.join( str_tmp, "benchmark.log" ) )
+        pline_plan.logr_logger.setLevel( logging.WARNING )
+        d_start = time.time()
+        dict_plan = pline_plan.func_plan_commands( dt_tree, i_fuzzy_time = 5 )
+        d_planned = time.time() - d_start
+        print( "\t".join( [ str( i_commands ), "{:.3f}".format( d_checked ), str( i_listings ), str( i_stats ), str( f_valid ),
+                            "{:.3f}".format( d_planned ), str( len( [ f_run for f_run in dict_plan.values() if f_run ] ) ) ] ) )
+        shutil.rmtree( str_env )
+finally:
+    shutil.rmtree( str_tmp )
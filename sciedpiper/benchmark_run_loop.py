@@ -0,0 +1,108 @@
+__author__ = "Timothy Tickle"
+__copyright__ = "Copyright 2016"
+__credits__ = [ "Timothy Tickle", "Brian Haas" ]
+__license__ = "MIT"
+__maintainer__ = "Timothy Tickle"
+__email__ = "ttickle@broadinstitute.org"
+__status__ = "Development"
+
+"""
+Measures the time the pipeline spends around each command ( checking, logging,
+completing ) by running a chain of quick commands while logging to a file
+which is slow to write ( like a log on NFS ). Compares the log written
+synchronously with the per-file messages ( before ) to the log written from
+a buffer by a thread with the per-file messages at debug ( after ), relative
+to not logging at all.
+"""
+
+import argparse
+import Command
+import logging
+import os
+import Pipeline
+import QueueLogging
+import shutil
+import tempfile
+import time
+
+
+class SlowFileHandler( logging.FileHandler ):
+    """ Writes to a file, waiting after each record as slow storage would. """
+
+    def __init__( self, str_file, d_write_delay ):
+        logging.FileHandler.__init__( self, str_file, mode = "w" )
+        self.d_write_delay = d_write_delay
+
+    def emit( self, rec_log ):
+        logging.FileHandler.emit( self, rec_log )
+        time.sleep( self.d_write_delay )
+
+
+def func_time_run( str_dir, str_name, i_commands, d_write_delay, f_queue, i_level ):
+    """
+    Runs a chain of commands logging as requested.
+
+    * return : ( Seconds running the commands, seconds until the log was written, lines logged )
+             : Tuple
+    """
+
+    os.makedirs( str_dir )
+    str_log = os.path.join( str_dir, "run.log" )
+    str_previous = os.path.join( str_dir, "input.txt" )
+    with open( str_previous, "w" ) as hndl_input:
+        hndl_input.write( "input" )
+    lcmd_commands = []
+    for i_command in range( i_commands ):
+        str_product = os.path.join( str_dir, "product_" + str( i_command ) + ".txt" )
+        lcmd_commands.append( Command.Command( " ".join( [ "cat", str_previous, ">", str_product ] ), [ str_previous ], [ str_product ] ) )
+        str_previous = str_product
+
+    pline_cur = Pipeline.Pipeline( str_name = str_name, str_log_to_file = str_log )
+    for hndl_cur in list( pline_cur.logr_logger.handlers ):
+        pline_cur.logr_logger.removeHandler( hndl_cur )
+    hndl_file = SlowFileHandler( str_log, d_write_delay )
+    hndl_file.setFormatter( logging.Formatter( "%(asctime)s - %(name)s - %(levelname)s - %(message)s" ) )
+    hndl_log = QueueLogging.QueueHandler( hndl_file ) if f_queue else hndl_file
+    pline_cur.logr_logger.addHandler( hndl_log )
+    pline_cur.logr_logger.setLevel( i_level )
+
+    d_start = time.time()
+    pline_cur.func_run_commands( lcmd_commands, str_dir, li_wait = [ 0, 0, 0 ] )
+    d_run = time.time() - d_start
+    hndl_log.flush()
+    d_written = time.time() - d_start
+    pline_cur.logr_logger.removeHandler( hndl_log )
+    hndl_log.close()
+    with open( str_log ) as hndl_written:
+        i_lines = len( hndl_written.readlines() )
+    return( d_run, d_written, i_lines )
+
+
+prsr_arguments = argparse.ArgumentParser( prog = "benchmark_run_loop.py", description = "Measures the time the pipeline spends around each command with the log written synchronously and from a buffer.", conflict_handler="resolve", formatter_class = argparse.ArgumentDefaultsHelpFormatter )
+prsr_arguments.add_argument( "-c", "--commands", metavar = "Commands", type = int, dest = "i_commands", default = 100, help = "Commands in the chain ran." )
+prsr_arguments.add_argument( "-d", "--write_delay", metavar = "Seconds", type = float, dest = "d_write_delay", default = 0.002, help = "Seconds writing each log line takes, 0 for a local disk, a few milliseconds for NFS." )
+prsr_arguments.add_argument( "-r", "--repeat", metavar = "Repeat", type = int, dest = "i_repeat", default = 3, help = "Times each run is repeated, the fastest is reported." )
+args_cur = prsr_arguments.parse_args()
+
+# ( name, log from a buffer, level )
+ltpl_modes = [ ( "no log", False, logging.CRITICAL ),
+               ( "before: synchronous, per-file messages", False, logging.DEBUG ),
+               ( "after: buffered, summaries", True, logging.INFO ) ]
+
+str_tmp = tempfile.mkdtemp( prefix = "benchmark_run_loop_" )
+try:
+    dict_results = {}
+    for str_mode, f_queue, i_level in ltpl_modes:
+        ltpl_runs = [ func_time_run( os.path.join( str_tmp, str( len( dict_results ) ) + "_" + str( i_repeat ) ), "benchmark_" + str( i_level ) + "_" + str( i_repeat ),
+                                     args_cur.i_commands, args_cur.d_write_delay, f_queue, i_level )
+                      for i_repeat in range( args_cur.i_repeat ) ]
+        dict_results[ str_mode ] = min( ltpl_runs )
+    d_baseline = dict_results[ ltpl_modes[ 0 ][ 0 ] ][ 0 ]
+    print( " ".join( [ str( args_cur.i_commands ), "commands,", str( args_cur.d_write_delay ), "seconds to write each log line." ] ) )
+    print( "\t".join( [ "Mode", "Run (s)", "Overhead per command (ms)", "Log written (s)", "Log lines" ] ) )
+    for str_mode, f_queue, i_level in ltpl_modes:
+        d_run, d_written, i_lines = dict_results[ str_mode ]
+        print( "\t".join( [ str_mode, "{:.3f}".format( d_run ), "{:.2f}".format( ( d_run - d_baseline ) * 1000 / args_cur.i_commands ),
+                            "{:.3f}".format( d_written ), str( i_lines ) ] ) )
+finally:
+    shutil.rmtree( str_tmp )
@@ -0,0 +1,95 @@
+__author__ = "Timothy Tickle"
+__copyright__ = "Copyright 2016"
+__credits__ = [ "Timothy Tickle", "Brian Haas" ]
+__license__ = "MIT"
+__maintainer__ = "Timothy Tickle"
+__email__ = "ttickle@broadinstitute.org"
+__status__ = "Development"
+
+"""
+Compares the order ready commands start in when running in parallel by
+simulating runs of synthetic pipelines: deep chains of slow commands next to
+many quick independent ( wide ) commands. Reports the time the last command
+ends ( makespan ) starting commands breadth-wise and on the critical path
+first, with the lower bound of all work spread over the slots or the longest
+chain, whichever is longer.
+"""
+
+import argparse
+import Command
+import DependencyTree
+import heapq
+import Scheduler
+import time
+
+
+def func_make_wide_and_deep_tree( i_chains, i_chain_length, i_wide ):
+    """
+    Synthetic DAG with deep chains of commands next to many independent (wide) commands.
+    Returns the tree and historical runtimes, chain commands are slower than wide commands.
+    """
+
+    lcmd_commands = []
+    dict_runtimes = {}
+    for i_chain in range( i_chains ):
+        str_previous = "chain_" + str( i_chain ) + "_0"
+        for i_link in range( 1, i_chain_length + 1 ):
+            str_next = "chain_" + str( i_chain ) + "_" + str( i_link )
+            cmd_link = Command.Command( "link " + str_next, [ str_previous ], [ str_next ] )
+            lcmd_commands.append( cmd_link )
+            dict_runtimes[ cmd_link.str_id ] = 5.0
+            str_previous = str_next
+    for i_index in range( i_wide ):
+        cmd_wide = Command.Command( "wide " + str( i_index ), [ "wide_in_" + str( i_index ) ], [ "wide_out_" + str( i_index ) ] )
+        lcmd_commands.append( cmd_wide )
+        dict_runtimes[ cmd_wide.str_id ] = 1.0
+    return( ( DependencyTree.DependencyTree( lcmd_commands ), dict_runtimes ) )
+
+
+def func_simulate_makespan( lcmd_ordered, dict_keys, dict_runtimes, i_slots ):
+    """
+    Simulates running commands with a number of slots, starting ready commands
+    by smallest key, and returns the time the last command ends.
+    """
+
+    dict_waiting_on = {}
+    for cmd_cur in lcmd_ordered:
+        dict_waiting_on[ cmd_cur.str_id ] = len( set( [ vtx_maker.str_id
+                                                         for rsc_dependency in cmd_cur.func_get_parents()
+                                                         for vtx_maker in rsc_dependency.func_get_parents()
+                                                         if vtx_maker.str_type == Command.STR_TYPE ] ) )
+    li_ready = [ ( dict_keys[ cmd_cur.str_id ], cmd_cur ) for cmd_cur in lcmd_ordered if not dict_waiting_on[ cmd_cur.str_id ] ]
+    heapq.heapify( li_ready )
+    li_running = []
+    d_now = 0.0
+    while li_ready or li_running:
+        while li_ready and len( li_running ) < i_slots:
+            tpl_key, cmd_cur = heapq.heappop( li_ready )
+            heapq.heappush( li_running, ( d_now + dict_runtimes[ cmd_cur.str_id ], tpl_key, cmd_cur ) )
+        d_now, tpl_key, cmd_done = heapq.heappop( li_running )
+        for cmd_child in Scheduler.func_get_downstream_commands( cmd_done ):
+            dict_waiting_on[ cmd_child.str_id ] -= 1
+            if not dict_waiting_on[ cmd_child.str_id ]:
+                heapq.heappush( li_ready, ( dict_keys[ cmd_child.str_id ], cmd_child ) )
+    return( d_now )
+
+
+prsr_arguments = argparse.ArgumentParser( prog = "benchmark_scheduler.py", description = "Simulates the makespan of synthetic pipelines starting commands breadth-wise and on the critical path first.", conflict_handler="resolve", formatter_class = argparse.ArgumentDefaultsHelpFormatter )
+prsr_arguments.add_argument( "-p", "--pipelines", metavar = "Pipelines", dest = "str_pipelines", default = "4:10:100:4,2:25:300:8,8:5:40:2", help = "Comma delimited pipelines simulated, each chains:chain length:wide commands:slots." )
+args_cur = prsr_arguments.parse_args()
+
+print( "\t".join( [ "Chains", "Chain length", "Wide", "Slots", "Breadth", "Critical path", "Lower bound", "Ordering (s)" ] ) )
+for str_pipeline in args_cur.str_pipelines.split( "," ):
+    i_chains, i_chain_length, i_wide, i_slots = [ int( str_value ) for str_value in str_pipeline.split( ":" ) ]
+    dt_tree, dict_runtimes = func_make_wide_and_deep_tree( i_chains, i_chain_length, i_wide )
+    lcmd_ordered = dt_tree.func_get_commands()
+    schd_breadth = Scheduler.LocalScheduler( i_cores = i_slots, str_priority = Scheduler.STR_PRIORITY_BREADTH )
+    schd_critical = Scheduler.LocalScheduler( i_cores = i_slots, dict_runtimes = dict_runtimes )
+    d_breadth = func_simulate_makespan( lcmd_ordered, schd_breadth.func_get_order_keys( lcmd_ordered ), dict_runtimes, i_slots )
+    d_start = time.time()
+    dict_keys = schd_critical.func_get_order_keys( lcmd_ordered )
+    d_ordering = time.time() - d_start
+    d_critical = func_simulate_makespan( lcmd_ordered, dict_keys, dict_runtimes, i_slots )
+    d_bound = max( sum( dict_runtimes.values() ) / i_slots, i_chain_length * 5.0 )
+    print( "\t".join( [ str( i_chains ), str( i_chain_length ), str( i_wide ), str( i_slots ), str( d_breadth ), str( d_critical ),
+                        str( d_bound ), "{:.4f}".format( d_ordering ) ] ) )